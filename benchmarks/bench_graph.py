@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+"""Benchmark LangGraph overhead and end-to-end turns with the fake LLM.
+
+Graph overhead: the same turns run through ``app.stream`` and through a
+plain loop calling the node methods (route, LLM, tool) directly, with an
+instant fake LLM. The difference divided by the graph steps is what LangGraph
+and the checkpointer add per step.
+
+Instrumentation: the tool case runs with metrics and an in-memory span
+recorder off and on, to show what recording them costs per turn.
+
+End to end: a mix of order, price, policy and open questions runs against a
+fake LLM with a simulated time to first token and token rate. Turns run
+sequentially with ``process`` and concurrently with ``aprocess``, with the
+response cache off and on, reporting throughput and tail latency.
+
+Example::
+
+    python benchmarks/bench_graph.py --llm-latency-ms 200 --tokens-per-second 100 --concurrency 1 16 64
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from customer_support_assistant import main as assistant_main
+from customer_support_assistant import metrics
+from customer_support_assistant.fake_llm import FakeChatModel
+from customer_support_assistant.llm_cache import ResponseCache
+from customer_support_assistant.router import Router
+
+QUESTIONS = [
+    "Where is my order ORD12345?",
+    "How much are the Sony WH-1000XM5 headphones?",
+    "What is your return policy?",
+    "Can I pay with PayPal and is shipping free?",
+    "Do you have any tips for choosing headphones?",
+    "What does the warranty cover and how long does delivery take?",
+]
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+    }
+
+
+def run_nodes(assistant: assistant_main.Assistant, question: str) -> int:
+    """Run one turn by calling the graph's nodes directly; returns the steps taken."""
+    state = {"input": question, "chat_history": [], "intermediate_steps": [], "agent_outcome": []}
+    state.update(assistant.route_input(state))
+    steps = 1
+    if assistant_main.after_route(state) == "end":
+        return steps
+    while True:
+        state.update(assistant.call_llm(state))
+        steps += 1
+        if assistant_main.should_continue(state) == "end":
+            return steps
+        state.update(assistant.call_tool(state))
+        steps += 1
+
+
+def bench_overhead(turns: int) -> Dict[str, object]:
+    results: Dict[str, object] = {}
+    cases = {
+        # router -> llm
+        "answer": dict(llm=FakeChatModel(responses=["Happy to help!"]), router=Router(rules=[])),
+        # router -> llm -> tool -> llm
+        "tool": dict(llm=FakeChatModel(), router=Router(rules=[])),
+        # router only
+        "routed": dict(llm=FakeChatModel(), router=Router()),
+    }
+    question = {"answer": "Hello", "tool": "What is your return policy?", "routed": "Where is ORD12345?"}
+    for case, components in cases.items():
+        assistant = assistant_main.Assistant(**components)
+        steps = run_nodes(assistant, question[case])
+        assistant.process(question[case])  # build the graph and warm the tools
+
+        direct, graph = [], []
+        for _ in range(turns):
+            start = time.perf_counter()
+            run_nodes(assistant, question[case])
+            direct.append((time.perf_counter() - start) * 1000)
+            start = time.perf_counter()
+            assistant.process(question[case])
+            graph.append((time.perf_counter() - start) * 1000)
+        direct_ms, graph_ms = float(np.median(direct)), float(np.median(graph))
+        results[case] = {
+            "steps": steps,
+            "direct_p50_ms": direct_ms,
+            "graph_p50_ms": graph_ms,
+            "overhead_per_step_ms": (graph_ms - direct_ms) / steps,
+        }
+    return results
+
+
+def bench_instrumentation(turns: int) -> Dict[str, object]:
+    assistant = assistant_main.Assistant(llm=FakeChatModel(), router=Router(rules=[]))
+    question = "What is your return policy?"
+    assistant.process(question)
+    results: Dict[str, object] = {}
+    for enabled in (False, True):
+        metrics.enable_metrics(enabled)
+        metrics.set_tracer(metrics.SpanRecorder() if enabled else None)
+        try:
+            timings = []
+            for _ in range(turns):
+                start = time.perf_counter()
+                assistant.process(question)
+                timings.append((time.perf_counter() - start) * 1000)
+        finally:
+            metrics.enable_metrics(False)
+            metrics.set_tracer(None)
+        results["on_p50_ms" if enabled else "off_p50_ms"] = float(np.median(timings))
+    metrics.REGISTRY.clear()
+    return results
+
+
+def fake_llm(args: argparse.Namespace) -> FakeChatModel:
+    return FakeChatModel(latency=args.llm_latency_ms / 1000, tokens_per_second=args.tokens_per_second)
+
+
+def questions(turns: int) -> List[str]:
+    return [QUESTIONS[i % len(QUESTIONS)] for i in range(turns)]
+
+
+def bench_sequential(args: argparse.Namespace, cache: bool) -> Dict[str, object]:
+    assistant = assistant_main.Assistant(llm=fake_llm(args), response_cache=ResponseCache() if cache else None)
+    assistant.app  # build the graph outside the timed loop
+    timings = []
+    start = time.perf_counter()
+    for question in questions(args.turns):
+        turn_start = time.perf_counter()
+        assistant.process(question)
+        timings.append((time.perf_counter() - turn_start) * 1000)
+    elapsed = time.perf_counter() - start
+    return {"turns": args.turns, "turns_per_s": args.turns / elapsed, **summarize(timings)}
+
+
+def bench_concurrent(args: argparse.Namespace, concurrency: int, cache: bool) -> Dict[str, object]:
+    assistant = assistant_main.Assistant(llm=fake_llm(args), response_cache=ResponseCache() if cache else None)
+    assistant.app  # build the graph outside the timed loop
+
+    async def run_all():
+        semaphore = asyncio.Semaphore(concurrency)
+        timings: List[float] = []
+
+        async def turn(question):
+            async with semaphore:
+                turn_start = time.perf_counter()
+                await assistant.aprocess(question)
+                timings.append((time.perf_counter() - turn_start) * 1000)
+
+        await asyncio.gather(*(turn(q) for q in questions(args.turns)))
+        return timings
+
+    start = time.perf_counter()
+    timings = asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
+    return {"concurrency": concurrency, "turns": args.turns, "turns_per_s": args.turns / elapsed, **summarize(timings)}
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    results: Dict[str, object] = {
+        "llm_latency_ms": args.llm_latency_ms,
+        "tokens_per_second": args.tokens_per_second,
+        "overhead": bench_overhead(args.overhead_turns),
+        "instrumentation": bench_instrumentation(args.overhead_turns),
+    }
+    for cache in (False, True):
+        key = "cached" if cache else "uncached"
+        results[key] = {
+            "sequential": bench_sequential(args, cache),
+            "concurrent": [bench_concurrent(args, c, cache) for c in args.concurrency],
+        }
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--llm-latency-ms", type=float, default=100, help="fake LLM time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200, help="fake LLM generation speed")
+    parser.add_argument("--turns", type=int, default=60, help="end-to-end turns per measurement")
+    parser.add_argument("--overhead-turns", type=int, default=200, help="turns per graph overhead case")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32],
+                        help="conversations in flight for the async runs")
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    results = run(args)
+    for case, row in results["overhead"].items():
+        print(f"{case:<7} {row['steps']} steps  direct {row['direct_p50_ms']:6.2f} ms"
+              f"  graph {row['graph_p50_ms']:6.2f} ms  overhead {row['overhead_per_step_ms']:5.2f} ms/step")
+    instrumentation = results["instrumentation"]
+    print(f"metrics off {instrumentation['off_p50_ms']:6.2f} ms  on {instrumentation['on_p50_ms']:6.2f} ms per turn")
+    for key in ("uncached", "cached"):
+        sequential = results[key]["sequential"]
+        print(f"{key:<9} sequential   {sequential['turns_per_s']:7.1f} turns/s"
+              f"  p50 {sequential['p50_ms']:7.1f} ms  p99 {sequential['p99_ms']:7.1f} ms")
+        for row in results[key]["concurrent"]:
+            print(f"{key:<9} async x{row['concurrency']:<5} {row['turns_per_s']:7.1f} turns/s"
+                  f"  p50 {row['p50_ms']:7.1f} ms  p99 {row['p99_ms']:7.1f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
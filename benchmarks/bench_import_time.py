@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+"""Benchmark the import time of the assistant's modules.
+
+Each module is imported in a fresh interpreter with ``python -X importtime``.
+The benchmark reports the median cumulative import time over the runs and the
+slowest imports it pulled in. ``--first-turn`` also times building the
+compiled graph, which is the work the import no longer does up front.
+
+Example::
+
+    python benchmarks/bench_import_time.py --runs 5 --top 10
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+DEFAULT_MODULES = [
+    "customer_support_assistant.tools.catalog",
+    "customer_support_assistant.tools.knowledge_base",
+    "customer_support_assistant.main",
+]
+# Builds the graph without calling Gemini, so no API key is needed
+FIRST_TURN = (
+    "import time; start = time.perf_counter()\n"
+    "from customer_support_assistant import main\n"
+    "main.Assistant(llm=object()).app\n"
+    "print(time.perf_counter() - start)"
+)
+
+
+def _run(code: str, importtime: bool = False) -> subprocess.CompletedProcess:
+    env = dict(os.environ, PYTHONPATH=str(SRC))
+    flags = ["-X", "importtime"] if importtime else []
+    # Run from src so a checkout's top-level package copy is not imported instead
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code], capture_output=True, text=True, env=env, cwd=SRC, check=True
+    )
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """Map each imported module to its (self, cumulative) time in microseconds."""
+    times = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if not fields[0].strip().isdigit():
+            continue  # the header line
+        times[fields[2].strip()] = (int(fields[0]), int(fields[1]))
+    return times
+
+
+def import_time(module: str, runs: int, top: int) -> Dict[str, object]:
+    cumulative: List[int] = []
+    times: Dict[str, Tuple[int, int]] = {}
+    for _ in range(runs):
+        times = parse_importtime(_run(f"import {module}", importtime=True).stderr)
+        cumulative.append(times[module][1])
+    slowest = sorted(times.items(), key=lambda item: item[1][0], reverse=True)[:top]
+    return {
+        "module": module,
+        "median_ms": statistics.median(cumulative) / 1000,
+        "modules_loaded": len(times),
+        "slowest": [{"module": name, "self_ms": t[0] / 1000} for name, t in slowest],
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    results: Dict[str, object] = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "imports": [import_time(module, args.runs, args.top) for module in args.modules],
+    }
+    if args.first_turn:
+        timings = [float(_run(FIRST_TURN).stdout) for _ in range(args.runs)]
+        results["first_turn_build_ms"] = statistics.median(timings) * 1000
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=DEFAULT_MODULES, help="modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=5, help="slowest imports to list")
+    parser.add_argument("--first-turn", action="store_true",
+                        help="also time importing main and building the compiled graph")
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+
+    results = run(args)
+    for row in results["imports"]:
+        print(f"{row['module']:<50} {row['median_ms']:8.1f} ms  ({row['modules_loaded']} modules)")
+        for slow in row["slowest"]:
+            print(f"    {slow['module']:<46} {slow['self_ms']:8.1f} ms")
+    if args.first_turn:
+        print(f"{'import main + build graph':<50} {results['first_turn_build_ms']:8.1f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
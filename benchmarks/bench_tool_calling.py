@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Compare the JSON-prompt and native tool-calling modes.
+
+Offline, the benchmark reports the fixed request overhead of each mode: the
+system prompt plus, in native mode, the tool schemas sent with every
+request. With ``--live`` it also sends the given questions to Gemini in each
+mode (``GEMINI_API_KEY`` required). It then reports the input tokens Gemini
+counted, the latency, and how many first replies neither called a tool nor
+answered cleanly.
+
+Example::
+
+    python benchmarks/bench_tool_calling.py
+    python benchmarks/bench_tool_calling.py --live "Where is ORD12345?" "What is your return policy?"
+"""
+
+import argparse
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from customer_support_assistant import main as assistant_main
+
+# Rough characters per token for English text and JSON
+CHARS_PER_TOKEN = 4
+
+
+def request_overhead(mode: str) -> Dict[str, int]:
+    """Characters and estimated tokens every request carries in ``mode``."""
+    assistant = assistant_main.Assistant(llm=object(), tool_calling=mode)
+    prompt = len(assistant.system_prompt)
+    schemas = 0
+    if mode == "native":
+        schemas = len(json.dumps([convert_to_openai_tool(tool) for tool in assistant.tools]))
+    return {
+        "system_prompt_chars": prompt,
+        "tool_schema_chars": schemas,
+        "estimated_tokens": (prompt + schemas) // CHARS_PER_TOKEN,
+    }
+
+
+def live_run(mode: str, questions: List[str]) -> Dict[str, object]:
+    """Send each question once and measure the first LLM reply."""
+    assistant = assistant_main.Assistant(tool_calling=mode)
+    latencies, input_tokens, unparsed = [], [], 0
+    for question in questions:
+        messages = [SystemMessage(content=assistant.system_prompt), HumanMessage(content=question)]
+        start = time.perf_counter()
+        reply = assistant.model.invoke(messages)
+        latencies.append((time.perf_counter() - start) * 1000)
+        usage = getattr(reply, "usage_metadata", None) or {}
+        input_tokens.append(usage.get("input_tokens", 0))
+        outcome = assistant_main._handle_llm_response(reply)["agent_outcome"][-1]
+        # A direct answer that still looks like JSON is a failed tool call
+        if "tool_calls" not in outcome.additional_kwargs and outcome.content.lstrip().startswith(("{", "`")):
+            unparsed += 1
+    return {
+        "questions": len(questions),
+        "median_latency_ms": statistics.median(latencies),
+        "mean_input_tokens": statistics.mean(input_tokens),
+        "unparsed_replies": unparsed,
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    results: Dict[str, object] = {}
+    for mode in assistant_main.TOOL_CALLING_MODES:
+        results[mode] = {"overhead": request_overhead(mode)}
+        if args.live:
+            results[mode]["live"] = live_run(mode, args.live)
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--live", nargs="+", metavar="QUESTION", help="questions to send to Gemini")
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+
+    results = run(args)
+    for mode, row in results.items():
+        overhead = row["overhead"]
+        print(f"{mode:<7} prompt {overhead['system_prompt_chars']:5d} chars"
+              f"  schemas {overhead['tool_schema_chars']:5d} chars"
+              f"  ~{overhead['estimated_tokens']} tokens/request")
+        if "live" in row:
+            live = row["live"]
+            print(f"        p50 {live['median_latency_ms']:.0f} ms"
+                  f"  input tokens {live['mean_input_tokens']:.0f}"
+                  f"  unparsed {live['unparsed_replies']}/{live['questions']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python
+"""Benchmark the tools and the tool-call dispatch of the graph.
+
+``product_catalog_search`` runs against synthetic catalogs of growing size
+with exact, substring (a name inside a question), fuzzy (a misspelt name)
+and missing product queries. ``knowledge_base_query`` runs against synthetic
+policy corpora of growing size. ``call_tool`` dispatch overhead is measured
+against calling a no-op tool function directly, for one and several tool
+calls per LLM turn, sync and async. Order lookups run from many threads
+against a SQLite order table, each sent on its own and coalesced into
+batched queries; ``--order-query-ms`` adds a network round trip per query,
+as for a remote order database.
+
+Synthetic product names share most of their characters, so many pass the
+catalog index's character count filter and fuzzy queries hit its slow end.
+Each measurement stops after a few seconds, so very slow cases report fewer
+timings than ``--repeat``.
+
+Example::
+
+    python benchmarks/bench_tools.py --catalog-sizes 10 10000 1000000 --corpus-sizes 100 1000
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import numpy as np
+from langchain_core.messages import AIMessage
+from langchain_core.tools import StructuredTool
+
+from customer_support_assistant import main as assistant_main
+from customer_support_assistant.tools import catalog, knowledge_base
+from customer_support_assistant.tools.catalog_index import CatalogIndex
+from customer_support_assistant.tools.catalog_store import CatalogStore
+from customer_support_assistant.tools.order_store import Order, OrderBackend, OrderLoader, SqliteOrderBackend
+from customer_support_assistant.tools.vector_store import VectorStore
+
+BRANDS = ["Sony", "Bose", "Apple", "Samsung", "Dell", "Lenovo", "Anker", "Logitech", "Canon", "Garmin"]
+PRODUCTS = ["headphones", "earbuds", "laptop", "monitor", "speaker", "camera", "watch", "keyboard", "mouse", "charger"]
+TOPICS = ["return", "refund", "warranty", "shipping", "delivery", "payment", "exchange", "repair", "order", "account"]
+FILLER = ("customers items days purchase receipt original condition packaging store online support "
+          "standard express international fee free policy eligible request contact business").split()
+
+# Every measurement stops after this many seconds, once it has MIN_CALLS timings,
+# bounding the slow fuzzy queries on the largest catalogs
+BUDGET_SECONDS = 5.0
+MIN_CALLS = 3
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    return {
+        "p50_us": float(np.percentile(timings, 50)),
+        "p99_us": float(np.percentile(timings, 99)),
+        "mean_us": float(np.mean(timings)),
+    }
+
+
+def latencies_us(call: Callable[[], object], repeat: int) -> List[float]:
+    timings = []
+    deadline = time.perf_counter() + BUDGET_SECONDS
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1e6)
+        if len(timings) >= MIN_CALLS and start > deadline:
+            break
+    return timings
+
+
+@contextmanager
+def swapped(module, name: str, value):
+    """Temporarily replace ``module.name``, e.g. the cached catalog index getter."""
+    original = getattr(module, name)
+    setattr(module, name, value)
+    try:
+        yield
+    finally:
+        setattr(module, name, original)
+
+
+def synthetic_catalog(size: int) -> CatalogStore:
+    return CatalogStore.from_records(
+        {
+            "name": f"{BRANDS[i % len(BRANDS)]} {PRODUCTS[i // len(BRANDS) % len(PRODUCTS)]} X{i}",
+            "price": 10 + i % 990,
+            "description": "",
+        }
+        for i in range(size)
+    )
+
+
+def bench_catalog(size: int, repeat: int, rng: random.Random) -> Dict[str, object]:
+    """Search the index a worker maps from a snapshot; build_s covers writing the snapshot."""
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        store = synthetic_catalog(size)
+        store.write_snapshot(Path(tmp) / "catalog.bin")
+        build_s = time.perf_counter() - start
+        start = time.perf_counter()
+        mapped = CatalogStore.open_snapshot(Path(tmp) / "catalog.bin")
+        index = CatalogIndex.from_arrays(mapped.index_arrays(), mapped.price_text)
+        attach_ms = (time.perf_counter() - start) * 1000
+
+    names = [store.name(rng.randrange(size)) for _ in range(repeat)]
+    queries = {
+        "exact": names,
+        "substring": [f"how much is the {name} today" for name in names],
+        "fuzzy": [name[:-1] + "q" if len(name) > 8 else name for name in names],
+        "miss": [f"unicorn blender {i}" for i in range(repeat)],
+    }
+    results: Dict[str, object] = {"size": size, "build_s": build_s, "attach_ms": attach_ms}
+    with swapped(catalog, "get_catalog_index", lambda: index):
+        for kind, batch in queries.items():
+            it = iter(batch)
+            timings = latencies_us(lambda: catalog.product_catalog_search(next(it)), len(batch))
+            results[kind] = {**summarize(timings), "calls": len(timings)}
+    return results
+
+
+def synthetic_corpus(size: int, rng: random.Random) -> Dict[str, str]:
+    documents = {}
+    for i in range(size):
+        topic = TOPICS[i % len(TOPICS)]
+        words = " ".join(rng.choice(FILLER) for _ in range(80))
+        documents[f"policy-{i}.md"] = f"{topic.title()} policy {i}\n{topic} {words}"
+    return documents
+
+
+def bench_knowledge_base(size: int, repeat: int, rng: random.Random) -> Dict[str, object]:
+    start = time.perf_counter()
+    store = VectorStore()
+    store.sync(synthetic_corpus(size, rng))
+    build_s = time.perf_counter() - start
+
+    questions = [f"What is your {rng.choice(TOPICS)} policy for {rng.choice(FILLER)}?" for _ in range(repeat)]
+    it = iter(questions)
+    with swapped(knowledge_base, "get_knowledge_base", lambda: store):
+        timings = latencies_us(lambda: knowledge_base.knowledge_base_query(next(it)), repeat)
+    return {"documents": size, "chunks": len(store), "build_s": build_s, "query": summarize(timings)}
+
+
+def noop(value: int) -> str:
+    """Return the value as text."""
+    return str(value)
+
+
+def tool_state(calls: int) -> dict:
+    tool_calls = [{"name": "noop", "args": {"value": i}} for i in range(calls)]
+    return {
+        "input": "benchmark",
+        "chat_history": [],
+        "agent_outcome": [AIMessage(content="", additional_kwargs={"tool_calls": tool_calls})],
+        "intermediate_steps": [],
+    }
+
+
+def bench_dispatch(repeat: int) -> Dict[str, object]:
+    tool = StructuredTool.from_function(noop, name="noop", description="No-op tool")
+    assistant = assistant_main.Assistant(llm=object(), tools=[tool], tool_calling="json")
+    results: Dict[str, object] = {
+        "function": summarize(latencies_us(lambda: noop(1), repeat)),
+        "tool_invoke": summarize(latencies_us(lambda: tool.invoke({"value": 1}), repeat)),
+    }
+    for calls in (1, 4):
+        state = tool_state(calls)
+        results[f"call_tool_{calls}"] = summarize(latencies_us(lambda: assistant.call_tool(state), repeat))
+
+        async def run_async(state=state):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                await assistant.acall_tool(state)
+                timings.append((time.perf_counter() - start) * 1e6)
+            return timings
+
+        results[f"acall_tool_{calls}"] = summarize(asyncio.run(run_async()))
+    results["dispatch_overhead_us"] = results["call_tool_1"]["p50_us"] - results["function"]["p50_us"]
+    return results
+
+
+class RemoteBackend(OrderBackend):
+    """Adds a round trip to every query of a backend with a few connections."""
+
+    def __init__(self, backend: OrderBackend, round_trip_s: float, connections: int = 4):
+        self.backend = backend
+        self.round_trip_s = round_trip_s
+        self._connections = threading.BoundedSemaphore(connections)
+
+    def lookup_many(self, order_ids):
+        with self._connections:
+            time.sleep(self.round_trip_s)
+            return self.backend.lookup_many(order_ids)
+
+    def close(self) -> None:
+        self.backend.close()
+
+
+def bench_orders(lookups: int, threads: int, query_ms: float, rng: random.Random) -> List[Dict[str, object]]:
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "orders.sqlite"
+        seeded = SqliteOrderBackend.open(path)
+        seeded.upsert(Order(f"ORD{i}", "in transit") for i in range(100_000))
+        backend = RemoteBackend(seeded, query_ms / 1000)
+        order_ids = [f"ORD{rng.randrange(120_000)}" for _ in range(lookups)]
+        # A batch window of 0 still coalesces lookups queued behind a running query
+        for mode, window in (("single", None), ("batched_0ms", 0.0), ("batched_2ms", 0.002)):
+            loader = OrderLoader(RemoteBackend(SqliteOrderBackend.open(path), query_ms / 1000), batch_window=window or 0.0)
+            lookup = (lambda i: backend.lookup_many([i])) if window is None else (lambda i: loader.load(i, timeout=10))
+            timings: List[float] = []
+
+            def timed(order_id):
+                start = time.perf_counter()
+                lookup(order_id)
+                timings.append((time.perf_counter() - start) * 1e6)
+
+            start = time.perf_counter()
+            with ThreadPoolExecutor(threads) as pool:
+                list(pool.map(timed, order_ids))
+            elapsed = time.perf_counter() - start
+            batches = len(order_ids) if window is None else loader.stats().batches
+            results.append({"mode": mode, "lookups_per_s": lookups / elapsed, "batches": batches, **summarize(timings)})
+            loader.close()
+        backend.close()
+    return results
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    rng = random.Random(args.seed)
+    return {
+        "catalog": [bench_catalog(size, args.repeat, rng) for size in args.catalog_sizes],
+        "knowledge_base": [bench_knowledge_base(size, args.repeat, rng) for size in args.corpus_sizes],
+        "dispatch": bench_dispatch(args.repeat),
+        "orders": bench_orders(args.order_lookups, args.order_threads, args.order_query_ms, rng),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--catalog-sizes", type=int, nargs="+", default=[10, 10_000, 1_000_000],
+                        help="products in each synthetic catalog")
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[10, 100, 1000],
+                        help="documents in each synthetic knowledge base")
+    parser.add_argument("--repeat", type=int, default=200, help="timed calls per measurement")
+    parser.add_argument("--order-lookups", type=int, default=20_000, help="order lookups per mode")
+    parser.add_argument("--order-threads", type=int, default=32, help="threads looking up orders")
+    parser.add_argument("--order-query-ms", type=float, default=1.0, help="simulated round trip per order query")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    results = run(args)
+    for row in results["catalog"]:
+        print(f"catalog {row['size']:>9} products  build {row['build_s']:6.2f} s  "
+              f"attach {row['attach_ms']:6.2f} ms  " + "  ".join(
+            f"{kind} p50 {row[kind]['p50_us']:8.1f} us" for kind in ("exact", "substring", "fuzzy", "miss")))
+    for row in results["knowledge_base"]:
+        print(f"kb      {row['documents']:>9} docs      build {row['build_s']:6.2f} s  "
+              f"query p50 {row['query']['p50_us']:8.1f} us  p99 {row['query']['p99_us']:8.1f} us")
+    dispatch = results["dispatch"]
+    for name in ("function", "tool_invoke", "call_tool_1", "call_tool_4", "acall_tool_1", "acall_tool_4"):
+        print(f"{name:<12} p50 {dispatch[name]['p50_us']:8.1f} us  p99 {dispatch[name]['p99_us']:8.1f} us")
+    for row in results["orders"]:
+        print(f"orders {row['mode']:<12} {row['lookups_per_s']:9.0f} lookups/s  {row['batches']:6d} queries"
+              f"  p50 {row['p50_us']:8.1f} us  p99 {row['p99_us']:8.1f} us")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
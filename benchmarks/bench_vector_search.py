@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""Benchmark exact vs. IVF knowledge base search.
+
+Reports recall@k against exact search and p50/p99 single-query latency for
+each ``n_probe`` setting, plus batched exact-search throughput.
+
+Example::
+
+    python benchmarks/bench_vector_search.py --size 200000 --dim 256 --n-probe 1 4 16
+"""
+
+import argparse
+import json
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from customer_support_assistant.tools.vector_search import ExactIndex, IVFIndex
+
+
+def clustered_vectors(n: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    """Generate normalized vectors around random topic centres, like chunk embeddings."""
+    centres = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def latencies_ms(search, queries: np.ndarray) -> List[float]:
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p99_ms": float(np.percentile(timings, 99)),
+    }
+
+
+def recall_at_k(found: np.ndarray, expected: np.ndarray) -> float:
+    k = expected.shape[1]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(found, expected)]))
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    rng = np.random.default_rng(args.seed)
+    vectors = clustered_vectors(args.size, args.dim, args.clusters, rng)
+    queries = clustered_vectors(args.queries, args.dim, args.clusters, rng)
+
+    exact = ExactIndex(vectors)
+    _, expected = exact.search(queries, args.k)
+    results: Dict[str, object] = {
+        "size": args.size,
+        "dim": args.dim,
+        "k": args.k,
+        "exact": summarize(latencies_ms(lambda q: exact.search(q, args.k), queries)),
+    }
+
+    start = time.perf_counter()
+    exact.search(queries, args.k)
+    results["exact"]["batch_qps"] = len(queries) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    ivf = IVFIndex(vectors, n_lists=args.n_lists)
+    results["ivf_build_s"] = time.perf_counter() - start
+    results["ivf"] = []
+    for n_probe in args.n_probe:
+        _, found = ivf.search(queries, args.k, n_probe=n_probe)
+        row = {"n_probe": n_probe, "recall_at_k": recall_at_k(found, expected)}
+        row.update(summarize(latencies_ms(lambda q: ivf.search(q, args.k, n_probe=n_probe), queries)))
+        results["ivf"].append(row)
+    return results
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=100_000, help="number of indexed chunks")
+    parser.add_argument("--dim", type=int, default=256, help="embedding dimension")
+    parser.add_argument("--clusters", type=int, default=200, help="synthetic topic count")
+    parser.add_argument("--queries", type=int, default=200, help="number of queries")
+    parser.add_argument("--k", type=int, default=10, help="neighbours per query")
+    parser.add_argument("--n-lists", type=int, default=None, help="IVF lists (default sqrt(size))")
+    parser.add_argument("--n-probe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the results to this file")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+
+    results = run(args)
+    exact = results["exact"]
+    print(f"{args.size} vectors x {args.dim} dims, k={args.k}")
+    print(f"exact   recall 1.000  p50 {exact['p50_ms']:.3f} ms  p99 {exact['p99_ms']:.3f} ms"
+          f"  batched {exact['batch_qps']:.0f} q/s")
+    print(f"ivf build {results['ivf_build_s']:.2f} s")
+    for row in results["ivf"]:
+        print(f"ivf n_probe={row['n_probe']:<4} recall {row['recall_at_k']:.3f}"
+              f"  p50 {row['p50_ms']:.3f} ms  p99 {row['p99_ms']:.3f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
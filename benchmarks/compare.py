@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Compare two benchmark suite results and flag regressions.
+
+Every timing (keys ending in ``_ms``, ``_us`` or ``_s``) and throughput
+(``per_s``, ``qps``) or recall metric found in both files is listed with
+its relative change. A timing that grows, or a throughput or recall that
+drops, by more than ``--threshold`` counts as a regression; the exit status
+is 1 if there is any.
+
+Example::
+
+    python benchmarks/compare.py benchmarks/results/abc1234-quick.json benchmarks/results/def5678-quick.json
+"""
+
+import argparse
+import json
+import sys
+from typing import Dict, Iterator, Optional, Tuple
+
+# Fields identifying the rows of a list of results, e.g. catalog sizes
+ROW_KEYS = ("size", "documents", "concurrency", "n_probe", "module", "mode")
+HIGHER_IS_BETTER = ("per_s", "qps")
+LOWER_IS_BETTER = ("_ms", "_us", "_s")
+# Setup and bookkeeping durations are not compared
+IGNORED = ("duration_s",)
+
+
+def flatten(value, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    """Yield ``(path, number)`` for every numeric leaf of a results tree."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from flatten(item, f"{prefix}.{key}" if prefix else str(key))
+    elif isinstance(value, list):
+        for i, item in enumerate(value):
+            label = next((f"{k}={item[k]}" for k in ROW_KEYS if isinstance(item, dict) and k in item), str(i))
+            yield from flatten(item, f"{prefix}[{label}]")
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield prefix, float(value)
+
+
+def direction(path: str) -> Optional[int]:
+    """+1 if higher is better for the metric at ``path``, -1 if lower is, None if not a metric."""
+    key = path.rsplit(".", 1)[-1]
+    if key in IGNORED:
+        return None
+    if key.endswith(HIGHER_IS_BETTER) or key.startswith("recall"):
+        return 1
+    if key.endswith(LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def compare(base: dict, head: dict, threshold: float) -> Dict[str, dict]:
+    """Return the relative change of every metric present in both results."""
+    base_metrics = dict(flatten(base.get("benchmarks", base)))
+    changes = {}
+    for path, new in flatten(head.get("benchmarks", head)):
+        sign = direction(path)
+        old = base_metrics.get(path)
+        if sign is None or old is None or old == 0:
+            continue
+        change = (new - old) / abs(old)
+        changes[path] = {"base": old, "head": new, "change": change, "regression": sign * change < -threshold}
+    return changes
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("base", help="results of the baseline commit")
+    parser.add_argument("head", help="results to check")
+    parser.add_argument("--threshold", type=float, default=0.10, help="relative change counted as a regression")
+    parser.add_argument("--all", action="store_true", help="list unchanged metrics too")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    changes = compare(base, head, args.threshold)
+    print(f"{base.get('commit')} -> {head.get('commit')}, threshold {args.threshold:.0%}")
+    regressions = 0
+    for path, row in changes.items():
+        regressions += row["regression"]
+        if row["regression"] or args.all or abs(row["change"]) > args.threshold:
+            flag = "REGRESSION" if row["regression"] else ""
+            print(f"{path:<70} {row['base']:12.3f} -> {row['head']:12.3f}  {row['change']:+7.1%}  {flag}")
+    print(f"{regressions} regressions in {len(changes)} metrics")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
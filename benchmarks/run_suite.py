@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+"""Run the benchmark suite and save the results as JSON.
+
+Every benchmark script in this directory runs in-process with the arguments
+of the chosen profile: ``quick`` takes seconds and suits CI, ``full``
+uses each benchmark's defaults. The results are written to
+``benchmarks/results/<commit>-<profile>.json`` together with the commit, Python
+version and machine, so runs of two commits can be compared with
+``compare.py``.
+
+Example::
+
+    python benchmarks/run_suite.py --profile quick
+    python benchmarks/run_suite.py --only tools graph --out before.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+RESULTS_DIR = BENCHMARKS_DIR / "results"
+
+# Arguments per profile for each benchmark module (bench_<name>.py)
+PROFILES: Dict[str, Dict[str, List[str]]] = {
+    "quick": {
+        "tools": ["--catalog-sizes", "10", "10000", "--corpus-sizes", "10", "100", "--repeat", "50",
+                  "--order-lookups", "2000"],
+        "graph": ["--turns", "24", "--overhead-turns", "50", "--concurrency", "1", "8",
+                  "--llm-latency-ms", "20", "--tokens-per-second", "0"],
+        "vector_search": ["--size", "20000", "--queries", "50", "--n-probe", "4", "16"],
+        "import_time": ["--runs", "3"],
+        "tool_calling": [],
+    },
+    "full": {
+        "tools": [],
+        "graph": [],
+        "vector_search": [],
+        "import_time": ["--first-turn"],
+        "tool_calling": [],
+    },
+}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=BENCHMARKS_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(name: str, argv: List[str]) -> Dict[str, object]:
+    """Run ``bench_<name>.run`` with ``argv`` and return its results and duration."""
+    module = importlib.import_module(f"bench_{name}")
+    args = module.build_parser().parse_args(argv)
+    start = time.perf_counter()
+    results = module.run(args)
+    return {"args": argv, "duration_s": time.perf_counter() - start, "results": results}
+
+
+def run(args: argparse.Namespace) -> Dict[str, object]:
+    profile = PROFILES[args.profile]
+    names = args.only or list(profile)
+    unknown = [name for name in names if name not in profile]
+    if unknown:
+        raise ValueError(f"Unknown benchmarks: {', '.join(unknown)}")
+    suite: Dict[str, object] = {
+        "commit": git_commit(),
+        "profile": args.profile,
+        "python": sys.version.split()[0],
+        "machine": f"{platform.system()} {platform.machine()}, {os.cpu_count()} CPUs",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "benchmarks": {},
+    }
+    for name in names:
+        print(f"running {name} ...", file=sys.stderr, flush=True)
+        suite["benchmarks"][name] = run_benchmark(name, profile[name])
+    return suite
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="quick")
+    parser.add_argument("--only", nargs="+", metavar="NAME", help="benchmarks to run, e.g. tools graph")
+    parser.add_argument("--out", help="results file (default benchmarks/results/<commit>.json)")
+    return parser
+
+
+def main() -> None:
+    args = build_parser().parse_args()
+    sys.path.insert(0, str(BENCHMARKS_DIR))
+    suite = run(args)
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{suite['commit'] or 'unknown'}-{args.profile}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(suite, f, indent=2)
+    for name, entry in suite["benchmarks"].items():
+        print(f"{name:<14} {entry['duration_s']:7.1f} s")
+    print(f"results written to {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,29 @@
 #!/usr/bin/env python
-"""CLI interface for the Customer Support Assistant."""
+"""CLI interface for the Customer Support Assistant.
+
+With ``--batch QUESTIONS.jsonl`` the questions in the file are evaluated
+concurrently instead (see ``customer_support_assistant.evaluation``); the
+remaining arguments are passed on, e.g. ``--out``, ``--concurrency`` and
+``--fake-llm``. With ``--serve`` the assistant is served over HTTP instead
+(see ``customer_support_assistant.server``), e.g. ``--serve --workers 4``.
+"""
 
 from customer_support_assistant.main import process_user_input
 
 import sys
-import time # Import time module
 
 def main():
     """Run the customer support assistant in interactive mode."""
+    if len(sys.argv) > 2 and sys.argv[1] == "--batch":
+        from customer_support_assistant.evaluation import main as evaluate
+
+        sys.exit(evaluate(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == "--serve":
+        from customer_support_assistant.server import main as serve
+
+        serve(sys.argv[2:])
+        return
+
     print("Customer Support Assistant initialized!")
     print("Type 'quit' or 'exit' to end the conversation.\n")
     
@@ -32,7 +48,6 @@ def main():
             # Flush output to ensure all messages are displayed
             sys.stdout.flush()
             sys.stderr.flush() # Explicitly flush stderr
-            time.sleep(0.1) # Add a small delay
     except EOFError:
         pass # Handle EOF when input is piped
     finally:
@@ -5,11 +5,14 @@
     name="customer-support-assistant",
     version="0.1.0",
     packages=find_packages(where="src"),
-    package_dir={"": "src"},    install_requires=[
+    package_dir={"": "src"},
+    package_data={"customer_support_assistant": ["data/*", "data/policies/*"]},
+    install_requires=[
         "langchain>=0.1.0",
         "langchain-google-genai>=0.0.5",
         "google-generativeai>=0.3.0",
         "python-dotenv>=1.0.0",
+        "numpy>=1.22",
     ],
     extras_require={
         "dev": [
@@ -26,6 +29,15 @@
             "sphinx-rtd-theme>=2.0.0",
             "myst-parser>=2.0.0",
         ],
+        "sqlite": [
+            "langgraph-checkpoint-sqlite>=2.0.0",
+        ],
+        "otel": [
+            "opentelemetry-api>=1.20.0",
+        ],
+        "server": [
+            "uvicorn>=0.30.0",
+        ],
     },
     python_requires=">=3.9",
     author="Your Name",
@@ -0,0 +1,282 @@
+"""Checkpoint storage for the conversation graph.
+
+The graph keeps one checkpoint history per conversation (``thread_id``).
+:class:`BoundedMemorySaver` holds these histories in memory but bounds them:
+each thread keeps only its newest checkpoints, idle threads expire after a
+TTL, and the least recently used threads are evicted once a thread limit is
+reached. For sessions that must outlive the process,
+:func:`create_checkpointer` can return a SQLite-backed saver instead (see
+:mod:`customer_support_assistant.checkpoints_sqlite`).
+
+Configuration is read from the environment by :func:`create_checkpointer`:
+
+* ``CHECKPOINT_BACKEND``: ``memory`` (default) or ``sqlite``
+* ``CHECKPOINT_SQLITE_PATH``: database file for the SQLite backend
+* ``CHECKPOINT_MAX_THREADS`` / ``CHECKPOINT_TTL_SECONDS``: in-memory thread limits
+* ``CHECKPOINT_MAX_PER_THREAD``: checkpoints kept per thread (both backends)
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Dict, Iterator, Mapping, Optional, Sequence, Set, Tuple
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+
+DEFAULT_MAX_THREADS = 10000
+DEFAULT_TTL_SECONDS = 3600.0
+DEFAULT_MAX_CHECKPOINTS_PER_THREAD = 20
+
+
+class _ThreadSaver(InMemorySaver):
+    """In-memory saver for a single thread that drops its oldest checkpoints."""
+
+    def __init__(self, max_checkpoints: int, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.max_checkpoints = max_checkpoints
+        self.last_used = time.monotonic()
+        # Channel versions per (checkpoint_ns, checkpoint_id), to tell which
+        # blobs the kept checkpoints still reference
+        self._versions: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        thread_id = saved["configurable"]["thread_id"]
+        checkpoint_ns = saved["configurable"]["checkpoint_ns"]
+        self._versions[(checkpoint_ns, checkpoint["id"])] = dict(checkpoint["channel_versions"])
+        self._trim(thread_id, checkpoint_ns)
+        return saved
+
+    def _trim(self, thread_id: str, checkpoint_ns: str) -> None:
+        checkpoints = self.storage[thread_id][checkpoint_ns]
+        if len(checkpoints) <= self.max_checkpoints:
+            return
+        # Checkpoint IDs sort chronologically
+        for checkpoint_id in sorted(checkpoints)[:-self.max_checkpoints]:
+            del checkpoints[checkpoint_id]
+            self.writes.pop((thread_id, checkpoint_ns, checkpoint_id), None)
+            self._versions.pop((checkpoint_ns, checkpoint_id), None)
+
+        referenced: Set[Tuple[str, Any]] = set()
+        for (ns, _), versions in self._versions.items():
+            if ns == checkpoint_ns:
+                referenced.update(versions.items())
+        for key in [k for k in self.blobs if k[1] == checkpoint_ns]:
+            if (key[2], key[3]) not in referenced:
+                del self.blobs[key]
+
+
+class BoundedMemorySaver(BaseCheckpointSaver):
+    """In-memory checkpointer with LRU/TTL eviction of conversation threads.
+
+    Each thread is stored separately, so evicting one is O(1) and never scans
+    other conversations.
+    """
+
+    def __init__(
+        self,
+        max_threads: int = DEFAULT_MAX_THREADS,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        max_checkpoints_per_thread: int = DEFAULT_MAX_CHECKPOINTS_PER_THREAD,
+        **kwargs: Any,
+    ):
+        """Create an empty checkpointer.
+
+        Args:
+            max_threads: Threads kept before the least recently used is evicted.
+            ttl_seconds: Idle time after which a thread expires; None disables it.
+            max_checkpoints_per_thread: Newest checkpoints kept per thread.
+
+        Raises:
+            ValueError: If a limit is not positive.
+        """
+        if max_threads < 1 or max_checkpoints_per_thread < 1:
+            raise ValueError("max_threads and max_checkpoints_per_thread must be positive")
+        if ttl_seconds is not None and ttl_seconds <= 0:
+            raise ValueError("ttl_seconds must be positive")
+        super().__init__(**kwargs)
+        self.max_threads = max_threads
+        self.ttl_seconds = ttl_seconds
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+        self._threads: "OrderedDict[str, _ThreadSaver]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    # No __len__: an empty saver must stay truthy, as LangGraph tests
+    # ``if checkpointer``
+
+    @property
+    def thread_count(self) -> int:
+        """Number of threads currently stored."""
+        return len(self._threads)
+
+    def __contains__(self, thread_id: object) -> bool:
+        return thread_id in self._threads
+
+    def _saver(self, thread_id: str, create: bool = False) -> Optional[_ThreadSaver]:
+        now = time.monotonic()
+        with self._lock:
+            # Threads are kept in last-use order, so expired ones are at the front
+            if self.ttl_seconds is not None:
+                while self._threads:
+                    oldest = next(iter(self._threads.values()))
+                    if now - oldest.last_used <= self.ttl_seconds:
+                        break
+                    self._threads.popitem(last=False)
+
+            saver = self._threads.get(thread_id)
+            if saver is None:
+                if not create:
+                    return None
+                saver = _ThreadSaver(self.max_checkpoints_per_thread, serde=self.serde)
+                self._threads[thread_id] = saver
+                while len(self._threads) > self.max_threads:
+                    self._threads.popitem(last=False)
+            else:
+                self._threads.move_to_end(thread_id)
+            saver.last_used = now
+            return saver
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        saver = self._saver(str(config["configurable"]["thread_id"]))
+        return saver.get_tuple(config) if saver is not None else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        if config is not None:
+            saver = self._saver(str(config["configurable"]["thread_id"]))
+            savers = [saver] if saver is not None else []
+        else:
+            with self._lock:
+                savers = list(self._threads.values())
+        for saver in savers:
+            for item in saver.list(config, filter=filter, before=before, limit=limit):
+                yield item
+                if limit is not None:
+                    limit -= 1
+                    if limit <= 0:
+                        return
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saver = self._saver(str(config["configurable"]["thread_id"]), create=True)
+        return saver.put(config, checkpoint, metadata, new_versions)
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        saver = self._saver(str(config["configurable"]["thread_id"]), create=True)
+        saver.put_writes(config, writes, task_id, task_path)
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock:
+            self._threads.pop(str(thread_id), None)
+
+    def get_delta_channel_history(
+        self, *, config: RunnableConfig, channels: Sequence[str]
+    ) -> Mapping[str, Any]:
+        saver = self._saver(str(config["configurable"]["thread_id"]))
+        if saver is None:
+            return {channel: {"writes": []} for channel in channels}
+        return saver.get_delta_channel_history(config=config, channels=channels)
+
+    # Storage is in memory, so the async API simply calls the sync methods
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+    async def aget_delta_channel_history(
+        self, *, config: RunnableConfig, channels: Sequence[str]
+    ) -> Mapping[str, Any]:
+        return self.get_delta_channel_history(config=config, channels=channels)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        return InMemorySaver.get_next_version(self, current, channel)
+
+
+def create_checkpointer() -> BaseCheckpointSaver:
+    """Build the graph checkpointer configured by the environment.
+
+    Raises:
+        ValueError: If ``CHECKPOINT_BACKEND`` is unknown.
+        ImportError: If the SQLite backend is selected but
+            ``langgraph-checkpoint-sqlite`` is not installed.
+    """
+    backend = os.getenv("CHECKPOINT_BACKEND", "memory").lower()
+    max_per_thread = int(os.getenv("CHECKPOINT_MAX_PER_THREAD", DEFAULT_MAX_CHECKPOINTS_PER_THREAD))
+    if backend == "memory":
+        ttl = float(os.getenv("CHECKPOINT_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+        return BoundedMemorySaver(
+            max_threads=int(os.getenv("CHECKPOINT_MAX_THREADS", DEFAULT_MAX_THREADS)),
+            ttl_seconds=ttl if ttl > 0 else None,
+            max_checkpoints_per_thread=max_per_thread,
+        )
+    if backend == "sqlite":
+        from customer_support_assistant.checkpoints_sqlite import SqliteCheckpointer
+
+        return SqliteCheckpointer.open(
+            os.getenv("CHECKPOINT_SQLITE_PATH", "checkpoints.sqlite"),
+            max_checkpoints_per_thread=max_per_thread,
+        )
+    raise ValueError(f"Unknown checkpoint backend: {backend}")
@@ -0,0 +1,109 @@
+"""SQLite-backed graph checkpoints that survive restarts.
+
+Requires the optional ``langgraph-checkpoint-sqlite`` package
+(``pip install customer-support-assistant[sqlite]``).
+"""
+
+import asyncio
+import sqlite3
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple, Union
+
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import ChannelVersions, Checkpoint, CheckpointMetadata, CheckpointTuple
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError as e:  # pragma: no cover - depends on the environment
+    raise ImportError(
+        "The SQLite checkpoint backend requires langgraph-checkpoint-sqlite: "
+        "pip install customer-support-assistant[sqlite]"
+    ) from e
+
+
+class SqliteCheckpointer(SqliteSaver):
+    """:class:`SqliteSaver` that caps checkpoints per thread and supports async graphs.
+
+    The connection is shared and guarded by the saver's lock, so the async
+    methods run the sync ones in a worker thread instead of needing a
+    separate async driver.
+    """
+
+    def __init__(
+        self, conn: sqlite3.Connection, max_checkpoints_per_thread: Optional[int] = None, **kwargs: Any
+    ):
+        super().__init__(conn, **kwargs)
+        self.max_checkpoints_per_thread = max_checkpoints_per_thread
+
+    @classmethod
+    def open(cls, path: Union[str, Path], **kwargs: Any) -> "SqliteCheckpointer":
+        """Open (creating if needed) the checkpoint database at ``path``."""
+        return cls(sqlite3.connect(str(path), check_same_thread=False), **kwargs)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self.conn.close()
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        saved = super().put(config, checkpoint, metadata, new_versions)
+        if self.max_checkpoints_per_thread:
+            self._trim(saved["configurable"]["thread_id"], saved["configurable"]["checkpoint_ns"])
+        return saved
+
+    def _trim(self, thread_id: str, checkpoint_ns: str) -> None:
+        keep = (
+            "SELECT checkpoint_id FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? "
+            "ORDER BY checkpoint_id DESC LIMIT ?"
+        )
+        params = (str(thread_id), checkpoint_ns, str(thread_id), checkpoint_ns, self.max_checkpoints_per_thread)
+        with self.cursor() as cur:
+            for table in ("checkpoints", "writes"):
+                cur.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ? "
+                    f"AND checkpoint_id NOT IN ({keep})",
+                    params,
+                )
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
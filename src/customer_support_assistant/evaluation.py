@@ -0,0 +1,229 @@
+"""Batch evaluation of the assistant over a JSONL file of questions.
+
+Each input line is a JSON object with a ``question`` and optionally an
+``expected`` answer, an ``id`` and a ``session_id``. The questions run
+through the graph concurrently with :meth:`Assistant.aprocess`. Each result
+line records the response, the latency, the tools called, the number of LLM
+calls and, if an answer was expected, whether the response contains it.
+
+With ``--fake-llm`` (or ``LLM_PROVIDER=fake``),
+:class:`~customer_support_assistant.fake_llm.FakeChatModel` answers instead
+of Gemini, so a run needs no network access::
+
+    python -m customer_support_assistant.evaluation questions.jsonl \\
+        --out results.jsonl --concurrency 16 --fake-llm
+"""
+
+import argparse
+import asyncio
+import contextvars
+import json
+import statistics
+import sys
+import time
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from customer_support_assistant.main import Assistant, create_llm
+
+DEFAULT_CONCURRENCY = 8
+
+# Usage record of the question being evaluated; every question runs in a task
+# of its own, so concurrent questions never share one
+_usage: contextvars.ContextVar = contextvars.ContextVar("evaluation_usage")
+
+
+class _CountingModel:
+    """Wrap a chat model and count its calls in the current usage record."""
+
+    def __init__(self, model: Any):
+        self._model = model
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._model, name)
+
+    def invoke(self, messages, *args, **kwargs):
+        _count_llm_call()
+        return self._model.invoke(messages, *args, **kwargs)
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        _count_llm_call()
+        return await self._model.ainvoke(messages, *args, **kwargs)
+
+
+def _count_llm_call() -> None:
+    usage = _usage.get(None)
+    if usage is not None:
+        usage["llm_calls"] += 1
+
+
+def _record_tool_call(call: Dict[str, Any]) -> None:
+    usage = _usage.get(None)
+    if usage is not None:
+        usage["tool_calls"].append(call)
+
+
+class EvaluationAssistant(Assistant):
+    """An :class:`Assistant` that records the LLM and tool calls of each question."""
+
+    def model_for_call(self, cached_content=None):
+        return _CountingModel(super().model_for_call(cached_content))
+
+    def _select_tools(self, state) -> list:
+        selected = super()._select_tools(state)
+        for _, tool, tool_args in selected:
+            _record_tool_call({"name": tool.name, "args": tool_args})
+        return selected
+
+    def _route_tool(self, state):
+        route, tool = super()._route_tool(state)
+        if tool is not None:
+            _record_tool_call({"name": tool.name, "args": route.args, "routed": True})
+        return route, tool
+
+
+def load_questions(lines: Iterable[str]) -> List[Dict[str, Any]]:
+    """Parse JSONL question lines, skipping blank ones.
+
+    Raises:
+        ValueError: If a line is not a JSON object with a non-empty ``question``.
+    """
+    items = []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {number}: invalid JSON: {e}") from e
+        if not isinstance(item, dict) or not str(item.get("question") or "").strip():
+            raise ValueError(f"Line {number}: expected an object with a 'question'")
+        item.setdefault("id", number)
+        items.append(item)
+    return items
+
+
+def matches_expected(response: str, expected: Optional[str]) -> Optional[bool]:
+    """Whether ``response`` contains ``expected``, ignoring case; None if nothing was expected."""
+    if expected is None:
+        return None
+    return expected.strip().lower() in response.lower()
+
+
+async def evaluate_item(assistant: Assistant, item: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one question and return its result record."""
+    usage = {"llm_calls": 0, "tool_calls": []}
+    _usage.set(usage)
+    response, error = None, None
+    start = time.perf_counter()
+    try:
+        response = await assistant.aprocess(
+            item["question"], session_id=item.get("session_id") or uuid.uuid4().hex
+        )
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    latency_ms = (time.perf_counter() - start) * 1000
+    return {
+        "id": item["id"],
+        "question": item["question"],
+        "response": response,
+        "expected": item.get("expected"),
+        "correct": matches_expected(response or "", item.get("expected")),
+        "latency_ms": round(latency_ms, 3),
+        "llm_calls": usage["llm_calls"],
+        "tool_calls": usage["tool_calls"],
+        "error": error,
+    }
+
+
+async def run_evaluation(
+    items: Sequence[Dict[str, Any]],
+    assistant: Optional[Assistant] = None,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    """Evaluate ``items`` with at most ``concurrency`` questions in flight.
+
+    Args:
+        items: Questions as returned by :func:`load_questions`.
+        assistant: The assistant to evaluate; an :class:`EvaluationAssistant`
+            with the default components if omitted.
+        concurrency: Maximum number of questions running at once.
+
+    Returns:
+        One result record per item, in input order.
+
+    Raises:
+        ValueError: If ``concurrency`` is not positive.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be positive")
+    assistant = assistant if assistant is not None else EvaluationAssistant()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(item):
+        async with semaphore:
+            return await evaluate_item(assistant, item)
+
+    # gather runs each question in its own task, with its own usage record
+    return list(await asyncio.gather(*(bounded(item) for item in items)))
+
+
+def summarize(results: Sequence[Dict[str, Any]], elapsed: float) -> Dict[str, Any]:
+    """Aggregate result records into run-level statistics."""
+    latencies = sorted(r["latency_ms"] for r in results)
+    graded = [r for r in results if r["expected"] is not None]
+    summary: Dict[str, Any] = {
+        "questions": len(results),
+        "errors": sum(r["error"] is not None for r in results),
+        "correct": sum(bool(r["correct"]) for r in graded),
+        "graded": len(graded),
+        "llm_calls": sum(r["llm_calls"] for r in results),
+        "tool_calls": sum(len(r["tool_calls"]) for r in results),
+        "elapsed_s": round(elapsed, 3),
+        "questions_per_s": round(len(results) / elapsed, 2) if elapsed > 0 else None,
+    }
+    if latencies:
+        summary["p50_ms"] = round(statistics.median(latencies), 3)
+        summary["p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+    return summary
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    """Command-line entry point; returns the process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("questions", help="JSONL file of questions, '-' for stdin")
+    parser.add_argument("--out", default="-", help="JSONL file for the results (default stdout)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="questions in flight at once")
+    parser.add_argument("--fake-llm", action="store_true",
+                        help="answer with the offline fake model (same as LLM_PROVIDER=fake)")
+    parser.add_argument("--tool-calling", choices=("json", "native"), help="tool-calling mode")
+    args = parser.parse_args(argv)
+
+    if args.questions == "-":
+        items = load_questions(sys.stdin)
+    else:
+        with open(args.questions) as f:
+            items = load_questions(f)
+
+    # The fake model is configured by the FAKE_LLM_* variables
+    llm = create_llm("fake") if args.fake_llm else None
+    assistant = EvaluationAssistant(llm=llm, tool_calling=args.tool_calling)
+
+    start = time.perf_counter()
+    results = asyncio.run(run_evaluation(items, assistant, args.concurrency))
+    summary = summarize(results, time.perf_counter() - start)
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    try:
+        for result in results:
+            out.write(json.dumps(result, default=str) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(json.dumps(summary), file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
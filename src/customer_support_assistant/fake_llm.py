@@ -0,0 +1,271 @@
+"""Offline stand-in for Gemini, for evaluation runs, benchmarks and tests.
+
+:class:`FakeChatModel` follows the assistant's tool protocol with a few
+keyword rules: an order ID is looked up, a price question goes to the
+catalog, anything else to the knowledge base. Once the tool results are in
+the prompt, it answers with them. Alternatively it replays a script of
+replies in order. It needs no network access or API key, and the same
+prompt always gets the same reply.
+
+To load-test the graph like a real model, it can simulate a time to first
+token (``latency``) and a generation speed (``tokens_per_second``); a reply
+streams word by word at that speed. :func:`create_fake_llm` configures it
+from ``FAKE_LLM_*`` variables and is the ``fake`` provider of
+:func:`customer_support_assistant.main.create_llm`.
+
+It also stands in for a provider's context cache: :meth:`FakeChatModel.create_context_cache`
+stores a prompt prefix under a name, and calls passing that name as
+``cached_content`` have it prepended and report its tokens as cache reads.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import re
+import time
+import uuid
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Union
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+from customer_support_assistant.history import approximate_tokens
+from customer_support_assistant.streaming import content_text
+from customer_support_assistant.tool_call_parser import parse_tool_calls
+
+ORDER_ID_RE = re.compile(r"\bORD\d+\b", re.IGNORECASE)
+PRICE_INTENT_RE = re.compile(r"\b(price|prices|cost|costs|how much)\b|\$", re.IGNORECASE)
+# A streamed token: a word with the whitespace after it
+TOKEN_RE = re.compile(r"\s*\S+\s*|\s+")
+
+
+def choose_tool_call(text: str) -> Dict[str, Any]:
+    """Pick the tool call a support agent would make for the question ``text``."""
+    order = ORDER_ID_RE.search(text)
+    if order:
+        return {"name": "order_status_lookup", "args": {"order_id": order.group(0).upper()}}
+    if PRICE_INTENT_RE.search(text):
+        return {"name": "product_catalog_search", "args": {"query": text}}
+    return {"name": "knowledge_base_query", "args": {"query": text}}
+
+
+def _tool_outputs(messages: Sequence[BaseMessage]) -> Optional[List[str]]:
+    """Return the tool results at the end of the prompt, or None if there are none.
+
+    In native mode they are ToolMessages. In JSON mode they are user messages
+    following the user input, so a run of more than one user message at the
+    end of the prompt means tool results.
+    """
+    trailing: List[BaseMessage] = []
+    for message in reversed(messages):
+        if isinstance(message, (AIMessage, SystemMessage)) and not getattr(message, "tool_calls", None):
+            break
+        trailing.append(message)
+    trailing.reverse()
+    tool_messages = [m for m in trailing if isinstance(m, ToolMessage)]
+    if tool_messages:
+        return [content_text(m.content) for m in tool_messages]
+    humans = [m for m in trailing if isinstance(m, HumanMessage)]
+    if len(humans) > 1:
+        return [content_text(m.content) for m in humans[1:]]
+    return None
+
+
+def split_tokens(text: str) -> List[str]:
+    """Split ``text`` into the pieces it is streamed in, one word each."""
+    return TOKEN_RE.findall(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """Rule-based or scripted chat model with simulated latency.
+
+    Attributes:
+        latency: Seconds before the first token of every reply.
+        tokens_per_second: Generation speed; 0 generates instantly.
+        responses: Replies to return in turn, cycling, instead of following
+            the rules. A reply is the text the model writes; a tool-call JSON
+            reply becomes native tool calls when the model is bound to tools.
+    """
+
+    latency: float = 0.0
+    tokens_per_second: float = 0.0
+    responses: Optional[List[Union[str, Dict[str, Any]]]] = None
+
+    _turns: Any = PrivateAttr(default_factory=itertools.count)
+    _contexts: Dict[str, Any] = PrivateAttr(default_factory=dict)
+
+    def create_context_cache(
+        self, messages: Sequence[BaseMessage], tools: Sequence[Any] = (), ttl: Optional[float] = None
+    ) -> str:
+        """Store ``messages`` (and ``tools``) as a context cache and return its name.
+
+        Like a provider cache, it expires after ``ttl`` seconds.
+        """
+        name = f"cachedContents/fake-{len(self._contexts) + 1}"
+        expires = time.monotonic() + ttl if ttl is not None else float("inf")
+        self._contexts[name] = (list(messages), bool(tools), expires)
+        return name
+
+    def _cached_context(self, name: str) -> tuple:
+        context = self._contexts.get(name)
+        if context is None or context[2] <= time.monotonic():
+            raise ValueError(f"Cached content {name} not found or expired")
+        return context
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        """Switch to native tool calls; the tool schemas themselves are not needed."""
+        return self.bind(native_tools=True, **kwargs)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-support-agent"
+
+    def reply(self, messages: Sequence[BaseMessage], native: bool = False) -> AIMessage:
+        """Return the model's reply to ``messages``, without any simulated delay."""
+        if self.responses:
+            text = self.responses[next(self._turns) % len(self.responses)]
+            if not isinstance(text, str):
+                text = json.dumps(text)
+            calls = parse_tool_calls(text) if native else None
+            if calls is None:
+                return AIMessage(content=text)
+            return AIMessage(content="", tool_calls=[
+                {"name": call["name"], "args": call.get("args") or {}, "id": call.get("id") or uuid.uuid4().hex}
+                for call in calls
+            ])
+
+        outputs = _tool_outputs(messages)
+        if outputs is not None:
+            return AIMessage(content="\n".join(outputs))
+        question = next(
+            (content_text(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), ""
+        )
+        call = choose_tool_call(question)
+        if native:
+            return AIMessage(content="", tool_calls=[{**call, "id": uuid.uuid4().hex}])
+        return AIMessage(content=json.dumps({"tool_calls": [call]}))
+
+    def _respond(self, messages: Sequence[BaseMessage], kwargs: Dict[str, Any]) -> AIMessage:
+        native = kwargs.get("native_tools", False)
+        cached: List[BaseMessage] = []
+        if kwargs.get("cached_content"):
+            cached, cached_tools, _ = self._cached_context(kwargs["cached_content"])
+            native = native or cached_tools
+            messages = [*cached, *messages]
+        message = self.reply(messages, native=native)
+        prompt = sum(approximate_tokens(content_text(m.content)) for m in messages)
+        output = max(len(self._tokens(message)), 1)
+        message.usage_metadata = {
+            "input_tokens": prompt, "output_tokens": output, "total_tokens": prompt + output,
+            "input_token_details": {"cache_read": sum(approximate_tokens(content_text(m.content)) for m in cached)},
+        }
+        return message
+
+    @staticmethod
+    def _tokens(message: AIMessage) -> List[str]:
+        if message.tool_calls:
+            return split_tokens(json.dumps([{"name": c["name"], "args": c["args"]} for c in message.tool_calls]))
+        return split_tokens(content_text(message.content))
+
+    def _token_delay(self) -> float:
+        return 1 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _generation_time(self, message: AIMessage) -> float:
+        return self.latency + len(self._tokens(message)) * self._token_delay()
+
+    def _chunks(self, message: AIMessage) -> Iterator[ChatGenerationChunk]:
+        """The reply as chunks: one per answer token, or one with all tool calls."""
+        if message.tool_calls:
+            yield ChatGenerationChunk(message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": call["name"], "args": json.dumps(call["args"]), "id": call["id"], "index": i}
+                    for i, call in enumerate(message.tool_calls)
+                ],
+                usage_metadata=message.usage_metadata,
+            ))
+            return
+        tokens = split_tokens(content_text(message.content)) or [""]
+        for i, token in enumerate(tokens):
+            # Usage is reported once, with the first chunk
+            usage = message.usage_metadata if i == 0 else None
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token, usage_metadata=usage))
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._respond(messages, kwargs)
+        time.sleep(self._generation_time(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._respond(messages, kwargs)
+        await asyncio.sleep(self._generation_time(message))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._respond(messages, kwargs)
+        time.sleep(self.latency)
+        for chunk in self._chunks(message):
+            yield chunk
+            time.sleep(self._token_delay())
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages, kwargs)
+        await asyncio.sleep(self.latency)
+        for chunk in self._chunks(message):
+            yield chunk
+            await asyncio.sleep(self._token_delay())
+
+
+def create_fake_llm() -> FakeChatModel:
+    """Build the fake model configured by the environment.
+
+    ``FAKE_LLM_LATENCY_MS`` sets the time to first token,
+    ``FAKE_LLM_TOKENS_PER_SECOND`` the generation speed (0 for instant) and
+    ``FAKE_LLM_SCRIPT`` a JSON file with a list of replies to replay.
+    """
+    responses = None
+    script = os.getenv("FAKE_LLM_SCRIPT")
+    if script:
+        with open(script) as f:
+            responses = json.load(f)
+        if not isinstance(responses, list) or not responses:
+            raise ValueError(f"FAKE_LLM_SCRIPT must contain a non-empty JSON list: {script}")
+    return FakeChatModel(
+        latency=float(os.getenv("FAKE_LLM_LATENCY_MS", "0")) / 1000,
+        tokens_per_second=float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "0")),
+        responses=responses,
+    )
@@ -0,0 +1,205 @@
+"""Keeping the chat history sent to the LLM within a token budget.
+
+Every LLM call sends the system prompt, the chat history, the user input and
+the current turn's tool results. :class:`HistoryManager` trims the history
+so the whole prompt fits ``max_tokens``. It first collapses tool outputs of
+earlier turns into short summaries, then drops the oldest turns. A turn
+(a user message and the replies after it) is always kept or dropped as a
+whole, so tool calls are never separated from their results.
+
+Tool results are ``ToolMessage`` objects with native function calling. In
+the JSON tool-calling mode they are ``HumanMessage`` objects following the
+assistant message that requested them (see :func:`tool_result_flags`).
+
+Token counts and summaries are cached by message content, so a long session
+does not re-count or re-summarize the same messages on every turn. Tokens
+are counted with a pluggable ``tokenizer``; the default
+:func:`approximate_tokens` needs no model access.
+
+:func:`create_history_manager` reads the budget from ``HISTORY_MAX_TOKENS``
+(default 8000, 0 disables compaction).
+"""
+
+import hashlib
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from customer_support_assistant.streaming import content_text
+from customer_support_assistant.structured_logging import get_logger, log_event
+
+DEFAULT_MAX_TOKENS = 8000
+DEFAULT_SUMMARY_CHARS = 160
+DEFAULT_CACHE_SIZE = 4096
+# Tokens for the role and framing of each message
+MESSAGE_OVERHEAD_TOKENS = 4
+
+Tokenizer = Callable[[str], int]
+
+logger = get_logger("history")
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def approximate_tokens(text: str) -> int:
+    """Estimate the token count of ``text`` at about four characters per token."""
+    return (len(text) + 3) // 4
+
+
+def summarize_text(text: str, max_chars: int = DEFAULT_SUMMARY_CHARS) -> str:
+    """Shorten ``text`` to about ``max_chars`` characters, cutting at a word boundary."""
+    text = _WHITESPACE_RE.sub(" ", text).strip()
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind(" ", 0, max_chars)
+    return text[:cut if cut > 0 else max_chars].rstrip() + " …"
+
+
+def tool_result_flags(history: Sequence[BaseMessage]) -> List[bool]:
+    """Return, for each message of ``history``, whether it is a tool result.
+
+    Besides ``ToolMessage`` objects, the ``HumanMessage`` objects right after
+    an assistant message with JSON-mode tool calls (in its
+    ``additional_kwargs``) are tool results, at most one per call.
+    """
+    flags: List[bool] = []
+    expected = 0
+    for message in history:
+        if isinstance(message, ToolMessage) or (isinstance(message, HumanMessage) and expected):
+            flags.append(True)
+            expected = max(expected - 1, 0)
+            continue
+        flags.append(False)
+        calls = message.additional_kwargs.get("tool_calls") if isinstance(message, AIMessage) else None
+        expected = len(calls or [])
+    return flags
+
+
+def split_turns(history: Sequence[BaseMessage]) -> List[List[BaseMessage]]:
+    """Split a history into turns, each starting at a user message."""
+    turns: List[List[BaseMessage]] = []
+    for message, is_tool_result in zip(history, tool_result_flags(history)):
+        if (isinstance(message, HumanMessage) and not is_tool_result) or not turns:
+            turns.append([])
+        turns[-1].append(message)
+    return turns
+
+
+class _LRU:
+    """Small thread-safe LRU mapping for the token and summary caches."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self._items: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], object]) -> object:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        value = compute()
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return value
+
+
+class HistoryManager:
+    """Trim chat histories to a token budget."""
+
+    def __init__(
+        self,
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        tokenizer: Optional[Tokenizer] = None,
+        summary_chars: int = DEFAULT_SUMMARY_CHARS,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        """Create a history manager.
+
+        Args:
+            max_tokens: Token budget for the whole prompt.
+            tokenizer: Returns the token count of a text, e.g. a model's
+                ``get_num_tokens``; :func:`approximate_tokens` by default.
+            summary_chars: Length tool outputs of earlier turns are cut to.
+            cache_size: Token counts and summaries kept in each cache.
+
+        Raises:
+            ValueError: If ``max_tokens`` is not positive.
+        """
+        if max_tokens < 1:
+            raise ValueError("max_tokens must be positive")
+        self.max_tokens = max_tokens
+        self.tokenizer = tokenizer or approximate_tokens
+        self.summary_chars = summary_chars
+        self._token_counts = _LRU(cache_size)
+        self._summaries = _LRU(cache_size)
+
+    def count(self, message: BaseMessage) -> int:
+        """Return the tokens ``message`` takes up in a prompt."""
+        text = content_text(message.content)
+        tokens = self._token_counts.get_or_compute(_digest(text), lambda: self.tokenizer(text))
+        return tokens + MESSAGE_OVERHEAD_TOKENS
+
+    def summarize(self, message: BaseMessage) -> BaseMessage:
+        """Return ``message`` with its content cut to a short summary."""
+        text = content_text(message.content)
+        summary = self._summaries.get_or_compute(
+            _digest(text), lambda: summarize_text(text, self.summary_chars)
+        )
+        return message.model_copy(update={"content": summary})
+
+    def compact(
+        self, history: Sequence[BaseMessage], fixed: Sequence[BaseMessage] = ()
+    ) -> List[BaseMessage]:
+        """Return ``history`` trimmed so that it and ``fixed`` fit the budget.
+
+        Args:
+            history: The conversation so far, oldest first.
+            fixed: Messages that are always sent (system prompt, user input,
+                the current turn's tool results).
+        """
+        budget = self.max_tokens - sum(self.count(m) for m in fixed)
+        before = sum(self.count(m) for m in history)
+        if before <= budget:
+            return list(history)
+
+        turns = split_turns(history)
+        flags = iter(tool_result_flags(history))
+        summarized = 0
+        # Tool outputs of earlier turns have served their purpose; keep a summary
+        for turn in turns[:-1]:
+            for i, message in enumerate(turn):
+                if next(flags):
+                    turn[i] = self.summarize(message)
+                    summarized += 1
+
+        sizes = [sum(self.count(m) for m in turn) for turn in turns]
+        total, dropped = sum(sizes), 0
+        while turns and total > budget:
+            total -= sizes.pop(0)
+            turns.pop(0)
+            dropped += 1
+
+        log_event(
+            logger, logging.DEBUG, "history_compacted",
+            tokens_before=before, tokens_after=total, budget=budget,
+            summarized=summarized, dropped_turns=dropped,
+        )
+        return [message for turn in turns for message in turn]
+
+
+def _digest(text: str) -> Tuple[int, str]:
+    return len(text), hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def create_history_manager() -> Optional[HistoryManager]:
+    """Build the history manager configured by ``HISTORY_MAX_TOKENS``, or None if disabled."""
+    max_tokens = int(os.getenv("HISTORY_MAX_TOKENS", DEFAULT_MAX_TOKENS))
+    return HistoryManager(max_tokens=max_tokens) if max_tokens > 0 else None
@@ -0,0 +1,275 @@
+"""Response cache for LLM calls.
+
+Entries are keyed on the system prompt, the conversation so far and the
+user's input, each normalized (case and whitespace). A lookup first tries an
+exact match of that key. It then falls back to a similarity match: among
+entries with the same system prompt and history, the cached input whose
+embedding is closest to the query is used if its cosine similarity reaches
+``similarity_threshold`` and both inputs name the same identifiers (words
+containing a digit: model numbers, order IDs, SKUs, prices). Character
+trigram embeddings barely separate "WH-1000XM4" from "WH-1000XM5" in a long
+question, so without that check one product's answer would be served for
+the other. Entries are evicted least recently used first and
+expire after ``ttl_seconds``; with a ``path`` they are also kept in SQLite so
+the cache survives worker restarts.
+
+The cache is opt-in; :func:`create_response_cache` reads its configuration
+from the environment:
+
+* ``LLM_CACHE``: set to ``1`` to enable the cache
+* ``LLM_CACHE_THRESHOLD``: similarity threshold (default 0.95; above 1
+  disables the similarity tier)
+* ``LLM_CACHE_MAX_ENTRIES`` / ``LLM_CACHE_TTL_SECONDS``: eviction limits
+* ``LLM_CACHE_PATH``: SQLite file to persist the cache in
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, FrozenSet, NamedTuple, Optional, Sequence, Union
+
+import numpy as np
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+
+from customer_support_assistant.tools.vector_store import Embedder, HashingEmbedder
+
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 3600.0
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_APOSTROPHE_RE = re.compile(r"['\u2019]")
+_PUNCTUATION_RE = re.compile(r"[^\w\s$.-]|(?<!\d)\.|\.(?!\d)")
+_IDENTIFIER_RE = re.compile(r"\S*\d\S*")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase ``text``, drop punctuation (keeping prices) and collapse whitespace."""
+    text = _PUNCTUATION_RE.sub(" ", _APOSTROPHE_RE.sub("", text.lower()))
+    return _WHITESPACE_RE.sub(" ", text).strip()
+
+
+def identifiers(normalized: str) -> FrozenSet[str]:
+    """Return the words of normalized text that contain a digit, e.g. ``wh-1000xm5`` or ``ord12345``."""
+    return frozenset(_IDENTIFIER_RE.findall(normalized))
+
+
+def _digest(*parts: str) -> str:
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def context_key(system_prompt: str, history: Sequence[BaseMessage]) -> str:
+    """Return the hash identifying a system prompt and conversation history."""
+    messages = [f"{m.type}:{normalize_text(str(m.content))}" for m in history]
+    return _digest(_digest(system_prompt), *messages)
+
+
+class CacheStats(NamedTuple):
+    """Lookup counters of a :class:`ResponseCache`."""
+
+    exact_hits: int
+    semantic_hits: int
+    misses: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return (self.exact_hits + self.semantic_hits) / lookups if lookups else 0.0
+
+
+class _Entry(NamedTuple):
+    context: str
+    query: str
+    response: str  # JSON-serialized message
+    created: float
+
+
+class ResponseCache:
+    """LRU/TTL cache of LLM responses with exact and similarity lookups."""
+
+    def __init__(
+        self,
+        similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        path: Optional[Union[str, Path]] = None,
+        embedder: Optional[Embedder] = None,
+    ):
+        """Create a cache, loading persisted entries from ``path`` if given.
+
+        Args:
+            similarity_threshold: Minimum cosine similarity for a similarity
+                hit; values above 1 disable the similarity tier.
+            max_entries: Entries kept before the least recently used is evicted.
+            ttl_seconds: Age after which an entry expires; None disables it.
+            path: SQLite file persisting the cache.
+            embedder: Embedder for the similarity tier (a HashingEmbedder by default).
+
+        Raises:
+            ValueError: If ``max_entries`` is not positive.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.embedder = embedder or HashingEmbedder(dim=256)
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Query embeddings per context, for the similarity tier
+        self._vectors: Dict[str, Dict[str, np.ndarray]] = {}
+        self._exact_hits = self._semantic_hits = self._misses = 0
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if path is not None:
+            self._open(path)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> CacheStats:
+        """Return the hit and miss counters."""
+        return CacheStats(self._exact_hits, self._semantic_hits, self._misses)
+
+    def get(
+        self, system_prompt: str, history: Sequence[BaseMessage], query: str
+    ) -> Optional[BaseMessage]:
+        """Return the cached response for this prompt, or None on a miss."""
+        context = context_key(system_prompt, history)
+        normalized = normalize_text(query)
+        key = _digest(context, normalized)
+        with self._lock:
+            entry = self._live_entry(key)
+            if entry is not None:
+                self._exact_hits += 1
+            else:
+                key = self._similar_key(context, normalized)
+                entry = self._live_entry(key) if key is not None else None
+                if entry is None:
+                    self._misses += 1
+                    return None
+                self._semantic_hits += 1
+            self._entries.move_to_end(key)
+        return messages_from_dict([json.loads(entry.response)])[0]
+
+    def put(
+        self,
+        system_prompt: str,
+        history: Sequence[BaseMessage],
+        query: str,
+        response: BaseMessage,
+    ) -> None:
+        """Cache ``response`` for this prompt."""
+        context = context_key(system_prompt, history)
+        normalized = normalize_text(query)
+        key = _digest(context, normalized)
+        entry = _Entry(context, normalized, json.dumps(message_to_dict(response)), time.time())
+        vector = self._embed(normalized)
+        with self._lock:
+            self._insert(key, entry, vector)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?, ?)", (key, *entry)
+                )
+                self._conn.commit()
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self) -> None:
+        """Drop every entry, including persisted ones."""
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM llm_cache")
+                self._conn.commit()
+
+    def close(self) -> None:
+        """Close the SQLite connection, if any."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _embed(self, normalized: str) -> Optional[np.ndarray]:
+        if self.similarity_threshold > 1:
+            return None
+        return self.embedder.embed([normalized])[0]
+
+    def _similar_key(self, context: str, normalized: str) -> Optional[str]:
+        candidates = self._vectors.get(context)
+        if not candidates:
+            return None
+        # Only inputs naming the same products, orders and amounts can share an answer
+        names = identifiers(normalized)
+        keys = [key for key in candidates if identifiers(self._entries[key].query) == names]
+        if not keys:
+            return None
+        scores = np.stack([candidates[k] for k in keys]) @ self._embed(normalized)
+        best = int(np.argmax(scores))
+        return keys[best] if scores[best] >= self.similarity_threshold else None
+
+    def _live_entry(self, key: str) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is not None and self._expired(entry):
+            self._remove(key)
+            return None
+        return entry
+
+    def _expired(self, entry: _Entry) -> bool:
+        return self.ttl_seconds is not None and time.time() - entry.created > self.ttl_seconds
+
+    def _insert(self, key: str, entry: _Entry, vector: Optional[np.ndarray]) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if vector is not None:
+            self._vectors.setdefault(entry.context, {})[key] = vector
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        vectors = self._vectors.get(entry.context)
+        if vectors is not None:
+            vectors.pop(key, None)
+            if not vectors:
+                del self._vectors[entry.context]
+        if self._conn is not None:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def _open(self, path: Union[str, Path]) -> None:
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, context TEXT, query TEXT, response TEXT, created REAL)"
+        )
+        if self.ttl_seconds is not None:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE created < ?", (time.time() - self.ttl_seconds,)
+            )
+        self._conn.commit()
+        rows = self._conn.execute(
+            "SELECT key, context, query, response, created FROM llm_cache "
+            "ORDER BY created DESC LIMIT ?",
+            (self.max_entries,),
+        ).fetchall()
+        # Oldest first, so the most recent entries end up most recently used
+        for key, *fields in reversed(rows):
+            entry = _Entry(*fields)
+            self._insert(key, entry, self._embed(entry.query))
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Build the response cache configured by the environment, or None if disabled."""
+    if os.getenv("LLM_CACHE", "").lower() not in ("1", "true", "yes", "on"):
+        return None
+    ttl = float(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS))
+    return ResponseCache(
+        similarity_threshold=float(os.getenv("LLM_CACHE_THRESHOLD", DEFAULT_SIMILARITY_THRESHOLD)),
+        max_entries=int(os.getenv("LLM_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        ttl_seconds=ttl if ttl > 0 else None,
+        path=os.getenv("LLM_CACHE_PATH") or None,
+    )
@@ -1,31 +1,48 @@
-"""Main module for the Customer Support Assistant."""
+"""Main module for the Customer Support Assistant.
 
+Importing this module does no setup work: the ``.env`` file, the Gemini
+client, the tools and the compiled graph are all built by :class:`Assistant`
+on first use, so workers and tests only pay for what they run.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import contextvars
 import os
 import json
+import logging
+import queue
 import re
 import sys
-from typing import List, TypedDict, Annotated
+import threading
+import time
+import uuid
+from functools import cached_property, lru_cache
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple, TypedDict, Annotated
 from dotenv import load_dotenv
-from langchain_core.runnables import RunnableConfig
 
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage
-from langchain_core.tools import Tool
-from langgraph.graph import StateGraph, END
-from langgraph.checkpoint.memory import MemorySaver
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, SystemMessage, ToolMessage
 
 from customer_support_assistant.tools.catalog import product_catalog_search
-from customer_support_assistant.tools.orders import order_status_lookup
+from customer_support_assistant.tools.orders import aorder_status_lookup, order_status_lookup
+from customer_support_assistant import metrics, prompt_cache
+from customer_support_assistant.history import HistoryManager, create_history_manager
+from customer_support_assistant.router import Route, Router, create_router
+from customer_support_assistant.streaming import TokenStream, content_text
+from customer_support_assistant.tool_cache import tool_cache_key
+from customer_support_assistant.tool_call_parser import parse_tool_calls
+from customer_support_assistant.structured_logging import ensure_logging_configured, get_logger, log_event
 from customer_support_assistant.tools.knowledge_base import knowledge_base_query
 
-# Load environment variables from .env file
-load_dotenv()
+if TYPE_CHECKING:
+    # LangChain's runnables and tools pull in its tracing stack, so they are
+    # only imported once a graph or tool list is built
+    from langchain_core.runnables import RunnableConfig
+    from langchain_core.tools import BaseTool
 
-# Verify that the API key is available
-gemini_api_key = os.getenv("GEMINI_API_KEY")
-if not gemini_api_key:
-    raise ValueError("GEMINI_API_KEY environment variable is not set. Please check your .env file.")
-os.environ["GOOGLE_API_KEY"] = gemini_api_key
+logger = get_logger("main")
 
 # System prompt configuration
 SYSTEM_PROMPT = """You are a helpful customer support assistant. You have access to the following tools:
@@ -80,276 +97,1003 @@
   ]
 }"""
 
-# Initialize the LLM
-llm = ChatGoogleGenerativeAI(
-    model="gemini-1.5-flash"  # Using the lower-tier flash model
-)
+# System prompt for native function calling: the tool schemas are sent with
+# the request, so the prompt needn't describe the tools or a JSON format
+NATIVE_SYSTEM_PROMPT = """You are a helpful customer support assistant. Use the provided tools to look up products, orders and store policies.
+If a tool answers the question, reply with its answer only. Otherwise answer directly and briefly."""
 
-# Create the tools
-tools = [
-    Tool(
-        name="product_catalog_search",
-        func=product_catalog_search,
-        description="Search for product information in the catalog. Use the 'query' parameter to specify the product name or details (e.g., query='Sony WH-1000XM5')."
-    ),
-    Tool(
-        name="order_status_lookup",
-        func=order_status_lookup,
-        description="Look up the status of a customer order"
-    ),
-    Tool(
-        name="knowledge_base_query",
-        func=knowledge_base_query,
-        description="Query the internal knowledge base for general information"
-    )
-]
+# How the LLM requests tools: "json" prompts for tool-call JSON in the reply
+# text, "native" uses the model's function-calling API (TOOL_CALLING)
+TOOL_CALLING_MODES = ("json", "native")
+
+# Per-tool timeout overrides in seconds; other tools use TOOL_TIMEOUT_SECONDS
+TOOL_TIMEOUTS: Dict[str, float] = {}
 
 class AgentState(TypedDict):
     input: str
     chat_history: List[BaseMessage]
     agent_outcome: Annotated[List[BaseMessage], {"operator": "add"}]
     intermediate_steps: Annotated[List[BaseMessage], {"operator": "add"}]
+    routed: bool
 
-def call_llm(state: AgentState):
-    # Create a new messages list starting with the system prompt
-    messages: List[BaseMessage] = [SystemMessage(content=SYSTEM_PROMPT)]
-    
-    # Append the chat history
-    messages.extend(state["chat_history"])
-    
-    # Append the user input as a HumanMessage
-    messages.append(HumanMessage(content=state["input"]))
-    
-    # Append intermediate steps as separate messages
-    intermediate_steps = state.get("intermediate_steps", [])
-    if intermediate_steps:
-        messages.extend(intermediate_steps)
-    
-    response = llm.invoke(messages)
-    
-    # Log the full LLM response to a file
-    log_path = os.path.join(os.getcwd(), 'llm_responses.log')
-    with open(log_path, 'a') as f:
-        f.write(f"LLM Response: {response}\n")
-        f.write(f"Response Content: {response.content}\n")
-        f.write(f"Additional Kwargs: {getattr(response, 'additional_kwargs', 'N/A')}\n")
-        f.write("-----\n")
-    
-    # Also write to a separate debug log
-    debug_log_path = os.path.join(os.getcwd(), 'debug.log')
-    with open(debug_log_path, 'a') as f:
-        f.write(f"[LLM DEBUG] Response: {response}\n")
-        f.write(f"[LLM DEBUG] Content: {response.content}\n")
-        f.write(f"[LLM DEBUG] Kwargs: {getattr(response, 'additional_kwargs', 'N/A')}\n")
-        f.write(f"[LLM DEBUG] Log written to: {log_path}\n")
-    
-    # Print to stderr
-    sys.stderr.write(f"[LLM DEBUG] Response logged to {log_path}\n")
-    sys.stderr.write(f"[LLM DEBUG] Debug details written to {debug_log_path}\n")
-    
-    from langchain_core.messages import AIMessage
-    
-    # Create a clean response object
-    clean_response = AIMessage(content="", additional_kwargs={})
-    
-    # Extract tool calls from additional_kwargs if available
+def _build_messages(
+    state: AgentState,
+    system_prompt: str | SystemMessage = SYSTEM_PROMPT,
+    history: Optional[HistoryManager] = None,
+) -> List[BaseMessage]:
+    """Assemble the prompt for an LLM call from the graph state.
+
+    ``system_prompt`` may be a prebuilt message, which is then reused as is.
+    With a ``history`` manager, the chat history is trimmed to its token budget.
+    """
+    system = system_prompt if isinstance(system_prompt, SystemMessage) else SystemMessage(content=system_prompt)
+    user_input = HumanMessage(content=state["input"])
+    intermediate_steps = list(state.get("intermediate_steps", []))
+
+    chat_history = state["chat_history"]
+    if history is not None:
+        chat_history = history.compact(chat_history, [system, user_input, *intermediate_steps])
+
+    # System prompt, chat history, the user input, then the turn's tool results
+    return [system, *chat_history, user_input, *intermediate_steps]
+
+def _handle_llm_response(
+    response: BaseMessage, tool_calls: Optional[List[Dict[str, Any]]] = None
+) -> dict:
+    """Log an LLM response and turn it into either tool calls or a direct answer.
+
+    Args:
+        response: The LLM reply.
+        tool_calls: Tool calls already parsed from a streamed reply; otherwise
+            the reply content is parsed here.
+    """
+    log_event(
+        logger, logging.DEBUG, "llm_response",
+        content=response.content,
+        additional_kwargs=getattr(response, "additional_kwargs", None),
+    )
+
+    # Tool calls made through the model's function-calling API
+    if getattr(response, "tool_calls", None):
+        tool_calls = [
+            {"name": call["name"], "args": call["args"], "id": call.get("id") or uuid.uuid4().hex}
+            for call in response.tool_calls
+        ]
+        return {"agent_outcome": [AIMessage(content="", additional_kwargs={"tool_calls": tool_calls})]}
+
+    # Tool calls reported by the model itself
     if hasattr(response, "additional_kwargs") and "tool_calls" in response.additional_kwargs:
-        clean_response.additional_kwargs = {"tool_calls": response.additional_kwargs["tool_calls"]}
-        return {"agent_outcome": [clean_response]}
-    
-    # Handle different content types safely
-    if isinstance(response.content, str):
-        content_str = response.content
-    elif isinstance(response.content, list):
-        # Convert list elements to strings
-        content_str = " ".join(str(item) for item in response.content)
-    else:
-        content_str = str(response.content)
-    
-    # If we don't have tool calls from additional_kwargs, check the content string
-    if not clean_response.additional_kwargs.get("tool_calls"):
-        # Check if the content string is a JSON string that contains tool_calls
-        if isinstance(content_str, str):
-            try:
-                # Try to parse as JSON - first check for raw JSON
-                parsed = json.loads(content_str)
-                if "tool_calls" in parsed and isinstance(parsed["tool_calls"], list):
-                    clean_response.additional_kwargs = {"tool_calls": parsed["tool_calls"]}
-                    return {"agent_outcome": [clean_response]}
-            except json.JSONDecodeError:
-                # If that fails, check for JSON in markdown code blocks
-                try:
-                    # Extract JSON from markdown code block
-                    json_match = re.search(r'```json\n({.*?})\n```', content_str, re.DOTALL)
-                    if json_match:
-                        parsed = json.loads(json_match.group(1))
-                        if "tool_calls" in parsed and isinstance(parsed["tool_calls"], list):
-                            clean_response.additional_kwargs = {"tool_calls": parsed["tool_calls"]}
-                            return {"agent_outcome": [clean_response]}
-                except:
-                    # Not JSON, so we'll treat as a direct answer
-                    pass
-
-    # If we have tool calls at this point, return them
-    if clean_response.additional_kwargs.get("tool_calls"):
-        return {"agent_outcome": [clean_response]}
+        tool_calls = response.additional_kwargs["tool_calls"]
+        return {"agent_outcome": [AIMessage(content="", additional_kwargs={"tool_calls": tool_calls})]}
+
+    content_str = content_text(response.content)
+
+    # Tool calls written as JSON in the content, possibly in a code fence
+    if tool_calls is None:
+        tool_calls = parse_tool_calls(content_str)
+    if tool_calls is not None:
+        return {"agent_outcome": [AIMessage(content="", additional_kwargs={"tool_calls": tool_calls})]}
 
     # Otherwise, return the content as a direct answer
     return {"agent_outcome": [AIMessage(content=content_str)]}
 
-def call_tool(state: AgentState) -> dict:
-    """Call the appropriate tool based on the agent's request."""
-    print("DEBUG: call_tool function entered.") # Debug print
+def _cache_key(state: AgentState, system_prompt: str = SYSTEM_PROMPT) -> tuple:
+    """The (system prompt, history, input) a response is cached under.
+
+    Tool results are part of the history, so the answer written after a tool
+    call is cached separately from the tool request itself.
+    """
+    history = list(state["chat_history"]) + list(state.get("intermediate_steps", []))
+    return system_prompt, history, state["input"]
+
+def _pending_tool_calls(state: AgentState) -> list:
+    """Return every tool call requested by the last LLM message.
+
+    The calls were parsed when the LLM replied (see :func:`_handle_llm_response`),
+    so the message content is not parsed again here.
+    """
     last_message = state["agent_outcome"][-1]
-    print(f"DEBUG: last_message: {last_message}") # Debug print
-    
-    # Extract tool call information - handle different message types
-    tool_call = None
+    log_event(logger, logging.DEBUG, "tool_calls_pending", last_message=last_message)
+
+    tool_calls = getattr(last_message, "additional_kwargs", None) or {}
+    tool_calls = tool_calls.get("tool_calls") or []
+    if not tool_calls:
+        log_event(logger, logging.DEBUG, "tool_calls_missing")
+    return list(tool_calls)
+
+def _tool_result(tool: BaseTool, response) -> dict:
+    """Wrap a tool response as an intermediate step."""
+    log_event(logger, logging.DEBUG, "tool_result", tool=tool.name, response=response)
+
+    # For product_catalog_search, return just the price if found
+    if tool.name == "product_catalog_search" and isinstance(response, str) and response.startswith('$'):
+        return {"intermediate_steps": [HumanMessage(content=response)]}
     
-    # Check for tool calls in additional_kwargs
-    if hasattr(last_message, "additional_kwargs") and last_message.additional_kwargs and "tool_calls" in last_message.additional_kwargs:
-        tool_call = last_message.additional_kwargs["tool_calls"][0]
+    return {"intermediate_steps": [HumanMessage(content=str(response))]}
+
+def _collect_tool_results(selected: list, responses: list) -> dict:
+    """Merge per-call results into one update, in the order the calls were made."""
+    steps: List[BaseMessage] = []
+    for (_, tool, _), response in zip(selected, responses):
+        steps.extend(_tool_result(tool, response)["intermediate_steps"])
+    return {"intermediate_steps": steps}
+
+def _collect_native_tool_results(selected: list, responses: list) -> dict:
+    """Like :func:`_collect_tool_results`, as function-calling messages.
+
+    The model's tool-call message is replayed, followed by one ToolMessage per
+    call, as the function-calling API expects.
+    """
+    request = AIMessage(content="", tool_calls=[
+        {"name": tool.name, "args": tool_args, "id": call["id"]} for call, tool, tool_args in selected
+    ])
+    steps: List[BaseMessage] = [request]
+    for (call, tool, _), response in zip(selected, responses):
+        log_event(logger, logging.DEBUG, "tool_result", tool=tool.name, response=response)
+        steps.append(ToolMessage(content=str(response), tool_call_id=call["id"], name=tool.name))
+    return {"intermediate_steps": steps}
+
+def after_route(state: AgentState) -> str:
+    """End the turn if the router answered it, otherwise ask the LLM."""
+    decision = "end" if state.get("routed") else "llm"
+    metrics.count("decisions", "router", decision)
+    return decision
+
+def should_continue(state: AgentState) -> str:
+    """Determine if we should continue processing or end."""
+    last_message = state["agent_outcome"][-1]
+    # If the LLM returned a tool call, then we call the tool, otherwise we end
+    # the conversation
+    if hasattr(last_message, "additional_kwargs") and "tool_calls" in last_message.additional_kwargs:
+        decision = "tool"
+    else:
+        decision = "end"
+    metrics.count("decisions", "llm", decision)
+    return decision
+
+def _llm_result(response: BaseMessage, stream: Optional[TokenStream]) -> dict:
+    """Normalize an LLM reply, releasing held-back streamed text if it is an answer."""
+    result = _handle_llm_response(response, stream.tool_calls if stream is not None else None)
+    if stream is not None:
+        stream.finish("tool_calls" not in result["agent_outcome"][-1].additional_kwargs)
+    return result
+
+# Configurable key under which a streamed turn passes the callback receiving
+# answer tokens; LangGraph only buffers custom stream events of a running node
+TOKEN_WRITER = "token_writer"
+_END_OF_STREAM = object()
+
+def _token_writer(config: Optional[RunnableConfig]) -> Optional[Callable[[str], None]]:
+    """Return the callback of a streamed turn, or None if the turn is not streamed."""
+    return (config or {}).get("configurable", {}).get(TOKEN_WRITER)
+
+FALLBACK_RESPONSE = "I'm sorry, I couldn't process your request."
+
+def _start_turn(
+    user_input: str, chat_history: List[BaseMessage] | None, session_id: Optional[str]
+) -> Tuple[dict, RunnableConfig]:
+    """Validate a user turn and build the graph inputs and config for it."""
+    ensure_logging_configured()
+    metrics.ensure_metrics_configured()
+    if user_input is None or not user_input.strip():
+        raise ValueError("User input cannot be None or empty")
+    # Without a session, the turn gets a thread of its own so that unrelated
+    # callers never share checkpoints
+    session_id = session_id or uuid.uuid4().hex
+    log_event(logger, logging.INFO, "turn_started", session_id=session_id, user_input=user_input)
+
+    chat_history = chat_history or []
+
+    # Use the LangChain graph to process the input. Tool outputs belong to a
+    # single turn, so they are reset rather than carried over by the checkpointer
+    inputs = {"input": user_input, "chat_history": chat_history, "intermediate_steps": []}
     
-    # If not found, try to parse tool calls from content if it's a string
-    elif isinstance(getattr(last_message, "content", None), str):
-        content_str = str(last_message.content)
+    config: RunnableConfig = {"configurable": {"thread_id": session_id}}
+    return inputs, config
+
+def _handle_stream_state(s: dict, final_response: str) -> Tuple[bool, str]:
+    """Fold one streamed graph state into the turn's response.
+
+    Returns:
+        ``(done, response)``: ``done`` is True once the end state was reached
+        and ``response`` is final.
+    """
+    log_event(logger, logging.DEBUG, "graph_state", state=s)
+
+    if "__end__" in s:
+        # When the end state is reached, process the final state
+        final_state = s["__end__"]
+
+        # Return the latest tool output if available
+        if final_state.get("intermediate_steps"):
+            latest_tool_output = str(final_state["intermediate_steps"][-1].content)
+            return True, latest_tool_output
         
-        # Try to extract JSON from content string
-        try:
-            # Look for JSON in the content
-            json_match = re.search(r'\{.*\}', content_str, re.DOTALL)
-            if json_match:
-                content = json.loads(json_match.group())
-                if "tool_calls" in content:
-                    tool_call = content["tool_calls"][0]
-        except json.JSONDecodeError:
-            pass  # Content is not JSON, skip
-    
-    if not tool_call:
-        print("DEBUG: No tool_calls found.") # Debug print
-        return {"intermediate_steps": []}
-    
-    # Extract tool name and arguments with proper type checking
-    tool_name = tool_call.get("name") if isinstance(tool_call, dict) else None
-    tool_args = tool_call.get("args") if isinstance(tool_call, dict) else None
-    
-    if not tool_name or not tool_args:
-        print("DEBUG: Tool call missing name or args.") # Debug print
-        return {"intermediate_steps": []}
-    
-    print(f"DEBUG: Tool to call: {tool_name} with args: {tool_args}") # Debug print
+        # If no tool output, return the agent's final response
+        if final_state.get("agent_outcome"):
+            final_response = str(final_state["agent_outcome"][-1].content)
+            return True, final_response
+        
+        return True, FALLBACK_RESPONSE
+
+    # A routed turn ends with the tool output as the answer
+    if s.get("router", {}).get("routed"):
+        return False, str(s["router"]["agent_outcome"][-1].content)
+
+    # Check if we have a direct answer from the LLM
+    if 'llm' in s and s['llm'].get("agent_outcome"):
+        agent_outcome = s['llm']["agent_outcome"][-1]
+        if not agent_outcome.additional_kwargs.get("tool_calls") and agent_outcome.content:
+            final_response = agent_outcome.content
+    return False, final_response
+
+@lru_cache(maxsize=None)
+def load_environment() -> None:
+    """Load variables from the ``.env`` file, once per process."""
+    load_dotenv()
+
+def create_gemini_llm():
+    """Build the Gemini chat model.
+
+    Raises:
+        ValueError: If ``GEMINI_API_KEY`` is not set.
+    """
+    # Verify that the API key is available
+    gemini_api_key = os.getenv("GEMINI_API_KEY")
+    if not gemini_api_key:
+        raise ValueError("GEMINI_API_KEY environment variable is not set. Please check your .env file.")
+    os.environ["GOOGLE_API_KEY"] = gemini_api_key
+    # Looked up on the module so that tests can patch the class
+    chat_model = sys.modules[__name__].ChatGoogleGenerativeAI
+    return chat_model(
+        model="gemini-1.5-flash"  # Using the lower-tier flash model
+    )
+
+def create_fake_llm():
+    """Build the offline fake chat model, see :mod:`customer_support_assistant.fake_llm`."""
+    from customer_support_assistant.fake_llm import create_fake_llm
+
+    return create_fake_llm()
+
+# Chat model factories by provider name (LLM_PROVIDER). A provider returns a
+# LangChain chat model: ``invoke``/``ainvoke`` are required, ``stream``/
+# ``astream`` enable token streaming and ``bind_tools`` native tool calling
+LLM_PROVIDERS: Dict[str, Callable[[], Any]] = {
+    "gemini": create_gemini_llm,
+    "fake": create_fake_llm,
+}
+
+def register_llm_provider(name: str, factory: Callable[[], Any]) -> None:
+    """Make the chat model built by ``factory`` selectable as ``LLM_PROVIDER=name``."""
+    LLM_PROVIDERS[name.lower()] = factory
+
+def create_llm(provider: Optional[str] = None):
+    """Build the chat model of ``provider``, ``LLM_PROVIDER`` by default (``gemini``).
+
+    Raises:
+        ValueError: If the provider is unknown, or if Gemini is selected and
+            ``GEMINI_API_KEY`` is not set.
+    """
+    load_environment()
+    provider = (provider or os.getenv("LLM_PROVIDER", "gemini")).lower()
+    if provider not in LLM_PROVIDERS:
+        raise ValueError(f"Unknown LLM provider: {provider}")
+    return LLM_PROVIDERS[provider]()
+
+def create_tools() -> List[BaseTool]:
+    """Build the tools the LLM can call.
+
+    Argument schemas come from the function signatures, so in native
+    tool-calling mode the model sees ``query`` or ``order_id`` parameters.
+    """
+    from langchain_core.tools import StructuredTool
+
+    return [
+        StructuredTool.from_function(
+            name="product_catalog_search",
+            func=product_catalog_search,
+            description="Search for product information in the catalog. Use the 'query' parameter to specify the product name or details (e.g., query='Sony WH-1000XM5')."
+        ),
+        StructuredTool.from_function(
+            name="order_status_lookup",
+            func=order_status_lookup,
+            coroutine=aorder_status_lookup,
+            description="Look up the status of a customer order"
+        ),
+        StructuredTool.from_function(
+            name="knowledge_base_query",
+            func=knowledge_base_query,
+            description="Query the internal knowledge base for general information"
+        )
+    ]
+
+class Assistant:
+    """The LLM client, tools and compiled graph behind the assistant.
+
+    Every component is built on first use and then cached, so creating an
+    Assistant is free and a worker only imports LangGraph and the Gemini SDK
+    when it handles its first turn. Components passed to the constructor are
+    used instead of the defaults, e.g. a stub LLM in tests.
+    """
+
+    def __init__(
+        self,
+        llm: Any = None,
+        tools: Optional[List[BaseTool]] = None,
+        router: Optional[Router] = None,
+        response_cache: Any = None,
+        checkpointer: Any = None,
+        tool_calling: Optional[str] = None,
+        history: Optional[HistoryManager] = None,
+        tool_cache: Any = None,
+        single_flight: Any = None,
+        prefix_cache: Any = None,
+    ):
+        """Create an assistant.
+
+        Args:
+            llm: Chat model with ``invoke``/``ainvoke``; built by
+                :func:`create_llm` for ``LLM_PROVIDER`` by default.
+            tools: Tools the LLM can call; :func:`create_tools` by default.
+            router: Fast-path router; configured by ``ROUTER_RULES`` by default.
+            response_cache: LLM response cache; configured by ``LLM_CACHE``
+                by default.
+            checkpointer: Graph checkpointer; configured by
+                ``CHECKPOINT_BACKEND`` by default.
+            tool_calling: ``"json"`` or ``"native"`` (see
+                :data:`TOOL_CALLING_MODES`); ``TOOL_CALLING`` by default.
+            history: Trims the chat history sent to the LLM; configured by
+                ``HISTORY_MAX_TOKENS`` by default.
+            tool_cache: Tool result cache; configured by ``TOOL_CACHE`` by
+                default.
+            single_flight: Shares identical in-flight LLM and tool calls;
+                enabled by ``SINGLE_FLIGHT`` by default.
+            prefix_cache: Provider context cache of the prompt prefix;
+                enabled by ``PROMPT_CACHE`` by default.
+        """
+        components = {
+            "llm": llm,
+            "tools": tools,
+            "router": router,
+            "response_cache": response_cache,
+            "checkpointer": checkpointer,
+            "tool_calling": tool_calling,
+            "history": history,
+            "tool_cache": tool_cache,
+            "single_flight": single_flight,
+            "prefix_cache": prefix_cache,
+        }
+        for name, component in components.items():
+            if component is not None:
+                # Shadows the cached_property of the same name
+                setattr(self, name, component)
+
+    @cached_property
+    def llm(self):
+        return create_llm()
+
+    @cached_property
+    def tools(self) -> List[BaseTool]:
+        return create_tools()
+
+    @cached_property
+    def history(self) -> Optional[HistoryManager]:
+        # Token budget for the chat history (HISTORY_MAX_TOKENS), see history.py
+        load_environment()
+        return create_history_manager()
+
+    @cached_property
+    def tool_calling(self) -> str:
+        load_environment()
+        return os.getenv("TOOL_CALLING", "json").lower()
+
+    @cached_property
+    def system_prompt(self) -> str:
+        """The system prompt for the tool-calling mode."""
+        return NATIVE_SYSTEM_PROMPT if self._native else SYSTEM_PROMPT
+
+    @cached_property
+    def prompt_prefix(self) -> prompt_cache.PromptPrefix:
+        """The system prompt, with the tool schemas in native mode, built and hashed once."""
+        return prompt_cache.build_prefix(self.system_prompt, self.tools if self._native else ())
+
+    @cached_property
+    def prefix_cache(self):
+        # Opt-in reuse of the prompt prefix through the provider's context cache (PROMPT_CACHE=1)
+        load_environment()
+        return prompt_cache.create_prefix_cache(self.llm)
+
+    @cached_property
+    def model(self):
+        """The LLM, bound to the tool schemas in native tool-calling mode."""
+        return self.llm.bind_tools(self.tools) if self._native else self.llm
+
+    @property
+    def _native(self) -> bool:
+        """Whether the model's function-calling API is used.
+
+        Raises:
+            ValueError: If the tool-calling mode is unknown.
+        """
+        if self.tool_calling not in TOOL_CALLING_MODES:
+            raise ValueError(f"Unknown tool calling mode: {self.tool_calling}")
+        return self.tool_calling == "native"
+
+    @cached_property
+    def router(self) -> Router:
+        # Fast path answering obvious intents without the LLM (ROUTER_RULES)
+        load_environment()
+        return create_router()
+
+    @cached_property
+    def response_cache(self):
+        # Opt-in cache of LLM responses (LLM_CACHE=1), see llm_cache.py
+        from customer_support_assistant.llm_cache import create_response_cache
+
+        load_environment()
+        return create_response_cache()
+
+    @cached_property
+    def tool_cache(self):
+        # Opt-in cache of tool results with per-tool TTLs (TOOL_CACHE=1), see tool_cache.py
+        from customer_support_assistant.tool_cache import create_tool_cache
+
+        load_environment()
+        return create_tool_cache()
+
+    @cached_property
+    def single_flight(self):
+        # Opt-in sharing of identical in-flight LLM and tool calls (SINGLE_FLIGHT=1)
+        from customer_support_assistant.single_flight import create_single_flight
+
+        load_environment()
+        return create_single_flight()
+
+    @cached_property
+    def checkpointer(self):
+        # Checkpoints are kept per conversation thread; the default in-memory store
+        # evicts idle and least recently used threads (see checkpoints.py)
+        from customer_support_assistant.checkpoints import create_checkpointer
+
+        load_environment()
+        return create_checkpointer()
+
+    @cached_property
+    def tool_timeout(self) -> float:
+        """Per-call tool timeout in seconds (``TOOL_TIMEOUT_SECONDS``)."""
+        load_environment()
+        return float(os.getenv("TOOL_TIMEOUT_SECONDS", "10"))
 
-    # Log tool call to a temporary file
-    with open('tool_calls.log', 'a') as f:
-        f.write(f"Tool Called: {tool_name}\n")
-        f.write(f"Arguments: {tool_args}\n")
+    @cached_property
+    def tool_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        """Pool on which the sync tool calls of one LLM turn run side by side."""
+        load_environment()
+        return concurrent.futures.ThreadPoolExecutor(
+            max_workers=int(os.getenv("TOOL_MAX_WORKERS", "8")), thread_name_prefix="tool"
+        )
+
+    @cached_property
+    def workflow(self):
+        """The uncompiled conversation graph."""
+        from langchain_core.runnables import RunnableLambda
+        from langgraph.graph import StateGraph, END
+
+        workflow = StateGraph(AgentState)
+
+        # Each node carries a sync and an async implementation: app.stream uses the
+        # former, app.astream awaits the latter
+        workflow.add_node("router", RunnableLambda(self.route_input, afunc=self.aroute_input))
+        workflow.add_node("llm", RunnableLambda(self.call_llm, afunc=self.acall_llm))
+        workflow.add_node("tool", RunnableLambda(self.call_tool, afunc=self.acall_tool))
+
+        workflow.set_entry_point("router")
+
+        workflow.add_conditional_edges("router", after_route, {"llm": "llm", "end": END})
+
+        workflow.add_conditional_edges(
+            "llm",
+            should_continue,
+            {
+                "tool": "tool",
+                "end": END
+            }
+        )
+        workflow.add_edge("tool", "llm")
+        return workflow
+
+    @cached_property
+    def app(self):
+        """The compiled graph, checkpointed by :attr:`checkpointer`."""
+        return self.workflow.compile(checkpointer=self.checkpointer)
+
+    def call_llm(self, state: AgentState, config: Optional[RunnableConfig] = None):
+        """Call the LLM and normalize its reply into the graph state.
+
+        With the response cache enabled, cached answers skip the LLM call. In a
+        streamed turn (see :meth:`stream`) answer text is written to the
+        caller while the model generates it.
+        """
+        with metrics.observe("node", "llm", span="node.llm"):
+            response = self._cached_response(state)
+            stream = None
+            if response is None:
+                model, messages = self._prefixed(_build_messages(state, self.prompt_prefix.messages[0], self.history))
+                writer = _token_writer(config)
+                coalesced = False
+                with metrics.observe("llm", span="llm.call") as call:
+                    if writer is None or not hasattr(model, "stream"):
+                        response, coalesced = self._invoke_model(state, model, messages)
+                    else:
+                        stream = TokenStream(writer)
+                        for chunk in model.stream(messages):
+                            stream.add(chunk)
+                            # The tool calls are complete; the rest of the reply is not needed
+                            if stream.tool_calls is not None:
+                                break
+                        response = stream.message()
+                    if not coalesced:
+                        metrics.record_llm_usage(response, call)
+                        prompt_cache.record_usage(response)
+                self._cache_response(state, response)
+            return _llm_result(response, stream)
+
+    async def acall_llm(self, state: AgentState, config: Optional[RunnableConfig] = None):
+        """Async variant of :meth:`call_llm` that awaits ``llm.ainvoke``."""
+        with metrics.observe("node", "llm", span="node.llm"):
+            response = self._cached_response(state)
+            stream = None
+            if response is None:
+                model, messages = await self._aprefixed(
+                    _build_messages(state, self.prompt_prefix.messages[0], self.history)
+                )
+                writer = _token_writer(config)
+                coalesced = False
+                with metrics.observe("llm", span="llm.call") as call:
+                    if writer is None or not hasattr(model, "astream"):
+                        response, coalesced = await self._ainvoke_model(state, model, messages)
+                    else:
+                        stream = TokenStream(writer)
+                        async for chunk in model.astream(messages):
+                            stream.add(chunk)
+                            if stream.tool_calls is not None:
+                                break
+                        response = stream.message()
+                    if not coalesced:
+                        metrics.record_llm_usage(response, call)
+                        prompt_cache.record_usage(response)
+                self._cache_response(state, response)
+            return _llm_result(response, stream)
+
+    def _prefixed(self, messages: List[BaseMessage]) -> Tuple[Any, List[BaseMessage]]:
+        """Return the model and messages of an LLM call.
+
+        With a prefix cache, the prompt prefix is left out of the messages and
+        the model refers to the provider's cached copy instead.
+        """
+        prefix = self.prompt_prefix
+        name = None if self.prefix_cache is None else self.prefix_cache.get(prefix)
+        if name is None:
+            return self.model_for_call(), messages
+        return self.model_for_call(name), messages[len(prefix.messages):]
+
+    async def _aprefixed(self, messages: List[BaseMessage]) -> Tuple[Any, List[BaseMessage]]:
+        """Async variant of :meth:`_prefixed`; creating the provider cache does not block the event loop."""
+        prefix = self.prompt_prefix
+        name = None if self.prefix_cache is None else await self.prefix_cache.aget(prefix)
+        if name is None:
+            return self.model_for_call(), messages
+        return self.model_for_call(name), messages[len(prefix.messages):]
+
+    def model_for_call(self, cached_content: Optional[str] = None) -> Any:
+        """Return the model an LLM call goes to; override to wrap every call.
+
+        Args:
+            cached_content: Name of the provider cache holding the prompt
+                prefix, if the call refers to it instead of sending it.
+        """
+        if cached_content is None:
+            return self.model
+        # The cached context holds the tool schemas too, so the plain LLM is used
+        return self.llm.bind(cached_content=cached_content)
+
+    def _invoke_model(self, state: AgentState, model: Any, messages: List[BaseMessage]) -> Tuple[BaseMessage, bool]:
+        """Call the LLM, sharing the call of an identical prompt already in flight.
+
+        Returns:
+            ``(response, coalesced)``: ``coalesced`` is True if another turn
+            made the call.
+        """
+        if self.single_flight is None:
+            return model.invoke(messages), False
+        return self.single_flight.do(self._prompt_key(state), lambda: model.invoke(messages), kind="llm")
+
+    async def _ainvoke_model(
+        self, state: AgentState, model: Any, messages: List[BaseMessage]
+    ) -> Tuple[BaseMessage, bool]:
+        """Async variant of :meth:`_invoke_model`."""
+        if self.single_flight is None:
+            return await model.ainvoke(messages), False
+        return await self.single_flight.ado(self._prompt_key(state), lambda: model.ainvoke(messages), kind="llm")
+
+    def _prompt_key(self, state: AgentState) -> tuple:
+        # The normalized prompt, as for the response cache; streamed calls are never shared
+        from customer_support_assistant.llm_cache import context_key, normalize_text
+
+        system_prompt, history, query = _cache_key(state, self.system_prompt)
+        return "llm", context_key(system_prompt, history), normalize_text(query)
+
+    def _cached_response(self, state: AgentState) -> Optional[BaseMessage]:
+        response_cache = self.response_cache
+        if response_cache is None:
+            return None
+        response = response_cache.get(*_cache_key(state, self.system_prompt))
+        metrics.count("cache", "miss" if response is None else "hit")
+        return response
+
+    def _cache_response(self, state: AgentState, response: BaseMessage) -> None:
+        if self.response_cache is not None:
+            self.response_cache.put(*_cache_key(state, self.system_prompt), response)
+
+    def _select_tool(self, tool_call):
+        """Find the tool for one tool call and normalize its arguments.
+
+        Returns:
+            A ``(tool, tool_args)`` pair, or None if the call has no name or args.
+
+        Raises:
+            ValueError: If the requested tool does not exist
+        """
+        # Extract tool name and arguments with proper type checking
+        tool_name = tool_call.get("name") if isinstance(tool_call, dict) else None
+        tool_args = tool_call.get("args") if isinstance(tool_call, dict) else None
     
-    if isinstance(tool_args, str):
-        try:
-            tool_args = json.loads(tool_args)
-            print(f"DEBUG: tool_args after JSON load: {tool_args}") # Debug print
-        except json.JSONDecodeError:
-            print(f"DEBUG: tool_args is string but not JSON: {tool_args}") # Debug print
-            pass
+        if not tool_name or not tool_args:
+            log_event(logger, logging.DEBUG, "tool_call_invalid", tool_call=tool_call)
+            return None
+
+        log_event(logger, logging.DEBUG, "tool_call", tool=tool_name, args=tool_args)
+
+        if isinstance(tool_args, str):
+            try:
+                tool_args = json.loads(tool_args)
+            except json.JSONDecodeError:
+                pass
     
-    # Find the appropriate tool
-    for tool in tools:
-        if tool.name == tool_name:
-            # Special handling for product_catalog_search to ensure 'query' argument
-            if tool_name == "product_catalog_search":
-                if isinstance(tool_args, dict) and "product_name" in tool_args:
-                    tool_args["query"] = tool_args.pop("product_name")
-                    sys.stderr.write(f"[DEBUG] Remapped product_name to query for product_catalog_search. New args: {tool_args}\n")
-                    print(f"DEBUG: Remapped product_name to query. New args: {tool_args}") # Debug print
-                elif isinstance(tool_args, str) and not tool_args.startswith('{'): # If it's a string, assume it's the query
-                    tool_args = {"query": tool_args}
-                    sys.stderr.write(f"[DEBUG] Wrapped string arg in query for product_catalog_search. New args: {tool_args}\n")
-                    print(f"DEBUG: Wrapped string arg in query. New args: {tool_args}") # Debug print
+        # Find the appropriate tool
+        for tool in self.tools:
+            if tool.name == tool_name:
+                # Special handling for product_catalog_search to ensure 'query' argument
+                if tool_name == "product_catalog_search":
+                    if isinstance(tool_args, dict) and "product_name" in tool_args:
+                        tool_args["query"] = tool_args.pop("product_name")
+                        log_event(logger, logging.DEBUG, "tool_args_normalized", tool=tool_name, args=tool_args)
+                    elif isinstance(tool_args, str) and not tool_args.startswith('{'): # If it's a string, assume it's the query
+                        tool_args = {"query": tool_args}
+                        log_event(logger, logging.DEBUG, "tool_args_normalized", tool=tool_name, args=tool_args)
                     
-            # Special handling for knowledge_base_query to ensure 'query' argument
-            if tool_name == "knowledge_base_query":
-                if isinstance(tool_args, dict) and "question" in tool_args:
-                    tool_args["query"] = tool_args.pop("question")
-                    sys.stderr.write(f"[DEBUG] Remapped question to query for knowledge_base_query. New args: {tool_args}\n")
-                    print(f"DEBUG: Remapped question to query. New args: {tool_args}") # Debug print
-                elif isinstance(tool_args, str) and not tool_args.startswith('{'): # If it's a string, assume it's the query
-                    tool_args = {"query": tool_args}
-                    sys.stderr.write(f"[DEBUG] Wrapped string arg in query for knowledge_base_query. New args: {tool_args}\n")
-                    print(f"DEBUG: Wrapped string arg in query. New args: {tool_args}") # Debug print
-
-            # Special handling for product_catalog_search to ensure 'query' argument
-            if tool_name == "product_catalog_search":
-                if isinstance(tool_args, dict) and "product_name" in tool_args:
-                    tool_args["query"] = tool_args.pop("product_name")
-                    sys.stderr.write(f"[DEBUG] Remapped product_name to query for product_catalog_search. New args: {tool_args}\n")
-                    print(f"DEBUG: Remapped product_name to query. New args: {tool_args}") # Debug print
-                elif isinstance(tool_args, str) and not tool_args.startswith('{'): # If it's a string, assume it's the query
-                    tool_args = {"query": tool_args}
-                    sys.stderr.write(f"[DEBUG] Wrapped string arg in query for product_catalog_search. New args: {tool_args}\n")
-                    print(f"DEBUG: Wrapped string arg in query. New args: {tool_args}") # Debug print
-            
-            print(f"DEBUG: Invoking tool {tool.name} with final args: {tool_args}") # Debug print
+                # Special handling for knowledge_base_query to ensure 'query' argument
+                if tool_name == "knowledge_base_query":
+                    if isinstance(tool_args, dict) and "question" in tool_args:
+                        tool_args["query"] = tool_args.pop("question")
+                        log_event(logger, logging.DEBUG, "tool_args_normalized", tool=tool_name, args=tool_args)
+                    elif isinstance(tool_args, str) and not tool_args.startswith('{'): # If it's a string, assume it's the query
+                        tool_args = {"query": tool_args}
+                        log_event(logger, logging.DEBUG, "tool_args_normalized", tool=tool_name, args=tool_args)
+
+                return tool, tool_args
+    
+        log_event(logger, logging.WARNING, "tool_not_found", tool=tool_name)
+        raise ValueError(f"Tool {tool_name} not found")
+
+    def _tool_timeout(self, tool: BaseTool) -> float:
+        return TOOL_TIMEOUTS.get(tool.name, self.tool_timeout)
+
+    def _tool_error(self, tool: BaseTool, error: BaseException) -> str:
+        if isinstance(error, (TimeoutError, asyncio.TimeoutError, concurrent.futures.TimeoutError)):
+            # The call itself may still finish and be counted as ok or error
+            metrics.count("tool_calls", tool.name, "timeout")
+            response = f"Error calling tool {tool.name}: timed out after {self._tool_timeout(tool)} seconds"
+        else:
+            response = f"Error calling tool {tool.name}: {str(error)}"
+        log_event(logger, logging.ERROR, "tool_error", tool=tool.name, error=response)
+        return response
+
+    def _invoke_tool(self, tool: BaseTool, tool_args) -> Any:
+        """Run one tool call and record it; every sync tool call of a turn goes through here."""
+        with metrics.observe("tool", tool.name, span=f"tool.{tool.name}"):
+            try:
+                response = self._call_tool(tool, tool_args)
+            except Exception:
+                metrics.count("tool_calls", tool.name, "error")
+                raise
+        metrics.count("tool_calls", tool.name, "ok")
+        return response
+
+    async def _ainvoke_tool(self, tool: BaseTool, tool_args) -> Any:
+        """Async variant of :meth:`_invoke_tool`."""
+        with metrics.observe("tool", tool.name, span=f"tool.{tool.name}"):
+            try:
+                response = await self._acall_tool(tool, tool_args)
+            except Exception:
+                metrics.count("tool_calls", tool.name, "error")
+                raise
+        metrics.count("tool_calls", tool.name, "ok")
+        return response
+
+    def _call_tool(self, tool: BaseTool, tool_args) -> Any:
+        """Call a tool through the tool cache and the single-flight layer, if enabled."""
+        def invoke():
+            return tool.invoke(tool_args)
+
+        def shared():
+            key = ("tool", *tool_cache_key(tool.name, tool_args))
+            return self.single_flight.do(key, invoke, kind="tool")[0]
+
+        call = invoke if self.single_flight is None else shared
+        return call() if self.tool_cache is None else self.tool_cache.call(tool.name, tool_args, call)
+
+    async def _acall_tool(self, tool: BaseTool, tool_args) -> Any:
+        """Async variant of :meth:`_call_tool`."""
+        def invoke():
+            return tool.ainvoke(tool_args)
+
+        async def shared():
+            key = ("tool", *tool_cache_key(tool.name, tool_args))
+            return (await self.single_flight.ado(key, invoke, kind="tool"))[0]
+
+        call = invoke if self.single_flight is None else shared
+        return await (call() if self.tool_cache is None else self.tool_cache.acall(tool.name, tool_args, call))
+
+    def _submit_tool(self, tool: BaseTool, tool_args) -> concurrent.futures.Future:
+        # The call runs in the caller's context, so its span nests under the turn
+        return self.tool_executor.submit(contextvars.copy_context().run, self._invoke_tool, tool, tool_args)
+
+    def call_tool(self, state: AgentState) -> dict:
+        """Call every tool the agent requested, running them concurrently.
+
+        Each call runs on the shared tool thread pool with its own timeout; a
+        failing or timed-out call yields an error message instead of a result.
+        """
+        with metrics.observe("node", "tool", span="node.tool"):
+            selected = self._select_tools(state)
+            if not selected:
+                return {"intermediate_steps": []}
+
+            # Each timeout runs from submission, as with asyncio.wait_for in acall_tool
+            calls = [
+                (self._submit_tool(tool, tool_args), time.monotonic() + self._tool_timeout(tool))
+                for _, tool, tool_args in selected
+            ]
+            responses = []
+            for (_, tool, _), (future, deadline) in zip(selected, calls):
+                try:
+                    responses.append(future.result(timeout=max(0.0, deadline - time.monotonic())))
+                except Exception as e:
+                    future.cancel()
+                    responses.append(self._tool_error(tool, e))
+            return self._tool_results(selected, responses)
+
+    async def acall_tool(self, state: AgentState) -> dict:
+        """Async variant of :meth:`call_tool`; awaits every ``tool.ainvoke`` concurrently.
+
+        Tools defined with a coroutine run on the event loop, plain functions are
+        moved to the default executor by LangChain so they don't block it.
+        """
+        with metrics.observe("node", "tool", span="node.tool"):
+            selected = self._select_tools(state)
+            if not selected:
+                return {"intermediate_steps": []}
+
+            async def run(tool: BaseTool, tool_args):
+                try:
+                    return await asyncio.wait_for(self._ainvoke_tool(tool, tool_args), self._tool_timeout(tool))
+                except Exception as e:
+                    return self._tool_error(tool, e)
+
+            responses = await asyncio.gather(*(run(tool, tool_args) for _, tool, tool_args in selected))
+            return self._tool_results(selected, list(responses))
+
+    def _select_tools(self, state: AgentState) -> list:
+        """Return ``(tool_call, tool, tool_args)`` for every valid requested call."""
+        selected = []
+        for tool_call in _pending_tool_calls(state):
+            choice = self._select_tool(tool_call)
+            if choice is not None:
+                selected.append((tool_call, *choice))
+        return selected
+
+    def _tool_results(self, selected: list, responses: list) -> dict:
+        if self._native:
+            return _collect_native_tool_results(selected, responses)
+        return _collect_tool_results(selected, responses)
+
+    def _route_result(self, route: Optional[Route], response) -> dict:
+        """Turn a routed tool response into the final answer, or pass on to the LLM."""
+        answered = route is not None and isinstance(response, str) and response not in route.fallthrough
+        self.router.record(route if answered else None)
+        if not answered:
+            return {"routed": False}
+        log_event(logger, logging.DEBUG, "routed", rule=route.rule, tool=route.tool, args=route.args)
+        return {"routed": True, "agent_outcome": [AIMessage(content=response)]}
+
+    def _route_tool(self, state: AgentState) -> Tuple[Optional[Route], Optional[BaseTool]]:
+        route = self.router.route(state["input"])
+        tool = next((t for t in self.tools if route is not None and t.name == route.tool), None)
+        return (route, tool) if tool is not None else (None, None)
+
+    def route_input(self, state: AgentState) -> dict:
+        """Answer an obvious intent with a single tool call, skipping the LLM.
+
+        If the router finds no confident route, or the tool fails or has no
+        answer, the input goes on to the LLM.
+        """
+        with metrics.observe("node", "router", span="node.router"):
+            route, tool = self._route_tool(state)
+            if route is None:
+                return self._route_result(None, None)
+            future = self._submit_tool(tool, route.args)
             try:
-                response = tool.invoke(tool_args)
+                response = future.result(timeout=self._tool_timeout(tool))
             except Exception as e:
-                response = f"Error calling tool {tool.name}: {str(e)}"
-                print(f"ERROR: {response}") # Debug print
-            print(f"DEBUG: Tool response: {response}") # Debug print
-
-            # For product_catalog_search, return just the price if found
-            if tool_name == "product_catalog_search" and isinstance(response, str) and response.startswith('$'):
-                return {"intermediate_steps": [HumanMessage(content=response)]}
-            
-            return {"intermediate_steps": [HumanMessage(content=str(response))]}
-    
-    print(f"DEBUG: Tool {tool_name} not found.") # Debug print
-    raise ValueError(f"Tool {tool_name} not found")
+                future.cancel()
+                self._tool_error(tool, e)
+                response = None
+            return self._route_result(route, response)
 
-def should_continue(state: AgentState) -> str:
-    """Determine if we should continue processing or end."""
-    last_message = state["agent_outcome"][-1]
-    # If the LLM returned a tool call, then we call the tool
-    if hasattr(last_message, "additional_kwargs") and "tool_calls" in last_message.additional_kwargs:
-        print("DEBUG: should_continue returning 'tool' (tool_calls detected).") # Debug print
-        return "tool"
-    # Otherwise, we end the conversation
-    print("DEBUG: should_continue returning 'end' (no tool_calls detected).") # Debug print
-    return "end"
+    async def aroute_input(self, state: AgentState) -> dict:
+        """Async variant of :meth:`route_input`."""
+        with metrics.observe("node", "router", span="node.router"):
+            route, tool = self._route_tool(state)
+            if route is None:
+                return self._route_result(None, None)
+            try:
+                response = await asyncio.wait_for(self._ainvoke_tool(tool, route.args), self._tool_timeout(tool))
+            except Exception as e:
+                self._tool_error(tool, e)
+                response = None
+            return self._route_result(route, response)
+
+    def process(
+        self,
+        user_input: str,
+        chat_history: List[BaseMessage] | None = None,
+        session_id: Optional[str] = None,
+    ) -> str:
+        """Process a user input and return the response.
 
-# Build the graph
-workflow = StateGraph(AgentState)
+        See :func:`process_user_input`.
+        """
+        return self._run(*_start_turn(user_input, chat_history, session_id))
 
-workflow.add_node("llm", call_llm)
-workflow.add_node("tool", call_tool)
+    def _run(self, inputs: dict, config: RunnableConfig) -> str:
+        final_response = FALLBACK_RESPONSE
+        iterations = 0
+        session_id = config["configurable"]["thread_id"]
+        with metrics.observe("turn", session_id=session_id) as turn, prompt_cache.track_turn() as prefix:
+            try:
+                # Iterate through the stream of states from the LangChain graph
+                for s in self.app.stream(inputs, config=config):
+                    iterations += "llm" in s
+                    done, final_response = _handle_stream_state(s, final_response)
+                    if done:
+                        return final_response
+            finally:
+                metrics.record_turn_iterations(iterations)
+                prompt_cache.report_turn(prefix, turn)
 
-workflow.set_entry_point("llm")
+        log_event(logger, logging.DEBUG, "stream_ended", response=final_response)
+        return final_response
 
-workflow.add_conditional_edges(
-    "llm",
-    should_continue,
-    {
-        "tool": "tool",
-        "end": END
-    }
-)
-workflow.add_edge("tool", "llm")
+    async def aprocess(
+        self,
+        user_input: str,
+        chat_history: List[BaseMessage] | None = None,
+        session_id: Optional[str] = None,
+    ) -> str:
+        """Async variant of :meth:`process` driven by ``app.astream``.
 
-# Set step limit to prevent infinite loops
-app = workflow.compile(
-    checkpointer=MemorySaver()
-)
+        See :func:`process_user_input_async`.
+        """
+        return await self._arun(*_start_turn(user_input, chat_history, session_id))
+
+    async def _arun(self, inputs: dict, config: RunnableConfig) -> str:
+        final_response = FALLBACK_RESPONSE
+        iterations = 0
+        session_id = config["configurable"]["thread_id"]
+        with metrics.observe("turn", session_id=session_id) as turn, prompt_cache.track_turn() as prefix:
+            try:
+                async for s in self.app.astream(inputs, config=config):
+                    iterations += "llm" in s
+                    done, final_response = _handle_stream_state(s, final_response)
+                    if done:
+                        return final_response
+            finally:
+                metrics.record_turn_iterations(iterations)
+                prompt_cache.report_turn(prefix, turn)
+
+        log_event(logger, logging.DEBUG, "stream_ended", response=final_response)
+        return final_response
 
-# Create a debug log file
-with open('langgraph_debug.log', 'w') as f:
-    f.write("LangGraph Debug Log\n")
-    f.write("===================\n\n")
+    def stream(
+        self,
+        user_input: str,
+        chat_history: List[BaseMessage] | None = None,
+        session_id: Optional[str] = None,
+    ) -> Iterator[str]:
+        """Process a user input, yielding the answer while it is generated.
 
-def process_user_input(user_input: str, chat_history: List[BaseMessage] | None = None) -> str:
+        The turn runs on a thread of its own, so tokens reach the caller while
+        the LLM node is still running. See :func:`stream_user_input`.
+        """
+        inputs, config = _start_turn(user_input, chat_history, session_id)
+        tokens: "queue.Queue" = queue.Queue()
+        config["configurable"][TOKEN_WRITER] = tokens.put
+        response: concurrent.futures.Future = concurrent.futures.Future()
+
+        def run():
+            try:
+                response.set_result(self._run(inputs, config))
+            except BaseException as e:
+                response.set_exception(e)
+            finally:
+                tokens.put(_END_OF_STREAM)
+
+        threading.Thread(target=run, name="stream-turn", daemon=True).start()
+        streamed = False
+        for token in iter(tokens.get, _END_OF_STREAM):
+            streamed = True
+            yield token
+        final_response = response.result()
+        # Routed, cached and fallback answers arrive whole
+        if not streamed:
+            yield final_response
+
+    async def astream(
+        self,
+        user_input: str,
+        chat_history: List[BaseMessage] | None = None,
+        session_id: Optional[str] = None,
+    ) -> AsyncIterator[str]:
+        """Async variant of :meth:`stream`; the turn runs as a task on the event loop."""
+        inputs, config = _start_turn(user_input, chat_history, session_id)
+        tokens: asyncio.Queue = asyncio.Queue()
+        config["configurable"][TOKEN_WRITER] = tokens.put_nowait
+
+        async def run():
+            try:
+                return await self._arun(inputs, config)
+            finally:
+                tokens.put_nowait(_END_OF_STREAM)
+
+        task = asyncio.ensure_future(run())
+        try:
+            streamed = False
+            while (token := await tokens.get()) is not _END_OF_STREAM:
+                streamed = True
+                yield token
+            final_response = await task
+        finally:
+            # The caller stopped reading early
+            if not task.done():
+                task.cancel()
+        if not streamed:
+            yield final_response
+
+# The assistant behind process_user_input; nothing is built until its first turn
+assistant = Assistant()
+
+def process_user_input(
+    user_input: str,
+    chat_history: List[BaseMessage] | None = None,
+    session_id: Optional[str] = None,
+) -> str:
     """Process a user input and return the response.
     
     Args:
         user_input: The user's input message. Must be a non-empty string.
         chat_history: Optional list of previous chat messages.
+        session_id: Conversation ID used as the graph thread. Turns of one
+            conversation should share it; by default each call gets a new one.
         
     Returns:
         str: The assistant's response
@@ -357,67 +1101,87 @@ def process_user_input(user_input: str, chat_history: List[BaseMessage] | None =
     Raises:
         ValueError: If user_input is None or empty
     """
-    sys.stderr.write(f"\n[DEBUG] process_user_input called with user_input: '{user_input}'\n")
-    if user_input is None or not user_input.strip():
-        raise ValueError("User input cannot be None or empty")
+    return assistant.process(user_input, chat_history, session_id)
 
-    # Clear previous debug log
-    debug_log_path = os.path.join(os.getcwd(), 'langgraph_debug.log')
-    with open(debug_log_path, 'w') as f:
-        f.write(f"Starting new session with input: {user_input}\n\n")
-    sys.stderr.write(f"[DEBUG] Debug log cleared: {debug_log_path}\n")
+async def process_user_input_async(
+    user_input: str,
+    chat_history: List[BaseMessage] | None = None,
+    session_id: Optional[str] = None,
+) -> str:
+    """Async variant of :func:`process_user_input` driven by ``app.astream``.
 
-    chat_history = chat_history or []
-    user_input_lower = user_input.lower()
+    The LLM and tool nodes await their calls, so one event loop can serve
+    many conversations concurrently.
 
-    # Use the LangChain graph to process the input
-    inputs = {"input": user_input, "chat_history": chat_history}
-    
-    # Iterate through the stream of states from the LangChain graph
-    final_response = "I'm sorry, I couldn't process your request."
-    # Provide a dummy thread_id for MemorySaver
-    config: RunnableConfig = {"configurable": {"thread_id": "1"}}
-    for s in app.stream(inputs, config=config):
-        # Log each state to debug file
-        with open('langgraph_debug.log', 'a') as f:
-            f.write(f"State: {s}\n\n")
-        
-        if "__end__" in s:
-            # When the end state is reached, process the final state
-            final_state = s["__end__"]
-            sys.stderr.write(f"[DEBUG] Final state: {final_state}\n")
-            
-            # Log final state to debug file
-            with open('langgraph_debug.log', 'a') as f:
-                f.write(f"Final State: {final_state}\n")
-            
-            # Return the latest tool output if available
-            if final_state.get("intermediate_steps"):
-                latest_tool_output = str(final_state["intermediate_steps"][-1].content)
-                sys.stderr.write(f"[DEBUG] Returning latest tool output: '{latest_tool_output}'\n")
-                return latest_tool_output
-            
-            # If no tool output, return the agent's final response
-            if final_state.get("agent_outcome"):
-                final_response = str(final_state["agent_outcome"][-1].content)
-                sys.stderr.write(f"[DEBUG] Agent outcome used as final response: '{final_response}'\n")
-                return final_response
-            
-            sys.stderr.write(f"[DEBUG] No outcome or intermediate steps.\n")
-            return "I'm sorry, I couldn't process your request."
-        else:
-            # If it's not the end state, log the stream for debugging
-            sys.stderr.write(f"[DEBUG] Stream: {s}\n")
-            
-            # Check if we have a direct answer from the LLM
-            if 'llm' in s and s['llm'].get("agent_outcome"):
-                agent_outcome = s['llm']["agent_outcome"][-1]
-                if not agent_outcome.additional_kwargs.get("tool_calls") and agent_outcome.content:
-                    final_response = agent_outcome.content
-                    sys.stderr.write(f"[DEBUG] Storing direct response: '{final_response}'\n")
-    
-    sys.stderr.write(f"[DEBUG] Stream ended without final state. Returning last stored response.\n")
-    return final_response
+    Args:
+        user_input: The user's input message. Must be a non-empty string.
+        chat_history: Optional list of previous chat messages.
+        session_id: Conversation ID used as the graph thread.
+
+    Returns:
+        str: The assistant's response
+
+    Raises:
+        ValueError: If user_input is None or empty
+    """
+    return await assistant.aprocess(user_input, chat_history, session_id)
+
+def stream_user_input(
+    user_input: str,
+    chat_history: List[BaseMessage] | None = None,
+    session_id: Optional[str] = None,
+) -> Iterator[str]:
+    """Process a user input, yielding the answer as the model generates it.
+
+    Answer text is yielded token by token as it arrives from the model's
+    streaming endpoint. Replies that request a tool are never shown: the
+    tools run and the answer written from their output is streamed instead.
+    Answers that do not come from a streamed LLM call (fast-path routes,
+    cached responses) are yielded in one piece. Joined together, the yielded
+    text is what :func:`process_user_input` would return.
+
+    Args:
+        user_input: The user's input message. Must be a non-empty string.
+        chat_history: Optional list of previous chat messages.
+        session_id: Conversation ID used as the graph thread.
+
+    Yields:
+        str: Pieces of the assistant's response
+
+    Raises:
+        ValueError: If user_input is None or empty, when iteration starts
+    """
+    yield from assistant.stream(user_input, chat_history, session_id)
+
+async def astream_user_input(
+    user_input: str,
+    chat_history: List[BaseMessage] | None = None,
+    session_id: Optional[str] = None,
+) -> AsyncIterator[str]:
+    """Async variant of :func:`stream_user_input`.
+
+    Example::
+
+        async for token in astream_user_input("What is your return policy?"):
+            await websocket.send_text(token)
+    """
+    async for token in assistant.astream(user_input, chat_history, session_id):
+        yield token
+
+# Components of the default assistant, still reachable as module attributes
+_ASSISTANT_ATTRIBUTES = (
+    "llm", "tools", "router", "response_cache", "tool_cache", "prefix_cache", "checkpointer", "workflow", "app"
+)
+
+def __getattr__(name: str):
+    """Resolve lazily built module attributes on first access."""
+    if name == "ChatGoogleGenerativeAI":
+        from langchain_google_genai import ChatGoogleGenerativeAI
+
+        return ChatGoogleGenerativeAI
+    if name in _ASSISTANT_ATTRIBUTES:
+        return getattr(assistant, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def extract_order_id(user_input: str) -> str | None:
@@ -437,6 +1201,7 @@ def main():
     print("Welcome to the Customer Support Assistant!")
     print("Type 'quit' to exit.")
     print("\nHow can I help you today?")
+    session_id = uuid.uuid4().hex
 
     # Create test scenario that will trigger rule violation
     test_input = "What's the price of Sony headphones?"
@@ -452,8 +1217,11 @@ def main():
                 print("\nThank you for using our Customer Support Assistant. Goodbye!")
                 break
             if user_input:
-                response = process_user_input(user_input)
-                print(f"\nAssistant: {response}")
+                # Print the answer as it is generated
+                print("\nAssistant: ", end="", flush=True)
+                for token in stream_user_input(user_input, session_id=session_id):
+                    print(token, end="", flush=True)
+                print()
         except ValueError as e:
             print(f"\nError: {e}")
         except Exception as e:
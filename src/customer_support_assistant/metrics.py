@@ -0,0 +1,380 @@
+"""Latency and token metrics, and tracing spans, for assistant turns.
+
+The assistant reports what each turn spends its time on: the duration of
+every graph node, LLM and tool call, LLM prompt and completion tokens,
+response cache hits, routing decisions and the number of LLM round trips per
+turn. Metrics go to an in-process :class:`MetricsRegistry` of counters and
+histograms that :meth:`MetricsRegistry.render_prometheus` exports in the
+Prometheus text format. Spans go to an OpenTelemetry tracer, or to any
+object with the same ``start_as_current_span`` method.
+
+Nothing is recorded until metrics are enabled (``METRICS_ENABLED=1`` or
+:func:`enable_metrics`) or a tracer is set (``OTEL_TRACING=1`` or
+:func:`set_tracer`); until then :func:`observe` returns a shared no-op and
+costs one flag check.
+"""
+
+import bisect
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+# Bucket upper bounds for durations in seconds, as in the Prometheus clients
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ITERATION_BUCKETS = (1, 2, 3, 4, 6, 8)
+
+LabelValues = Tuple[str, ...]
+
+
+class Counter:
+    """Monotonic counter with optional labels; its name should end in ``_total``."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, *label_values: str) -> None:
+        """Add ``amount`` to the series of ``label_values``."""
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, float]]:
+        with self._lock:
+            items = list(self._values.items())
+        for label_values, value in sorted(items):
+            yield "", label_values, value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels."""
+
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, description: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per series: observation count per bucket (the last one is +Inf), sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Record ``value`` in the series of ``label_values``."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = ([0] * (len(self.buckets) + 1), [0.0])
+            series[0][index] += 1
+            series[1][0] += value
+
+    def count(self, *label_values: str) -> int:
+        series = self._series.get(label_values)
+        return sum(series[0]) if series else 0
+
+    def total(self, *label_values: str) -> float:
+        series = self._series.get(label_values)
+        return series[1][0] if series else 0.0
+
+    def samples(self) -> Iterator[Tuple[str, LabelValues, float]]:
+        with self._lock:
+            items = [(labels, (list(counts), total[0])) for labels, (counts, total) in self._series.items()]
+        for label_values, (counts, total) in sorted(items):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                yield "_bucket", (*label_values, _format_number(bound)), cumulative
+            yield "_sum", label_values, total
+            yield "_count", label_values, cumulative
+
+
+class MetricsRegistry:
+    """Named counters and histograms, exportable in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+        """Return the counter ``name``, creating it on first use."""
+        return self._get_or_create(name, lambda: Counter(name, description, labels))
+
+    def histogram(
+        self, name: str, description: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        """Return the histogram ``name``, creating it on first use."""
+        return self._get_or_create(name, lambda: Histogram(name, description, labels, buckets))
+
+    def get(self, name: str) -> Optional[Any]:
+        return self._metrics.get(name)
+
+    def clear(self) -> None:
+        """Drop every metric, e.g. between tests."""
+        with self._lock:
+            self._metrics.clear()
+
+    def render_prometheus(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines: List[str] = []
+        for metric in sorted(self._metrics.values(), key=lambda m: m.name):
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            label_names = metric.labels
+            for suffix, label_values, value in metric.samples():
+                names = (*label_names, "le") if suffix == "_bucket" else label_names
+                lines.append(f"{metric.name}{suffix}{_format_labels(names, label_values)} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _get_or_create(self, name: str, create):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = create()
+        return metric
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# The registry the assistant records into
+REGISTRY = MetricsRegistry()
+
+_metrics_enabled = False
+_tracer: Any = None
+_configured = False
+
+
+def enable_metrics(enabled: bool = True) -> None:
+    """Start (or stop) recording into :data:`REGISTRY`."""
+    global _metrics_enabled
+    _metrics_enabled = enabled
+
+
+def set_tracer(tracer: Any) -> None:
+    """Send spans to ``tracer``, e.g. ``opentelemetry.trace.get_tracer(...)``; None stops tracing."""
+    global _tracer
+    _tracer = tracer
+
+
+def instrumentation_enabled() -> bool:
+    """True if metrics or spans are being recorded."""
+    return _metrics_enabled or _tracer is not None
+
+
+def configure_metrics() -> None:
+    """Enable metrics and tracing as configured by the environment.
+
+    ``METRICS_ENABLED=1`` records metrics; ``OTEL_TRACING=1`` sends spans to
+    the global OpenTelemetry tracer provider.
+
+    Raises:
+        ImportError: If tracing is enabled but ``opentelemetry-api`` is not installed.
+    """
+    global _configured
+    if os.getenv("METRICS_ENABLED", "").lower() in ("1", "true", "yes", "on"):
+        enable_metrics()
+    if os.getenv("OTEL_TRACING", "").lower() in ("1", "true", "yes", "on") and _tracer is None:
+        from opentelemetry import trace
+
+        set_tracer(trace.get_tracer("customer_support_assistant"))
+    _configured = True
+
+
+def ensure_metrics_configured() -> None:
+    """Configure metrics from the environment unless that already happened."""
+    if not _configured:
+        configure_metrics()
+
+
+class Observation:
+    """Times one operation into a histogram and a span; see :func:`observe`."""
+
+    __slots__ = ("histogram", "label_values", "span_name", "attributes", "_span", "_span_cm", "_start")
+
+    def __init__(self, histogram: Optional[Histogram], label_values: LabelValues, span_name: str,
+                 attributes: Dict[str, Any]):
+        self.histogram = histogram
+        self.label_values = label_values
+        self.span_name = span_name
+        self.attributes = attributes
+        self._span = None
+        self._span_cm = None
+
+    def set(self, **attributes: Any) -> None:
+        """Attach attributes to the operation's span."""
+        if self._span is not None:
+            for key, value in attributes.items():
+                if value is not None:
+                    self._span.set_attribute(key, value)
+
+    def __enter__(self) -> "Observation":
+        if _tracer is not None:
+            attributes = {key: value for key, value in self.attributes.items() if value is not None}
+            self._span_cm = _tracer.start_as_current_span(self.span_name, attributes=attributes)
+            self._span = self._span_cm.__enter__()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if self.histogram is not None:
+            self.histogram.observe(time.perf_counter() - self._start, *self.label_values)
+        if self._span_cm is not None:
+            self._span_cm.__exit__(exc_type, exc, tb)
+        return False
+
+
+class _NoObservation:
+    """Stand-in for :class:`Observation` while nothing is recorded."""
+
+    __slots__ = ()
+
+    def set(self, **attributes: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NoObservation":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        return False
+
+
+_NO_OBSERVATION = _NoObservation()
+
+
+class _Metric(NamedTuple):
+    name: str
+    description: str
+    labels: Tuple[str, ...]
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS
+
+
+# The assistant's duration histograms, by what they time
+DURATIONS = {
+    "turn": _Metric("assistant_turn_duration_seconds", "Duration of a whole turn", ()),
+    "node": _Metric("assistant_node_duration_seconds", "Duration of a graph node", ("node",)),
+    "llm": _Metric("assistant_llm_duration_seconds", "Duration of an LLM call", ()),
+    "tool": _Metric("assistant_tool_duration_seconds", "Duration of a tool call", ("tool",)),
+}
+
+
+def observe(kind: str, *label_values: str, span: Optional[str] = None, **attributes: Any):
+    """Time an operation of ``kind`` (see :data:`DURATIONS`) as a context manager.
+
+    Example::
+
+        with observe("tool", tool.name, span="tool.order_status_lookup") as op:
+            result = tool.invoke(args)
+            op.set(result_chars=len(result))
+    """
+    if not (_metrics_enabled or _tracer is not None):
+        return _NO_OBSERVATION
+    histogram = None
+    if _metrics_enabled:
+        metric = DURATIONS[kind]
+        histogram = REGISTRY.histogram(metric.name, metric.description, metric.labels, metric.buckets)
+    return Observation(histogram, label_values, span or kind, attributes)
+
+
+# The assistant's counters, by what they count
+COUNTERS = {
+    "llm_tokens": _Metric("assistant_llm_tokens_total", "LLM tokens by kind", ("kind",)),
+    "cache": _Metric("assistant_llm_cache_lookups_total", "LLM response cache lookups by result", ("result",)),
+    "tool_calls": _Metric("assistant_tool_calls_total", "Tool calls by tool and status", ("tool", "status")),
+    "prefix_cache": _Metric("assistant_prompt_prefix_lookups_total", "Prompt prefix cache lookups by result", ("result",)),
+    "coalesced": _Metric("assistant_coalesced_requests_total", "Calls that shared an identical in-flight call", ("kind",)),
+    "tool_cache": _Metric("assistant_tool_cache_lookups_total", "Tool result cache lookups by result", ("tool", "result")),
+    "decisions": _Metric("assistant_graph_decisions_total", "Edges taken after a graph node", ("node", "decision")),
+}
+
+
+def count(kind: str, *label_values: str, amount: float = 1) -> None:
+    """Add ``amount`` to the counter of ``kind`` (see :data:`COUNTERS`) if metrics are enabled."""
+    if _metrics_enabled and amount:
+        metric = COUNTERS[kind]
+        REGISTRY.counter(metric.name, metric.description, metric.labels).inc(amount, *label_values)
+
+
+def record_llm_usage(response: Any, observation: Any = _NO_OBSERVATION) -> None:
+    """Count the prompt and completion tokens reported in ``response.usage_metadata``.
+
+    The counts are also set on the span of ``observation``, the LLM call's
+    :func:`observe` context.
+    """
+    if not (_metrics_enabled or _tracer is not None):
+        return
+    usage = getattr(response, "usage_metadata", None) or {}
+    prompt, completion = usage.get("input_tokens") or 0, usage.get("output_tokens") or 0
+    # Prompt tokens served from the provider's context cache (included in prompt)
+    cached = (usage.get("input_token_details") or {}).get("cache_read") or 0
+    observation.set(prompt_tokens=prompt, completion_tokens=completion, cached_tokens=cached)
+    count("llm_tokens", "prompt", amount=prompt)
+    count("llm_tokens", "completion", amount=completion)
+    count("llm_tokens", "cached", amount=cached)
+
+
+def record_turn_iterations(iterations: int) -> None:
+    """Record how many LLM round trips a turn took."""
+    if _metrics_enabled:
+        REGISTRY.histogram(
+            "assistant_turn_llm_iterations", "LLM calls per turn", (), ITERATION_BUCKETS
+        ).observe(iterations)
+
+
+class SpanRecorder:
+    """Minimal tracer keeping finished spans in memory, for tests and debugging.
+
+    It implements the ``start_as_current_span`` method of an OpenTelemetry
+    tracer, so it can be passed to :func:`set_tracer`.
+    """
+
+    class Span:
+        def __init__(self, name: str, attributes: Dict[str, Any], parent: Optional["SpanRecorder.Span"]):
+            self.name = name
+            self.attributes = dict(attributes or {})
+            self.parent = parent
+            self.start = time.perf_counter()
+            self.end: Optional[float] = None
+
+        def set_attribute(self, key: str, value: Any) -> None:
+            self.attributes[key] = value
+
+    def __init__(self):
+        self.spans: List[SpanRecorder.Span] = []
+        self._current: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+    @contextmanager
+    def start_as_current_span(self, name: str, attributes: Optional[Dict[str, Any]] = None):
+        span = SpanRecorder.Span(name, attributes or {}, self._current.get())
+        token = self._current.set(span)
+        try:
+            yield span
+        finally:
+            span.end = time.perf_counter()
+            self._current.reset(token)
+            self.spans.append(span)
@@ -0,0 +1,315 @@
+"""Reuse of the static prompt prefix across LLM calls.
+
+Every LLM call of every turn starts with the same system prompt (and, in
+native tool-calling mode, the same tool schemas). :func:`build_prefix`
+builds that prefix once and identifies it by a hash that is stable across
+processes. With ``PROMPT_CACHE=1``, :class:`PrefixCache` uploads the prefix
+once to the provider's context cache, and later calls refer to it by name
+instead of sending it again. Providers bill cached tokens at a discount and
+process them faster.
+
+A chat model supports context caching if it has a
+``create_context_cache(messages, tools=(), ttl=None)`` method returning a
+cache name, and accepts that name as the ``cached_content`` call option,
+like :class:`~customer_support_assistant.fake_llm.FakeChatModel`. Gemini's
+context caches are used through ``langchain_google_genai``. Gemini only
+caches prompts above a minimum size; if creating a cache fails, calls send
+the prefix in full as before.
+
+The prefix lookups and cached prompt tokens (as reported by the provider in
+``usage_metadata``) of a turn are collected by :func:`track_turn`.
+"""
+
+import asyncio
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional, Sequence, Set, Tuple
+
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from customer_support_assistant import metrics
+from customer_support_assistant.history import approximate_tokens
+from customer_support_assistant.structured_logging import get_logger, log_event
+
+logger = get_logger("prompt_cache")
+
+DEFAULT_TTL_SECONDS = 3600.0
+# Caches are replaced this long before the provider expires them
+_EXPIRY_MARGIN = 0.1
+
+# Creates a provider cache of (messages, tools) for ttl seconds and returns its name
+ContextCacheFactory = Callable[[Sequence[BaseMessage], Sequence[Any], float], str]
+
+
+class PromptPrefix(NamedTuple):
+    """The static start of every LLM call.
+
+    Attributes:
+        messages: The prefix messages, sent first in every call.
+        tools: Tool schemas sent with every call (native tool calling only).
+        key: SHA-256 of the system prompt and tool schemas.
+        tokens: Approximate size of the prefix in tokens.
+    """
+
+    messages: Tuple[BaseMessage, ...]
+    tools: Tuple[Any, ...]
+    key: str
+    tokens: int
+
+
+def build_prefix(system_prompt: str, tools: Sequence[Any] = ()) -> PromptPrefix:
+    """Build the prompt prefix of ``system_prompt`` and ``tools``, with its hash."""
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    payload = json.dumps(
+        {"system": system_prompt, "tools": [convert_to_openai_tool(tool) for tool in tools]},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return PromptPrefix(
+        (SystemMessage(content=system_prompt),),
+        tuple(tools),
+        hashlib.sha256(payload.encode("utf-8")).hexdigest(),
+        approximate_tokens(payload),
+    )
+
+
+class PrefixCacheStats(NamedTuple):
+    """Counters of a :class:`PrefixCache`."""
+
+    lookups: int
+    hits: int
+    created: int
+    failed: int
+
+
+class TurnPrefixStats:
+    """Prefix lookups and prompt tokens of one turn."""
+
+    __slots__ = ("lookups", "hits", "prompt_tokens", "cached_tokens")
+
+    def __init__(self):
+        self.lookups = self.hits = self.prompt_tokens = self.cached_tokens = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of the turn's LLM calls that reused a cached prefix."""
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+_turn: contextvars.ContextVar[Optional[TurnPrefixStats]] = contextvars.ContextVar("prefix_turn", default=None)
+
+
+@contextmanager
+def track_turn() -> Iterator[TurnPrefixStats]:
+    """Collect the prefix lookups and prompt tokens of the LLM calls made inside the block."""
+    stats = TurnPrefixStats()
+    token = _turn.set(stats)
+    try:
+        yield stats
+    finally:
+        _turn.reset(token)
+
+
+def record_usage(response: Any) -> None:
+    """Add the prompt and cached tokens of an LLM ``response`` to the current turn."""
+    stats = _turn.get()
+    if stats is None:
+        return
+    usage = getattr(response, "usage_metadata", None) or {}
+    stats.prompt_tokens += usage.get("input_tokens") or 0
+    stats.cached_tokens += (usage.get("input_token_details") or {}).get("cache_read") or 0
+
+
+def report_turn(stats: TurnPrefixStats, observation: Any = None) -> None:
+    """Report a turn's prefix hit rate and cached prompt tokens on its span and in the log."""
+    if not stats.lookups and not stats.cached_tokens:
+        return
+    if observation is not None:
+        observation.set(prefix_lookups=stats.lookups, prefix_hits=stats.hits, cached_prompt_tokens=stats.cached_tokens)
+    log_event(
+        logger, logging.INFO, "turn_prompt_prefix",
+        lookups=stats.lookups, hits=stats.hits, hit_rate=round(stats.hit_rate, 3),
+        prompt_tokens=stats.prompt_tokens, cached_tokens=stats.cached_tokens,
+    )
+
+
+def _record_lookup(result: str) -> None:
+    metrics.count("prefix_cache", result)
+    stats = _turn.get()
+    if stats is not None:
+        stats.lookups += 1
+        stats.hits += result == "hit"
+
+
+class PrefixCache:
+    """Provider context caches of prompt prefixes, created once and reused until they expire.
+
+    The upload to the provider runs without holding the cache's lock: the
+    first caller claims the prefix with an in-flight future and creates the
+    cache, and concurrent callers for the same prefix wait on that future.
+    :meth:`aget` runs the upload in a worker thread, so it never blocks the
+    event loop.
+    """
+
+    def __init__(self, create: ContextCacheFactory, ttl: float = DEFAULT_TTL_SECONDS):
+        """Create an empty cache.
+
+        Args:
+            create: Uploads a prefix to the provider and returns the cache name.
+            ttl: Seconds the provider keeps each cache.
+
+        Raises:
+            ValueError: If ``ttl`` is not positive.
+        """
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        self.ttl = ttl
+        self._create = create
+        self._names: Dict[str, Tuple[str, float]] = {}
+        self._failed: Set[str] = set()
+        # Prefixes being uploaded, resolved with the cache name (None on failure)
+        self._pending: Dict[str, "Future[Optional[str]]"] = {}
+        self._lookups = self._hits = self._created = 0
+        # Guards the maps and counters only, never held during an upload
+        self._lock = threading.Lock()
+
+    def stats(self) -> PrefixCacheStats:
+        """Return lookup, hit, creation and failure counts."""
+        return PrefixCacheStats(self._lookups, self._hits, self._created, len(self._failed))
+
+    def get(self, prefix: PromptPrefix) -> Optional[str]:
+        """Return the provider cache name of ``prefix``, creating the cache if needed.
+
+        Returns:
+            The name to pass as ``cached_content``, or None if the provider
+            could not cache the prefix.
+        """
+        state, value = self._claim(prefix)
+        if state == "wait":
+            return self._waited(value.result())
+        if state != "create":
+            return self._answer(state, value)
+        now = time.monotonic()
+        try:
+            name = self._create(prefix.messages, prefix.tools, self.ttl)
+        except Exception as e:
+            return self._publish(prefix, value, now, error=e)
+        except BaseException:
+            self._abandon(prefix, value)
+            raise
+        return self._publish(prefix, value, now, name=name)
+
+    async def aget(self, prefix: PromptPrefix) -> Optional[str]:
+        """Async variant of :meth:`get`; the upload runs in a worker thread."""
+        state, value = self._claim(prefix)
+        if state == "wait":
+            # Shielded, so a cancelled waiter does not cancel the shared upload
+            return self._waited(await asyncio.shield(asyncio.wrap_future(value)))
+        if state != "create":
+            return self._answer(state, value)
+        now = time.monotonic()
+        try:
+            name = await asyncio.to_thread(self._create, prefix.messages, prefix.tools, self.ttl)
+        except Exception as e:
+            return self._publish(prefix, value, now, error=e)
+        except BaseException:
+            self._abandon(prefix, value)
+            raise
+        return self._publish(prefix, value, now, name=name)
+
+    def _claim(self, prefix: PromptPrefix) -> Tuple[str, Any]:
+        """Look ``prefix`` up and claim its upload if no caller has yet.
+
+        Returns:
+            ``("hit", name)``, ``("uncached", None)``, ``("wait", future)``
+            for an upload in flight, or ``("create", future)`` if the caller
+            must upload the prefix and publish the outcome.
+        """
+        with self._lock:
+            self._lookups += 1
+            if prefix.key in self._failed:
+                return "uncached", None
+            entry = self._names.get(prefix.key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._hits += 1
+                return "hit", entry[0]
+            pending = self._pending.get(prefix.key)
+            if pending is not None:
+                return "wait", pending
+            future: "Future[Optional[str]]" = Future()
+            self._pending[prefix.key] = future
+            return "create", future
+
+    @staticmethod
+    def _answer(state: str, name: Optional[str]) -> Optional[str]:
+        _record_lookup(state)
+        return name
+
+    def _waited(self, name: Optional[str]) -> Optional[str]:
+        """Count a lookup that waited for another caller's upload."""
+        if name is None:
+            return self._answer("uncached", None)
+        with self._lock:
+            self._hits += 1
+        return self._answer("hit", name)
+
+    def _publish(
+        self, prefix: PromptPrefix, future: Future, created_at: float,
+        name: Optional[str] = None, error: Optional[Exception] = None,
+    ) -> Optional[str]:
+        """Store the outcome of an upload and hand it to the callers waiting for it."""
+        with self._lock:
+            del self._pending[prefix.key]
+            if error is None:
+                self._names[prefix.key] = (name, created_at + self.ttl * (1 - _EXPIRY_MARGIN))
+                self._created += 1
+            else:
+                self._failed.add(prefix.key)
+        future.set_result(name)
+        if error is not None:
+            log_event(logger, logging.WARNING, "prefix_cache_failed", key=prefix.key, error=str(error))
+            return self._answer("uncached", None)
+        log_event(logger, logging.INFO, "prefix_cache_created", key=prefix.key, name=name, tokens=prefix.tokens)
+        return self._answer("miss", name)
+
+    def _abandon(self, prefix: PromptPrefix, future: Future) -> None:
+        """Release an upload whose caller was cancelled; waiters send the prefix in full this time."""
+        with self._lock:
+            del self._pending[prefix.key]
+        future.set_result(None)
+
+
+def context_cache_factory(llm: Any) -> Optional[ContextCacheFactory]:
+    """Return the context cache factory of chat model ``llm``, or None if it has none."""
+    create = getattr(llm, "create_context_cache", None)
+    if create is not None:
+        return lambda messages, tools, ttl: create(list(messages), tools=list(tools), ttl=ttl)
+    if type(llm).__name__ == "ChatGoogleGenerativeAI":
+        from langchain_google_genai import create_context_cache
+
+        return lambda messages, tools, ttl: create_context_cache(
+            llm, list(messages), ttl=f"{int(ttl)}s", tools=list(tools) or None
+        )
+    return None
+
+
+def create_prefix_cache(llm: Any) -> Optional[PrefixCache]:
+    """Build the prefix cache for ``llm`` if ``PROMPT_CACHE`` enables it and the provider supports it.
+
+    ``PROMPT_CACHE_TTL_SECONDS`` sets how long the provider keeps the cache.
+    """
+    if os.getenv("PROMPT_CACHE", "").lower() not in ("1", "true", "yes", "on"):
+        return None
+    create = context_cache_factory(llm)
+    if create is None:
+        log_event(logger, logging.INFO, "prefix_cache_unsupported", model=type(llm).__name__)
+        return None
+    return PrefixCache(create, float(os.getenv("PROMPT_CACHE_TTL_SECONDS", str(DEFAULT_TTL_SECONDS))))
@@ -0,0 +1,149 @@
+"""Deterministic fast path for obvious intents.
+
+Before the LLM is called, the router checks the user input against a few
+high-confidence rules: an order ID, a price question naming a catalog
+product, or a single known policy topic. If exactly one rule matches, the
+graph runs that tool and returns its output without an LLM call. Inputs that
+match no rule, or several (multi-intent questions), go to the LLM as before.
+
+Rules are enabled by name with ``ROUTER_RULES`` (default
+``order,catalog,policy``); set ``ROUTER_RULES`` to an empty string to turn
+routing off.
+"""
+
+import os
+import re
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from customer_support_assistant.tools.catalog import get_catalog_index
+from customer_support_assistant.tools.catalog_index import normalize_query
+from customer_support_assistant.tools.knowledge_base import NO_ANSWER
+
+ORDER_ID_RE = re.compile(r"\bORD\d+\b", re.IGNORECASE)
+PRICE_INTENT_RE = re.compile(r"\b(price|prices|cost|costs|how much)\b|\$", re.IGNORECASE)
+
+# Policy topics the knowledge base documents, with the words that name them
+POLICY_TOPICS: Dict[str, Tuple[str, ...]] = {
+    "returns": ("return", "returns", "refund", "refunds"),
+    "warranty": ("warranty", "warranties", "guarantee"),
+    "shipping": ("shipping", "delivery", "ship", "shipped"),
+    "payment": ("payment", "payments", "pay", "paying"),
+}
+
+
+class Route(NamedTuple):
+    """A tool call the router decided to make instead of asking the LLM."""
+
+    rule: str
+    tool: str
+    args: Dict[str, str]
+    # Tool outputs meaning "no answer"; the input then goes to the LLM
+    fallthrough: Tuple[str, ...] = ()
+
+
+Rule = Callable[[str], Optional[Route]]
+
+
+def extract_order_ids(text: str) -> List[str]:
+    """Return the distinct order IDs mentioned in ``text``, uppercased."""
+    return list(dict.fromkeys(match.upper() for match in ORDER_ID_RE.findall(text)))
+
+
+def order_rule(text: str) -> Optional[Route]:
+    """Route a message naming exactly one order ID to the order lookup."""
+    order_ids = extract_order_ids(text)
+    if len(order_ids) != 1:
+        return None
+    return Route("order", "order_status_lookup", {"order_id": order_ids[0]})
+
+
+def catalog_rule(text: str) -> Optional[Route]:
+    """Route a price question that names a catalog product to the catalog search."""
+    index = get_catalog_index()
+    # Comparisons and other questions about several products need the LLM
+    if len(index.mentions(text)) > 1:
+        return None
+    if PRICE_INTENT_RE.search(text):
+        match = index.search(text)
+        # Fuzzy matches are left to the LLM, which can ask which product was meant
+        if match is None or match.kind == "fuzzy":
+            return None
+    else:
+        # A bare product name is a price lookup too
+        if normalize_query(text) not in index:
+            return None
+        match = index.search(text)
+    return Route("catalog", "product_catalog_search", {"query": match.name})
+
+
+def policy_rule(text: str) -> Optional[Route]:
+    """Route a question about exactly one policy topic to the knowledge base."""
+    words = set(re.findall(r"[a-z]+", text.lower()))
+    topics = [topic for topic, keywords in POLICY_TOPICS.items() if words.intersection(keywords)]
+    if len(topics) != 1:
+        return None
+    return Route("policy", "knowledge_base_query", {"query": text}, fallthrough=(NO_ANSWER,))
+
+
+RULES: Dict[str, Rule] = {
+    "order": order_rule,
+    "catalog": catalog_rule,
+    "policy": policy_rule,
+}
+
+
+class RouterStats(NamedTuple):
+    """How many inputs the router answered, in total and per rule."""
+
+    routed: int
+    passed: int
+    by_rule: Dict[str, int]
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.routed + self.passed
+        return self.routed / total if total else 0.0
+
+
+class Router:
+    """Pick a single high-confidence tool call for an input, if there is one."""
+
+    def __init__(self, rules: Sequence[str] = tuple(RULES)):
+        """Create a router using the named ``rules``.
+
+        Raises:
+            ValueError: If a rule name is unknown.
+        """
+        unknown = [name for name in rules if name not in RULES]
+        if unknown:
+            raise ValueError(f"Unknown router rules: {', '.join(unknown)}")
+        self.rules = [RULES[name] for name in rules]
+        self._routed: Dict[str, int] = {name: 0 for name in rules}
+        self._passed = 0
+        self._lock = threading.Lock()
+
+    def route(self, text: str) -> Optional[Route]:
+        """Return the route for ``text`` if exactly one rule matches it."""
+        routes = [route for route in (rule(text) for rule in self.rules) if route is not None]
+        return routes[0] if len(routes) == 1 else None
+
+    def record(self, route: Optional[Route]) -> None:
+        """Count an input as answered by ``route``, or passed on if None."""
+        with self._lock:
+            if route is None:
+                self._passed += 1
+            else:
+                self._routed[route.rule] += 1
+
+    def stats(self) -> RouterStats:
+        """Return the routing counters."""
+        with self._lock:
+            by_rule = dict(self._routed)
+            return RouterStats(sum(by_rule.values()), self._passed, by_rule)
+
+
+def create_router() -> Router:
+    """Build the router configured by ``ROUTER_RULES``."""
+    names = os.getenv("ROUTER_RULES", ",".join(RULES))
+    return Router([name.strip() for name in names.split(",") if name.strip()])
@@ -0,0 +1,426 @@
+"""HTTP service for the assistant.
+
+:class:`ChatServer` is a plain ASGI application with no web framework behind
+it, so it runs under any ASGI server and can be tested in-process, e.g.
+with ``httpx.ASGITransport``. It serves:
+
+* ``POST /chat``: ``{"message": ..., "session_id": ...}`` answered with
+  ``{"response": ..., "session_id": ...}``
+* ``POST /chat/stream``: the same request, answered with server-sent
+  events: one ``data:`` event per JSON-encoded token, then an ``end`` event
+* ``GET /health``: 200 while serving, 503 while draining
+* ``GET /metrics``: the metrics registry in the Prometheus text format
+
+At most ``max_concurrency`` turns run at once per worker. Up to
+``max_queue`` more requests wait up to ``queue_timeout`` seconds for a slot;
+beyond that requests are rejected with 429 and a ``Retry-After`` header
+instead of piling up. On shutdown the server stops accepting turns (503) and
+waits up to ``drain_timeout`` seconds for the running ones to finish.
+
+Run it with ``python -m customer_support_assistant.server --workers 4``
+(requires the ``[server]`` extra). Every worker process builds its own
+assistant and, on startup, compiles the graph and loads the catalog and
+knowledge base indexes once, before it accepts requests. Limits are read
+from the environment:
+
+* ``SERVER_MAX_CONCURRENCY``: turns running at once per worker (default 32)
+* ``SERVER_MAX_QUEUE``: requests waiting for a slot per worker (default 64)
+* ``SERVER_QUEUE_TIMEOUT_SECONDS``: how long a request may wait (default 10)
+* ``SERVER_DRAIN_SECONDS``: how long shutdown waits for running turns (default 30)
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from customer_support_assistant import metrics
+from customer_support_assistant.structured_logging import get_logger, log_event
+
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_MAX_QUEUE = 64
+DEFAULT_QUEUE_TIMEOUT_SECONDS = 10.0
+DEFAULT_DRAIN_SECONDS = 30.0
+# Chat requests are a message and a session id; anything larger is refused
+MAX_BODY_BYTES = 64 * 1024
+
+logger = get_logger("server")
+
+Scope = Dict[str, Any]
+Receive = Callable[[], Awaitable[Dict[str, Any]]]
+Send = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+class HTTPError(Exception):
+    """An error answered with ``status`` and a JSON ``{"error": message}`` body."""
+
+    def __init__(self, status: int, message: str, headers: Optional[List[Tuple[bytes, bytes]]] = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or []
+
+
+class AdmissionControl:
+    """Concurrency limit with a bounded wait queue for incoming turns."""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        """Create the limiter.
+
+        Raises:
+            ValueError: If ``max_concurrency`` is not positive or ``max_queue`` is negative.
+        """
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self.waiting = 0
+        self.draining = False
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    async def acquire(self) -> None:
+        """Wait for a slot.
+
+        Raises:
+            HTTPError: 503 while draining; 429 if the queue is full or the
+                wait times out.
+        """
+        if self.draining:
+            raise HTTPError(503, "Server is shutting down")
+        if self._slots.locked() and self.waiting >= self.max_queue:
+            raise HTTPError(429, "Too many requests", [(b"retry-after", b"1")])
+        self.waiting += 1
+        self._idle.clear()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(429, "Too many requests", [(b"retry-after", b"1")]) from None
+        finally:
+            self.waiting -= 1
+            self._update_idle()
+        self.in_flight += 1
+        self._idle.clear()
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._slots.release()
+        self._update_idle()
+
+    async def drain(self, timeout: float) -> bool:
+        """Stop admitting turns and wait up to ``timeout`` seconds for running ones.
+
+        Returns:
+            True if every turn finished in time.
+        """
+        self.draining = True
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _update_idle(self) -> None:
+        if not self.in_flight and not self.waiting:
+            self._idle.set()
+
+
+def warm_up(assistant: Any) -> None:
+    """Build what a worker's first turn would otherwise wait for.
+
+    Compiles the graph and loads the catalog and knowledge base indexes, so
+    each worker process pays for them once, before it serves requests.
+    """
+    from customer_support_assistant.tools.catalog import get_catalog_index
+    from customer_support_assistant.tools.knowledge_base import get_knowledge_base
+
+    assistant.app
+    get_catalog_index()
+    get_knowledge_base()
+
+
+class ChatServer:
+    """ASGI application serving the assistant; see the module docstring."""
+
+    def __init__(
+        self,
+        assistant: Any = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_queue: int = DEFAULT_MAX_QUEUE,
+        queue_timeout: float = DEFAULT_QUEUE_TIMEOUT_SECONDS,
+        drain_timeout: float = DEFAULT_DRAIN_SECONDS,
+        warm: bool = True,
+    ):
+        """Create the application.
+
+        Args:
+            assistant: The :class:`~customer_support_assistant.main.Assistant`
+                answering turns; a new one by default.
+            max_concurrency: Turns running at once.
+            max_queue: Requests waiting for a slot before new ones get 429.
+            queue_timeout: Seconds a request waits for a slot before it gets 429.
+            drain_timeout: Seconds shutdown waits for running turns.
+            warm: Call :func:`warm_up` on ASGI lifespan startup.
+        """
+        if assistant is None:
+            from customer_support_assistant.main import Assistant
+
+            assistant = Assistant()
+        self.assistant = assistant
+        self.drain_timeout = drain_timeout
+        self.warm = warm
+        self._max_concurrency = max_concurrency
+        self._max_queue = max_queue
+        self._queue_timeout = queue_timeout
+        self._admission: Optional[AdmissionControl] = None
+        self._routes = {
+            ("POST", "/chat"): self.chat,
+            ("POST", "/chat/stream"): self.chat_stream,
+            ("GET", "/health"): self.health,
+            ("GET", "/metrics"): self.metrics,
+        }
+
+    @property
+    def admission(self) -> AdmissionControl:
+        # Created on first use so its semaphore belongs to the serving event loop
+        if self._admission is None:
+            self._admission = AdmissionControl(self._max_concurrency, self._max_queue, self._queue_timeout)
+        return self._admission
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+        handler = self._routes.get((scope["method"], scope["path"]))
+        try:
+            if handler is None:
+                if any(path == scope["path"] for _, path in self._routes):
+                    raise HTTPError(405, "Method not allowed")
+                raise HTTPError(404, "Not found")
+            await handler(scope, receive, send)
+        except HTTPError as e:
+            await send_json(send, e.status, {"error": e.message}, e.headers)
+
+    async def lifespan(self, receive: Receive, send: Send) -> None:
+        """Handle ASGI lifespan events: warm up on startup, drain on shutdown."""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    if self.warm:
+                        await asyncio.to_thread(warm_up, self.assistant)
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                log_event(logger, logging.INFO, "server_started", pid=os.getpid())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                drained = await self.admission.drain(self.drain_timeout)
+                log_event(
+                    logger, logging.INFO if drained else logging.WARNING, "server_stopped",
+                    drained=drained, in_flight=self.admission.in_flight,
+                )
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def chat(self, scope: Scope, receive: Receive, send: Send) -> None:
+        message, session_id = parse_chat_request(await read_body(receive))
+        await self.admission.acquire()
+        try:
+            start = time.perf_counter()
+            try:
+                response = await self.assistant.aprocess(message, session_id=session_id)
+            except ValueError as e:
+                raise HTTPError(400, str(e)) from None
+            except Exception as e:
+                log_event(logger, logging.ERROR, "chat_failed", session_id=session_id, error=repr(e))
+                raise HTTPError(500, "The assistant could not answer") from None
+            log_event(
+                logger, logging.DEBUG, "chat_answered",
+                session_id=session_id, duration_ms=(time.perf_counter() - start) * 1000,
+            )
+        finally:
+            self.admission.release()
+        await send_json(send, 200, {"response": response, "session_id": session_id})
+
+    async def chat_stream(self, scope: Scope, receive: Receive, send: Send) -> None:
+        message, session_id = parse_chat_request(await read_body(receive))
+        await self.admission.acquire()
+        try:
+            tokens = self.assistant.astream(message, session_id=session_id)
+            try:
+                try:
+                    # Turn errors raised before any output get a plain error response
+                    first = await tokens.__anext__()
+                except StopAsyncIteration:
+                    first = None
+                except ValueError as e:
+                    raise HTTPError(400, str(e)) from None
+                except Exception as e:
+                    log_event(logger, logging.ERROR, "chat_failed", session_id=session_id, error=repr(e))
+                    raise HTTPError(500, "The assistant could not answer") from None
+                await send({
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        (b"content-type", b"text/event-stream"),
+                        (b"cache-control", b"no-cache"),
+                        (b"x-session-id", session_id.encode()),
+                    ],
+                })
+                try:
+                    if first is not None:
+                        await send_event(send, json.dumps(first))
+                    async for token in tokens:
+                        await send_event(send, json.dumps(token))
+                except Exception as e:
+                    log_event(logger, logging.ERROR, "chat_failed", session_id=session_id, error=repr(e))
+                    await send_event(send, json.dumps("The assistant could not answer"), event="error")
+                await send_event(send, "{}", event="end", more_body=False)
+            finally:
+                await tokens.aclose()
+        finally:
+            self.admission.release()
+
+    async def health(self, scope: Scope, receive: Receive, send: Send) -> None:
+        admission = self.admission
+        await send_json(send, 503 if admission.draining else 200, {
+            "status": "draining" if admission.draining else "ok",
+            "in_flight": admission.in_flight,
+            "queued": admission.waiting,
+            "max_concurrency": admission.max_concurrency,
+        })
+
+    async def metrics(self, scope: Scope, receive: Receive, send: Send) -> None:
+        body = metrics.REGISTRY.render_prometheus().encode()
+        await send_response(send, 200, body, b"text/plain; version=0.0.4; charset=utf-8")
+
+
+async def read_body(receive: Receive) -> bytes:
+    """Read a request body of at most :data:`MAX_BODY_BYTES`.
+
+    Raises:
+        HTTPError: 413 if the body is larger.
+    """
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise HTTPError(400, "Client disconnected")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def parse_chat_request(body: bytes) -> Tuple[str, str]:
+    """Return the message and session id of a chat request body.
+
+    A missing session id starts a new conversation.
+
+    Raises:
+        HTTPError: 400 if the body is not a JSON object with a non-empty ``message``.
+    """
+    try:
+        request = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "Request body must be JSON") from None
+    if not isinstance(request, dict):
+        raise HTTPError(400, "Request body must be a JSON object")
+    message = request.get("message")
+    if not isinstance(message, str) or not message.strip():
+        raise HTTPError(400, "'message' must be a non-empty string")
+    session_id = request.get("session_id") or uuid.uuid4().hex
+    if not isinstance(session_id, str):
+        raise HTTPError(400, "'session_id' must be a string")
+    return message, session_id
+
+
+async def send_response(
+    send: Send, status: int, body: bytes, content_type: bytes, headers: Optional[List[Tuple[bytes, bytes]]] = None
+) -> None:
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode()), *(headers or [])],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def send_json(
+    send: Send, status: int, payload: Any, headers: Optional[List[Tuple[bytes, bytes]]] = None
+) -> None:
+    await send_response(send, status, json.dumps(payload).encode(), b"application/json", headers)
+
+
+async def send_event(send: Send, data: str, event: Optional[str] = None, more_body: bool = True) -> None:
+    """Send one server-sent event."""
+    text = (f"event: {event}\n" if event else "") + f"data: {data}\n\n"
+    await send({"type": "http.response.body", "body": text.encode(), "more_body": more_body})
+
+
+def create_app() -> ChatServer:
+    """Build the server configured by the environment; the factory each worker process calls."""
+    from customer_support_assistant.main import load_environment
+
+    load_environment()
+    return ChatServer(
+        max_concurrency=int(os.getenv("SERVER_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+        max_queue=int(os.getenv("SERVER_MAX_QUEUE", DEFAULT_MAX_QUEUE)),
+        queue_timeout=float(os.getenv("SERVER_QUEUE_TIMEOUT_SECONDS", DEFAULT_QUEUE_TIMEOUT_SECONDS)),
+        drain_timeout=float(os.getenv("SERVER_DRAIN_SECONDS", DEFAULT_DRAIN_SECONDS)),
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Serve the customer support assistant over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="worker processes, each with its own graph")
+    parser.add_argument("--max-concurrency", type=int, help="turns running at once per worker")
+    parser.add_argument("--max-queue", type=int, help="requests waiting for a slot per worker")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the server under uvicorn.
+
+    Raises:
+        ImportError: If uvicorn (the ``[server]`` extra) is not installed.
+    """
+    args = build_parser().parse_args(argv)
+    import uvicorn
+
+    # Worker processes build their app from the environment
+    if args.max_concurrency is not None:
+        os.environ["SERVER_MAX_CONCURRENCY"] = str(args.max_concurrency)
+    if args.max_queue is not None:
+        os.environ["SERVER_MAX_QUEUE"] = str(args.max_queue)
+    uvicorn.run(
+        "customer_support_assistant.server:create_app",
+        factory=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        lifespan="on",
+        timeout_graceful_shutdown=int(float(os.getenv("SERVER_DRAIN_SECONDS", DEFAULT_DRAIN_SECONDS))) + 5,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Coalescing of identical in-flight calls (single-flight).
+
+When many users ask the same question at once, each turn would make the
+same LLM call and the same tool call. :class:`SingleFlight` lets the first
+caller of a key run the call while every caller arriving with the same key
+before it finishes waits for, and shares, its result. Nothing is kept
+afterwards; a later caller runs the call again (caching is left to the
+response and tool caches).
+
+Sync and async callers share the same in-flight calls: a thread can wait
+for a call a coroutine started and vice versa.
+
+Coalescing is opt-in (``SINGLE_FLIGHT=1``, see :func:`create_single_flight`).
+"""
+
+import asyncio
+import concurrent.futures
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Tuple
+
+from customer_support_assistant import metrics
+
+
+class SingleFlightStats(NamedTuple):
+    """Counters of a :class:`SingleFlight`."""
+
+    executions: int
+    coalesced: int
+
+
+class SingleFlight:
+    """Runs one call per key at a time, sharing its result with concurrent callers."""
+
+    def __init__(self):
+        self._calls: Dict[Hashable, concurrent.futures.Future] = {}
+        self._executions = self._coalesced = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Number of calls in flight."""
+        return len(self._calls)
+
+    def stats(self) -> SingleFlightStats:
+        """Return how many calls ran and how many callers shared another's call."""
+        return SingleFlightStats(self._executions, self._coalesced)
+
+    def do(self, key: Hashable, fn: Callable[[], Any], kind: str = "call") -> Tuple[Any, bool]:
+        """Run ``fn()``, or wait for the in-flight call with the same ``key``.
+
+        Args:
+            key: Identifies identical calls.
+            fn: Makes the call.
+            kind: Label of the coalesced-request counter, e.g. ``llm`` or ``tool``.
+
+        Returns:
+            ``(result, coalesced)``: ``coalesced`` is True if another caller
+            made the call. Its exceptions are raised to every caller.
+        """
+        while True:
+            future, leader = self._join(key, kind)
+            if leader:
+                return self._lead(key, future, fn), False
+            try:
+                return future.result(), True
+            except concurrent.futures.CancelledError:
+                # The caller making the call was cancelled; make it ourselves
+                continue
+
+    async def ado(self, key: Hashable, fn: Callable[[], Awaitable[Any]], kind: str = "call") -> Tuple[Any, bool]:
+        """Async variant of :meth:`do`; waits without blocking the event loop."""
+        while True:
+            future, leader = self._join(key, kind)
+            if leader:
+                try:
+                    result = await fn()
+                except BaseException as e:
+                    self._finish(key, future, exception=e)
+                    raise
+                self._finish(key, future, result=result)
+                return result, False
+            try:
+                # Shielded, so a cancelled waiter does not cancel the shared call
+                return await asyncio.shield(asyncio.wrap_future(future)), True
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+
+    def _join(self, key: Hashable, kind: str) -> Tuple[concurrent.futures.Future, bool]:
+        """Return the future of the call with ``key`` and whether this caller makes it."""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = concurrent.futures.Future()
+                self._executions += 1
+                return future, True
+            self._coalesced += 1
+        metrics.count("coalesced", kind)
+        return future, False
+
+    def _lead(self, key: Hashable, future: concurrent.futures.Future, fn: Callable[[], Any]) -> Any:
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, exception=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def _finish(
+        self, key: Hashable, future: concurrent.futures.Future, result: Any = None,
+        exception: Optional[BaseException] = None,
+    ) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+        if isinstance(exception, asyncio.CancelledError):
+            future.cancel()
+        elif exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+
+def create_single_flight() -> Optional[SingleFlight]:
+    """Build the single-flight layer if ``SINGLE_FLIGHT`` enables it, else None."""
+    if os.getenv("SINGLE_FLIGHT", "").lower() not in ("1", "true", "yes", "on"):
+        return None
+    return SingleFlight()
@@ -0,0 +1,129 @@
+"""Filtering streamed LLM output down to the text the user should see.
+
+With the JSON-prompt tool protocol, a reply is either a tool-call JSON
+object or a plain answer, and which one it is only shows once enough of it
+has arrived. :class:`AnswerFilter` passes answer text on as soon as it is
+clearly not a tool call and holds back anything that may still be one, so
+partial JSON never reaches the user.
+"""
+
+import operator
+from functools import reduce
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, BaseMessageChunk, message_chunk_to_message
+
+from customer_support_assistant.tool_call_parser import ToolCallParser
+
+# A reply starting with one of these may be a tool call (raw or fenced JSON)
+TOOL_CALL_PREFIXES = ("{", "`")
+FENCE = "```"
+
+
+def content_text(content: Any) -> str:
+    """Return the text of a message ``content``, which may be a list of parts."""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(
+            part if isinstance(part, str) else str(part.get("text", "")) if isinstance(part, dict) else ""
+            for part in content
+        )
+    return str(content)
+
+
+class AnswerFilter:
+    """Decide, chunk by chunk, which streamed text is safe to show.
+
+    Text is released once the reply clearly starts as an answer. A reply
+    that starts like JSON or a code fence is held back entirely, and so is
+    everything from a code fence inside an answer, since the fence may wrap
+    a tool call. Once the full reply has been parsed, :meth:`flush` releases
+    the held text if it was an answer after all.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._holding = False
+        self.released = False
+
+    def hold(self) -> None:
+        """Hold back the rest of the reply, e.g. once a native tool call shows up."""
+        self._holding = True
+
+    def feed(self, text: str) -> str:
+        """Add a chunk of model output and return the part that can be shown now."""
+        self._pending += text
+        if self._holding:
+            return ""
+        if not self.released:
+            start = self._pending.lstrip()
+            if not start:
+                return ""
+            if start.startswith(TOOL_CALL_PREFIXES):
+                self._holding = True
+                return ""
+
+        fence = self._pending.find(FENCE)
+        if fence >= 0:
+            self._holding = True
+            keep = len(self._pending) - fence
+        else:
+            # Keep trailing backticks, which may be the start of a fence
+            keep = len(self._pending) - len(self._pending.rstrip("`"))
+        return self._release(len(self._pending) - keep)
+
+    def flush(self) -> str:
+        """Return the text still held back; call once the reply is known to be an answer."""
+        return self._release(len(self._pending))
+
+    def _release(self, end: int) -> str:
+        text, self._pending = self._pending[:end], self._pending[end:]
+        if text:
+            self.released = True
+        return text
+
+
+class TokenStream:
+    """Collect a streamed LLM reply, writing its answer text as it arrives.
+
+    The reply is also fed to a :class:`ToolCallParser`, so tool calls are
+    known as soon as their JSON object is complete.
+    """
+
+    def __init__(self, writer: Callable[[str], None]):
+        """Create a stream that sends answer text to ``writer``."""
+        self.writer = writer
+        self.filter = AnswerFilter()
+        self.parser = ToolCallParser()
+        self._chunks: List[BaseMessageChunk] = []
+
+    @property
+    def tool_calls(self) -> Optional[List[Dict[str, Any]]]:
+        """Tool calls parsed from the reply so far, or None."""
+        return self.parser.tool_calls
+
+    def add(self, chunk: BaseMessageChunk) -> None:
+        """Record a chunk and write whatever answer text it makes safe to show."""
+        self._chunks.append(chunk)
+        if getattr(chunk, "tool_call_chunks", None) or chunk.additional_kwargs.get("tool_calls"):
+            self.filter.hold()
+        text = content_text(chunk.content)
+        if self.parser.feed(text) is not None:
+            self.filter.hold()
+        self._write(self.filter.feed(text))
+
+    def message(self) -> BaseMessage:
+        """Return the reply received so far as a single message."""
+        if not self._chunks:
+            return AIMessage(content="")
+        return message_chunk_to_message(reduce(operator.add, self._chunks))
+
+    def finish(self, is_answer: bool) -> None:
+        """Write the held-back text if the reply turned out to be an answer."""
+        if is_answer:
+            self._write(self.filter.flush())
+
+    def _write(self, text: str) -> None:
+        if text:
+            self.writer(text)
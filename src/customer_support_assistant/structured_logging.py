@@ -0,0 +1,270 @@
+"""Structured, non-blocking logging for the assistant.
+
+Modules log through standard :mod:`logging` loggers under the
+``customer_support_assistant`` namespace, using :func:`log_event` to attach
+structured fields. When a log file is configured, the calling thread only
+serializes the record's fields and puts it on an in-memory queue; a
+background writer thread formats the JSON lines, writes them in batches and
+rotates the file by size. With
+logging disabled (the default level is WARNING), a debug event costs a single
+level check.
+
+Configuration is read from the environment by :func:`configure_logging`:
+
+* ``LOG_LEVEL``: minimum level to record (default ``WARNING``)
+* ``LOG_FILE``: JSON-lines output file; without it records go to stderr
+* ``LOG_MAX_BYTES`` / ``LOG_BACKUP_COUNT``: rotation size and kept files
+"""
+
+import atexit
+import copy
+import datetime
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from pathlib import Path
+from typing import Any, List, Optional, Union
+
+ROOT_LOGGER_NAME = "customer_support_assistant"
+
+_configured = False
+_writer: Optional["JsonLinesWriter"] = None
+_lock = threading.Lock()
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Return a logger in the package namespace (e.g. ``get_logger("tools.catalog")``)."""
+    if name == ROOT_LOGGER_NAME or name.startswith(ROOT_LOGGER_NAME + "."):
+        return logging.getLogger(name)
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{name}")
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields: Any) -> None:
+    """Log ``event`` with structured ``fields`` if ``level`` is enabled.
+
+    Field values that are not JSON types are logged via ``str()``, so
+    callers may pass objects such as messages without formatting them first.
+    Fields are serialized when the record is queued; later changes to a
+    mutable value do not reach the log.
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "event": record.getMessage(),
+            "thread": record.threadName,
+        }
+        fields = getattr(record, "fields_json", None)
+        if fields is None:
+            entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        line = json.dumps(entry, default=str, ensure_ascii=False)
+        if fields and fields != "{}":
+            # Splice in the fields serialized at enqueue time; like update(), they win over the base keys
+            line = f"{line[:-1]}, {fields[1:]}"
+        return line
+
+
+class JsonLinesWriter:
+    """Background thread writing queued log records to a size-rotated file."""
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 5,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        queue_size: int = 10000,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(queue_size)
+        self.dropped = 0
+        self.formatter = JsonFormatter()
+        self._stream = None
+        self._size = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Hand a record to the writer without blocking; drop it if the queue is full."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self) -> None:
+        """Write out everything queued so far and stop the thread."""
+        self.queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            try:
+                first = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch: List[logging.LogRecord] = []
+            record = first
+            while True:
+                if record is None:
+                    running = False
+                    break
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+        if self._stream is not None:
+            self._stream.close()
+
+    def _write(self, batch: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record) + "\n")
+            except Exception:  # pragma: no cover - never let logging kill the writer
+                self.dropped += 1
+        data = "".join(lines).encode("utf-8")
+        try:
+            if self._stream is None:
+                self._open()
+            if self._size and self._size + len(data) > self.max_bytes:
+                self._rotate()
+            self._stream.write(data)
+            self._stream.flush()
+            self._size += len(data)
+        except OSError as e:
+            self.dropped += len(batch)
+            sys.stderr.write(f"Logging error writing {self.path}: {e}\n")
+
+    def _open(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._stream = open(self.path, "ab")
+        self._size = self._stream.tell()
+
+    def _rotate(self) -> None:
+        self._stream.close()
+        if self.backup_count > 0:
+            for i in range(self.backup_count - 1, 0, -1):
+                source = self.path.with_name(f"{self.path.name}.{i}")
+                if source.exists():
+                    source.replace(self.path.with_name(f"{self.path.name}.{i + 1}"))
+            self.path.replace(self.path.with_name(f"{self.path.name}.1"))
+        else:
+            self.path.unlink()
+        self._open()
+
+
+class _QueueHandler(logging.Handler):
+    """Hand records to the writer; formatting and I/O happen on its thread.
+
+    The message and fields are rendered before queueing, on a copy of the
+    record, so arguments changed by the caller afterwards are logged as they
+    were when the event happened.
+    """
+
+    def __init__(self, writer: JsonLinesWriter):
+        super().__init__()
+        self.writer = writer
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            record = copy.copy(record)
+            record.msg, record.args = record.getMessage(), None
+            record.fields_json = json.dumps(record.__dict__.pop("fields", {}), default=str, ensure_ascii=False)
+        except Exception:
+            self.handleError(record)
+            return
+        self.writer.enqueue(record)
+
+
+def set_log_level(level: Union[int, str]) -> None:
+    """Change the package log level at runtime."""
+    logging.getLogger(ROOT_LOGGER_NAME).setLevel(
+        level if isinstance(level, int) else level.upper()
+    )
+
+
+def configure_logging(
+    path: Optional[Union[str, Path]] = None,
+    level: Optional[Union[int, str]] = None,
+    propagate: Optional[bool] = None,
+    **writer_options: Any,
+) -> Optional[JsonLinesWriter]:
+    """Set up package logging; later calls replace the previous setup.
+
+    Args:
+        path: JSON-lines log file; defaults to ``LOG_FILE``. Without a file,
+            records are written to stderr by a plain stream handler.
+        level: Minimum level; defaults to ``LOG_LEVEL`` or WARNING.
+        propagate: Whether package records also reach the root logger's
+            handlers. None leaves the setting as the host application left it.
+        writer_options: Extra :class:`JsonLinesWriter` options (rotation, batching).
+
+    Returns:
+        The background writer, if a log file is configured.
+    """
+    global _configured, _writer
+    with _lock:
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        shutdown_logging()
+        set_log_level(level or os.getenv("LOG_LEVEL", "WARNING"))
+        if propagate is not None:
+            root.propagate = propagate
+
+        path = path or os.getenv("LOG_FILE")
+        if path:
+            writer_options.setdefault("max_bytes", int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024)))
+            writer_options.setdefault("backup_count", int(os.getenv("LOG_BACKUP_COUNT", 5)))
+            _writer = JsonLinesWriter(path, **writer_options)
+            root.addHandler(_QueueHandler(_writer))
+        else:
+            handler = logging.StreamHandler(sys.stderr)
+            handler.setFormatter(JsonFormatter())
+            root.addHandler(handler)
+        _configured = True
+        return _writer
+
+
+def ensure_logging_configured() -> None:
+    """Configure logging from the environment unless that already happened."""
+    if not _configured:
+        configure_logging()
+
+
+def shutdown_logging() -> None:
+    """Detach package handlers and drain the background writer, if any."""
+    global _configured, _writer
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+    if _writer is not None:
+        _writer.stop()
+        _writer = None
+    _configured = False
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,311 @@
+"""Result cache for tool calls.
+
+Tools such as ``order_status_lookup`` front backends that get the same
+question many times, within a conversation and across users. The cache keeps
+each tool's results, keyed on the tool name and its arguments, for a per-tool
+TTL: short for order status, long for policies. Tools without a TTL are not
+cached. Entries are evicted least recently used first beyond ``max_entries``.
+
+With ``stale_seconds``, an expired result is still served for that long
+while a single background call refreshes it (stale-while-revalidate), so
+callers never wait on a backend for a result that was recently known.
+
+When the data behind a tool changes, e.g. the catalog or knowledge base is
+reloaded, :meth:`ToolCache.invalidate` (or :func:`invalidate_tool_results`
+for every cache) drops its results; calls already in flight when that
+happens are not cached.
+
+The cache is opt-in; :func:`create_tool_cache` reads its configuration from
+the environment:
+
+* ``TOOL_CACHE``: set to ``1`` to enable the cache
+* ``TOOL_CACHE_TTLS``: per-tool TTLs in seconds, e.g.
+  ``order_status_lookup=30,knowledge_base_query=3600``, on top of
+  :data:`DEFAULT_TOOL_TTLS`; 0 disables caching for a tool
+* ``TOOL_CACHE_MAX_ENTRIES``: eviction limit
+* ``TOOL_CACHE_STALE_SECONDS``: how long expired results are served while
+  they are refreshed (default 0, off)
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import os
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Mapping, NamedTuple, Optional, Set, Tuple
+
+from customer_support_assistant import metrics
+
+# Seconds a result stays fresh, per tool; orders change, policies rarely do
+DEFAULT_TOOL_TTLS: Dict[str, float] = {
+    "order_status_lookup": 30.0,
+    "product_catalog_search": 600.0,
+    "knowledge_base_query": 3600.0,
+}
+DEFAULT_MAX_ENTRIES = 4096
+
+CacheKey = Tuple[str, str]
+
+
+class ToolCacheStats(NamedTuple):
+    """Lookup counters of a :class:`ToolCache`."""
+
+    hits: int
+    stale_hits: int
+    misses: int
+    refreshes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.stale_hits + self.misses
+        return (self.hits + self.stale_hits) / lookups if lookups else 0.0
+
+
+class _Entry(NamedTuple):
+    value: Any
+    expires: float
+    stale_until: float
+
+
+def tool_cache_key(tool: str, args: Any) -> CacheKey:
+    """Return the cache key of a call of ``tool`` with ``args`` (a dict or a string)."""
+    if isinstance(args, str):
+        return tool, args
+    return tool, json.dumps(args, sort_keys=True, default=str)
+
+
+class ToolCache:
+    """LRU cache of tool results with per-tool TTLs and stale-while-revalidate."""
+
+    def __init__(
+        self,
+        ttls: Optional[Mapping[str, float]] = None,
+        default_ttl: Optional[float] = None,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        stale_seconds: float = 0.0,
+    ):
+        """Create an empty cache.
+
+        Args:
+            ttls: Seconds a result stays fresh, per tool name;
+                :data:`DEFAULT_TOOL_TTLS` by default.
+            default_ttl: TTL of tools missing from ``ttls``; None leaves
+                them uncached.
+            max_entries: Results kept before the least recently used is evicted.
+            stale_seconds: How long after expiry a result is still served
+                while a background call refreshes it; 0 disables it.
+
+        Raises:
+            ValueError: If ``max_entries`` is not positive or ``stale_seconds`` is negative.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be positive")
+        if stale_seconds < 0:
+            raise ValueError("stale_seconds must not be negative")
+        self.ttls = dict(DEFAULT_TOOL_TTLS if ttls is None else ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self._entries: "OrderedDict[CacheKey, _Entry]" = OrderedDict()
+        # Bumped by invalidate, so calls started before it are not cached
+        self._epoch = 0
+        self._generations: Dict[str, int] = {}
+        self._refreshing: Set[CacheKey] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self._hits = self._stale_hits = self._misses = self._refreshes = 0
+        self._lock = threading.Lock()
+        _caches.add(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> ToolCacheStats:
+        """Return the lookup counters."""
+        return ToolCacheStats(self._hits, self._stale_hits, self._misses, self._refreshes)
+
+    def ttl(self, tool: str) -> Optional[float]:
+        """Seconds results of ``tool`` stay fresh, or None if they are not cached."""
+        ttl = self.ttls.get(tool, self.default_ttl)
+        return ttl if ttl else None
+
+    def call(self, tool: str, args: Any, compute: Callable[[], Any]) -> Any:
+        """Return the cached result of ``tool(args)``, calling ``compute()`` on a miss.
+
+        A stale result is returned at once and refreshed on a background thread.
+        Exceptions raised by ``compute`` propagate and are not cached.
+        """
+        if self.ttl(tool) is None:
+            return compute()
+        key = tool_cache_key(tool, args)
+        found, value, refresh = self._lookup(key)
+        if refresh:
+            self._refresh_executor().submit(self._refresh, key, compute)
+        if found:
+            return value
+        generation = self._generation(tool)
+        value = compute()
+        self._store(key, value, generation)
+        return value
+
+    async def acall(self, tool: str, args: Any, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Async variant of :meth:`call`; stale results are refreshed in a task."""
+        if self.ttl(tool) is None:
+            return await compute()
+        key = tool_cache_key(tool, args)
+        found, value, refresh = self._lookup(key)
+        if refresh:
+            task = asyncio.ensure_future(self._arefresh(key, compute))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        if found:
+            return value
+        generation = self._generation(tool)
+        value = await compute()
+        self._store(key, value, generation)
+        return value
+
+    def invalidate(self, tool: Optional[str] = None, args: Any = None) -> int:
+        """Drop cached results and return how many were dropped.
+
+        Args:
+            tool: Only drop results of this tool; every result by default.
+            args: With ``tool``, only drop the result for these arguments.
+        """
+        with self._lock:
+            if tool is None:
+                self._epoch += 1
+                keys = list(self._entries)
+            else:
+                self._generations[tool] = self._generations.get(tool, 0) + 1
+                if args is not None:
+                    keys = [tool_cache_key(tool, args)]
+                else:
+                    keys = [key for key in self._entries if key[0] == tool]
+            return sum(self._entries.pop(key, None) is not None for key in keys)
+
+    def clear(self) -> None:
+        """Drop every result."""
+        self.invalidate()
+
+    def close(self) -> None:
+        """Stop the background refresh thread, if any."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _lookup(self, key: CacheKey) -> Tuple[bool, Any, bool]:
+        """Return ``(found, value, refresh)`` for ``key``, counting the lookup."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now <= entry.expires:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                result = "hit"
+            elif entry is not None and now <= entry.stale_until:
+                self._entries.move_to_end(key)
+                self._stale_hits += 1
+                result = "stale"
+            else:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                result = "miss"
+            refresh = result == "stale" and key not in self._refreshing
+            if refresh:
+                self._refreshing.add(key)
+                self._refreshes += 1
+        metrics.count("tool_cache", key[0], result)
+        if result == "miss":
+            return False, None, False
+        return True, entry.value, refresh
+
+    def _generation(self, tool: str) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(tool, 0)
+
+    def _store(self, key: CacheKey, value: Any, generation: Tuple[int, int]) -> None:
+        ttl = self.ttl(key[0])
+        if ttl is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            # The tool's results were invalidated while this call ran
+            if self._generation(key[0]) != generation:
+                return
+            self._entries[key] = _Entry(value, now + ttl, now + ttl + self.stale_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _refresh(self, key: CacheKey, compute: Callable[[], Any]) -> None:
+        generation = self._generation(key[0])
+        try:
+            self._store(key, compute(), generation)
+        except Exception:
+            # Keep serving the stale result until it runs out
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    async def _arefresh(self, key: CacheKey, compute: Callable[[], Awaitable[Any]]) -> None:
+        generation = self._generation(key[0])
+        try:
+            self._store(key, await compute(), generation)
+        except Exception:
+            pass
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _refresh_executor(self) -> concurrent.futures.ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = concurrent.futures.ThreadPoolExecutor(
+                        max_workers=2, thread_name_prefix="tool-cache"
+                    )
+        return self._executor
+
+
+# Every live cache, so reloading a tool's data can invalidate all of them
+_caches: "weakref.WeakSet[ToolCache]" = weakref.WeakSet()
+
+
+def invalidate_tool_results(tool: Optional[str] = None) -> None:
+    """Drop the cached results of ``tool`` (of every tool by default) in every cache."""
+    for cache in list(_caches):
+        cache.invalidate(tool)
+
+
+def parse_ttls(spec: str) -> Dict[str, float]:
+    """Parse ``name=seconds`` pairs separated by commas.
+
+    Raises:
+        ValueError: If a pair is malformed.
+    """
+    ttls = {}
+    for pair in filter(None, (p.strip() for p in spec.split(","))):
+        name, sep, seconds = pair.partition("=")
+        try:
+            if not sep or not name.strip():
+                raise ValueError
+            ttls[name.strip()] = float(seconds)
+        except ValueError:
+            raise ValueError(f"Invalid tool TTL {pair!r}, expected name=seconds") from None
+    return ttls
+
+
+def create_tool_cache() -> Optional[ToolCache]:
+    """Build the tool cache configured by the environment, or None if disabled."""
+    if os.getenv("TOOL_CACHE", "").lower() not in ("1", "true", "yes", "on"):
+        return None
+    return ToolCache(
+        ttls={**DEFAULT_TOOL_TTLS, **parse_ttls(os.getenv("TOOL_CACHE_TTLS", ""))},
+        max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+        stale_seconds=float(os.getenv("TOOL_CACHE_STALE_SECONDS", "0")),
+    )
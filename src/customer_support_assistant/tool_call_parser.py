@@ -0,0 +1,136 @@
+"""Incremental parser for tool calls written as JSON in the model's reply.
+
+In the JSON-prompt tool protocol the model answers either in prose or with
+an object like ``{"tool_calls": [{"name": ..., "args": {...}}]}``, sometimes
+wrapped in a markdown code fence. :class:`ToolCallParser` consumes the reply
+chunk by chunk in a single pass: it tracks brace depth and string state of a
+candidate object and decodes it once, as soon as its closing brace arrives.
+
+Candidate objects start either at the beginning of the reply or right after
+a code fence (```` ```json ````); braces elsewhere in prose are ignored.
+"""
+
+import json
+from typing import Any, Dict, List, Optional
+
+FENCE = "```"
+
+# Parser states
+_START = "start"  # skipping whitespace at the start of the reply
+_TEXT = "text"  # prose, looking for a code fence
+_FENCE_INFO = "fence_info"  # after a fence, skipping its language tag
+_FENCE_BODY = "fence_body"  # after the tag, skipping whitespace before an object
+_OBJECT = "object"  # inside a candidate object
+_DONE = "done"  # tool calls found
+
+
+class ToolCallParser:
+    """Recognize a ``tool_calls`` object in model output fed chunk by chunk."""
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._state = _START
+        self._start = 0  # offset of the candidate object
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self.tool_calls: Optional[List[Dict[str, Any]]] = None
+
+    @property
+    def done(self) -> bool:
+        """True once a complete ``tool_calls`` object has been parsed."""
+        return self._state == _DONE
+
+    def feed(self, text: str) -> Optional[List[Dict[str, Any]]]:
+        """Consume a chunk of the reply.
+
+        Returns:
+            The parsed tool calls once their object is complete, else None.
+        """
+        if self._state == _DONE:
+            return self.tool_calls
+        self._buffer += text
+        buffer = self._buffer
+        pos = self._pos
+        while pos < len(buffer) and self._state != _DONE:
+            state = self._state
+            if state == _START or state == _FENCE_BODY:
+                char = buffer[pos]
+                if char.isspace():
+                    pos += 1
+                elif char == "{":
+                    self._begin_object(pos)
+                    pos += 1
+                elif state == _START and buffer.startswith("`", pos):
+                    # Wait until a possible fence has fully arrived
+                    if len(buffer) - pos < len(FENCE):
+                        break
+                    self._state = _TEXT
+                else:
+                    self._state = _TEXT
+            elif state == _TEXT:
+                fence = buffer.find(FENCE, pos)
+                if fence < 0:
+                    # Keep trailing backticks that may start a fence
+                    pos = max(pos, len(buffer) - len(FENCE) + 1)
+                    break
+                pos = fence + len(FENCE)
+                self._state = _FENCE_INFO
+            elif state == _FENCE_INFO:
+                # Skip the fence's language tag, e.g. "json"
+                while pos < len(buffer) and (buffer[pos].isalnum() or buffer[pos] in "_-"):
+                    pos += 1
+                if pos < len(buffer):
+                    self._state = _FENCE_BODY
+            else:
+                pos = self._scan_object(buffer, pos)
+        self._pos = pos
+        return self.tool_calls
+
+    def _begin_object(self, pos: int) -> None:
+        self._state = _OBJECT
+        self._start = pos
+        self._depth = 1
+        self._in_string = False
+        self._escaped = False
+
+    def _scan_object(self, buffer: str, pos: int) -> int:
+        """Advance through a candidate object; returns the next position to scan."""
+        while pos < len(buffer):
+            char = buffer[pos]
+            pos += 1
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._finish_object(buffer[self._start:pos])
+                    return pos
+        return pos
+
+    def _finish_object(self, text: str) -> None:
+        try:
+            parsed = json.loads(text)
+        except json.JSONDecodeError:
+            parsed = None
+        if isinstance(parsed, dict) and isinstance(parsed.get("tool_calls"), list):
+            self.tool_calls = parsed["tool_calls"]
+            self._state = _DONE
+        else:
+            # Not a tool call; keep looking for a fenced one
+            self._state = _TEXT
+
+
+def parse_tool_calls(text: str) -> Optional[List[Dict[str, Any]]]:
+    """Return the tool calls in a complete reply, or None if it is an answer."""
+    return ToolCallParser().feed(text)
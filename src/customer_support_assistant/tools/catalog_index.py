@@ -0,0 +1,301 @@
+"""Prebuilt lookup index for product catalog searches.
+
+The index is a handful of flat NumPy arrays (sorted normalized names, alias
+keys, per-name character counts). :func:`build_index_arrays` computes them
+once, e.g. when a catalog snapshot is written; a process that maps the
+snapshot wraps them in a :class:`CatalogIndex` without copying or rebuilding
+anything.
+"""
+
+import difflib
+import re
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Mapping, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+_QUERY_STRIP_RE = re.compile(r"[^a-zA-Z0-9 -]")
+_NAME_STRIP_RE = re.compile(r"[^a-z0-9 -]")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Characters left in normalized names and queries, in column order
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789 -"
+_CHAR_COLUMNS = {char: column for column, char in enumerate(ALPHABET)}
+# Character counts are stored as uint8; a full cell means "at least this many"
+_SATURATED = 255
+
+# Arrays making up an index, as written to catalog snapshots
+INDEX_ARRAYS = (
+    "keys", "key_positions", "key_ranks", "aliases", "alias_positions", "rows", "name_lengths", "lengths", "char_counts"
+)
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query: drop punctuation, keep hyphens, collapse spaces."""
+    norm_query = _QUERY_STRIP_RE.sub("", query)
+    return _WHITESPACE_RE.sub(" ", norm_query).strip()
+
+
+def normalize_product_name(name: str) -> str:
+    """Normalize a catalog product name to its lookup key."""
+    return _NAME_STRIP_RE.sub("", name.lower())
+
+
+class CatalogMatch(NamedTuple):
+    """A catalog hit: the normalized product name, its value and the match kind."""
+
+    name: str
+    value: str
+    kind: str
+
+
+def build_index_arrays(names: Iterable[str]) -> Dict[str, np.ndarray]:
+    """Build the lookup arrays of a catalog with product ``names``, in catalog order.
+
+    Names are normalized and deduplicated; a repeated name keeps the position
+    of its first occurrence and the row (value) of its last, like a dict
+    built from the catalog.
+
+    Returns:
+        The arrays named in :data:`INDEX_ARRAYS`, with ``rows`` mapping each
+        distinct name to the catalog row holding its value.
+    """
+    positions: Dict[str, int] = {}
+    rows: List[int] = []
+    for row, name in enumerate(names):
+        norm_name = normalize_product_name(name)
+        position = positions.setdefault(norm_name, len(positions))
+        if position == len(rows):
+            rows.append(row)
+        else:
+            rows[position] = row
+
+    ordered = list(positions)
+    width = max((len(name) for name in ordered), default=1) or 1
+    keys = np.array(sorted(ordered), dtype=f"S{width}")
+    key_positions = np.array([positions[key.decode("ascii")] for key in keys], dtype=np.int32)
+    key_ranks = np.empty(len(ordered), dtype=np.int32)
+    key_ranks[key_positions] = np.arange(len(ordered), dtype=np.int32)
+
+    # Hyphen-agnostic keys; the earliest name wins when several collapse to one
+    alias_positions: Dict[str, int] = {}
+    for position, name in enumerate(ordered):
+        alias_positions.setdefault(name.replace("-", " "), position)
+    aliases = sorted(alias_positions)
+
+    name_lengths = np.array([len(name) for name in ordered], dtype=np.int32)
+    char_counts = np.zeros((len(ALPHABET), len(ordered)), dtype=np.uint8)
+    for position, name in enumerate(ordered):
+        for char, count in Counter(name).items():
+            char_counts[_CHAR_COLUMNS[char], position] = min(count, _SATURATED)
+
+    return {
+        "keys": keys,
+        "key_positions": key_positions,
+        "key_ranks": key_ranks,
+        "aliases": np.array(aliases, dtype=f"S{width}"),
+        "alias_positions": np.array([alias_positions[alias] for alias in aliases], dtype=np.int32),
+        "rows": np.array(rows, dtype=np.int32),
+        "name_lengths": name_lengths,
+        "lengths": np.unique(name_lengths),
+        "char_counts": char_counts,
+    }
+
+
+def _find(keys: np.ndarray, positions: np.ndarray, key: str) -> Optional[int]:
+    """Binary search the sorted ``keys`` for ``key`` and return its position."""
+    encoded = key.encode("ascii")
+    if len(encoded) > keys.dtype.itemsize:
+        return None
+    i = int(np.searchsorted(keys, encoded))
+    return int(positions[i]) if i < len(keys) and keys[i] == encoded else None
+
+
+class CatalogIndex:
+    """Product lookups answered from prebuilt arrays.
+
+    Matching keeps the semantics of the original linear scan: products are
+    considered in catalog order and the first one that matches the query by
+    exact name, hyphen-agnostic name, substring or fuzzy ratio wins. Instead
+    of running every check against every product, exact and hyphen-agnostic
+    names are found by binary search over sorted keys, and the substrings of
+    the query are looked up the same way in one vectorized search.
+
+    Fuzzy candidates are the names before the best hit so far whose length and
+    character counts allow a ``difflib`` ratio of ``fuzzy_cutoff``: the same
+    ``real_quick_ratio`` and ``quick_ratio`` upper bounds ``difflib`` checks
+    first, computed for all names at once from a matrix of per-name character
+    counts. A name failing them cannot match, so only the survivors are
+    compared with ``difflib`` and results are those of the linear scan.
+
+    For an exact hit the query is the product name, so whether an earlier
+    product fuzzy matches it is remembered per product, and repeated exact
+    hits take constant time.
+    """
+
+    def __init__(self, products: Mapping[str, str], fuzzy_cutoff: float = 0.8):
+        """Build the index in memory.
+
+        Args:
+            products: Mapping of product name to catalog value (e.g. price).
+            fuzzy_cutoff: Minimum ``difflib`` ratio for a fuzzy match.
+        """
+        values = list(products.values())
+        self._attach(build_index_arrays(products), values.__getitem__, fuzzy_cutoff)
+
+    @classmethod
+    def from_arrays(
+        cls, arrays: Mapping[str, np.ndarray], value: Callable[[int], str], fuzzy_cutoff: float = 0.8
+    ) -> "CatalogIndex":
+        """Wrap arrays from :func:`build_index_arrays`, e.g. memory-mapped from a snapshot.
+
+        Args:
+            arrays: The index arrays; they are used as they are, not copied.
+            value: Returns the catalog value (e.g. formatted price) of a row.
+            fuzzy_cutoff: Minimum ``difflib`` ratio for a fuzzy match.
+        """
+        index = cls.__new__(cls)
+        index._attach(arrays, value, fuzzy_cutoff)
+        return index
+
+    def _attach(self, arrays: Mapping[str, np.ndarray], value: Callable[[int], str], fuzzy_cutoff: float) -> None:
+        self.fuzzy_cutoff = fuzzy_cutoff
+        self._value = value
+        self._keys = arrays["keys"]
+        self._key_positions = arrays["key_positions"]
+        self._key_ranks = arrays["key_ranks"]
+        self._aliases = arrays["aliases"]
+        self._alias_positions = arrays["alias_positions"]
+        self._rows = arrays["rows"]
+        self._name_lengths = arrays["name_lengths"]
+        # Distinct name lengths, for probing the query's substrings
+        self._lengths = arrays["lengths"]
+        self._char_counts = arrays["char_counts"]
+        # Earliest fuzzy match before each exact-hit product, filled in on use
+        self._exact_fuzzy: Dict[int, Optional[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._key_ranks)
+
+    def __contains__(self, name: object) -> bool:
+        return isinstance(name, str) and self._position(normalize_product_name(name)) is not None
+
+    def _position(self, norm_name: str) -> Optional[int]:
+        return _find(self._keys, self._key_positions, norm_name)
+
+    def _name(self, position: int) -> str:
+        return self._keys[self._key_ranks[position]].decode("ascii")
+
+    def _match(self, position: int, kind: str) -> CatalogMatch:
+        return CatalogMatch(self._name(position), self._value(int(self._rows[position])), kind)
+
+    def get(self, name: str) -> Optional[str]:
+        """Return the value stored for an exact product name, if any."""
+        position = self._position(normalize_product_name(name))
+        return None if position is None else self._value(int(self._rows[position]))
+
+    def search(self, query: str) -> Optional[CatalogMatch]:
+        """Find the first catalog product matching ``query``.
+
+        Args:
+            query: Raw user query; it is normalized before matching.
+
+        Returns:
+            The matching product, or None if nothing matches.
+        """
+        norm_query = normalize_query(query).lower()
+        if not norm_query:
+            return None
+
+        best: Optional[int] = None
+        kind = ""
+
+        def consider(position: Optional[int], match_kind: str) -> None:
+            nonlocal best, kind
+            if position is not None and (best is None or position < best):
+                best, kind = position, match_kind
+
+        exact = self._position(norm_query)
+        consider(exact, "exact")
+        consider(_find(self._aliases, self._alias_positions, norm_query.replace("-", " ")), "hyphen")
+        consider(self._substring_match(norm_query), "substring")
+        if best == 0:
+            # Nothing comes before the first product
+            pass
+        elif exact is not None:
+            if exact not in self._exact_fuzzy:
+                self._exact_fuzzy[exact] = self._fuzzy_match(norm_query, exact)
+            # The earliest fuzzy match before the exact hit, if also before best
+            fuzzy = self._exact_fuzzy[exact]
+            consider(fuzzy if fuzzy is not None and fuzzy < best else None, "fuzzy")
+        else:
+            consider(self._fuzzy_match(norm_query, best), "fuzzy")
+
+        if best is None:
+            return None
+        return self._match(best, kind)
+
+    def mentions(self, query: str) -> List[CatalogMatch]:
+        """Return the products whose names occur in ``query``, in order of appearance.
+
+        A name found only inside a longer mentioned name (e.g. "widget pro 300"
+        within "widget pro 3000") does not count as a mention of its own.
+        """
+        spans = self._substring_hits(normalize_query(query).lower())
+        mentioned: Dict[int, None] = {}
+        for start, end, position in sorted(spans, key=lambda span: (span[0], -span[1])):
+            if not any(s <= start and end <= e and (s, e) != (start, end) for s, e, _ in spans):
+                mentioned.setdefault(position)
+        return [self._match(position, "substring") for position in mentioned]
+
+    def _substring_hits(self, norm_query: str) -> List[Tuple[int, int, int]]:
+        """Return ``(start, end, position)`` of every product name occurring in the query."""
+        query_len = len(norm_query)
+        spans = [
+            (start, start + length)
+            for length in self._lengths[self._lengths <= query_len].tolist()
+            for start in range(query_len - length + 1)
+        ]
+        if not spans:
+            return []
+        encoded = np.array([norm_query[start:end].encode("ascii") for start, end in spans], dtype=self._keys.dtype)
+        found = np.minimum(np.searchsorted(self._keys, encoded), len(self._keys) - 1)
+        return [
+            (*spans[i], int(self._key_positions[found[i]])) for i in np.flatnonzero(self._keys[found] == encoded)
+        ]
+
+    def _substring_match(self, norm_query: str) -> Optional[int]:
+        """Return the earliest product whose name occurs inside the query."""
+        hits = self._substring_hits(norm_query)
+        return min(position for _, _, position in hits) if hits else None
+
+    def _fuzzy_candidates(self, norm_query: str, limit: int) -> np.ndarray:
+        """Return the products before ``limit`` that pass difflib's quick ratio bounds, in order."""
+        query_len = len(norm_query)
+        lengths = self._name_lengths[:limit]
+        total = lengths + query_len
+        # real_quick_ratio: the shorter string, matched in full
+        passing = 2.0 * np.minimum(lengths, query_len) / total >= self.fuzzy_cutoff
+        # quick_ratio: characters the two strings have in common, counted with multiplicity
+        common = np.zeros(limit, dtype=np.int32)
+        for char, count in Counter(norm_query).items():
+            counts = self._char_counts[_CHAR_COLUMNS[char], :limit]
+            if count < _SATURATED:
+                common += np.minimum(counts, count)
+            else:
+                common += np.where(counts == _SATURATED, count, counts)
+        passing &= 2.0 * common / total >= self.fuzzy_cutoff
+        return np.flatnonzero(passing)
+
+    def _fuzzy_match(self, norm_query: str, before: Optional[int]) -> Optional[int]:
+        """Return the earliest fuzzy match positioned before ``before``."""
+        limit = len(self) if before is None else before
+        # Same comparison as difflib.get_close_matches(name, [query]), with the
+        # query side of the matcher set up once for all candidates
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq1(norm_query)
+        for position in self._fuzzy_candidates(norm_query, limit).tolist():
+            matcher.set_seq2(self._name(position))
+            if matcher.ratio() >= self.fuzzy_cutoff:
+                return position
+        return None
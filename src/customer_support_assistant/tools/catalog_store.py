@@ -0,0 +1,281 @@
+"""Columnar product catalog storage, feed loading and binary snapshots.
+
+Products are held column-wise: every string lives in one UTF-8 blob addressed
+by offset arrays, and prices sit in a flat float64 array. A store can be
+written to a binary snapshot and reopened with ``mmap``, so worker processes
+attach to one shared, page-cached copy of the catalog instead of re-parsing
+the feed. Snapshots also carry the arrays of the
+:class:`~customer_support_assistant.tools.catalog_index.CatalogIndex`, built
+when the snapshot is written, so workers search the mapped catalog without
+building an index of their own.
+"""
+
+import csv
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Mapping, NamedTuple, Optional, Union
+
+import numpy as np
+
+from customer_support_assistant.tools.catalog_index import INDEX_ARRAYS, build_index_arrays
+
+SNAPSHOT_MAGIC = b"CSACAT02"
+# magic, byte order, product count, blob length, index table length
+_HEADER = struct.Struct("<8s8sQQQ")
+# Snapshots written before the index was stored in them; opened without one
+_V1_MAGIC = b"CSACAT01"
+_V1_HEADER = struct.Struct("<8s8sQQ")
+# Index arrays start on this boundary so they can be viewed in place
+_ALIGNMENT = 8
+_BYTEORDER = sys.byteorder.encode().ljust(8, b"\0")
+
+PathLike = Union[str, Path]
+
+
+def _align(offset: int) -> int:
+    return -(-offset // _ALIGNMENT) * _ALIGNMENT
+
+
+class Product(NamedTuple):
+    """A single catalog entry."""
+
+    name: str
+    price: float
+    description: str
+
+
+class CatalogStore:
+    """Read-only, array-backed product catalog."""
+
+    __slots__ = ("_blob", "_name_offsets", "_description_offsets", "_prices", "_mmap", "_index_arrays")
+
+    def __init__(
+        self,
+        blob: Union[bytes, memoryview],
+        name_offsets: Union[array, memoryview],
+        description_offsets: Union[array, memoryview],
+        prices: Union[array, memoryview],
+        mapped: Optional[mmap.mmap] = None,
+        index_arrays: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        self._blob = blob
+        self._name_offsets = name_offsets
+        self._description_offsets = description_offsets
+        self._prices = prices
+        self._mmap = mapped
+        self._index_arrays = index_arrays
+
+    @classmethod
+    def from_records(cls, records: Iterable[Mapping[str, Any]]) -> "CatalogStore":
+        """Build a store from product records with name, price and description.
+
+        Raises:
+            ValueError: If a record has no name or an unparseable price.
+        """
+        blob = bytearray()
+        name_offsets = array("Q", [0])
+        description_offsets = array("Q", [0])
+        prices = array("d")
+        for line_number, record in enumerate(records, start=1):
+            name = str(record.get("name") or "").strip()
+            if not name:
+                raise ValueError(f"Product record {line_number} has no name")
+            try:
+                price = float(str(record.get("price", "")).lstrip("$").replace(",", ""))
+            except ValueError:
+                raise ValueError(
+                    f"Product record {line_number} has an invalid price: {record.get('price')!r}"
+                ) from None
+            # Names and descriptions are interleaved in the blob; each offset
+            # array records where its own field ends
+            blob += name.encode("utf-8")
+            name_offsets.append(len(blob))
+            blob += str(record.get("description") or "").encode("utf-8")
+            description_offsets.append(len(blob))
+            prices.append(price)
+        return cls(bytes(blob), name_offsets, description_offsets, prices)
+
+    @classmethod
+    def open_snapshot(cls, path: PathLike) -> "CatalogStore":
+        """Attach to a snapshot written by :meth:`write_snapshot` via ``mmap``.
+
+        Nothing is copied: the columns and the index arrays are views of the
+        mapped file. Snapshots written before the index was stored in them
+        open without one.
+
+        Raises:
+            ValueError: If the file is not a catalog snapshot for this platform.
+        """
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic = mapped[:len(SNAPSHOT_MAGIC)]
+            if magic == SNAPSHOT_MAGIC:
+                _, byteorder, count, blob_len, table_len = _HEADER.unpack_from(mapped, 0)
+                offset = _HEADER.size
+            elif magic == _V1_MAGIC:
+                _, byteorder, count, blob_len = _V1_HEADER.unpack_from(mapped, 0)
+                offset, table_len = _V1_HEADER.size, 0
+            else:
+                raise ValueError(f"{path} is not a catalog snapshot")
+            if byteorder != _BYTEORDER:
+                host = byteorder.rstrip(b"\0").decode()
+                raise ValueError(f"{path} was written on a {host}-endian host")
+            view = memoryview(mapped)
+            offsets_len = (count + 1) * 8
+            name_offsets = view[offset:offset + offsets_len].cast("Q")
+            offset += offsets_len
+            description_offsets = view[offset:offset + offsets_len].cast("Q")
+            offset += offsets_len
+            prices = view[offset:offset + count * 8].cast("d")
+            offset += count * 8
+            blob = view[offset:offset + blob_len]
+            offset += blob_len
+            index_arrays = None
+            if table_len:
+                table = json.loads(bytes(view[offset:offset + table_len]))
+                arrays_start = _align(offset + table_len)
+                index_arrays = {
+                    name: np.frombuffer(
+                        mapped, dtype=np.dtype(dtype), count=int(np.prod(shape)), offset=arrays_start + start
+                    ).reshape(shape)
+                    for name, (dtype, shape, start) in table.items()
+                }
+        except Exception:
+            mapped.close()
+            raise
+        return cls(blob, name_offsets, description_offsets, prices, mapped, index_arrays)
+
+    def write_snapshot(self, path: PathLike) -> None:
+        """Write the store and its catalog index as a binary snapshot that can be memory-mapped."""
+        arrays = self.index_arrays()
+        if arrays is None:
+            arrays = build_index_arrays(self.names())
+        columns = [
+            memoryview(self._name_offsets).cast("B"),
+            memoryview(self._description_offsets).cast("B"),
+            memoryview(self._prices).cast("B"),
+            memoryview(self._blob).cast("B"),
+        ]
+        # Table of the index arrays: name -> (dtype, shape, offset from the
+        # first aligned byte after the table)
+        table, start = {}, 0
+        for name in INDEX_ARRAYS:
+            table[name] = [arrays[name].dtype.str, list(arrays[name].shape), start]
+            start = _align(start + arrays[name].nbytes)
+        encoded_table = json.dumps(table).encode("ascii")
+        arrays_start = _align(_HEADER.size + sum(len(column) for column in columns) + len(encoded_table))
+
+        tmp_path = Path(f"{path}.tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(SNAPSHOT_MAGIC, _BYTEORDER, len(self), len(self._blob), len(encoded_table)))
+            for column in columns:
+                f.write(column)
+            f.write(encoded_table)
+            for name in INDEX_ARRAYS:
+                f.write(b"\0" * (arrays_start + table[name][2] - f.tell()))
+                f.write(np.ascontiguousarray(arrays[name]).tobytes())
+        # Replace atomically so workers never map a half-written file
+        tmp_path.replace(path)
+
+    def close(self) -> None:
+        """Release the memory map backing a snapshot, if any.
+
+        Raises:
+            BufferError: If a catalog index over the snapshot is still alive.
+        """
+        if self._mmap is None:
+            return
+        for view in (self._blob, self._name_offsets, self._description_offsets, self._prices):
+            view.release()
+        self._index_arrays = None
+        self._mmap.close()
+        self._mmap = None
+
+    def index_arrays(self) -> Optional[Dict[str, np.ndarray]]:
+        """Return the catalog index arrays mapped from a snapshot, or None if the store has none."""
+        return self._index_arrays
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    def __iter__(self) -> Iterator[Product]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index: int) -> Product:
+        return Product(self.name(index), self.price(index), self.description(index))
+
+    def name(self, index: int) -> str:
+        """Return the product name at ``index``."""
+        start = self._description_offsets[index]
+        return str(self._blob[start:self._name_offsets[index + 1]], "utf-8")
+
+    def description(self, index: int) -> str:
+        """Return the product description at ``index``."""
+        start = self._name_offsets[index + 1]
+        return str(self._blob[start:self._description_offsets[index + 1]], "utf-8")
+
+    def price(self, index: int) -> float:
+        """Return the product price at ``index``."""
+        return self._prices[index]
+
+    def price_text(self, index: int) -> str:
+        """Return the price at ``index`` formatted for answers, e.g. ``$399.99``."""
+        return f"${self._prices[index]:.2f}"
+
+    def names(self) -> Iterator[str]:
+        """Yield the product names in catalog order."""
+        for i in range(len(self)):
+            yield self.name(i)
+
+    def price_map(self) -> Dict[str, str]:
+        """Return a name -> formatted price mapping for catalog lookups."""
+        return {self.name(i): self.price_text(i) for i in range(len(self))}
+
+
+def _read_feed(path: Path) -> Iterator[Dict[str, Any]]:
+    suffix = path.suffix.lower()
+    if suffix not in (".csv", ".jsonl", ".ndjson"):
+        raise ValueError(f"Unsupported product feed format: {path.suffix}")
+    with open(path, newline="", encoding="utf-8") as f:
+        if suffix == ".csv":
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_feed(path: PathLike) -> CatalogStore:
+    """Load a CSV or JSONL product feed into a :class:`CatalogStore`.
+
+    Raises:
+        ValueError: If the feed format is unsupported or a record is invalid.
+    """
+    return CatalogStore.from_records(_read_feed(Path(path)))
+
+
+def load_catalog(path: PathLike) -> CatalogStore:
+    """Open a catalog snapshot, or parse a product feed if ``path`` is not one."""
+    with open(path, "rb") as f:
+        is_snapshot = f.read(len(SNAPSHOT_MAGIC)) in (SNAPSHOT_MAGIC, _V1_MAGIC)
+    return CatalogStore.open_snapshot(path) if is_snapshot else load_feed(path)
+
+
+def build_snapshot(feed_path: PathLike, snapshot_path: PathLike) -> int:
+    """Convert a product feed into a snapshot and return the product count."""
+    store = load_feed(feed_path)
+    store.write_snapshot(snapshot_path)
+    return len(store)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m customer_support_assistant.tools.catalog_store FEED SNAPSHOT")
+    count = build_snapshot(sys.argv[1], sys.argv[2])
+    print(f"Wrote {count} products to {sys.argv[2]}")
@@ -0,0 +1,232 @@
+"""Keyword search over document chunks with BM25 ranking.
+
+Texts are tokenized into lowercase words, stop words are dropped and the
+rest reduced to a stem by a small suffix-stripping stemmer, so "returns",
+"returned" and "returning" all match "return". :class:`BM25Index` keeps an
+inverted index of those terms in flat NumPy arrays (sorted terms, posting
+offsets, posting document ids and term frequencies). Building it is a
+one-time cost: :meth:`BM25Index.save` writes the arrays as ``.npy`` files and
+:meth:`BM25Index.load` memory-maps them, so a process attaches to the index
+without rebuilding or copying it.
+
+:func:`reciprocal_rank_fusion` merges several rankings, e.g. BM25 and vector
+results, by rank alone, so their scores need not be comparable.
+"""
+
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple, Union
+
+import numpy as np
+
+from customer_support_assistant.tools.vector_search import SearchResult, top_k
+
+PathLike = Union[str, Path]
+
+KEYWORD_INDEX_VERSION = 1
+_PARAMS_FILE = "bm25.json"
+_ARRAY_FILES = ("terms", "offsets", "doc_ids", "freqs", "lengths")
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Longer tokens (URLs, serial numbers) are truncated to keep the term array compact
+MAX_TERM_CHARS = 40
+
+# Function words that carry no topic signal in support questions
+STOP_WORDS = frozenset(
+    "a about an and are as at be by can do does for from have how i in is it me my "
+    "of on or our tell that the this to was what when where which who why will with "
+    "you your".split()
+)
+
+_SUFFIXES = ("ation", "ment", "ness", "ing", "ed", "ly")
+_VOWELS = frozenset("aeiouy")
+
+
+@lru_cache(maxsize=65536)
+def stem(word: str) -> str:
+    """Reduce an English word to its stem by stripping common suffixes.
+
+    A light Porter-style stemmer: plural ``s``, then one of ``-ation``,
+    ``-ment``, ``-ness``, ``-ing``, ``-ed`` or ``-ly``, a doubled final
+    consonant and a final ``e`` are removed. Stems need not be words
+    ("shipping" and "ships" both become "ship", "charge" becomes "charg");
+    they only need to agree between documents and queries.
+    """
+    if len(word) <= 3 or not word.isalpha():
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    for suffix in _SUFFIXES:
+        base = word[:-len(suffix)]
+        if word.endswith(suffix) and len(base) >= 3 and _VOWELS.intersection(base):
+            word = base
+            break
+    if len(word) > 3 and word[-1] == word[-2] and word[-1] not in _VOWELS and word[-1] != "s":
+        word = word[:-1]
+    if len(word) > 4 and word.endswith("e"):
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str, stop_words: Iterable[str] = STOP_WORDS) -> List[str]:
+    """Return the stemmed terms of ``text``, minus stop words, in order."""
+    stop_words = stop_words if isinstance(stop_words, frozenset) else frozenset(stop_words)
+    return [
+        stem(token[:MAX_TERM_CHARS]) for token in _TOKEN_RE.findall(text.lower()) if token not in stop_words
+    ]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> List[Tuple[int, float]]:
+    """Merge rankings of ids into one, best first.
+
+    Each id scores ``sum(1 / (k + rank))`` over the rankings it appears in
+    (ranks start at 1); ties keep the order of first appearance.
+
+    Args:
+        rankings: Ids ordered best first, e.g. one list per retriever.
+        k: Damping constant; larger values flatten the weight of top ranks.
+
+    Returns:
+        ``(id, fused score)`` pairs, best first.
+    """
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, start=1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda pair: -pair[1])
+
+
+class BM25Index:
+    """Inverted index of document terms, ranked with Okapi BM25.
+
+    Postings are stored term by term: the documents containing
+    ``terms[t]`` are ``doc_ids[offsets[t]:offsets[t + 1]]``, with their term
+    frequencies at the same positions in ``freqs``.
+    """
+
+    def __init__(
+        self,
+        terms: np.ndarray,
+        offsets: np.ndarray,
+        doc_ids: np.ndarray,
+        freqs: np.ndarray,
+        lengths: np.ndarray,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        """Wrap prebuilt index arrays; use :meth:`build` or :meth:`load` instead."""
+        self.k1 = k1
+        self.b = b
+        self._terms = terms
+        self._offsets = offsets
+        self._doc_ids = doc_ids
+        self._freqs = freqs
+        self._lengths = lengths
+        # The length normalization of each document's term frequencies
+        average = float(lengths.mean()) if len(lengths) else 0.0
+        self._norms = (k1 * (1 - b + b * lengths / max(average, 1e-9))).astype(np.float32)
+
+    @classmethod
+    def build(cls, texts: Sequence[str], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """Index ``texts``; document ids are their positions.
+
+        Args:
+            texts: Documents to index.
+            k1: Term frequency saturation.
+            b: Strength of the document length normalization, from 0 to 1.
+        """
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc, text in enumerate(texts):
+            counts = Counter(tokenize(text))
+            lengths[doc] = sum(counts.values())
+            for term, freq in counts.items():
+                postings.setdefault(term, []).append((doc, freq))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        np.cumsum([len(postings[term]) for term in terms], out=offsets[1:])
+        total = int(offsets[-1])
+        doc_ids = np.fromiter((doc for term in terms for doc, _ in postings[term]), dtype=np.int32, count=total)
+        freqs = np.fromiter((freq for term in terms for _, freq in postings[term]), dtype=np.float32, count=total)
+        width = max((len(term) for term in terms), default=1)
+        return cls(np.array(terms, dtype=f"<U{width}"), offsets, doc_ids, freqs, lengths, k1, b)
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    @property
+    def vocabulary_size(self) -> int:
+        """Number of distinct terms."""
+        return len(self._terms)
+
+    def _term_id(self, term: str) -> int:
+        i = int(np.searchsorted(self._terms, term))
+        return i if i < len(self._terms) and self._terms[i] == term else -1
+
+    def scores(self, query: str) -> np.ndarray:
+        """Return the BM25 score of every document for ``query``."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        n = len(self)
+        for term, count in Counter(tokenize(query)).items():
+            t = self._term_id(term)
+            if t < 0:
+                continue
+            start, end = self._offsets[t], self._offsets[t + 1]
+            docs, freqs = self._doc_ids[start:end], self._freqs[start:end]
+            df = end - start
+            idf = np.log1p((n - df + 0.5) / (df + 0.5))
+            scores[docs] += count * idf * freqs * (self.k1 + 1) / (freqs + self._norms[docs])
+        return scores
+
+    def search(self, queries: Sequence[str], k: int) -> SearchResult:
+        """Return ``(scores, ids)`` of the ``k`` best documents per query, best first.
+
+        Documents sharing no term with a query are left out; their slots
+        hold id -1.
+        """
+        if not len(self):
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.float32), empty.astype(np.int64)
+        scores, ids = top_k(np.stack([self.scores(query) for query in queries]), k)
+        ids[scores <= 0] = -1
+        return scores, ids
+
+    def save(self, directory: PathLike) -> None:
+        """Write the index to ``directory`` as ``.npy`` arrays plus parameters."""
+        root = Path(directory)
+        root.mkdir(parents=True, exist_ok=True)
+        arrays = (self._terms, self._offsets, self._doc_ids, self._freqs, self._lengths)
+        for name, array in zip(_ARRAY_FILES, arrays):
+            np.save(root / f"bm25_{name}.npy", np.ascontiguousarray(array))
+        params = {"version": KEYWORD_INDEX_VERSION, "k1": self.k1, "b": self.b, "documents": len(self)}
+        (root / _PARAMS_FILE).write_text(json.dumps(params), encoding="utf-8")
+
+    @staticmethod
+    def exists(directory: PathLike) -> bool:
+        """Return whether ``directory`` holds an index written by :meth:`save`."""
+        return (Path(directory) / _PARAMS_FILE).exists()
+
+    @classmethod
+    def load(cls, directory: PathLike, mmap: bool = True) -> "BM25Index":
+        """Open an index written by :meth:`save`.
+
+        Args:
+            directory: Where the index was saved.
+            mmap: Memory-map the arrays read-only instead of reading them in.
+
+        Raises:
+            ValueError: If the index was written in another format version.
+        """
+        root = Path(directory)
+        params = json.loads((root / _PARAMS_FILE).read_text(encoding="utf-8"))
+        if params.get("version") != KEYWORD_INDEX_VERSION:
+            raise ValueError(f"Unsupported keyword index version: {params.get('version')}")
+        arrays = [np.load(root / f"bm25_{name}.npy", mmap_mode="r" if mmap else None) for name in _ARRAY_FILES]
+        return cls(*arrays, k1=params["k1"], b=params["b"])
@@ -1,61 +1,36 @@
 """Knowledge base related tools."""
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
 
-def knowledge_base_query(query: str) -> str:
-    """
-    Queries the internal knowledge base for general information, policies, or FAQs.
-    Useful for answering questions about return policies, warranty information, or general company procedures.
-    """
-    query = query.lower()
-    
-    # Returns and Warranty
-    if "return" in query:
-        return """Return Policy:
-- 30-day return period from date of purchase
-- Original receipt required
-- Item must be in original condition with all packaging and accessories
-- Free returns for defective items
-- Return shipping fees may apply for non-defective items
-- Store credit or refund to original payment method
+from customer_support_assistant.tool_cache import invalidate_tool_results
+from customer_support_assistant.tools.keyword_index import BM25Index
+from customer_support_assistant.tools.vector_store import VectorStore
+
+# Directory of policy documents (*.md, *.txt) to index. Set KNOWLEDGE_BASE_INDEX
+# to persist the embeddings so restarts only re-embed documents that changed,
+# and KNOWLEDGE_BASE_SEARCH=ivf (with KNOWLEDGE_BASE_NPROBE) for approximate
+# search over large corpora. KNOWLEDGE_BASE_RETRIEVAL=bm25 ranks passages by
+# keywords instead, and =hybrid fuses keyword and vector rankings.
+DEFAULT_DOCUMENTS_DIR = Path(__file__).resolve().parent.parent / "data" / "policies"
 
-For online purchases, initiate returns through your account or contact customer support."""
-    
-    # Robust warranty/guarantee/guaranty matching
-    if any(word in query for word in ["warranty", "guarantee", "guaranty"]):
-        return """Warranty Policy:
-- Standard 1-year manufacturer warranty included with all products
-- Covers defects in materials and workmanship
-- Extended warranty options available at purchase:
-  * 2-year extension (+$49.99)
-  * 3-year extension (+$79.99)
-- Warranty service includes:
-  * Free repair or replacement of defective products
-  * Technical support
-  * Free shipping for warranty service
+# Minimum cosine similarity for a vector match to count as an answer
+MIN_SCORE = 0.12
 
-Contact customer support to initiate a warranty claim."""
-    
-    # Shipping and Delivery
-    elif any(word in query for word in ["shipping", "delivery"]):
-        return """Shipping Information:
-- Free standard shipping on orders over $50
-- Standard shipping: 3-5 business days
-- Express shipping: 1-2 business days (additional fee)
-- International shipping available to select countries
-- Track your order through your account or order confirmation email"""
-    
-    # Payment and Pricing
-    elif any(word in query for word in ["payment", "price", "pricing"]):
-        return """Payment Information:
-- Accepted payment methods:
-  * Credit/Debit cards (Visa, MasterCard, American Express)
-  * PayPal
-  * Shop Pay
-- Secure payment processing
-- Price matching available for identical items from major retailers
-- Special discounts for students and military (with valid ID)"""
-    
-    else:
-        return """I don't have specific information about that in my knowledge base. For assistance, you can:
+# Words customers use for a policy that its document does not contain, mapped
+# to the document's own term; like the original keyword lookup, they match
+# anywhere in the query
+QUERY_SYNONYMS: Dict[str, str] = {
+    "guarantee": "warranty",
+    "guaranty": "warranty",
+    "delivery": "shipping",
+    "deliver": "shipping",
+    "pricing": "payment",
+    "price": "payment",
+}
+
+NO_ANSWER = """I don't have specific information about that in my knowledge base. For assistance, you can:
 1. Contact our customer support team
 2. Visit our FAQ page on our website
 3. Chat with a live representative during business hours
@@ -64,3 +39,50 @@ def knowledge_base_query(query: str) -> str:
 Monday-Friday: 9 AM - 8 PM EST
 Saturday: 10 AM - 6 PM EST
 Sunday: Closed"""
+
+
+@lru_cache(maxsize=None)
+def get_knowledge_base() -> VectorStore:
+    """Return the knowledge base index, syncing it with the documents on first use."""
+    documents_dir = os.getenv("KNOWLEDGE_BASE_DIR", str(DEFAULT_DOCUMENTS_DIR))
+    index_dir = os.getenv("KNOWLEDGE_BASE_INDEX")
+    options = {
+        "search_mode": os.getenv("KNOWLEDGE_BASE_SEARCH", "exact"),
+        "retrieval": os.getenv("KNOWLEDGE_BASE_RETRIEVAL", "vector"),
+    }
+    if options["search_mode"] == "ivf":
+        options["n_probe"] = int(os.getenv("KNOWLEDGE_BASE_NPROBE", "8"))
+
+    # A missing or incomplete saved index loads as an empty store and is rebuilt
+    store = VectorStore.load(index_dir, **options) if index_dir else VectorStore(**options)
+    stats = store.ingest_directory(documents_dir)
+    if index_dir:
+        missing_keywords = store.retrieval != "vector" and not BM25Index.exists(index_dir)
+        if stats.added or stats.updated or stats.removed or missing_keywords:
+            store.save(index_dir)
+    return store
+
+
+def reload_knowledge_base() -> None:
+    """Sync the index with the documents again on next use and drop cached answers."""
+    get_knowledge_base.cache_clear()
+    invalidate_tool_results("knowledge_base_query")
+
+
+def expand_query(query: str) -> str:
+    """Append the policy terms of any synonyms in ``query``, so it matches their documents."""
+    lowered = query.lower()
+    terms = dict.fromkeys(term for word, term in QUERY_SYNONYMS.items() if word in lowered and term not in lowered)
+    return " ".join([query, *terms]) if terms else query
+
+
+def knowledge_base_query(query: str) -> str:
+    """
+    Queries the internal knowledge base for general information, policies, or FAQs.
+    Useful for answering questions about return policies, warranty information, or general company procedures.
+    """
+    top_k = int(os.getenv("KNOWLEDGE_BASE_TOP_K", "1"))
+    passages = get_knowledge_base().query(expand_query(query), k=top_k, min_similarity=MIN_SCORE)
+    if not passages:
+        return NO_ANSWER
+    return "\n\n".join(p.text for p in passages)
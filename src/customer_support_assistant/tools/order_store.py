@@ -0,0 +1,340 @@
+"""Order storage backends and batched order lookups.
+
+An order backend answers :meth:`OrderBackend.lookup_many` for a batch of
+order IDs. :class:`InMemoryOrderBackend` holds a fixed set of orders (the
+sample order by default); :class:`SqliteOrderBackend` is the reference
+database implementation. It borrows connections from a
+:class:`ConnectionPool`, which works with the ``connect`` function of any
+DB-API driver, so a production backend only needs its own query.
+
+:class:`OrderLoader` sits in front of a backend and coalesces lookups, in
+the manner of a dataloader: single lookups arriving within ``batch_window``
+seconds of each other, from any thread or event loop, go to the backend as
+one batched query, and concurrent lookups of the same order share one
+result. Each lookup waits at most its own timeout.
+"""
+
+import asyncio
+import concurrent.futures
+import datetime
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Sequence, Union
+
+DEFAULT_BATCH_WINDOW_SECONDS = 0.002
+DEFAULT_MAX_BATCH_SIZE = 256
+DEFAULT_POOL_SIZE = 4
+# SQLite's default limit on bound parameters is 999 on older builds
+_SQLITE_MAX_PARAMETERS = 900
+
+
+class Order(NamedTuple):
+    """Status of one customer order."""
+
+    order_id: str
+    status: str
+    expected_delivery: Optional[datetime.date] = None
+
+    def describe(self) -> str:
+        """Return the status as the sentence the order tool answers with."""
+        text = f"Order {self.order_id} is currently {self.status}"
+        if self.expected_delivery is not None:
+            day = self.expected_delivery
+            text += f" and is expected to be delivered by {day:%B} {day.day}, {day.year}"
+        return text + "."
+
+
+SAMPLE_ORDERS = [Order("ORD12345", "in transit", datetime.date(2025, 6, 20))]
+
+
+class OrderBackend:
+    """Source of order statuses; subclasses implement :meth:`lookup_many`."""
+
+    def lookup_many(self, order_ids: Sequence[str]) -> Dict[str, Order]:
+        """Return the orders found among ``order_ids``, keyed by ID."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the backend's connections, if any."""
+
+
+class InMemoryOrderBackend(OrderBackend):
+    """Backend answering from a fixed set of orders."""
+
+    def __init__(self, orders: Iterable[Order] = SAMPLE_ORDERS):
+        self._orders = {order.order_id: order for order in orders}
+
+    def lookup_many(self, order_ids: Sequence[str]) -> Dict[str, Order]:
+        return {order_id: self._orders[order_id] for order_id in order_ids if order_id in self._orders}
+
+
+class ConnectionPool:
+    """Bounded pool of DB-API connections created on demand by ``connect``."""
+
+    def __init__(self, connect: Callable[[], Any], size: int = DEFAULT_POOL_SIZE, timeout: Optional[float] = 30.0):
+        """Create an empty pool.
+
+        Args:
+            connect: Opens a new connection.
+            size: Connections open at most at once.
+            timeout: Seconds to wait for a free connection; None waits forever.
+
+        Raises:
+            ValueError: If ``size`` is not positive.
+        """
+        if size < 1:
+            raise ValueError("size must be positive")
+        self.size = size
+        self.timeout = timeout
+        self._connect = connect
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    @contextmanager
+    def connection(self) -> Iterator[Any]:
+        """Borrow a connection for the duration of a ``with`` block.
+
+        Raises:
+            TimeoutError: If no connection frees up within the pool timeout.
+            ValueError: If the pool is closed.
+        """
+        if self._closed:
+            raise ValueError("Connection pool is closed")
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError(f"No database connection available after {self.timeout} seconds")
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            except BaseException:
+                # The connection may be mid-transaction or broken
+                conn.close()
+                raise
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    def close(self) -> None:
+        """Close the idle connections; borrowed ones are closed when returned."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class SqliteOrderBackend(OrderBackend):
+    """Reference database backend: an ``orders`` table in SQLite."""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    @classmethod
+    def open(cls, path: Union[str, Path], pool_size: int = DEFAULT_POOL_SIZE) -> "SqliteOrderBackend":
+        """Open (creating if needed) the order database at ``path``."""
+
+        def connect() -> sqlite3.Connection:
+            conn = sqlite3.connect(str(path), check_same_thread=False)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS orders ("
+                "order_id TEXT PRIMARY KEY, status TEXT NOT NULL, expected_delivery TEXT)"
+            )
+            return conn
+
+        return cls(ConnectionPool(connect, pool_size))
+
+    def upsert(self, orders: Iterable[Order]) -> None:
+        """Insert or replace ``orders``."""
+        rows = [
+            (o.order_id, o.status, o.expected_delivery.isoformat() if o.expected_delivery else None) for o in orders
+        ]
+        with self.pool.connection() as conn:
+            conn.executemany("INSERT OR REPLACE INTO orders VALUES (?, ?, ?)", rows)
+            conn.commit()
+
+    def lookup_many(self, order_ids: Sequence[str]) -> Dict[str, Order]:
+        ids = list(dict.fromkeys(order_ids))
+        found: Dict[str, Order] = {}
+        with self.pool.connection() as conn:
+            for start in range(0, len(ids), _SQLITE_MAX_PARAMETERS):
+                chunk = ids[start:start + _SQLITE_MAX_PARAMETERS]
+                rows = conn.execute(
+                    "SELECT order_id, status, expected_delivery FROM orders "
+                    f"WHERE order_id IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for order_id, status, delivery in rows:
+                    found[order_id] = Order(
+                        order_id, status, datetime.date.fromisoformat(delivery) if delivery else None
+                    )
+        return found
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+class LoaderStats(NamedTuple):
+    """Counters of an :class:`OrderLoader`."""
+
+    lookups: int
+    batches: int
+
+
+class OrderLoader:
+    """Coalesces concurrent order lookups into batched backend queries."""
+
+    def __init__(
+        self,
+        backend: OrderBackend,
+        batch_window: float = DEFAULT_BATCH_WINDOW_SECONDS,
+        max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+        max_concurrent_batches: int = DEFAULT_POOL_SIZE,
+    ):
+        """Create a loader.
+
+        Args:
+            backend: Answers the batched queries.
+            batch_window: Seconds a batch stays open for more lookups after
+                its first one; 0 sends each lookup (and whatever queued up
+                behind it) right away.
+            max_batch_size: Lookups after which a batch is sent at once.
+            max_concurrent_batches: Batches queried at the same time, e.g.
+                the backend's connection pool size.
+
+        Raises:
+            ValueError: If ``max_batch_size`` is not positive.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be positive")
+        self.backend = backend
+        self.batch_window = batch_window
+        self.max_batch_size = max_batch_size
+        self._pending: Dict[str, concurrent.futures.Future] = {}
+        self._opened = 0.0
+        self._lookups = self._batches = 0
+        self._cond = threading.Condition()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_concurrent_batches, thread_name_prefix="order-batch"
+        )
+        self._batch_slots = threading.Semaphore(max_concurrent_batches)
+        self._dispatcher: Optional[threading.Thread] = None
+        self._closed = False
+
+    def stats(self) -> LoaderStats:
+        """Return how many lookups were made and in how many backend queries."""
+        return LoaderStats(self._lookups, self._batches)
+
+    def submit(self, order_id: str) -> concurrent.futures.Future:
+        """Queue a lookup and return a future of its :class:`Order` (None if not found)."""
+        with self._cond:
+            if self._closed:
+                raise ValueError("Order loader is closed")
+            self._lookups += 1
+            future = self._pending.get(order_id)
+            if future is None:
+                if not self._pending:
+                    self._opened = time.monotonic()
+                future = self._pending[order_id] = concurrent.futures.Future()
+                self._cond.notify()
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop, name="order-loader", daemon=True)
+                self._dispatcher.start()
+        return future
+
+    def load(self, order_id: str, timeout: Optional[float] = None) -> Optional[Order]:
+        """Look up one order, batched with concurrent lookups.
+
+        Raises:
+            TimeoutError: If the lookup takes longer than ``timeout`` seconds.
+        """
+        try:
+            return self.submit(order_id).result(timeout)
+        except concurrent.futures.TimeoutError:
+            raise TimeoutError(f"Order lookup for {order_id} timed out after {timeout} seconds") from None
+
+    async def aload(self, order_id: str, timeout: Optional[float] = None) -> Optional[Order]:
+        """Async variant of :meth:`load`; waits without blocking the event loop."""
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self.submit(order_id)), timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"Order lookup for {order_id} timed out after {timeout} seconds") from None
+
+    def load_many(self, order_ids: Sequence[str], timeout: Optional[float] = None) -> Dict[str, Optional[Order]]:
+        """Look up several orders together; every lookup shares ``timeout``.
+
+        Raises:
+            TimeoutError: If the lookups take longer than ``timeout`` seconds.
+        """
+        futures = {order_id: self.submit(order_id) for order_id in order_ids}
+        done, not_done = concurrent.futures.wait(futures.values(), timeout)
+        if not_done:
+            raise TimeoutError(f"Order lookups timed out after {timeout} seconds")
+        return {order_id: future.result() for order_id, future in futures.items()}
+
+    def close(self) -> None:
+        """Send the pending lookups, stop the dispatcher and close the backend."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+        self._executor.shutdown(wait=True)
+        self.backend.close()
+
+    def _dispatch_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+            # While every batch slot is busy, lookups keep piling into the next batch
+            self._batch_slots.acquire()
+            with self._cond:
+                # Hold the batch open for the window unless it fills up first
+                while not self._closed and len(self._pending) < self.max_batch_size:
+                    remaining = self._opened + self.batch_window - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch = dict(list(self._pending.items())[:self.max_batch_size])
+                for order_id in batch:
+                    del self._pending[order_id]
+                self._opened = time.monotonic()
+                self._batches += 1
+            self._executor.submit(self._run_batch, batch)
+
+    def _run_batch(self, batch: Dict[str, concurrent.futures.Future]) -> None:
+        try:
+            found = self.backend.lookup_many(list(batch))
+        except Exception as e:
+            for future in batch.values():
+                _settle(future, exception=e)
+            return
+        finally:
+            self._batch_slots.release()
+        for order_id, future in batch.items():
+            _settle(future, result=found.get(order_id))
+
+
+def _settle(future: concurrent.futures.Future, result: Any = None, exception: Optional[BaseException] = None) -> None:
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except concurrent.futures.InvalidStateError:
+        # The waiter cancelled the future
+        pass
@@ -1,11 +1,88 @@
 """Order management related tools."""
+import os
+from functools import lru_cache
+from typing import Dict, Iterable
+
+from customer_support_assistant.tools.order_store import (
+    DEFAULT_POOL_SIZE,
+    InMemoryOrderBackend,
+    Order,
+    OrderLoader,
+    SqliteOrderBackend,
+)
+
+# Order backend: "memory" answers for the sample order only; "sqlite" reads the
+# orders table of ORDER_DB_PATH through a pool of ORDER_DB_POOL_SIZE connections.
+# Lookups arriving within ORDER_BATCH_WINDOW_MS of each other share one query.
+ORDER_BACKENDS = ("memory", "sqlite")
+
+NOT_FOUND = "Order not found or invalid order ID."
+
+
+@lru_cache(maxsize=None)
+def get_order_loader() -> OrderLoader:
+    """Return the batching loader in front of the configured order backend.
+
+    Raises:
+        ValueError: If ``ORDER_BACKEND`` is unknown or ``sqlite`` without ``ORDER_DB_PATH``.
+    """
+    backend_name = os.getenv("ORDER_BACKEND", "memory").lower()
+    pool_size = int(os.getenv("ORDER_DB_POOL_SIZE", DEFAULT_POOL_SIZE))
+    if backend_name == "memory":
+        backend = InMemoryOrderBackend()
+    elif backend_name == "sqlite":
+        path = os.getenv("ORDER_DB_PATH")
+        if not path:
+            raise ValueError("ORDER_BACKEND=sqlite requires ORDER_DB_PATH")
+        backend = SqliteOrderBackend.open(path, pool_size=pool_size)
+    else:
+        raise ValueError(f"Unknown order backend: {backend_name}")
+    return OrderLoader(
+        backend,
+        batch_window=float(os.getenv("ORDER_BATCH_WINDOW_MS", "2")) / 1000,
+        max_concurrent_batches=pool_size,
+    )
+
+
+def lookup_timeout() -> float:
+    """Seconds a single order lookup may take (``ORDER_LOOKUP_TIMEOUT_SECONDS``)."""
+    return float(os.getenv("ORDER_LOOKUP_TIMEOUT_SECONDS", "5"))
+
+
+def _normalize(order_id: str) -> str:
+    return (order_id or "").strip().upper()
+
+
+def _describe(order: "Order | None") -> str:
+    return order.describe() if order is not None else NOT_FOUND
+
 
 def order_status_lookup(order_id: str) -> str:
     """
     Looks up the status of a customer order using the order ID.
     Useful for providing updates on shipping, delivery, or order processing.
     """
-    # This is a placeholder. In a real application, this would query an order management system.
-    if order_id == "ORD12345":
-        return "Order ORD12345 is currently in transit and is expected to be delivered by June 20, 2025."
-    return "Order not found or invalid order ID."
+    order_id = _normalize(order_id)
+    if not order_id:
+        return NOT_FOUND
+    return _describe(get_order_loader().load(order_id, timeout=lookup_timeout()))
+
+
+async def aorder_status_lookup(order_id: str) -> str:
+    """Async variant of :func:`order_status_lookup` that waits without blocking the event loop."""
+    order_id = _normalize(order_id)
+    if not order_id:
+        return NOT_FOUND
+    return _describe(await get_order_loader().aload(order_id, timeout=lookup_timeout()))
+
+
+def order_status_lookup_many(order_ids: Iterable[str]) -> Dict[str, str]:
+    """Look up several orders in one batched query, keyed by the IDs as given.
+
+    Raises:
+        TimeoutError: If the lookups take longer than ``ORDER_LOOKUP_TIMEOUT_SECONDS``.
+    """
+    order_ids = list(order_ids)
+    normalized = {order_id: _normalize(order_id) for order_id in order_ids}
+    orders = get_order_loader().load_many([n for n in set(normalized.values()) if n], timeout=lookup_timeout())
+    return {order_id: _describe(orders.get(normalized[order_id])) for order_id in order_ids}
@@ -0,0 +1,183 @@
+"""Nearest-neighbour search over embedding matrices.
+
+Two interchangeable indexes are provided. :class:`ExactIndex` keeps all
+vectors in one contiguous float32 matrix and answers batches of queries with a
+single matrix multiply followed by a partial sort. :class:`IVFIndex` clusters
+the vectors into inverted lists with spherical k-means and only scores the
+``n_probe`` lists closest to each query, trading recall for latency.
+
+Vectors are expected to be L2-normalized, so inner products are cosine
+similarities.
+"""
+
+from typing import Optional, Protocol, Tuple
+
+import numpy as np
+
+SearchResult = Tuple[np.ndarray, np.ndarray]
+
+# Rows scored per matrix multiply, bounding the temporary score matrix
+_BLOCK_ROWS = 65536
+
+
+class SearchIndex(Protocol):
+    """Common interface of the search indexes."""
+
+    def __len__(self) -> int:
+        ...
+
+    def search(self, queries: np.ndarray, k: int) -> SearchResult:
+        """Return ``(scores, ids)``, each of shape ``(n_queries, k)``, best first."""
+        ...
+
+
+def _as_matrix(vectors: np.ndarray) -> np.ndarray:
+    matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+    return matrix.reshape(1, -1) if matrix.ndim == 1 else matrix
+
+
+def top_k(scores: np.ndarray, k: int) -> SearchResult:
+    """Return the ``k`` best scores per row and their column ids, best first.
+
+    Ties are broken by the lower column id so results are deterministic.
+    """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.float32), empty.astype(np.int64)
+    if k < scores.shape[1]:
+        ids = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        ids = np.broadcast_to(np.arange(scores.shape[1]), scores.shape).copy()
+    picked = np.take_along_axis(scores, ids, axis=1)
+    order = np.lexsort((ids, -picked), axis=1)
+    return np.take_along_axis(picked, order, axis=1), np.take_along_axis(ids, order, axis=1)
+
+
+class ExactIndex:
+    """Brute-force inner product search with batched matrix multiplies."""
+
+    def __init__(self, vectors: np.ndarray):
+        self.vectors = _as_matrix(vectors)
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def search(self, queries: np.ndarray, k: int) -> SearchResult:
+        queries = _as_matrix(queries)
+        n = len(self)
+        if n <= _BLOCK_ROWS:
+            return top_k(queries @ self.vectors.T, k)
+
+        # Keep the score matrix bounded on very large indexes by merging the
+        # per-block winners
+        best_scores, best_ids = None, None
+        for start in range(0, n, _BLOCK_ROWS):
+            block = self.vectors[start:start + _BLOCK_ROWS]
+            scores, ids = top_k(queries @ block.T, k)
+            ids += start
+            if best_scores is not None:
+                scores = np.concatenate([best_scores, scores], axis=1)
+                ids = np.concatenate([best_ids, ids], axis=1)
+                merged_scores, positions = top_k(scores, k)
+                ids = np.take_along_axis(ids, positions, axis=1)
+                scores = merged_scores
+            best_scores, best_ids = scores, ids
+        return best_scores, best_ids
+
+
+class IVFIndex:
+    """Inverted-file approximate search.
+
+    Vectors are grouped into ``n_lists`` clusters and stored contiguously per
+    cluster. A query scores the cluster centroids, then searches exactly
+    within its ``n_probe`` best clusters. Raising ``n_probe`` improves recall
+    at the cost of latency; ``n_probe == n_lists`` is an exact search.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        train_iterations: int = 10,
+        seed: int = 0,
+    ):
+        """Cluster ``vectors`` into inverted lists.
+
+        Args:
+            vectors: L2-normalized vectors, one per row.
+            n_lists: Number of clusters; defaults to about ``sqrt(len(vectors))``.
+            n_probe: Clusters searched per query (the recall/latency knob).
+            train_iterations: Spherical k-means iterations.
+            seed: Seed for centroid initialization and training sample.
+        """
+        matrix = _as_matrix(vectors)
+        n = matrix.shape[0]
+        self.n_lists = max(1, min(n_lists or int(np.sqrt(n)), n))
+        self.n_probe = n_probe
+        self.centroids = self._train(matrix, train_iterations, np.random.default_rng(seed))
+
+        assignments = self._assign(matrix)
+        order = np.argsort(assignments, kind="stable")
+        self.vectors = np.ascontiguousarray(matrix[order])
+        self.ids = order.astype(np.int64)
+        counts = np.bincount(assignments, minlength=self.n_lists)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+
+    def __len__(self) -> int:
+        return self.vectors.shape[0]
+
+    def _train(self, matrix: np.ndarray, iterations: int, rng: np.random.Generator) -> np.ndarray:
+        n, dim = matrix.shape
+        if n == 0:
+            return np.zeros((1, dim), dtype=np.float32)
+        # Train on a sample; a few hundred points per list is plenty
+        sample = matrix[rng.choice(n, min(n, self.n_lists * 256), replace=False)]
+        centroids = sample[rng.choice(len(sample), self.n_lists, replace=False)].copy()
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        return centroids.astype(np.float32)
+
+    def _assign(self, matrix: np.ndarray) -> np.ndarray:
+        labels = np.empty(matrix.shape[0], dtype=np.int64)
+        for start in range(0, matrix.shape[0], _BLOCK_ROWS):
+            block = matrix[start:start + _BLOCK_ROWS]
+            labels[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return labels
+
+    def search(self, queries: np.ndarray, k: int, n_probe: Optional[int] = None) -> SearchResult:
+        queries = _as_matrix(queries)
+        n_probe = min(n_probe or self.n_probe, self.n_lists)
+        _, probes = top_k(queries @ self.centroids.T, n_probe)
+
+        k = min(k, len(self))
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        out_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, lists) in enumerate(zip(queries, probes)):
+            rows = np.concatenate([np.arange(self.offsets[c], self.offsets[c + 1]) for c in lists])
+            if not len(rows):
+                continue
+            scores, positions = top_k((self.vectors[rows] @ query)[None, :], k)
+            found = scores.shape[1]
+            out_scores[row, :found] = scores[0]
+            out_ids[row, :found] = self.ids[rows[positions[0]]]
+        return out_scores, out_ids
+
+
+def build_index(vectors: np.ndarray, mode: str = "exact", **options) -> SearchIndex:
+    """Build a search index of the given ``mode`` ("exact" or "ivf").
+
+    Raises:
+        ValueError: If ``mode`` is unknown.
+    """
+    if mode == "exact":
+        return ExactIndex(vectors)
+    if mode == "ivf":
+        return IVFIndex(vectors, **options)
+    raise ValueError(f"Unknown search mode: {mode}")
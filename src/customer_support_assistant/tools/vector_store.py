@@ -0,0 +1,386 @@
+"""Local vector store backing knowledge base retrieval.
+
+Policy documents are split into chunks, embedded with a pluggable embedder and
+kept in a flat NumPy index that can be persisted to disk. Ingestion is keyed on
+content hashes: unchanged documents are skipped, and chunks whose text has
+been seen before reuse their stored embedding, so re-indexing a large corpus
+only embeds what actually changed.
+
+Besides vector similarity, a store can rank chunks by keywords with a BM25
+index (``retrieval="bm25"``) or fuse both rankings (``retrieval="hybrid"``).
+"""
+
+import hashlib
+import json
+import re
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, NamedTuple, Optional, Protocol, Sequence, Tuple, Union
+
+import numpy as np
+
+from customer_support_assistant.tools.keyword_index import STOP_WORDS, BM25Index, reciprocal_rank_fusion
+from customer_support_assistant.tools.vector_search import SearchIndex, build_index
+
+PathLike = Union[str, Path]
+
+INDEX_FORMAT_VERSION = 1
+_EMBEDDINGS_FILE = "embeddings.npy"
+_METADATA_FILE = "chunks.json"
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+RETRIEVAL_MODES = ("vector", "bm25", "hybrid")
+
+
+class Embedder(Protocol):
+    """Turns texts into L2-normalized float32 vectors of a fixed dimension."""
+
+    name: str
+    dim: int
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        """Return an array of shape ``(len(texts), dim)``."""
+        ...
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-features embedder using the hashing trick.
+
+    Each text is represented by its lowercase word tokens (minus stop words)
+    plus the character trigrams of every word, hashed with CRC32 into a signed
+    vector. It needs no model download and gives identical vectors in every
+    process, which makes it suitable for tests and small policy corpora.
+    """
+
+    def __init__(self, dim: int = 1024, stop_words: Iterable[str] = STOP_WORDS):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+        self.stop_words = frozenset(stop_words)
+
+    def _features(self, text: str) -> Iterable[str]:
+        for token in _TOKEN_RE.findall(text.lower()):
+            if token in self.stop_words:
+                continue
+            yield token
+            padded = f"<{token}>"
+            for i in range(len(padded) - 2):
+                yield "#" + padded[i:i + 3]
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class Passage(NamedTuple):
+    """A retrieved chunk and its relevance to the query.
+
+    The score is the cosine similarity, the BM25 score or the fused
+    reciprocal rank score, depending on the store's retrieval mode.
+    """
+
+    doc_id: str
+    text: str
+    score: float
+
+
+class IngestStats(NamedTuple):
+    """Outcome of an ingestion run."""
+
+    added: int
+    updated: int
+    removed: int
+    unchanged: int
+    embedded_chunks: int
+
+
+def content_hash(text: str) -> str:
+    """Return the hex SHA-256 digest identifying ``text``."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_text(text: str, max_chars: int = 1000) -> List[str]:
+    """Split text into chunks of whole paragraphs of at most ``max_chars``.
+
+    Paragraphs longer than ``max_chars`` are split on line boundaries, and
+    single lines longer than that are hard-wrapped.
+    """
+    pieces: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text.strip()):
+        if len(paragraph) <= max_chars:
+            pieces.append(paragraph)
+            continue
+        for line in paragraph.splitlines():
+            pieces.extend(line[i:i + max_chars] for i in range(0, len(line), max_chars))
+
+    chunks: List[str] = []
+    current = ""
+    for piece in pieces:
+        if not piece.strip():
+            continue
+        candidate = f"{current}\n\n{piece}" if current else piece
+        if len(candidate) <= max_chars:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class VectorStore:
+    """Persistable vector index over document chunks.
+
+    Embeddings are kept in one contiguous float32 matrix. Searches go through
+    an index from :mod:`vector_search`, built lazily after each change:
+    ``search_mode="exact"`` (the default) scores every chunk, ``"ivf"``
+    searches only the nearest clusters; ``search_options`` (e.g. ``n_probe``)
+    are passed to the index.
+
+    ``retrieval`` picks how chunks are ranked: by vector similarity
+    (``"vector"``, the default), by BM25 keyword score (``"bm25"``), or by
+    reciprocal rank fusion of the ``fusion_depth`` best chunks of each
+    (``"hybrid"``). The keyword index is also built lazily, and persisted
+    and memory-mapped along with the embeddings.
+    """
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        max_chunk_chars: int = 1000,
+        search_mode: str = "exact",
+        retrieval: str = "vector",
+        fusion_depth: int = 50,
+        **search_options,
+    ):
+        if retrieval not in RETRIEVAL_MODES:
+            raise ValueError(f"Unknown retrieval mode: {retrieval}")
+        self.embedder: Embedder = embedder or HashingEmbedder()
+        self.max_chunk_chars = max_chunk_chars
+        self.search_mode = search_mode
+        self.retrieval = retrieval
+        self.fusion_depth = fusion_depth
+        self.search_options = search_options
+        self._index: Optional[SearchIndex] = None
+        self._keywords: Optional[BM25Index] = None
+        self._doc_hashes: Dict[str, str] = {}
+        self._chunk_docs: List[str] = []
+        self._chunk_texts: List[str] = []
+        self._chunk_hashes: List[str] = []
+        self._embeddings = np.zeros((0, self.embedder.dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self._chunk_texts)
+
+    @property
+    def documents(self) -> Dict[str, str]:
+        """Mapping of indexed document ID to its content hash."""
+        return dict(self._doc_hashes)
+
+    def sync(self, documents: Dict[str, str]) -> IngestStats:
+        """Make the index hold exactly ``documents`` (doc ID -> text).
+
+        Only documents whose content hash changed are re-chunked, and only
+        chunks not already present in the index are embedded.
+        """
+        added = updated = unchanged = 0
+        changed: Dict[str, str] = {}
+        for doc_id, text in documents.items():
+            previous = self._doc_hashes.get(doc_id)
+            digest = content_hash(text)
+            if previous == digest:
+                unchanged += 1
+                continue
+            if previous is None:
+                added += 1
+            else:
+                updated += 1
+            changed[doc_id] = text
+        removed = {doc_id for doc_id in self._doc_hashes if doc_id not in documents}
+        if not changed and not removed:
+            return IngestStats(added, updated, 0, unchanged, 0)
+
+        known = {h: row for row, h in enumerate(self._chunk_hashes)}
+        keep = [row for row, doc_id in enumerate(self._chunk_docs)
+                if doc_id not in changed and doc_id not in removed]
+        docs = [self._chunk_docs[row] for row in keep]
+        texts = [self._chunk_texts[row] for row in keep]
+        hashes = [self._chunk_hashes[row] for row in keep]
+        vectors = [self._embeddings[keep]]
+
+        # For every new chunk, either the row of an existing embedding to reuse
+        # or the position of its text in the batch still to be embedded
+        reuse: List[int] = []
+        fresh: List[int] = []
+        pending: Dict[str, int] = {}
+        pending_texts: List[str] = []
+        for doc_id, text in changed.items():
+            for chunk in chunk_text(text, self.max_chunk_chars):
+                digest = content_hash(chunk)
+                docs.append(doc_id)
+                texts.append(chunk)
+                hashes.append(digest)
+                if digest in known:
+                    reuse.append(known[digest])
+                    fresh.append(-1)
+                else:
+                    if digest not in pending:
+                        pending[digest] = len(pending_texts)
+                        pending_texts.append(chunk)
+                    reuse.append(-1)
+                    fresh.append(pending[digest])
+
+        tail = np.empty((len(reuse), self.embedder.dim), dtype=np.float32)
+        reused_at = [i for i, row in enumerate(reuse) if row >= 0]
+        tail[reused_at] = self._embeddings[[reuse[i] for i in reused_at]]
+        if pending:
+            embedded = self.embedder.embed(pending_texts)
+            fresh_at = [i for i, n in enumerate(fresh) if n >= 0]
+            tail[fresh_at] = embedded[[fresh[i] for i in fresh_at]]
+        vectors.append(tail)
+
+        self._chunk_docs, self._chunk_texts, self._chunk_hashes = docs, texts, hashes
+        self._embeddings = np.ascontiguousarray(np.concatenate(vectors), dtype=np.float32)
+        self._index = self._keywords = None
+        for doc_id in removed:
+            del self._doc_hashes[doc_id]
+        for doc_id, text in changed.items():
+            self._doc_hashes[doc_id] = content_hash(text)
+        return IngestStats(added, updated, len(removed), unchanged, len(pending_texts))
+
+    def ingest_directory(
+        self, directory: PathLike, patterns: Sequence[str] = ("*.md", "*.txt")
+    ) -> IngestStats:
+        """Sync the index with the documents found under ``directory``."""
+        root = Path(directory)
+        documents = {}
+        for pattern in patterns:
+            for path in sorted(root.rglob(pattern)):
+                documents[path.relative_to(root).as_posix()] = path.read_text(encoding="utf-8")
+        return self.sync(documents)
+
+    @property
+    def keyword_index(self) -> BM25Index:
+        """BM25 index of the chunks, built on first use after each change."""
+        if self._keywords is None:
+            self._keywords = BM25Index.build(self._chunk_texts)
+        return self._keywords
+
+    def query(self, text: str, k: int = 3, min_similarity: Optional[float] = None) -> List[Passage]:
+        """Return the ``k`` chunks most relevant to ``text``, best first."""
+        return self.query_batch([text], k, min_similarity)[0]
+
+    def query_batch(
+        self, texts: Sequence[str], k: int = 3, min_similarity: Optional[float] = None
+    ) -> List[List[Passage]]:
+        """Answer several queries with one embedding call and one index search.
+
+        Args:
+            texts: Queries.
+            k: Passages per query.
+            min_similarity: Drop vector matches below this cosine similarity,
+                before fusion in hybrid mode. Keyword matches need at least
+                one term in common with the query.
+        """
+        if not len(self) or k <= 0:
+            return [[] for _ in texts]
+        if self.retrieval == "bm25":
+            hits = self._keyword_hits(texts, k)
+        elif self.retrieval == "vector":
+            hits = self._vector_hits(texts, k, min_similarity)
+        else:
+            depth = max(k, self.fusion_depth)
+            hits = [
+                reciprocal_rank_fusion([[i for i, _ in vector], [i for i, _ in keyword]])[:k]
+                for vector, keyword in zip(
+                    self._vector_hits(texts, depth, min_similarity), self._keyword_hits(texts, depth)
+                )
+            ]
+        return [
+            [Passage(self._chunk_docs[i], self._chunk_texts[i], score) for i, score in query_hits]
+            for query_hits in hits
+        ]
+
+    def _vector_hits(
+        self, texts: Sequence[str], k: int, min_similarity: Optional[float]
+    ) -> List[List[Tuple[int, float]]]:
+        if self._index is None:
+            self._index = build_index(self._embeddings, self.search_mode, **self.search_options)
+        all_scores, all_ids = self._index.search(self.embedder.embed(texts), k)
+        floor = -np.inf if min_similarity is None else min_similarity
+        return [
+            [(int(i), float(score)) for score, i in zip(scores, ids) if i >= 0 and score >= floor]
+            for scores, ids in zip(all_scores, all_ids)
+        ]
+
+    def _keyword_hits(self, texts: Sequence[str], k: int) -> List[List[Tuple[int, float]]]:
+        all_scores, all_ids = self.keyword_index.search(texts, k)
+        return [
+            [(int(i), float(score)) for score, i in zip(scores, ids) if i >= 0]
+            for scores, ids in zip(all_scores, all_ids)
+        ]
+
+    def save(self, directory: PathLike) -> None:
+        """Persist the index to ``directory``."""
+        root = Path(directory)
+        root.mkdir(parents=True, exist_ok=True)
+        np.save(root / _EMBEDDINGS_FILE, self._embeddings)
+        metadata = {
+            "version": INDEX_FORMAT_VERSION,
+            "embedder": self.embedder.name,
+            "dim": self.embedder.dim,
+            "max_chunk_chars": self.max_chunk_chars,
+            "documents": self._doc_hashes,
+            "chunks": [
+                {"doc_id": d, "hash": h, "text": t}
+                for d, h, t in zip(self._chunk_docs, self._chunk_hashes, self._chunk_texts)
+            ],
+        }
+        if self.retrieval != "vector" or self._keywords is not None:
+            self.keyword_index.save(root)
+        (root / _METADATA_FILE).write_text(json.dumps(metadata), encoding="utf-8")
+
+    @classmethod
+    def load(
+        cls, directory: PathLike, embedder: Optional[Embedder] = None, **options
+    ) -> "VectorStore":
+        """Load an index saved with :meth:`save`.
+
+        ``options`` (such as ``search_mode``) are passed to the constructor.
+        A saved keyword index is memory-mapped rather than rebuilt.
+
+        An index built with a different embedder (or an older format), or a
+        directory without a saved index, gives an empty store, so the next
+        ingestion rebuilds it.
+        """
+        root = Path(directory)
+        if not (root / _METADATA_FILE).exists() or not (root / _EMBEDDINGS_FILE).exists():
+            return cls(embedder, **options)
+        metadata = json.loads((root / _METADATA_FILE).read_text(encoding="utf-8"))
+        store = cls(embedder, metadata.get("max_chunk_chars", 1000), **options)
+        if (
+            metadata.get("version") != INDEX_FORMAT_VERSION
+            or metadata.get("embedder") != store.embedder.name
+            or metadata.get("dim") != store.embedder.dim
+        ):
+            return store
+        chunks = metadata["chunks"]
+        store._doc_hashes = dict(metadata["documents"])
+        store._chunk_docs = [c["doc_id"] for c in chunks]
+        store._chunk_hashes = [c["hash"] for c in chunks]
+        store._chunk_texts = [c["text"] for c in chunks]
+        store._embeddings = np.ascontiguousarray(np.load(root / _EMBEDDINGS_FILE), dtype=np.float32)
+        if BM25Index.exists(root):
+            try:
+                keywords = BM25Index.load(root)
+            except ValueError:
+                # Another format version; rebuilt on first use
+                keywords = None
+            if keywords is not None and len(keywords) == len(chunks):
+                store._keywords = keywords
+        return store
@@ -3,9 +3,10 @@
 from pathlib import Path
 import sys
 
-# Add the src directory to the Python path
+# Put the src directory first on the Python path so the packaged sources are
+# tested rather than the legacy top-level copy of the package
 src_path = str(Path(__file__).parent.parent / "src")
-sys.path.append(src_path)
+sys.path.insert(0, src_path)
 
 @pytest.fixture
 def mock_gemini_api_key():
@@ -42,3 +43,17 @@ def mock_order_data():
             "delivery_date": "2025-06-20"
         }
     }
+
+@pytest.fixture
+def recording():
+    """Record metrics and spans into a fresh registry and a SpanRecorder."""
+    from customer_support_assistant import metrics
+
+    metrics.REGISTRY.clear()
+    recorder = metrics.SpanRecorder()
+    metrics.enable_metrics()
+    metrics.set_tracer(recorder)
+    yield recorder
+    metrics.enable_metrics(False)
+    metrics.set_tracer(None)
+    metrics.REGISTRY.clear()
@@ -0,0 +1,72 @@
+"""Test cases for the async graph execution path."""
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+from customer_support_assistant import main
+
+
+class SlowLLM:
+    """LLM stub that answers after a delay, synchronously or asynchronously."""
+
+    def __init__(self, delay=0.2):
+        self.delay = delay
+
+    def invoke(self, messages):
+        time.sleep(self.delay)
+        return AIMessage(content=f"Answer to: {messages[-1].content}")
+
+    async def ainvoke(self, messages):
+        await asyncio.sleep(self.delay)
+        return AIMessage(content=f"Answer to: {messages[-1].content}")
+
+
+class ToolCallingLLM:
+    """LLM stub that requests the knowledge base once, then repeats its output."""
+
+    async def ainvoke(self, messages):
+        if len(messages) > 2:
+            return AIMessage(content=f"From the knowledge base: {messages[-1].content}")
+        return AIMessage(content='{"tool_calls": [{"name": "knowledge_base_query", "args": {"query": "warranty"}}]}')
+
+
+class TestAsyncExecution:
+    """Test cases for process_user_input_async."""
+
+    def test_async_direct_answer(self, monkeypatch):
+        """A direct LLM answer is returned."""
+        monkeypatch.setattr(main, "assistant", main.Assistant(llm=SlowLLM(delay=0)))
+        response = asyncio.run(main.process_user_input_async("Hello there"))
+        assert response == "Answer to: Hello there"
+
+    def test_async_tool_call(self, monkeypatch):
+        """Tool calls are awaited and their output returned."""
+        monkeypatch.setattr(main, "assistant", main.Assistant(llm=ToolCallingLLM()))
+        response = asyncio.run(main.process_user_input_async("Is there a warranty?"))
+        assert "1-year" in response
+
+    def test_async_empty_input(self):
+        """Empty input is rejected like in the sync API."""
+        with pytest.raises(ValueError):
+            asyncio.run(main.process_user_input_async("  "))
+
+    def test_concurrent_conversations(self, monkeypatch):
+        """Conversations waiting on the LLM overlap on one event loop."""
+        monkeypatch.setattr(main, "assistant", main.Assistant(llm=SlowLLM(delay=0.2)))
+
+        async def run_all():
+            return await asyncio.gather(
+                *(main.process_user_input_async(f"Question {i}") for i in range(20))
+            )
+
+        start = time.perf_counter()
+        responses = asyncio.run(run_all())
+        assert time.perf_counter() - start < 2.0
+        assert sorted(responses) == sorted(f"Answer to: Question {i}" for i in range(20))
+
+    def test_sync_wrapper(self, monkeypatch):
+        """The sync API shares the same turn handling."""
+        monkeypatch.setattr(main, "assistant", main.Assistant(llm=SlowLLM(delay=0)))
+        assert main.process_user_input("Hi") == "Answer to: Hi"
@@ -0,0 +1,150 @@
+"""Test cases for the prebuilt product catalog index."""
+import difflib
+import random
+import re
+
+import pytest
+
+from customer_support_assistant.tools.catalog import get_catalog_store, product_catalog_search
+from customer_support_assistant.tools.catalog_index import CatalogIndex
+
+
+def linear_search(products, query):
+    """Reference implementation: the original per-call linear scan."""
+    norm_query = re.sub(r"[^a-zA-Z0-9 -]", "", query)
+    norm_query = re.sub(r"\s+", " ", norm_query).strip()
+    if not norm_query:
+        return None
+    norm_products = {re.sub(r"[^a-z0-9 -]", "", k.lower()): v for k, v in products.items()}
+    for norm_name, price in norm_products.items():
+        if norm_name.lower() == norm_query.lower():
+            return price
+        if norm_name.replace("-", " ").lower() == norm_query.replace("-", " ").lower():
+            return price
+        if norm_name.lower() in norm_query.lower():
+            return price
+        if difflib.get_close_matches(norm_name.lower(), [norm_query.lower()], n=1, cutoff=0.8):
+            return price
+    return None
+
+
+PRODUCTS = get_catalog_store().price_map()
+
+QUERIES = [
+    "Sony WH-1000XM5",
+    "sony wh 1000xm5",
+    "How much is the Sony WH-1000XM5?",
+    "sony wh-1000xm6",
+    "Sony over-ear headphones",
+    "sony overear headphones",
+    "price of sony headphones please",
+    "Bose QuietComfort 45",
+    "bose quiet comfort 45",
+    "apple airpod max",
+    "sennheiser hd450bt",
+    "jbl tune",
+    "nonexistent product xyz",
+    "ab",
+    "",
+]
+
+
+def typo(text, rng):
+    """Apply one to three random character insertions, deletions or substitutions."""
+    for _ in range(rng.randint(1, 3)):
+        i = rng.randrange(len(text) + 1)
+        char = rng.choice("abcdefghijklmnopqrstuvwxyz0123456789 -")
+        edit = rng.choice("isd")
+        if edit == "i":
+            text = text[:i] + char + text[i:]
+        elif edit == "s":
+            text = text[:i] + char + text[i + 1:]
+        else:
+            text = text[:i] + text[i + 1:]
+    return text
+
+
+class TestCatalogIndex:
+    """Test cases for CatalogIndex."""
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_matches_linear_scan(self, query):
+        """The index returns exactly what the original linear scan returned."""
+        match = CatalogIndex(PRODUCTS).search(query)
+        assert (match.value if match else None) == linear_search(PRODUCTS, query)
+
+    def test_catalog_order_wins_across_tiers(self):
+        """An earlier fuzzy hit beats a later exact hit, as in the linear scan."""
+        products = {"widget pro 3000": "$1", "widget pro 300": "$2"}
+        match = CatalogIndex(products).search("widget pro 300")
+        assert match.value == linear_search(products, "widget pro 300") == "$1"
+        assert match.kind == "fuzzy"
+
+    def test_match_kinds(self):
+        """Each matching tier is reported."""
+        index = CatalogIndex(PRODUCTS)
+        assert index.search("sony wh-ch720n").kind == "exact"
+        assert index.search("sony wh ch720n").kind == "hyphen"
+        assert index.search("is the jbl tune 770nc good").kind == "substring"
+        assert index.search("jbl tune 770n").kind == "fuzzy"
+
+    def test_short_names(self):
+        """Very short names are still fuzzy and substring matched."""
+        products = {"ab": "$1", "xyz": "$2"}
+        assert CatalogIndex(products).search("abc").value == "$1"
+        assert CatalogIndex(products).search("xy").value == "$2"
+
+    def test_exact_lookup(self):
+        """Exact name lookups are direct."""
+        index = CatalogIndex(PRODUCTS)
+        assert len(index) == len(PRODUCTS)
+        assert "Sony WH-1000XM5" in index
+        assert index.get("Apple AirPods Max") == "$549.99"
+        assert index.get("unknown") is None
+
+    def test_large_catalog(self):
+        """Generated catalogs behave like the linear scan."""
+        products = {f"brand{i % 97} model-{i}x": f"${i}.99" for i in range(2000)}
+        index = CatalogIndex(products)
+        for query in ["brand5 model-1942x", "brand5 model 1942x", "brand3 modl-1843x",
+                      "does brand7 model-7x fit", "unrelated"]:
+            match = index.search(query)
+            assert (match.value if match else None) == linear_search(products, query)
+
+    @pytest.mark.parametrize("seed", range(3))
+    def test_random_typos_match_linear_scan(self, seed):
+        """Misspelled names and questions about them resolve exactly like the linear scan."""
+        rng = random.Random(seed)
+        for products in (PRODUCTS, {f"brand{i % 97} model-{i}x": f"${i}.99" for i in range(500)}):
+            index, names = CatalogIndex(products), list(products)
+            for _ in range(300):
+                query = rng.choice(["", "", "how much is the ", "price of "]) + typo(rng.choice(names), rng)
+                match = index.search(query)
+                assert (match.value if match else None) == linear_search(products, query), query
+
+    def test_exact_hits_are_constant_time(self, monkeypatch):
+        """The fuzzy tier runs at most once per exact-hit product, and never for the first product."""
+        products = {f"brand{i % 97} model-{i}x": f"${i}.99" for i in range(2000)}
+        index = CatalogIndex(products)
+        calls = []
+        fuzzy_match = index._fuzzy_match
+        monkeypatch.setattr(index, "_fuzzy_match", lambda *args: calls.append(args) or fuzzy_match(*args))
+        assert index.search("brand0 model-0x").kind == "exact"
+        assert calls == []
+        query = f"brand{1942 % 97} model-1942x"
+        for _ in range(3):
+            match = index.search(query)
+        assert match.value == linear_search(products, query)
+        assert len(calls) == 1
+
+    def test_mentions(self):
+        """Every product named in the query is reported once, except names inside a longer named one."""
+        index = CatalogIndex({"widget pro 300": "$1", "widget pro 3000": "$2", "gadget": "$3"})
+        assert [m.value for m in index.mentions("widget pro 3000 or gadget, or a gadget?")] == ["$2", "$3"]
+        assert [m.value for m in index.mentions("widget pro 300 vs widget pro 3000")] == ["$1", "$2"]
+        assert index.mentions("nothing here") == []
+
+    def test_product_catalog_search_uses_index(self):
+        """The tool returns prices through the shared index."""
+        assert product_catalog_search("How much is the Sony WH-1000XM5?") == "$399.99"
+        assert product_catalog_search("nonexistent product xyz") == "Price not found in catalog."
@@ -0,0 +1,128 @@
+"""Test cases for the columnar catalog store and its snapshots."""
+import json
+import sys
+
+import pytest
+
+from customer_support_assistant.tools import catalog
+from customer_support_assistant.tools.catalog_index import CatalogIndex
+from customer_support_assistant.tools.catalog_store import (
+    _V1_HEADER,
+    _V1_MAGIC,
+    CatalogStore,
+    build_snapshot,
+    load_catalog,
+    load_feed,
+)
+
+
+@pytest.fixture
+def jsonl_feed(tmp_path, mock_catalog_data):
+    """Write a small JSONL product feed."""
+    path = tmp_path / "products.jsonl"
+    records = [
+        {"name": name, "price": info["price"], "description": ", ".join(info["features"])}
+        for name, info in mock_catalog_data["headphones"].items()
+    ]
+    records.append({"name": "Bose QuietComfort 45", "price": "$329.99"})
+    path.write_text("\n".join(json.dumps(r) for r in records) + "\n")
+    return path
+
+
+class TestCatalogStore:
+    """Test cases for CatalogStore loading and snapshots."""
+
+    def test_load_jsonl_feed(self, jsonl_feed):
+        """JSONL feeds load into columnar records."""
+        store = load_feed(jsonl_feed)
+        assert len(store) == 2
+        assert store[0].name == "Sony WH-1000XM5"
+        assert store[0].price == 399.99
+        assert store[0].description == "noise-canceling, wireless"
+        assert store[1].description == ""
+        assert store.price_map() == {"Sony WH-1000XM5": "$399.99", "Bose QuietComfort 45": "$329.99"}
+
+    def test_load_csv_feed(self, tmp_path):
+        """CSV feeds with a header row are supported."""
+        path = tmp_path / "products.csv"
+        path.write_text("name,price,description\nJBL Tune 770NC,149.99,\"Wireless, noise-canceling\"\n")
+        store = load_feed(path)
+        assert list(store)[0] == ("JBL Tune 770NC", 149.99, "Wireless, noise-canceling")
+
+    def test_invalid_records(self, tmp_path):
+        """Records without a name or with a bad price are rejected."""
+        with pytest.raises(ValueError, match="no name"):
+            CatalogStore.from_records([{"price": 1}])
+        with pytest.raises(ValueError, match="invalid price"):
+            CatalogStore.from_records([{"name": "x", "price": "free"}])
+        with pytest.raises(ValueError, match="Unsupported"):
+            load_feed(tmp_path / "products.xml")
+
+    def test_snapshot_round_trip(self, jsonl_feed, tmp_path):
+        """Snapshots are memory-mapped back with identical contents."""
+        snapshot = tmp_path / "catalog.bin"
+        assert build_snapshot(jsonl_feed, snapshot) == 2
+        store = load_catalog(snapshot)
+        try:
+            assert list(store) == list(load_feed(jsonl_feed))
+        finally:
+            store.close()
+
+    def test_snapshot_unicode(self, tmp_path):
+        """Multi-byte names survive the blob offsets."""
+        snapshot = tmp_path / "catalog.bin"
+        CatalogStore.from_records([{"name": "Café Über", "price": 1, "description": "naïve"}]).write_snapshot(snapshot)
+        store = CatalogStore.open_snapshot(snapshot)
+        assert store[0] == ("Café Über", 1.0, "naïve")
+        store.close()
+
+    def test_open_non_snapshot(self, jsonl_feed):
+        """Opening a feed as a snapshot fails loudly."""
+        with pytest.raises(ValueError, match="not a catalog snapshot"):
+            CatalogStore.open_snapshot(jsonl_feed)
+
+    def test_snapshot_maps_index(self, tmp_path):
+        """The catalog index is stored in the snapshot and searched in place."""
+        records = [{"name": f"Brand{i % 7} Model-{i}X", "price": i} for i in range(50)]
+        records.append({"name": "brand1 model-1x", "price": 999})
+        store = CatalogStore.from_records(records)
+        snapshot = tmp_path / "catalog.bin"
+        store.write_snapshot(snapshot)
+        mapped = CatalogStore.open_snapshot(snapshot)
+        arrays = mapped.index_arrays()
+        # Read-only views of the mapped file, not copies
+        assert not any(array.flags.owndata or array.flags.writeable for array in arrays.values())
+        index = CatalogIndex.from_arrays(arrays, mapped.price_text)
+        in_memory = CatalogIndex(store.price_map())
+        for query in ["brand1 model-1x", "brand3 model 10x", "is brand4 model-11x good", "brand5 modl-12x", "none"]:
+            assert index.search(query) == in_memory.search(query)
+        assert index.get("Brand1 Model-1X") == "$999.00"
+        del index, arrays
+        mapped.close()
+
+    def test_version_1_snapshot(self, tmp_path):
+        """Snapshots written without an index still open, and the index is built instead."""
+        store = CatalogStore.from_records([{"name": "JBL Tune 770NC", "price": 149.99}])
+        snapshot = tmp_path / "catalog.bin"
+        with open(snapshot, "wb") as f:
+            f.write(_V1_HEADER.pack(_V1_MAGIC, sys.byteorder.encode().ljust(8, b"\0"), 1, len(store._blob)))
+            for column in (store._name_offsets, store._description_offsets, store._prices):
+                f.write(column.tobytes())
+            f.write(store._blob)
+        mapped = load_catalog(snapshot)
+        assert mapped.index_arrays() is None
+        assert list(mapped) == list(store)
+        mapped.close()
+
+    def test_tool_uses_mapped_index(self, tmp_path, monkeypatch):
+        """With a snapshot configured, the tool searches the snapshot's index without building one."""
+        snapshot = tmp_path / "catalog.bin"
+        CatalogStore.from_records([{"name": "Sony WH-1000XM5", "price": 399.99}]).write_snapshot(snapshot)
+        monkeypatch.setenv("PRODUCT_CATALOG_PATH", str(snapshot))
+        monkeypatch.setattr(catalog, "build_index_arrays", lambda names: pytest.fail("index rebuilt"))
+        catalog.reload_catalog()
+        try:
+            assert catalog.product_catalog_search("How much is the Sony WH-1000XM5?") == "$399.99"
+        finally:
+            monkeypatch.undo()
+            catalog.reload_catalog()
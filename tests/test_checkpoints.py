@@ -0,0 +1,172 @@
+"""Test cases for per-session checkpoint storage."""
+import asyncio
+import importlib.util
+import operator
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langchain_core.messages import AIMessage
+from langgraph.graph import END, StateGraph
+
+from customer_support_assistant import checkpoints, main
+from customer_support_assistant.checkpoints import BoundedMemorySaver, create_checkpointer
+
+
+class CounterState(TypedDict):
+    turns: Annotated[List[int], operator.add]
+
+
+def counter_graph(checkpointer):
+    """A one-node graph that appends to its state on every run."""
+    graph = StateGraph(CounterState)
+    graph.add_node("count", lambda state: {"turns": [len(state["turns"])]})
+    graph.set_entry_point("count")
+    graph.add_edge("count", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def run(app, thread_id):
+    return app.invoke({"turns": []}, {"configurable": {"thread_id": thread_id}})
+
+
+class TestBoundedMemorySaver:
+    """Test cases for BoundedMemorySaver."""
+
+    def test_state_persists_per_thread(self):
+        """Each thread keeps its own state across runs."""
+        app = counter_graph(BoundedMemorySaver())
+        run(app, "a")
+        assert run(app, "a")["turns"] == [0, 1]
+        assert run(app, "b")["turns"] == [0]
+
+    def test_lru_eviction(self):
+        """The least recently used thread is evicted past max_threads."""
+        saver = BoundedMemorySaver(max_threads=2)
+        app = counter_graph(saver)
+        run(app, "a")
+        run(app, "b")
+        run(app, "a")
+        run(app, "c")
+        assert "a" in saver and "c" in saver
+        assert "b" not in saver
+        assert run(app, "b")["turns"] == [0]
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Threads idle for longer than the TTL are dropped."""
+        now = [1000.0]
+        monkeypatch.setattr(checkpoints.time, "monotonic", lambda: now[0])
+        saver = BoundedMemorySaver(ttl_seconds=60)
+        app = counter_graph(saver)
+        run(app, "a")
+        now[0] += 30
+        run(app, "b")
+        now[0] += 45
+        run(app, "b")
+        assert "a" not in saver
+        assert "b" in saver
+
+    def test_checkpoints_capped_per_thread(self):
+        """Only the newest checkpoints and the blobs they use are kept."""
+        saver = BoundedMemorySaver(max_checkpoints_per_thread=3)
+        app = counter_graph(saver)
+        for _ in range(10):
+            state = run(app, "a")
+        assert state["turns"] == list(range(10))
+        config = {"configurable": {"thread_id": "a"}}
+        assert len(list(saver.list(config))) == 3
+        thread = saver._threads["a"]
+        referenced = {v for versions in thread._versions.values() for v in versions.items()}
+        assert {(k[2], k[3]) for k in thread.blobs} <= referenced
+
+    def test_async_graph(self):
+        """The async API works with astream/ainvoke."""
+        app = counter_graph(BoundedMemorySaver())
+        config = {"configurable": {"thread_id": "a"}}
+        asyncio.run(app.ainvoke({"turns": []}, config))
+        assert asyncio.run(app.ainvoke({"turns": []}, config))["turns"] == [0, 1]
+
+    def test_invalid_limits(self):
+        """Non-positive limits are rejected."""
+        with pytest.raises(ValueError):
+            BoundedMemorySaver(max_threads=0)
+        with pytest.raises(ValueError):
+            BoundedMemorySaver(ttl_seconds=0)
+
+
+@pytest.mark.skipif(
+    importlib.util.find_spec("langgraph.checkpoint.sqlite") is None,
+    reason="langgraph-checkpoint-sqlite is not installed",
+)
+class TestSqliteCheckpointer:
+    """Test cases for the SQLite backend."""
+
+    def test_survives_restart(self, tmp_path, monkeypatch):
+        """Sessions stored in SQLite are visible to a new checkpointer."""
+        monkeypatch.setenv("CHECKPOINT_BACKEND", "sqlite")
+        monkeypatch.setenv("CHECKPOINT_SQLITE_PATH", str(tmp_path / "checkpoints.sqlite"))
+        saver = create_checkpointer()
+        run(counter_graph(saver), "a")
+        saver.close()
+
+        saver = create_checkpointer()
+        assert run(counter_graph(saver), "a")["turns"] == [0, 1]
+        saver.close()
+
+    def test_capped_and_async(self, tmp_path):
+        """Old checkpoints are pruned and async graphs are supported."""
+        from customer_support_assistant.checkpoints_sqlite import SqliteCheckpointer
+
+        saver = SqliteCheckpointer.open(tmp_path / "checkpoints.sqlite", max_checkpoints_per_thread=2)
+        app = counter_graph(saver)
+        config = {"configurable": {"thread_id": "a"}}
+        for _ in range(5):
+            state = asyncio.run(app.ainvoke({"turns": []}, config))
+        assert state["turns"] == list(range(5))
+        assert len(list(saver.list(config))) == 2
+        saver.close()
+
+
+class TestCheckpointerConfig:
+    """Test cases for create_checkpointer."""
+
+    def test_default_is_bounded_memory(self, monkeypatch):
+        """The in-memory saver is the default and reads its limits from the environment."""
+        monkeypatch.setenv("CHECKPOINT_MAX_THREADS", "5")
+        saver = create_checkpointer()
+        assert isinstance(saver, BoundedMemorySaver)
+        assert saver.max_threads == 5
+
+    def test_unknown_backend(self, monkeypatch):
+        """An unknown backend is rejected."""
+        monkeypatch.setenv("CHECKPOINT_BACKEND", "redis")
+        with pytest.raises(ValueError):
+            create_checkpointer()
+
+
+class RecordingLLM:
+    """LLM stub that answers directly."""
+
+    def invoke(self, messages):
+        return AIMessage(content="ok")
+
+
+class TestSessions:
+    """Test cases for session IDs in process_user_input."""
+
+    def test_sessions_use_separate_threads(self, monkeypatch):
+        """Turns are checkpointed under their session's thread."""
+        saver = BoundedMemorySaver()
+        monkeypatch.setattr(main, "assistant", main.Assistant(llm=RecordingLLM(), checkpointer=saver))
+        main.process_user_input("Hello", session_id="alice")
+        main.process_user_input("Hi", session_id="bob")
+        assert "alice" in saver and "bob" in saver
+        state = saver.get_tuple({"configurable": {"thread_id": "alice"}}).checkpoint
+        assert state["channel_values"]["input"] == "Hello"
+
+    def test_default_session_is_unique(self, monkeypatch):
+        """Calls without a session ID never share a thread."""
+        saver = BoundedMemorySaver()
+        monkeypatch.setattr(main, "assistant", main.Assistant(llm=RecordingLLM(), checkpointer=saver))
+        main.process_user_input("Hello")
+        main.process_user_input("Hello")
+        assert saver.thread_count == 2
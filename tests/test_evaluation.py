@@ -0,0 +1,100 @@
+"""Test cases for the batch evaluation runner and the offline fake LLM."""
+import asyncio
+import json
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from customer_support_assistant import evaluation
+from customer_support_assistant.fake_llm import FakeChatModel
+from customer_support_assistant.prompt_cache import PrefixCache, context_cache_factory
+from customer_support_assistant.router import Router
+
+
+def no_router():
+    """A router without rules, so every question goes to the LLM."""
+    return Router(rules=[])
+
+
+class TestFakeChatModel:
+    """Test cases for FakeChatModel."""
+
+    def test_requests_tool_as_json(self):
+        """A question gets a tool-call JSON reply."""
+        reply = FakeChatModel().invoke([SystemMessage(content="sys"), HumanMessage(content="Where is ORD12345?")])
+        call = json.loads(reply.content)["tool_calls"][0]
+        assert call == {"name": "order_status_lookup", "args": {"order_id": "ORD12345"}}
+
+    def test_answers_with_tool_output(self):
+        """Once tool output follows the user input, it is the answer."""
+        messages = [SystemMessage(content="sys"), HumanMessage(content="Q"), HumanMessage(content="In transit")]
+        assert FakeChatModel().invoke(messages).content == "In transit"
+
+    def test_native_tool_calls(self):
+        """Bound to tools, the model uses native tool calls."""
+        reply = FakeChatModel().bind_tools([]).invoke([HumanMessage(content="How much is a laptop?")])
+        assert reply.tool_calls[0]["name"] == "product_catalog_search"
+
+
+class TestEvaluation:
+    """Test cases for the evaluation runner."""
+
+    def test_load_questions(self):
+        """Blank lines are skipped and items get their line number as id."""
+        items = evaluation.load_questions(['{"question": "Hi"}', "", '{"question": "Yo", "id": "x"}'])
+        assert [item["id"] for item in items] == [1, "x"]
+
+    def test_load_questions_rejects_missing_question(self):
+        """A line without a question is an error naming the line."""
+        with pytest.raises(ValueError, match="Line 2"):
+            evaluation.load_questions(['{"question": "Hi"}', '{"expected": "x"}'])
+
+    def test_records_usage_per_item(self):
+        """Each result counts its own LLM and tool calls under concurrency."""
+        assistant = evaluation.EvaluationAssistant(llm=FakeChatModel(), router=no_router())
+        items = [
+            {"id": 1, "question": "Where is ORD12345?", "expected": "in transit"},
+            {"id": 2, "question": "What is the warranty?", "expected": "1-year"},
+            {"id": 3, "question": "Where is ORD12345?", "expected": "delivered yesterday"},
+        ]
+        results = asyncio.run(evaluation.run_evaluation(items, assistant, concurrency=3))
+
+        assert [r["id"] for r in results] == [1, 2, 3]
+        assert [r["correct"] for r in results] == [True, True, False]
+        for result in results:
+            assert result["llm_calls"] == 2
+            assert len(result["tool_calls"]) == 1
+            assert result["error"] is None
+        assert results[0]["tool_calls"][0] == {"name": "order_status_lookup", "args": {"order_id": "ORD12345"}}
+
+    def test_counts_calls_with_prefix_cache(self):
+        """LLM calls that refer to a cached prompt prefix are counted too."""
+        llm = FakeChatModel()
+        assistant = evaluation.EvaluationAssistant(
+            llm=llm, router=no_router(), prefix_cache=PrefixCache(context_cache_factory(llm))
+        )
+        [result] = asyncio.run(evaluation.run_evaluation([{"id": 1, "question": "What is the warranty?"}], assistant))
+        assert result["llm_calls"] == 2
+        assert assistant.prefix_cache.stats().hits == 1
+
+    def test_routed_question_skips_llm(self):
+        """A question answered by the router records the routed tool call and no LLM call."""
+        assistant = evaluation.EvaluationAssistant(llm=FakeChatModel())
+        [result] = asyncio.run(evaluation.run_evaluation([{"id": 1, "question": "Where is ORD12345?"}], assistant))
+        assert result["llm_calls"] == 0
+        assert result["tool_calls"][0]["routed"] is True
+        assert result["correct"] is None
+
+    def test_main_writes_results(self, tmp_path, capsys):
+        """The CLI writes one result line per question and a summary to stderr."""
+        questions = tmp_path / "questions.jsonl"
+        questions.write_text('{"question": "What is your return policy?"}\n{"question": "Where is ORD12345?"}\n')
+        out = tmp_path / "results.jsonl"
+
+        code = evaluation.main([str(questions), "--out", str(out), "--fake-llm", "--concurrency", "2"])
+
+        assert code == 0
+        assert len(out.read_text().splitlines()) == 2
+        summary = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+        assert summary["questions"] == 2
+        assert summary["errors"] == 0
@@ -0,0 +1,74 @@
+"""Test cases for the fake LLM provider and LLM provider selection."""
+import asyncio
+import json
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from customer_support_assistant import main
+from customer_support_assistant.fake_llm import FakeChatModel, create_fake_llm, split_tokens
+
+
+class TestFakeChatModel:
+    """Test cases for scripted replies and simulated timing."""
+
+    def test_scripted_replies_cycle(self):
+        """Scripted replies are returned in order and then repeat."""
+        model = FakeChatModel(responses=["one", "two"])
+        replies = [model.invoke([HumanMessage(content="hi")]).content for _ in range(3)]
+        assert replies == ["one", "two", "one"]
+
+    def test_scripted_tool_call_native(self):
+        """A scripted tool-call reply becomes native tool calls when bound to tools."""
+        model = FakeChatModel(responses=[{"tool_calls": [{"name": "order_status_lookup", "args": {"order_id": "ORD1"}}]}])
+        reply = model.bind_tools([]).invoke([HumanMessage(content="hi")])
+        assert reply.tool_calls[0]["args"] == {"order_id": "ORD1"}
+
+    def test_streams_word_by_word(self):
+        """A streamed answer arrives one word per chunk and reports usage."""
+        model = FakeChatModel(responses=["Your order has shipped."])
+        # LangChain may close the stream with an empty chunk
+        chunks = [c for c in model.stream([HumanMessage(content="hi")]) if c.content]
+        assert [c.content for c in chunks] == split_tokens("Your order has shipped.")
+        assert chunks[0].usage_metadata["output_tokens"] == 4
+
+    def test_simulated_latency(self):
+        """Time to first token and token rate add up to the reply time."""
+        model = FakeChatModel(responses=["a b c d"], latency=0.05, tokens_per_second=100)
+        start = time.perf_counter()
+        asyncio.run(model.ainvoke([HumanMessage(content="hi")]))
+        assert time.perf_counter() - start >= 0.09
+
+    def test_create_from_environment(self, monkeypatch, tmp_path):
+        """The FAKE_LLM_* variables configure the model."""
+        script = tmp_path / "script.json"
+        script.write_text(json.dumps(["scripted"]))
+        monkeypatch.setenv("FAKE_LLM_LATENCY_MS", "20")
+        monkeypatch.setenv("FAKE_LLM_TOKENS_PER_SECOND", "50")
+        monkeypatch.setenv("FAKE_LLM_SCRIPT", str(script))
+        model = create_fake_llm()
+        assert (model.latency, model.tokens_per_second, model.responses) == (0.02, 50.0, ["scripted"])
+
+
+class TestLLMProviders:
+    """Test cases for create_llm provider selection."""
+
+    def test_fake_provider_needs_no_key(self, monkeypatch):
+        """LLM_PROVIDER=fake answers a turn offline."""
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        monkeypatch.setenv("LLM_PROVIDER", "fake")
+        assistant = main.Assistant(router=main.Router(rules=[]))
+        assert "in transit" in assistant.process("Where is ORD12345?")
+
+    def test_unknown_provider(self):
+        """An unknown provider is rejected."""
+        with pytest.raises(ValueError, match="Unknown LLM provider"):
+            main.create_llm("nope")
+
+    def test_register_provider(self, monkeypatch):
+        """Registered providers can be selected by name."""
+        monkeypatch.setattr(main, "LLM_PROVIDERS", dict(main.LLM_PROVIDERS))
+        model = FakeChatModel(responses=["custom"])
+        main.register_llm_provider("Custom", lambda: model)
+        assert main.create_llm("custom") is model
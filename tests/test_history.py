@@ -0,0 +1,161 @@
+"""Test cases for token-budgeted chat history compaction."""
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from customer_support_assistant import history, main
+from customer_support_assistant.history import (
+    HistoryManager,
+    approximate_tokens,
+    create_history_manager,
+    split_turns,
+    summarize_text,
+    tool_result_flags,
+)
+from customer_support_assistant.router import Router
+
+LONG_RESULT = "Warranty Policy: " + "every product is covered for one full year. " * 40
+
+
+def tool_turn(i):
+    """A user question answered through a tool call."""
+    call = {"name": "knowledge_base_query", "args": {"query": f"q{i}"}, "id": f"call-{i}"}
+    return [
+        HumanMessage(content=f"Question {i}"),
+        AIMessage(content="", tool_calls=[call]),
+        ToolMessage(content=LONG_RESULT, tool_call_id=f"call-{i}"),
+        AIMessage(content=f"Answer {i}"),
+    ]
+
+
+def json_tool_turn(i):
+    """The same turn in the JSON tool-calling mode, where tool results are user messages."""
+    call = {"name": "knowledge_base_query", "args": {"query": f"q{i}"}}
+    return [
+        HumanMessage(content=f"Question {i}"),
+        AIMessage(content="", additional_kwargs={"tool_calls": [call]}),
+        HumanMessage(content=LONG_RESULT),
+        AIMessage(content=f"Answer {i}"),
+    ]
+
+
+def total(manager, messages):
+    return sum(manager.count(m) for m in messages)
+
+
+class TestHistoryManager:
+    """Test cases for HistoryManager.compact."""
+
+    def test_history_within_budget_is_unchanged(self):
+        """Nothing is trimmed while the prompt fits."""
+        messages = tool_turn(1)
+        assert HistoryManager(max_tokens=10_000).compact(messages) == messages
+
+    def test_stale_tool_outputs_are_summarized_first(self):
+        """Earlier tool outputs shrink before any turn is dropped."""
+        messages = tool_turn(1) + tool_turn(2)
+        manager = HistoryManager(max_tokens=total(HistoryManager(), messages) - 100)
+        compacted = manager.compact(messages)
+        assert len(compacted) == len(messages)
+        assert compacted[2].content.endswith("…") and len(compacted[2].content) < 200
+        assert compacted[2].tool_call_id == "call-1"
+        # The latest turn keeps its full tool output
+        assert compacted[6].content == LONG_RESULT
+
+    def test_json_mode_tool_outputs_are_summarized(self):
+        """Tool results sent back as user messages are summarized like ToolMessages."""
+        messages = json_tool_turn(1) + json_tool_turn(2)
+        assert split_turns(messages) == [json_tool_turn(1), json_tool_turn(2)]
+        manager = HistoryManager(max_tokens=total(HistoryManager(), messages) - 100)
+        compacted = manager.compact(messages)
+        assert len(compacted) == len(messages)
+        assert compacted[2].content.endswith("…") and isinstance(compacted[2], HumanMessage)
+        assert compacted[6].content == LONG_RESULT
+
+    def test_tool_result_flags(self):
+        """Only the results of the requested calls count as tool results."""
+        calls = [{"name": "knowledge_base_query", "args": {"query": q}} for q in ("a", "b")]
+        messages = [
+            HumanMessage(content="Question"),
+            AIMessage(content="", additional_kwargs={"tool_calls": calls}),
+            HumanMessage(content="result a"),
+            HumanMessage(content="result b"),
+            HumanMessage(content="Next question"),
+        ]
+        assert tool_result_flags(messages) == [False, False, True, True, False]
+        assert tool_result_flags(tool_turn(1)) == [False, False, True, False]
+
+    def test_oldest_turns_are_dropped_whole(self):
+        """Over budget, the oldest turns go first and tool calls keep their results."""
+        messages = [m for i in range(10) for m in tool_turn(i)]
+        fixed = [SystemMessage(content="system"), HumanMessage(content="Now?")]
+        manager = HistoryManager(max_tokens=800)
+        compacted = manager.compact(messages, fixed)
+        assert total(manager, compacted) + total(manager, fixed) <= 800
+        assert compacted[0].content == f"Question {10 - len(split_turns(compacted))}"
+        assert compacted[-4:] == tool_turn(9)
+
+    def test_budget_smaller_than_fixed_drops_all_history(self):
+        """If the fixed messages use up the budget, no history is sent."""
+        fixed = [HumanMessage(content="x" * 400)]
+        assert HistoryManager(max_tokens=50).compact(tool_turn(1), fixed) == []
+
+    def test_counts_and_summaries_are_cached(self, monkeypatch):
+        """Re-compacting the same history does no repeated work."""
+        calls = {"tokens": 0, "summaries": 0}
+
+        def tokenizer(text):
+            calls["tokens"] += 1
+            return approximate_tokens(text)
+
+        def counting_summary(text, max_chars):
+            calls["summaries"] += 1
+            return summarize_text(text, max_chars)
+
+        monkeypatch.setattr(history, "summarize_text", counting_summary)
+        manager = HistoryManager(max_tokens=700, tokenizer=tokenizer)
+        messages = [m for i in range(3) for m in tool_turn(i)]
+        first = manager.compact(messages)
+        counted, summarized = calls["tokens"], calls["summaries"]
+        assert manager.compact(messages) == first
+        assert calls == {"tokens": counted, "summaries": summarized}
+        # Identical tool outputs share one summary
+        assert summarized == 1
+
+    def test_pluggable_tokenizer(self):
+        """A custom tokenizer decides the counts."""
+        manager = HistoryManager(tokenizer=lambda text: len(text.split()))
+        assert manager.count(HumanMessage(content="three short words")) == 3 + history.MESSAGE_OVERHEAD_TOKENS
+
+    def test_configuration(self, monkeypatch):
+        """HISTORY_MAX_TOKENS sets the budget; 0 disables compaction."""
+        monkeypatch.setenv("HISTORY_MAX_TOKENS", "0")
+        assert create_history_manager() is None
+        monkeypatch.setenv("HISTORY_MAX_TOKENS", "1234")
+        assert create_history_manager().max_tokens == 1234
+
+
+class PromptRecordingLLM:
+    """LLM stub that records the prompts it is sent."""
+
+    def __init__(self):
+        self.prompts = []
+
+    def invoke(self, messages):
+        self.prompts.append(messages)
+        return AIMessage(content="ok")
+
+
+class TestCallLLMHistory:
+    """Test cases for the history budget in call_llm."""
+
+    def test_long_sessions_stay_within_budget(self):
+        """The prompt stays within budget however long the history grows."""
+        llm = PromptRecordingLLM()
+        manager = HistoryManager(max_tokens=1500)
+        assistant = main.Assistant(llm=llm, router=Router([]), history=manager)
+        chat_history = [m for i in range(50) for m in tool_turn(i)]
+        assistant.process("And the warranty?", chat_history=chat_history)
+        prompt = llm.prompts[-1]
+        assert total(manager, prompt) <= 1500
+        assert prompt[0].content == main.SYSTEM_PROMPT
+        assert prompt[-1].content == "And the warranty?"
+        assert prompt[-5:-1] == tool_turn(49)
@@ -0,0 +1,107 @@
+"""Test cases for the BM25 keyword index and hybrid knowledge base retrieval."""
+import numpy as np
+import pytest
+
+from customer_support_assistant.tools import knowledge_base
+from customer_support_assistant.tools.keyword_index import BM25Index, reciprocal_rank_fusion, stem, tokenize
+from customer_support_assistant.tools.vector_store import HashingEmbedder, VectorStore
+
+DOCUMENTS = [
+    "Return policy: items can be returned within 30 days. Return shipping fees may apply.",
+    "Shipping: free standard shipping over $50. Express shipping costs an additional fee.",
+    "Warranty: all electronics carry a 1-year manufacturer warranty.",
+]
+
+
+class TestTokenizer:
+    """Test cases for tokenization and stemming."""
+
+    def test_stem_variants_agree(self):
+        """Inflected forms share a stem."""
+        assert {stem(w) for w in ("shipping", "shipped", "ships", "shipment")} == {"ship"}
+        assert stem("returns") == stem("returned") == "return"
+        assert stem("policies") == "policy"
+        assert stem("fees") == "fee"
+
+    def test_tokenize(self):
+        """Stop words and punctuation are dropped and tokens stemmed."""
+        assert tokenize("What are the Return Shipping fees?") == ["return", "ship", "fee"]
+
+
+class TestBM25Index:
+    """Test cases for ranking, persistence and rank fusion."""
+
+    def test_ranks_by_keyword(self):
+        """The chunk matching the most, and rarest, query terms ranks first."""
+        index = BM25Index.build(DOCUMENTS)
+        scores, ids = index.search(["express shipping fee", "warranty"], k=3)
+        assert ids[0][0] == 1
+        assert ids[1].tolist() == [2, -1, -1]
+        assert scores[0][0] > scores[0][1] > 0
+
+    def test_no_match(self):
+        """A query sharing no term with any chunk finds nothing."""
+        _, ids = BM25Index.build(DOCUMENTS).search(["weather forecast"], k=2)
+        assert (ids == -1).all()
+
+    def test_save_and_mmap_load(self, tmp_path):
+        """A saved index is memory-mapped and scores identically."""
+        index = BM25Index.build(DOCUMENTS)
+        index.save(tmp_path)
+        loaded = BM25Index.load(tmp_path)
+        assert isinstance(loaded._doc_ids, np.memmap)
+        assert loaded.vocabulary_size == index.vocabulary_size
+        np.testing.assert_allclose(loaded.scores("return fees"), index.scores("return fees"))
+
+    def test_reciprocal_rank_fusion(self):
+        """Ids ranked well by both rankings come first."""
+        fused = reciprocal_rank_fusion([[1, 2, 3], [3, 1]], k=60)
+        assert [i for i, _ in fused] == [1, 3, 2]
+        assert fused[0][1] == pytest.approx(1 / 61 + 1 / 62)
+
+
+class TestRetrievalModes:
+    """Test cases for keyword and hybrid retrieval in the vector store."""
+
+    @pytest.fixture
+    def policy_dir(self, tmp_path):
+        for name, text in zip(("returns.md", "shipping.md", "warranty.md"), DOCUMENTS):
+            (tmp_path / name).write_text(text)
+        return tmp_path
+
+    def test_bm25_and_hybrid(self, policy_dir):
+        """Keyword and hybrid stores rank the matching document first."""
+        for retrieval in ("bm25", "hybrid"):
+            store = VectorStore(HashingEmbedder(dim=256), retrieval=retrieval)
+            store.ingest_directory(policy_dir)
+            assert store.query("express shipping", k=1)[0].doc_id == "shipping.md"
+            assert store.query("weather forecast", k=2, min_similarity=0.5) == []
+
+    def test_unknown_mode(self):
+        """An unknown retrieval mode is rejected."""
+        with pytest.raises(ValueError, match="Unknown retrieval mode"):
+            VectorStore(retrieval="fuzzy")
+
+    def test_keyword_index_persisted(self, policy_dir, tmp_path):
+        """The keyword index is saved with the store and memory-mapped on load."""
+        store = VectorStore(HashingEmbedder(dim=256), retrieval="bm25")
+        store.ingest_directory(policy_dir)
+        store.save(tmp_path / "index")
+        loaded = VectorStore.load(tmp_path / "index", HashingEmbedder(dim=256), retrieval="bm25")
+        assert loaded._keywords is not None
+        assert loaded.query("warranty", k=1) == store.query("warranty", k=1)
+        loaded.ingest_directory(policy_dir)
+        assert loaded._keywords is not None
+
+    def test_knowledge_base_tool(self, monkeypatch, policy_dir, tmp_path):
+        """KNOWLEDGE_BASE_RETRIEVAL switches the tool to keyword retrieval and persists the index."""
+        monkeypatch.setenv("KNOWLEDGE_BASE_DIR", str(policy_dir))
+        monkeypatch.setenv("KNOWLEDGE_BASE_INDEX", str(tmp_path / "index"))
+        monkeypatch.setenv("KNOWLEDGE_BASE_RETRIEVAL", "bm25")
+        knowledge_base.reload_knowledge_base()
+        try:
+            assert "Express shipping" in knowledge_base.knowledge_base_query("express shipping costs")
+            assert knowledge_base.knowledge_base_query("weather forecast") == knowledge_base.NO_ANSWER
+            assert BM25Index.exists(tmp_path / "index")
+        finally:
+            knowledge_base.reload_knowledge_base()
@@ -0,0 +1,64 @@
+"""Test cases for the side-effect-free import of the main module."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from customer_support_assistant import main
+
+SRC = str(Path(__file__).parent.parent / "src")
+
+
+def loaded_modules(statement):
+    """Run ``statement`` in a fresh interpreter and return the modules it loaded."""
+    env = {k: v for k, v in os.environ.items() if k != "GEMINI_API_KEY"}
+    script = f"import sys\n{statement}\nprint('\\n'.join(sys.modules))"
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, env=env, cwd=SRC, check=True
+    )
+    return set(result.stdout.split())
+
+
+class TestLazyImport:
+    """Test cases for what importing the package sets up."""
+
+    def test_main_import_builds_nothing(self):
+        """Importing main needs no API key and loads neither LangGraph nor Gemini."""
+        modules = loaded_modules("import customer_support_assistant.main")
+        assert "customer_support_assistant.main" in modules
+        assert not any(m.startswith(("langgraph", "langchain_google_genai")) for m in modules)
+
+    def test_tools_import_has_no_langchain(self):
+        """The tools package imports no LangChain or Google SDK module."""
+        modules = loaded_modules("import customer_support_assistant.tools.catalog, "
+                                 "customer_support_assistant.tools.knowledge_base, "
+                                 "customer_support_assistant.tools.orders")
+        assert not any(m.startswith(("langchain", "langgraph", "google")) for m in modules)
+
+
+class TestAssistant:
+    """Test cases for the lazily built Assistant components."""
+
+    def test_components_are_built_once(self):
+        """The compiled graph and tools are cached after first use."""
+        assistant = main.Assistant(llm=object())
+        assert assistant.app is assistant.app
+        assert [tool.name for tool in assistant.tools] == [
+            "product_catalog_search", "order_status_lookup", "knowledge_base_query"
+        ]
+
+    def test_missing_api_key_raises_on_first_use(self, monkeypatch):
+        """Without GEMINI_API_KEY the LLM cannot be built."""
+        monkeypatch.setattr(main, "load_environment", lambda: None)
+        monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+        with pytest.raises(ValueError):
+            main.Assistant().llm
+
+    def test_module_attributes_resolve_to_default_assistant(self, monkeypatch):
+        """``main.app`` and friends still work, via the default assistant."""
+        assistant = main.Assistant(llm=object())
+        monkeypatch.setattr(main, "assistant", assistant)
+        assert main.app is assistant.app
+        assert main.llm is assistant.llm
@@ -0,0 +1,134 @@
+"""Test cases for the LLM response cache."""
+from langchain_core.messages import AIMessage, HumanMessage
+
+from customer_support_assistant import llm_cache, main
+from customer_support_assistant.llm_cache import ResponseCache, normalize_text
+
+SYSTEM = "You are a helpful assistant."
+
+
+def answer(text):
+    return AIMessage(content=text)
+
+
+class TestResponseCache:
+    """Test cases for ResponseCache lookups and eviction."""
+
+    def test_exact_hit_after_normalization(self):
+        """Case, punctuation and whitespace differences still hit exactly."""
+        cache = ResponseCache()
+        cache.put(SYSTEM, [], "What is your return policy?", answer("30 days"))
+        hit = cache.get(SYSTEM, [], "  what is your RETURN policy ")
+        assert hit.content == "30 days"
+        assert cache.stats().exact_hits == 1
+
+    def test_normalize_keeps_prices_and_model_names(self):
+        """Normalization keeps prices and hyphenated model names intact."""
+        assert normalize_text("Is the WH-1000XM5 $399.99?") == "is the wh-1000xm5 $399.99"
+
+    def test_semantic_hit(self):
+        """A close paraphrase is served from the similarity tier."""
+        cache = ResponseCache(similarity_threshold=0.8)
+        cache.put(SYSTEM, [], "what is the return policy", answer("30 days"))
+        assert cache.get(SYSTEM, [], "so what is the return policy?").content == "30 days"
+        assert cache.stats().semantic_hits == 1
+
+    def test_unrelated_query_misses(self):
+        """A different question is a miss."""
+        cache = ResponseCache(similarity_threshold=0.8)
+        cache.put(SYSTEM, [], "what is the return policy", answer("30 days"))
+        assert cache.get(SYSTEM, [], "how long does shipping take") is None
+        assert cache.stats().misses == 1
+
+    def test_different_model_numbers_miss(self):
+        """Near-identical questions about different products never share an answer."""
+        cache = ResponseCache()
+        question = (
+            "Hi there, could you tell me how much the Sony WH-1000XM4 wireless noise cancelling "
+            "headphones cost with the travel case and the extended two year warranty included?"
+        )
+        cache.put(SYSTEM, [], question, answer("$349.99"))
+        other = question.replace("XM4", "XM5")
+        vectors = cache.embedder.embed([normalize_text(question), normalize_text(other)])
+        assert float(vectors[0] @ vectors[1]) >= llm_cache.DEFAULT_SIMILARITY_THRESHOLD
+        assert cache.get(SYSTEM, [], other) is None
+        assert cache.get(SYSTEM, [], "ORD1 status") is None
+        assert cache.get(SYSTEM, [], question.replace("Hi there", "Hello there")).content == "$349.99"
+
+    def test_context_separates_entries(self):
+        """Different system prompts or histories never share entries."""
+        cache = ResponseCache(similarity_threshold=0.5)
+        cache.put(SYSTEM, [], "hello", answer("hi"))
+        assert cache.get("Another prompt", [], "hello") is None
+        assert cache.get(SYSTEM, [HumanMessage(content="earlier")], "hello") is None
+
+    def test_lru_eviction(self):
+        """The least recently used entry is evicted past max_entries."""
+        cache = ResponseCache(max_entries=2, similarity_threshold=2)
+        cache.put(SYSTEM, [], "a", answer("1"))
+        cache.put(SYSTEM, [], "b", answer("2"))
+        cache.get(SYSTEM, [], "a")
+        cache.put(SYSTEM, [], "c", answer("3"))
+        assert cache.get(SYSTEM, [], "b") is None
+        assert cache.get(SYSTEM, [], "a").content == "1"
+        assert len(cache) == 2
+
+    def test_ttl_expiry(self, monkeypatch):
+        """Entries older than the TTL are dropped on lookup."""
+        now = [1000.0]
+        monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+        cache = ResponseCache(ttl_seconds=10)
+        cache.put(SYSTEM, [], "a", answer("1"))
+        now[0] += 11
+        assert cache.get(SYSTEM, [], "a") is None
+        assert len(cache) == 0
+
+    def test_tool_calls_round_trip(self):
+        """Cached responses keep their tool calls."""
+        cache = ResponseCache()
+        calls = {"tool_calls": [{"name": "knowledge_base_query", "args": {"query": "returns"}}]}
+        cache.put(SYSTEM, [], "returns?", AIMessage(content="", additional_kwargs=calls))
+        assert cache.get(SYSTEM, [], "returns?").additional_kwargs == calls
+
+    def test_sqlite_persistence(self, tmp_path):
+        """Entries survive reopening the cache file."""
+        path = tmp_path / "cache.sqlite"
+        cache = ResponseCache(path=path)
+        cache.put(SYSTEM, [], "what is the return policy", answer("30 days"))
+        cache.close()
+
+        reopened = ResponseCache(path=path, similarity_threshold=0.8)
+        assert reopened.get(SYSTEM, [], "what is the return policy").content == "30 days"
+        assert reopened.get(SYSTEM, [], "so what is the return policy?").content == "30 days"
+        reopened.close()
+
+
+class CountingLLM:
+    """LLM stub that counts its calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return AIMessage(content=f"Answer to: {messages[-1].content}")
+
+
+class TestCallLLMCache:
+    """Test cases for the cache in front of call_llm."""
+
+    def test_repeated_question_skips_llm(self, monkeypatch):
+        """A repeated question is answered without calling the LLM."""
+        stub = CountingLLM()
+        monkeypatch.setattr(main, "assistant", main.Assistant(llm=stub, response_cache=ResponseCache()))
+        first = main.process_user_input("Do you have a store in Boston?")
+        second = main.process_user_input("do you have a store in boston")
+        assert first == second == "Answer to: Do you have a store in Boston?"
+        assert stub.calls == 1
+
+    def test_disabled_by_default(self, monkeypatch):
+        """The cache is only built when LLM_CACHE is set."""
+        monkeypatch.delenv("LLM_CACHE", raising=False)
+        assert llm_cache.create_response_cache() is None
+        monkeypatch.setenv("LLM_CACHE", "1")
+        assert isinstance(llm_cache.create_response_cache(), ResponseCache)
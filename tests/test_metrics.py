@@ -0,0 +1,105 @@
+"""Test cases for the metrics registry, its Prometheus export and turn instrumentation."""
+import asyncio
+
+import pytest
+
+from customer_support_assistant import main, metrics
+from customer_support_assistant.fake_llm import FakeChatModel
+from customer_support_assistant.llm_cache import ResponseCache
+from customer_support_assistant.router import Router
+
+
+def tool_turn_assistant(**components) -> main.Assistant:
+    """An assistant whose fake LLM calls the knowledge base once, then answers."""
+    return main.Assistant(llm=FakeChatModel(), router=Router(rules=[]), tool_calling="native", **components)
+
+
+class TestMetricsRegistry:
+    """Test cases for counters, histograms and the Prometheus text format."""
+
+    def test_prometheus_text(self):
+        """Counters and cumulative histogram buckets render in the exposition format."""
+        registry = metrics.MetricsRegistry()
+        registry.counter("calls_total", "Calls", ("tool",)).inc(2, "order")
+        histogram = registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        assert registry.render_prometheus().splitlines() == [
+            "# HELP calls_total Calls",
+            "# TYPE calls_total counter",
+            'calls_total{tool="order"} 2',
+            "# HELP latency_seconds Latency",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 2',
+            'latency_seconds_bucket{le="+Inf"} 2',
+            "latency_seconds_sum 0.55",
+            "latency_seconds_count 2",
+        ]
+
+    def test_label_values_escaped(self):
+        """Quotes in label values are escaped."""
+        registry = metrics.MetricsRegistry()
+        registry.counter("x_total", "X", ("name",)).inc(1, 'say "hi"')
+        assert 'x_total{name="say \\"hi\\""} 1' in registry.render_prometheus()
+
+    def test_disabled_records_nothing(self):
+        """Without metrics or a tracer, observe is a shared no-op."""
+        metrics.REGISTRY.clear()
+        assert not metrics.instrumentation_enabled()
+        assert metrics.observe("tool", "noop") is metrics.observe("llm")
+        with metrics.observe("tool", "noop"):
+            metrics.count("tool_calls", "noop", "ok")
+        assert metrics.REGISTRY.render_prometheus() == "\n"
+
+    def test_configure_from_environment(self, monkeypatch):
+        """METRICS_ENABLED=1 turns recording on."""
+        monkeypatch.setenv("METRICS_ENABLED", "1")
+        try:
+            metrics.configure_metrics()
+            assert metrics.instrumentation_enabled()
+        finally:
+            metrics.enable_metrics(False)
+
+
+class TestTurnInstrumentation:
+    """Test cases for the metrics and spans of assistant turns."""
+
+    def test_tool_turn_metrics(self, recording):
+        """A turn records its nodes, LLM tokens, tool call, decisions and iterations."""
+        tool_turn_assistant().process("What is your return policy?")
+        registry = metrics.REGISTRY
+        nodes = registry.get("assistant_node_duration_seconds")
+        assert (nodes.count("router"), nodes.count("llm"), nodes.count("tool")) == (1, 2, 1)
+        assert registry.get("assistant_llm_duration_seconds").count() == 2
+        assert registry.get("assistant_tool_calls_total").value("knowledge_base_query", "ok") == 1
+        assert registry.get("assistant_tool_duration_seconds").count("knowledge_base_query") == 1
+        assert registry.get("assistant_llm_tokens_total").value("prompt") > 0
+        assert registry.get("assistant_llm_tokens_total").value("completion") > 0
+        decisions = registry.get("assistant_graph_decisions_total")
+        assert (decisions.value("llm", "tool"), decisions.value("llm", "end")) == (1, 1)
+        assert registry.get("assistant_turn_llm_iterations").total() == 2
+        assert registry.get("assistant_turn_duration_seconds").count() == 1
+
+    def test_cache_hits_counted(self, recording):
+        """Response cache lookups are counted as hits and misses."""
+        assistant = main.Assistant(
+            llm=FakeChatModel(responses=["Hello!"]), router=Router(rules=[]), response_cache=ResponseCache()
+        )
+        assistant.process("Hi there")
+        assistant.process("Hi there")
+        lookups = metrics.REGISTRY.get("assistant_llm_cache_lookups_total")
+        assert (lookups.value("miss"), lookups.value("hit")) == (1, 1)
+
+    def test_spans_nest_under_turn(self, recording):
+        """Node, LLM and tool spans are children of the turn span, also in async turns."""
+        asyncio.run(tool_turn_assistant().aprocess("What is your return policy?", session_id="s1"))
+        by_name = {}
+        for span in recording.spans:
+            by_name.setdefault(span.name, []).append(span)
+        turn = by_name["turn"][0]
+        assert turn.attributes["session_id"] == "s1"
+        assert all(span.parent is turn for span in by_name["node.llm"] + by_name["node.tool"])
+        tool_span = by_name["tool.knowledge_base_query"][0]
+        assert tool_span.parent is by_name["node.tool"][0]
+        assert by_name["llm.call"][0].attributes["prompt_tokens"] > 0
@@ -0,0 +1,62 @@
+"""Test cases for the native function-calling mode."""
+import pytest
+from langchain_core.messages import AIMessage, ToolMessage
+
+from customer_support_assistant import main
+from customer_support_assistant.router import Router
+
+
+class NativeLLM:
+    """LLM stub that calls the order tool natively, then answers from its result."""
+
+    def __init__(self):
+        self.bound = []
+        self.prompts = []
+
+    def bind_tools(self, tools):
+        self.bound = [tool.name for tool in tools]
+        return self
+
+    def invoke(self, messages):
+        self.prompts.append(messages)
+        if isinstance(messages[-1], ToolMessage):
+            return AIMessage(content=f"Answer: {messages[-1].content}")
+        call = {"name": "order_status_lookup", "args": {"order_id": "ORD12345"}, "id": "call-1"}
+        return AIMessage(content="", tool_calls=[call])
+
+
+class TestNativeToolCalling:
+    """Test cases for Assistant(tool_calling="native")."""
+
+    def test_native_tool_call_round_trip(self):
+        """Tool calls come from the model's API and results go back as ToolMessages."""
+        llm = NativeLLM()
+        assistant = main.Assistant(llm=llm, router=Router([]), tool_calling="native")
+        response = assistant.process("Where is my order ORD12345?")
+        assert response.startswith("Answer: Order ORD12345 is currently in transit")
+        assert llm.bound == ["product_catalog_search", "order_status_lookup", "knowledge_base_query"]
+
+        first, second = llm.prompts
+        assert first[0].content == main.NATIVE_SYSTEM_PROMPT
+        request, result = second[-2:]
+        assert request.tool_calls[0]["id"] == "call-1"
+        assert result.tool_call_id == "call-1"
+
+    def test_json_mode_is_default(self, monkeypatch):
+        """The JSON prompt and the unbound model are used unless native is selected."""
+        monkeypatch.delenv("TOOL_CALLING", raising=False)
+        llm = NativeLLM()
+        assistant = main.Assistant(llm=llm)
+        assert assistant.system_prompt == main.SYSTEM_PROMPT
+        assert assistant.model is llm and not llm.bound
+
+    def test_mode_from_environment(self, monkeypatch):
+        """TOOL_CALLING selects the mode; unknown values are rejected."""
+        monkeypatch.setenv("TOOL_CALLING", "native")
+        assert main.Assistant(llm=NativeLLM()).system_prompt == main.NATIVE_SYSTEM_PROMPT
+        with pytest.raises(ValueError):
+            main.Assistant(llm=NativeLLM(), tool_calling="xml").system_prompt
+
+    def test_native_prompt_is_shorter(self):
+        """The native system prompt is a fraction of the JSON one."""
+        assert len(main.NATIVE_SYSTEM_PROMPT) * 4 < len(main.SYSTEM_PROMPT)
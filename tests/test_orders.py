@@ -0,0 +1,197 @@
+"""Test cases for the order backends, connection pool and batched order lookups."""
+import asyncio
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from customer_support_assistant.tools import orders
+from customer_support_assistant.tools.order_store import (
+    ConnectionPool,
+    InMemoryOrderBackend,
+    Order,
+    OrderBackend,
+    OrderLoader,
+    SqliteOrderBackend,
+)
+
+SHIPPED = Order("ORD2", "shipped", datetime.date(2025, 7, 1))
+
+
+class RecordingBackend(OrderBackend):
+    """In-memory backend recording each batch it is asked for."""
+
+    def __init__(self, delay=0.0):
+        self.inner = InMemoryOrderBackend([SHIPPED])
+        self.batches = []
+        self.delay = delay
+
+    def lookup_many(self, order_ids):
+        self.batches.append(sorted(order_ids))
+        time.sleep(self.delay)
+        return self.inner.lookup_many(order_ids)
+
+
+@pytest.fixture
+def sqlite_backend(tmp_path):
+    backend = SqliteOrderBackend.open(tmp_path / "orders.sqlite", pool_size=2)
+    backend.upsert([SHIPPED, Order("ORD3", "processing")])
+    yield backend
+    backend.close()
+
+
+class TestOrderBackends:
+    """Test cases for the SQLite backend and its connection pool."""
+
+    def test_sqlite_lookup_many(self, sqlite_backend):
+        """Found orders come back keyed by ID; unknown IDs are left out."""
+        found = sqlite_backend.lookup_many(["ORD2", "ORD3", "ORD404"])
+        assert found == {"ORD2": SHIPPED, "ORD3": Order("ORD3", "processing")}
+
+    def test_describe(self):
+        """The tool sentence includes the delivery date when known."""
+        assert SHIPPED.describe() == "Order ORD2 is currently shipped and is expected to be delivered by July 1, 2025."
+        assert Order("ORD3", "processing").describe() == "Order ORD3 is currently processing."
+
+    def test_pool_reuses_and_bounds_connections(self):
+        """Connections are reused, and borrowing beyond the size times out."""
+        opened = []
+
+        class Connection:
+            def close(self):
+                pass
+
+        pool = ConnectionPool(lambda: opened.append(Connection()) or opened[-1], size=1, timeout=0.01)
+        with pool.connection() as first:
+            with pytest.raises(TimeoutError):
+                with pool.connection():
+                    pass
+        with pool.connection() as second:
+            assert second is first
+        assert len(opened) == 1
+
+    def test_pool_without_timeout_waits(self):
+        """With timeout=None, a borrower of a saturated pool waits for a connection."""
+        class Connection:
+            def close(self):
+                pass
+
+        pool = ConnectionPool(Connection, size=1, timeout=None)
+        borrowed, release = threading.Event(), threading.Event()
+
+        def hold():
+            with pool.connection():
+                borrowed.set()
+                release.wait(2)
+
+        def borrow():
+            with pool.connection() as conn:
+                return conn
+
+        holder = threading.Thread(target=hold)
+        holder.start()
+        borrowed.wait(2)
+        with ThreadPoolExecutor(1) as executor:
+            waiter = executor.submit(borrow)
+            time.sleep(0.05)
+            assert not waiter.done()
+            release.set()
+            assert isinstance(waiter.result(timeout=2), Connection)
+        holder.join()
+
+
+class TestOrderLoader:
+    """Test cases for coalescing lookups into batches."""
+
+    def test_concurrent_lookups_share_a_batch(self):
+        """Lookups from many threads within the window go out as one query."""
+        backend = RecordingBackend()
+        loader = OrderLoader(backend, batch_window=0.05)
+        barrier = threading.Barrier(8)
+
+        def lookup(i):
+            barrier.wait()
+            return loader.load("ORD2" if i % 2 else f"ORD{100 + i}", timeout=2)
+
+        with ThreadPoolExecutor(8) as pool:
+            results = list(pool.map(lookup, range(8)))
+        assert results.count(SHIPPED) == 4
+        assert backend.batches == [["ORD100", "ORD102", "ORD104", "ORD106", "ORD2"]]
+        assert loader.stats() == (8, 1)
+        loader.close()
+
+    def test_async_lookups_share_a_batch(self):
+        """aload coalesces lookups from coroutines too."""
+        backend = RecordingBackend()
+        loader = OrderLoader(backend, batch_window=0.02)
+
+        async def run():
+            return await asyncio.gather(*(loader.aload(order_id, timeout=2) for order_id in ("ORD2", "ORD9")))
+
+        assert asyncio.run(run()) == [SHIPPED, None]
+        assert backend.batches == [["ORD2", "ORD9"]]
+        loader.close()
+
+    def test_max_batch_size(self):
+        """A full batch is sent without waiting for the window."""
+        backend = RecordingBackend()
+        loader = OrderLoader(backend, batch_window=10, max_batch_size=2)
+        start = time.perf_counter()
+        assert loader.load_many(["ORD1", "ORD2"], timeout=2)["ORD2"] == SHIPPED
+        assert time.perf_counter() - start < 1
+        loader.close()
+
+    def test_lookup_timeout(self):
+        """A lookup waiting on a slow backend times out on its own deadline."""
+        loader = OrderLoader(RecordingBackend(delay=0.2), batch_window=0)
+        with pytest.raises(TimeoutError, match="ORD2"):
+            loader.load("ORD2", timeout=0.01)
+        loader.close()
+
+    def test_backend_errors_reach_every_lookup(self):
+        """A failing batch query fails each lookup in it."""
+        class Broken(OrderBackend):
+            def lookup_many(self, order_ids):
+                raise RuntimeError("database down")
+
+        loader = OrderLoader(Broken(), batch_window=0)
+        with pytest.raises(RuntimeError, match="database down"):
+            loader.load("ORD2", timeout=2)
+        loader.close()
+
+
+class TestOrderTools:
+    """Test cases for the order tools on a configured backend."""
+
+    @pytest.fixture
+    def sqlite_orders(self, monkeypatch, tmp_path, sqlite_backend):
+        monkeypatch.setenv("ORDER_BACKEND", "sqlite")
+        monkeypatch.setenv("ORDER_DB_PATH", str(tmp_path / "orders.sqlite"))
+        orders.get_order_loader.cache_clear()
+        yield
+        orders.get_order_loader().close()
+        orders.get_order_loader.cache_clear()
+
+    def test_lookup_from_sqlite(self, sqlite_orders):
+        """The tool answers from the database, sync and async."""
+        assert "shipped" in orders.order_status_lookup("ord2")
+        assert asyncio.run(orders.aorder_status_lookup("ORD404")) == orders.NOT_FOUND
+
+    def test_lookup_many(self, sqlite_orders):
+        """order_status_lookup_many answers every ID from one batch."""
+        answers = orders.order_status_lookup_many(["ORD2", "ord3", "", "ORD404"])
+        assert answers["ord3"] == "Order ORD3 is currently processing."
+        assert answers[""] == answers["ORD404"] == orders.NOT_FOUND
+        assert orders.get_order_loader().stats().batches == 1
+
+    def test_unknown_backend(self, monkeypatch):
+        """An unknown ORDER_BACKEND is rejected."""
+        monkeypatch.setenv("ORDER_BACKEND", "oracle")
+        orders.get_order_loader.cache_clear()
+        try:
+            with pytest.raises(ValueError, match="Unknown order backend"):
+                orders.get_order_loader()
+        finally:
+            orders.get_order_loader.cache_clear()
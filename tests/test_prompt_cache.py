@@ -0,0 +1,184 @@
+"""Test cases for building the prompt prefix once and reusing it through context caching."""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+from customer_support_assistant import main, metrics, prompt_cache
+from customer_support_assistant.fake_llm import FakeChatModel
+from customer_support_assistant.prompt_cache import PrefixCache, build_prefix, context_cache_factory
+from customer_support_assistant.router import Router
+
+
+def cached_assistant(llm=None, **options) -> main.Assistant:
+    """An assistant whose fake LLM calls a tool, then answers, with a prefix cache."""
+    llm = llm or FakeChatModel()
+    return main.Assistant(
+        llm=llm, router=Router(rules=[]), prefix_cache=PrefixCache(context_cache_factory(llm)), **options
+    )
+
+
+class TestPromptPrefix:
+    """Test cases for the prefix and its hash."""
+
+    def test_stable_key(self):
+        """The same prompt and tools hash alike; other tools change the key."""
+        tools = main.Assistant(llm=object()).tools
+        first, second = build_prefix("prompt", tools), build_prefix("prompt", tools)
+        assert first.key == second.key and len(first.key) == 64
+        assert build_prefix("prompt").key != first.key
+        assert first.messages == (SystemMessage(content="prompt"),)
+
+    def test_built_once_per_assistant(self):
+        """Every LLM call reuses the same system message object."""
+        assistant = main.Assistant(llm=object(), tool_calling="json")
+        assert assistant.prompt_prefix is assistant.prompt_prefix
+        assert assistant.prompt_prefix.messages[0].content == main.SYSTEM_PROMPT
+
+
+class TestPrefixCache:
+    """Test cases for creating, reusing and expiring provider caches."""
+
+    def test_created_once_then_hit(self):
+        """The provider cache is created on first use and reused afterwards."""
+        created = []
+        cache = PrefixCache(lambda messages, tools, ttl: created.append(ttl) or f"cache-{len(created)}", ttl=60)
+        prefix = build_prefix("prompt")
+        assert [cache.get(prefix) for _ in range(3)] == ["cache-1"] * 3
+        assert cache.stats() == (3, 2, 1, 0)
+
+    def test_recreated_before_expiry(self, monkeypatch):
+        """A cache close to its TTL is replaced by a new one."""
+        now = [1000.0]
+        monkeypatch.setattr(prompt_cache.time, "monotonic", lambda: now[0])
+        names = iter(["cache-1", "cache-2"])
+        cache = PrefixCache(lambda messages, tools, ttl: next(names), ttl=100)
+        prefix = build_prefix("prompt")
+        cache.get(prefix)
+        now[0] += 95
+        assert cache.get(prefix) == "cache-2"
+
+    def test_failure_falls_back(self):
+        """A prefix the provider cannot cache is sent in full and not retried."""
+        calls = []
+
+        def refuse(messages, tools, ttl):
+            calls.append(1)
+            raise ValueError("Cached content is too small")
+
+        cache = PrefixCache(refuse)
+        assert cache.get(build_prefix("prompt")) is None
+        assert cache.get(build_prefix("prompt")) is None
+        assert len(calls) == 1
+        assert cache.stats().failed == 1
+
+    def test_upload_runs_outside_the_lock(self):
+        """While one prefix uploads, other prefixes are served and callers of the same prefix wait for it."""
+        started, release = threading.Event(), threading.Event()
+
+        def create(messages, tools, ttl):
+            if messages[0].content == "slow":
+                started.set()
+                release.wait(2)
+            return f"cache-{messages[0].content}"
+
+        cache = PrefixCache(create)
+        slow = build_prefix("slow")
+        with ThreadPoolExecutor(3) as pool:
+            first = pool.submit(cache.get, slow)
+            started.wait(2)
+            second = pool.submit(cache.get, slow)
+            assert pool.submit(cache.get, build_prefix("fast")).result(timeout=1) == "cache-fast"
+            release.set()
+            assert (first.result(), second.result()) == ("cache-slow", "cache-slow")
+        assert cache.stats() == (3, 1, 2, 0)
+
+    def test_async_upload_leaves_the_event_loop_free(self):
+        """aget uploads in a worker thread; concurrent coroutines share the upload."""
+        threads = []
+
+        def create(messages, tools, ttl):
+            threads.append(threading.current_thread())
+            threading.Event().wait(0.05)
+            return "cache-1"
+
+        async def run():
+            ticks = 0
+
+            async def tick():
+                nonlocal ticks
+                while True:
+                    ticks += 1
+                    await asyncio.sleep(0.001)
+
+            ticker = asyncio.ensure_future(tick())
+            cache = PrefixCache(create)
+            names = await asyncio.gather(cache.aget(build_prefix("prompt")), cache.aget(build_prefix("prompt")))
+            ticker.cancel()
+            return names, ticks, cache.stats()
+
+        names, ticks, stats = asyncio.run(run())
+        assert names == ["cache-1", "cache-1"]
+        assert threads != [threading.current_thread()] and len(threads) == 1
+        assert ticks > 5
+        assert stats == (2, 1, 1, 0)
+
+    def test_unsupported_provider(self, monkeypatch):
+        """A model without context caching gets no prefix cache."""
+        monkeypatch.setenv("PROMPT_CACHE", "1")
+        assert prompt_cache.create_prefix_cache(object()) is None
+        assert isinstance(prompt_cache.create_prefix_cache(FakeChatModel()), PrefixCache)
+
+
+class TestFakeContextCache:
+    """Test cases for the local stand-in of a provider context cache."""
+
+    def test_cached_prefix_is_prepended(self):
+        """A call naming a cached context replies as if the prefix had been sent, and reports a cache read."""
+        llm = FakeChatModel()
+        name = llm.create_context_cache([SystemMessage(content="You are a support agent.")])
+        full = llm.invoke([SystemMessage(content="You are a support agent."), HumanMessage(content="Where is ORD1?")])
+        cached = llm.invoke([HumanMessage(content="Where is ORD1?")], cached_content=name)
+        assert cached.content == full.content
+        assert cached.usage_metadata["input_tokens"] == full.usage_metadata["input_tokens"]
+        assert cached.usage_metadata["input_token_details"]["cache_read"] > 0
+
+    def test_expired_context(self):
+        """An expired context cannot be used."""
+        llm = FakeChatModel()
+        name = llm.create_context_cache([SystemMessage(content="prompt")], ttl=0)
+        with pytest.raises(ValueError, match="expired"):
+            llm.invoke([HumanMessage(content="hi")], cached_content=name)
+
+
+class TestAssistantPrefixCache:
+    """Test cases for prefix reuse in assistant turns."""
+
+    @pytest.mark.parametrize("tool_calling", ["json", "native"])
+    def test_turn_reuses_prefix(self, recording, tool_calling):
+        """A tool turn creates the prefix cache once, reuses it and reports the savings on the turn span."""
+        assistant = cached_assistant(tool_calling=tool_calling)
+        answer = assistant.process("What is your return policy?", session_id="s1")
+        assert "30-day" in answer
+        assert assistant.prefix_cache.stats() == (2, 1, 1, 0)
+
+        turn = next(span for span in recording.spans if span.name == "turn")
+        assert (turn.attributes["prefix_lookups"], turn.attributes["prefix_hits"]) == (2, 1)
+        assert turn.attributes["cached_prompt_tokens"] > 0
+        tokens = metrics.REGISTRY.get("assistant_llm_tokens_total")
+        assert tokens.value("cached") == turn.attributes["cached_prompt_tokens"]
+        assert metrics.REGISTRY.get("assistant_prompt_prefix_lookups_total").value("hit") == 1
+
+    def test_async_and_streamed_turns(self, recording):
+        """Async and streamed turns use the cached prefix too."""
+        assistant = cached_assistant()
+        assert "30-day" in asyncio.run(assistant.aprocess("What is your return policy?"))
+        assert "30-day" in "".join(assistant.stream("What is your return policy?"))
+        assert assistant.prefix_cache.stats() == (4, 3, 1, 0)
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Without PROMPT_CACHE the full prompt is sent on every call."""
+        monkeypatch.delenv("PROMPT_CACHE", raising=False)
+        assert main.Assistant(llm=FakeChatModel()).prefix_cache is None
@@ -0,0 +1,113 @@
+"""Test cases for the fast-path router."""
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.tools import Tool
+
+from customer_support_assistant import main
+from customer_support_assistant.router import Router, create_router, extract_order_ids
+from customer_support_assistant.tools.knowledge_base import NO_ANSWER
+
+
+class CountingLLM:
+    """LLM stub that counts its calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return AIMessage(content="from the LLM")
+
+    async def ainvoke(self, messages):
+        return self.invoke(messages)
+
+
+class TestRouterRules:
+    """Test cases for Router.route."""
+
+    @pytest.mark.parametrize("text, tool, args", [
+        ("Where is ORD12345?", "order_status_lookup", {"order_id": "ORD12345"}),
+        ("status of ord12345 please", "order_status_lookup", {"order_id": "ORD12345"}),
+        ("What's the price of the Sony WH-1000XM5?", "product_catalog_search", {"query": "sony wh-1000xm5"}),
+        ("Sony WH-1000XM5", "product_catalog_search", {"query": "sony wh-1000xm5"}),
+        ("What is your return policy?", "knowledge_base_query", {"query": "What is your return policy?"}),
+        ("Is there a warranty?", "knowledge_base_query", {"query": "Is there a warranty?"}),
+    ])
+    def test_confident_routes(self, text, tool, args):
+        """High-confidence intents are routed to their tool."""
+        route = Router().route(text)
+        assert route.tool == tool
+        assert route.args == args
+
+    @pytest.mark.parametrize("text", [
+        "Hello there",
+        "Tell me about the Sony WH-1000XM5",  # a features question, not a price
+        "How much are the Sony WH-1000XM6?",  # only a fuzzy catalog match
+        "How much is the Sony WH-1000XM4 vs the Sony WH-1000XM5?",  # two products
+        "Compare ORD12345 and ORD67890",
+        "What is the warranty and the return policy?",
+        "Can I return ORD12345?",
+    ])
+    def test_ambiguous_inputs_pass(self, text):
+        """Inputs without exactly one confident intent go to the LLM."""
+        assert Router().route(text) is None
+
+    def test_rules_are_configurable(self, monkeypatch):
+        """ROUTER_RULES selects rules; an empty value disables routing."""
+        monkeypatch.setenv("ROUTER_RULES", "order")
+        assert create_router().route("What is your return policy?") is None
+        monkeypatch.setenv("ROUTER_RULES", "")
+        assert create_router().route("Where is ORD12345?") is None
+        with pytest.raises(ValueError):
+            Router(["nope"])
+
+    def test_extract_order_ids(self):
+        """Order IDs are deduplicated case-insensitively, in order."""
+        assert extract_order_ids("ord1 and ORD1, then ORD22") == ["ORD1", "ORD22"]
+
+
+class TestRoutedGraph:
+    """Test cases for the router node in the graph."""
+
+    @pytest.fixture(autouse=True)
+    def stub_llm(self, monkeypatch):
+        """Count LLM calls and start each test with fresh router counters."""
+        self.llm = CountingLLM()
+        self.assistant = main.Assistant(llm=self.llm, router=Router())
+        monkeypatch.setattr(main, "assistant", self.assistant)
+
+    def test_routed_input_skips_llm(self):
+        """A routed input is answered by its tool without an LLM call."""
+        response = main.process_user_input("What's the status of ORD12345?")
+        assert "in transit" in response
+        assert self.llm.calls == 0
+        stats = self.assistant.router.stats()
+        assert stats.by_rule["order"] == 1
+        assert stats.hit_rate == 1.0
+
+    def test_async_routed_input(self):
+        """The async graph takes the fast path too."""
+        response = asyncio.run(main.process_user_input_async("How much is the Sony WH-1000XM5?"))
+        assert response == "$399.99"
+        assert self.llm.calls == 0
+
+    def test_other_inputs_reach_llm(self):
+        """Unrouted and multi-intent inputs go to the LLM."""
+        assert main.process_user_input("Hello there") == "from the LLM"
+        assert main.process_user_input("Do you ship to Mars or accept payment in gold?") == "from the LLM"
+        assert self.llm.calls == 2
+        assert self.assistant.router.stats().passed == 2
+
+    def test_knowledge_base_miss_reaches_llm(self, monkeypatch):
+        """A routed tool without an answer falls through to the LLM."""
+        no_answer = Tool(name="knowledge_base_query", func=lambda query: NO_ANSWER, description="kb")
+        monkeypatch.setattr(self.assistant, "tools", [no_answer])
+        assert main.process_user_input("What is your return policy?") == "from the LLM"
+        assert self.assistant.router.stats().routed == 0
+
+    def test_routing_does_not_leak_between_turns(self):
+        """A routed turn does not end the next turn on the same session early."""
+        main.process_user_input("Where is ORD12345?", session_id="s")
+        assert main.process_user_input("Hello there", session_id="s") == "from the LLM"
@@ -0,0 +1,213 @@
+"""Test cases for the ASGI chat server."""
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from customer_support_assistant import main
+from customer_support_assistant.fake_llm import FakeChatModel
+from customer_support_assistant.router import Router
+from customer_support_assistant.server import AdmissionControl, ChatServer
+
+
+class BlockingAssistant:
+    """Assistant stub whose turns wait until released."""
+
+    def __init__(self):
+        self.started = 0
+        self.release = asyncio.Event()
+
+    async def aprocess(self, message, session_id=None):
+        self.started += 1
+        await self.release.wait()
+        return f"answer to {message}"
+
+
+class FailingStream:
+    """Token stream stub whose turn fails before the first token."""
+
+    def __init__(self):
+        self.closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        raise RuntimeError("LLM unavailable")
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FailingAssistant:
+    """Assistant stub whose streamed turns fail."""
+
+    def __init__(self):
+        self.streams = []
+
+    def astream(self, message, session_id=None):
+        self.streams.append(FailingStream())
+        return self.streams[-1]
+
+
+def client(app):
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+
+
+def fake_assistant():
+    return main.Assistant(llm=FakeChatModel(responses=["Happy to help with that."]), router=Router())
+
+
+async def lifespan(app, *events):
+    """Run the ASGI lifespan protocol with ``events`` and return the replies."""
+    incoming = asyncio.Queue()
+    for event in events:
+        incoming.put_nowait({"type": event})
+    replies = []
+
+    async def send(message):
+        replies.append(message["type"])
+
+    await app({"type": "lifespan"}, incoming.get, send)
+    return replies
+
+
+class TestChatEndpoints:
+    """Test cases for the chat, streaming, health and metrics endpoints."""
+
+    def test_chat(self):
+        """A chat request is answered by the graph, routed or via the LLM."""
+        async def run():
+            async with client(ChatServer(fake_assistant(), warm=False)) as http:
+                routed = await http.post("/chat", json={"message": "Where is ORD12345?", "session_id": "s1"})
+                answered = await http.post("/chat", json={"message": "Hello"})
+                return routed, answered
+
+        routed, answered = asyncio.run(run())
+        assert routed.status_code == 200
+        assert routed.json()["session_id"] == "s1"
+        assert "in transit" in routed.json()["response"]
+        assert answered.json()["response"] == "Happy to help with that."
+        assert answered.json()["session_id"]
+
+    def test_chat_stream(self):
+        """Streaming chat sends one event per token and an end event."""
+        async def run():
+            async with client(ChatServer(fake_assistant(), warm=False)) as http:
+                return await http.post("/chat/stream", json={"message": "Hello", "session_id": "s1"})
+
+        response = asyncio.run(run())
+        assert response.headers["content-type"] == "text/event-stream"
+        events = response.text.strip().split("\n\n")
+        tokens = [json.loads(e[len("data: "):]) for e in events if e.startswith("data: ")]
+        assert "".join(tokens) == "Happy to help with that."
+        assert events[-1] == "event: end\ndata: {}"
+
+    def test_chat_stream_failure(self):
+        """A turn failing before its first token gets a 500 and its stream is closed."""
+        assistant = FailingAssistant()
+        server = ChatServer(assistant, warm=False)
+
+        async def run():
+            async with client(server) as http:
+                return await http.post("/chat/stream", json={"message": "Hello"})
+
+        response = asyncio.run(run())
+        assert response.status_code == 500
+        assert response.json() == {"error": "The assistant could not answer"}
+        assert assistant.streams[0].closed
+        assert server.admission.in_flight == 0
+
+    def test_bad_requests(self):
+        """Invalid bodies get 400, unknown paths 404 and wrong methods 405."""
+        async def run():
+            async with client(ChatServer(fake_assistant(), warm=False)) as http:
+                return [
+                    await http.post("/chat", content=b"not json"),
+                    await http.post("/chat", json={"message": "  "}),
+                    await http.get("/nowhere"),
+                    await http.get("/chat"),
+                ]
+
+        assert [r.status_code for r in asyncio.run(run())] == [400, 400, 404, 405]
+
+    def test_health_and_metrics(self):
+        """Health reports the load; metrics are served in the Prometheus format."""
+        async def run():
+            async with client(ChatServer(fake_assistant(), warm=False)) as http:
+                return await http.get("/health"), await http.get("/metrics")
+
+        health, metrics = asyncio.run(run())
+        assert health.json() == {"status": "ok", "in_flight": 0, "queued": 0, "max_concurrency": 32}
+        assert metrics.headers["content-type"].startswith("text/plain")
+
+
+class TestBackpressure:
+    """Test cases for concurrency limits, queueing and draining."""
+
+    def test_saturated_server_returns_429(self):
+        """Beyond the running and queued requests, new ones are rejected at once."""
+        async def run():
+            assistant = BlockingAssistant()
+            app = ChatServer(assistant, max_concurrency=2, max_queue=1, warm=False)
+            async with client(app) as http:
+                requests = [asyncio.ensure_future(http.post("/chat", json={"message": f"q{i}"})) for i in range(3)]
+                while assistant.started < 2 or app.admission.waiting < 1:
+                    await asyncio.sleep(0.001)
+                rejected = await http.post("/chat", json={"message": "one too many"})
+                assistant.release.set()
+                return rejected, await asyncio.gather(*requests), assistant.started
+
+        rejected, responses, started = asyncio.run(run())
+        assert rejected.status_code == 429
+        assert rejected.headers["retry-after"] == "1"
+        assert [r.status_code for r in responses] == [200, 200, 200]
+        assert started == 3
+
+    def test_queue_timeout(self):
+        """A queued request that waits too long gets 429."""
+        async def run():
+            assistant = BlockingAssistant()
+            app = ChatServer(assistant, max_concurrency=1, max_queue=5, queue_timeout=0.05, warm=False)
+            async with client(app) as http:
+                first = asyncio.ensure_future(http.post("/chat", json={"message": "slow"}))
+                while assistant.started < 1:
+                    await asyncio.sleep(0.001)
+                timed_out = await http.post("/chat", json={"message": "waits"})
+                assistant.release.set()
+                await first
+                return timed_out
+
+        assert asyncio.run(run()).status_code == 429
+
+    def test_drain_waits_for_running_turns(self):
+        """Shutdown rejects new turns with 503 and completes once running ones finish."""
+        async def run():
+            assistant = BlockingAssistant()
+            app = ChatServer(assistant, warm=False)
+            async with client(app) as http:
+                running = asyncio.ensure_future(http.post("/chat", json={"message": "slow"}))
+                while assistant.started < 1:
+                    await asyncio.sleep(0.001)
+                shutdown = asyncio.ensure_future(lifespan(app, "lifespan.shutdown"))
+                await asyncio.sleep(0.01)
+                assert not shutdown.done()
+                rejected = await http.post("/chat", json={"message": "late"})
+                health = await http.get("/health")
+                assistant.release.set()
+                return (await running).status_code, rejected.status_code, health.status_code, await shutdown
+
+        assert asyncio.run(run()) == (200, 503, 503, ["lifespan.shutdown.complete"])
+
+    def test_startup_warms_the_assistant(self):
+        """Lifespan startup compiles the graph before serving."""
+        assistant = fake_assistant()
+        replies = asyncio.run(lifespan(ChatServer(assistant), "lifespan.startup", "lifespan.shutdown"))
+        assert replies == ["lifespan.startup.complete", "lifespan.shutdown.complete"]
+        assert "app" in vars(assistant)
+
+    def test_invalid_limits(self):
+        """Limits must leave room for at least one turn."""
+        with pytest.raises(ValueError, match="max_concurrency"):
+            AdmissionControl(0, 1, 1.0)
@@ -0,0 +1,172 @@
+"""Test cases for coalescing identical in-flight calls."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.tools import StructuredTool
+
+from customer_support_assistant import main, metrics
+from customer_support_assistant.fake_llm import FakeChatModel
+from customer_support_assistant.router import Router
+from customer_support_assistant.single_flight import SingleFlight, create_single_flight
+
+
+class SlowCall:
+    """A call counting its executions, blocking until released."""
+
+    def __init__(self, result="done"):
+        self.calls = 0
+        self.result = result
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(2)
+        return self.result
+
+
+class TestSingleFlight:
+    """Test cases for sharing one call between concurrent callers."""
+
+    def test_threads_share_one_call(self):
+        """Callers arriving while a call runs get its result without calling again."""
+        flight, call = SingleFlight(), SlowCall()
+        with ThreadPoolExecutor(4) as pool:
+            leader = pool.submit(flight.do, "k", call)
+            call.started.wait(2)
+            followers = [pool.submit(flight.do, "k", call) for _ in range(3)]
+            while flight.stats().coalesced < 3:
+                time.sleep(0.001)
+            call.release.set()
+            assert leader.result() == ("done", False)
+            assert [f.result() for f in followers] == [("done", True)] * 3
+        assert call.calls == 1
+        assert flight.stats() == (1, 3)
+        assert len(flight) == 0
+
+    def test_nothing_kept_after_the_call(self):
+        """A caller arriving after the call finished runs it again."""
+        flight, call = SingleFlight(), SlowCall()
+        call.release.set()
+        flight.do("k", call)
+        assert flight.do("k", call) == ("done", False)
+        assert call.calls == 2
+
+    def test_async_and_sync_callers_share(self):
+        """A thread waits for the call a coroutine started."""
+        flight, call = SingleFlight(), SlowCall()
+
+        async def lead():
+            return call()
+
+        async def run():
+            leader = asyncio.ensure_future(flight.ado("k", lambda: asyncio.to_thread(call)))
+            await asyncio.to_thread(call.started.wait, 2)
+            follower = asyncio.to_thread(flight.do, "k", call)
+            waiter = asyncio.ensure_future(flight.ado("k", lead))
+            await asyncio.sleep(0.01)
+            call.release.set()
+            return await asyncio.gather(leader, follower, waiter)
+
+        assert asyncio.run(run()) == [("done", False), ("done", True), ("done", True)]
+        assert call.calls == 1
+
+    def test_exception_reaches_every_caller(self):
+        """An exception of the shared call is raised to each caller."""
+        flight, started, release = SingleFlight(), threading.Event(), threading.Event()
+
+        def fail():
+            started.set()
+            release.wait(2)
+            raise RuntimeError("backend down")
+
+        with ThreadPoolExecutor(2) as pool:
+            leader = pool.submit(flight.do, "k", fail)
+            started.wait(2)
+            follower = pool.submit(flight.do, "k", fail)
+            while flight.stats().coalesced < 1:
+                time.sleep(0.001)
+            release.set()
+            for future in (leader, follower):
+                with pytest.raises(RuntimeError, match="backend down"):
+                    future.result()
+
+    def test_cancelled_leader_hands_over(self):
+        """When the calling coroutine is cancelled, a waiting caller makes the call itself."""
+        flight = SingleFlight()
+
+        async def hang():
+            await asyncio.sleep(10)
+
+        async def answer():
+            return "done"
+
+        async def run():
+            leader = asyncio.ensure_future(flight.ado("k", hang))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.ado("k", answer))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(run()) == ("done", False)
+
+    def test_create_single_flight(self, monkeypatch):
+        """SINGLE_FLIGHT turns coalescing on."""
+        monkeypatch.delenv("SINGLE_FLIGHT", raising=False)
+        assert create_single_flight() is None
+        monkeypatch.setenv("SINGLE_FLIGHT", "1")
+        assert isinstance(create_single_flight(), SingleFlight)
+
+
+class TestAssistantSingleFlight:
+    """Test cases for coalescing inside assistant turns."""
+
+    def test_identical_turns_share_llm_call(self, recording):
+        """Concurrent turns with the same normalized question make one LLM call."""
+        flight = SingleFlight()
+        assistant = main.Assistant(
+            llm=FakeChatModel(latency=0.2, responses=["Returns are accepted within 30 days."]),
+            router=Router(rules=[]),
+            single_flight=flight,
+        )
+        barrier = threading.Barrier(3)
+
+        def ask(question):
+            barrier.wait()
+            return assistant.process(question)
+
+        questions = ["What is your return policy?", "what is your  return policy", "WHAT IS YOUR RETURN POLICY?"]
+        with ThreadPoolExecutor(3) as pool:
+            answers = list(pool.map(ask, questions))
+        assert answers == ["Returns are accepted within 30 days."] * 3
+        assert flight.stats() == (1, 2)
+        assert metrics.REGISTRY.get("assistant_coalesced_requests_total").value("llm") == 2
+
+    def test_identical_tool_calls_share_one_call(self):
+        """Concurrent async turns looking up the same order call the backend once."""
+        calls = []
+
+        async def lookup(order_id: str) -> str:
+            """Look up an order."""
+            calls.append(order_id)
+            await asyncio.sleep(0.05)
+            return f"{order_id} shipped"
+
+        tool = StructuredTool.from_function(coroutine=lookup, name="order_status_lookup", description="Look up")
+        assistant = main.Assistant(
+            llm=FakeChatModel(), tools=[tool], router=Router(rules=[]), single_flight=SingleFlight(),
+            tool_calling="native",
+        )
+
+        async def run():
+            return await asyncio.gather(
+                assistant.aprocess("Where is my order ORD12345?"), assistant.aprocess("Where is order ORD12345")
+            )
+
+        assert asyncio.run(run()) == ["ORD12345 shipped"] * 2
+        assert calls == ["ORD12345"]
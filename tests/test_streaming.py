@@ -0,0 +1,144 @@
+"""Test cases for streaming answer tokens to the caller."""
+import asyncio
+import json
+import threading
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from customer_support_assistant import main
+from customer_support_assistant.router import Router
+from customer_support_assistant.streaming import AnswerFilter
+
+TOOL_CALL = json.dumps({"tool_calls": [{"name": "knowledge_base_query", "args": {"query": "warranty"}}]})
+
+
+def pieces(text, size=4):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class StreamingLLM:
+    """LLM stub that streams a tool call first, then an answer, in small chunks."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.chunks_sent = 0
+
+    def _next(self, messages):
+        reply = self.replies.pop(0)
+        return reply(messages) if callable(reply) else reply
+
+    def invoke(self, messages):
+        return AIMessage(content=self._next(messages))
+
+    def stream(self, messages):
+        for piece in pieces(self._next(messages)):
+            self.chunks_sent += 1
+            yield AIMessageChunk(content=piece)
+
+    async def astream(self, messages):
+        for chunk in self.stream(messages):
+            await asyncio.sleep(0)
+            yield chunk
+
+
+class BlockingLLM:
+    """LLM stub that streams its first chunk, then waits to be resumed."""
+
+    def __init__(self, reply):
+        self.reply = reply
+        self.resume = threading.Event()
+        self.finished = False
+
+    def stream(self, messages):
+        first, *rest = pieces(self.reply)
+        yield AIMessageChunk(content=first)
+        self.resume.wait(5)
+        for piece in rest:
+            yield AIMessageChunk(content=piece)
+        self.finished = True
+
+
+class TestAnswerFilter:
+    """Test cases for AnswerFilter."""
+
+    def test_answer_text_is_released_as_it_arrives(self):
+        """Plain answer text passes through chunk by chunk."""
+        answer = AnswerFilter()
+        assert answer.feed("  ") == ""
+        assert answer.feed("Our return") == "  Our return"
+        assert answer.feed(" policy") == " policy"
+
+    def test_json_reply_is_held(self):
+        """A reply starting like JSON or a fence is held until flushed."""
+        for start in ('{"tool', "```json\n{"):
+            answer = AnswerFilter()
+            assert answer.feed(start) == ""
+            assert answer.feed(' "x"}') == ""
+            assert answer.flush() == start + ' "x"}'
+
+    def test_fence_inside_answer_is_held(self):
+        """Text from a code fence onwards is held, including a split fence."""
+        answer = AnswerFilter()
+        assert answer.feed("Sure. `") == "Sure. "
+        assert answer.feed("``json") == ""
+        assert answer.flush() == "```json"
+
+
+class TestStreamUserInput:
+    """Test cases for stream_user_input and astream_user_input."""
+
+    @pytest.fixture(autouse=True)
+    def no_routing(self, monkeypatch):
+        """Send every input to the LLM unless a test installs its own assistant."""
+        self.use_llm = lambda llm: monkeypatch.setattr(
+            main, "assistant", main.Assistant(llm=llm, router=Router([]))
+        )
+
+    def test_tokens_are_yielded_as_they_arrive(self):
+        """The first token reaches the caller before the model has finished."""
+        llm = BlockingLLM("Thanks for asking about our stores.")
+        self.use_llm(llm)
+        stream = main.stream_user_input("Do you have stores?")
+        assert next(stream) == "Than"
+        assert not llm.finished
+        llm.resume.set()
+        assert "Than" + "".join(stream) == "Thanks for asking about our stores."
+        assert llm.finished
+
+    def test_tool_call_json_is_not_leaked(self):
+        """A streamed tool call runs the tool; only the final answer is shown."""
+        self.use_llm(StreamingLLM([TOOL_CALL, lambda m: f"Good news: {m[-1].content}"]))
+        tokens = list(main.stream_user_input("Is there a warranty?"))
+        assert len(tokens) > 1
+        text = "".join(tokens)
+        assert text.startswith("Good news:") and "1-year" in text
+        assert "tool_calls" not in text
+
+    def test_matches_process_user_input(self):
+        """The joined stream equals the non-streaming answer."""
+        reply = "We ship worldwide within 5 days."
+        self.use_llm(StreamingLLM([reply]))
+        streamed = "".join(main.stream_user_input("Where do you ship?"))
+        self.use_llm(StreamingLLM([reply]))
+        assert streamed == main.process_user_input("Where do you ship?") == reply
+
+    def test_routed_answer_is_yielded_whole(self, monkeypatch):
+        """Fast-path answers arrive as one piece without an LLM call."""
+        monkeypatch.setattr(main, "assistant", main.Assistant(llm=StreamingLLM([])))
+        assert list(main.stream_user_input("How much is the Sony WH-1000XM5?")) == ["$399.99"]
+
+    def test_async_stream(self):
+        """The async generator streams tokens too."""
+        self.use_llm(StreamingLLM([TOOL_CALL, "Covered for a year."]))
+
+        async def collect():
+            return [token async for token in main.astream_user_input("Is there a warranty?")]
+
+        tokens = asyncio.run(collect())
+        assert tokens == pieces("Covered for a year.")
+
+    def test_empty_input(self):
+        """Empty input is rejected once iteration starts."""
+        with pytest.raises(ValueError):
+            next(main.stream_user_input(" "))
@@ -0,0 +1,160 @@
+"""Test cases for the structured logging subsystem."""
+import json
+import logging
+import threading
+
+import pytest
+
+from customer_support_assistant import structured_logging
+from customer_support_assistant.structured_logging import (
+    JsonLinesWriter,
+    configure_logging,
+    get_logger,
+    log_event,
+    set_log_level,
+    shutdown_logging,
+)
+
+
+@pytest.fixture(autouse=True)
+def reset_logging():
+    """Leave the package logging unconfigured after each test."""
+    yield
+    shutdown_logging()
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+class TestStructuredLogging:
+    """Test cases for configure_logging and log_event."""
+
+    def test_events_written_as_json_lines(self, tmp_path):
+        """Events and their fields end up as one JSON object per line."""
+        path = tmp_path / "assistant.jsonl"
+        configure_logging(path, level="DEBUG")
+        logger = get_logger("tests")
+        log_event(logger, logging.DEBUG, "tool_call", tool="catalog", args={"query": "sony"})
+        log_event(logger, logging.INFO, "turn_started", user_input="hi")
+        shutdown_logging()
+
+        first, second = read_lines(path)
+        assert first["event"] == "tool_call"
+        assert first["level"] == "DEBUG"
+        assert first["logger"] == "customer_support_assistant.tests"
+        assert first["args"] == {"query": "sony"}
+        assert second["user_input"] == "hi"
+
+    def test_disabled_level_skips_record(self, tmp_path):
+        """Events below the configured level are dropped before any work."""
+        path = tmp_path / "assistant.jsonl"
+        configure_logging(path, level="WARNING")
+        logger = get_logger("tests")
+        log_event(logger, logging.DEBUG, "ignored")
+        set_log_level("DEBUG")
+        log_event(logger, logging.DEBUG, "recorded")
+        shutdown_logging()
+
+        assert [line["event"] for line in read_lines(path)] == ["recorded"]
+
+    def test_no_file_io_on_calling_thread(self, tmp_path, monkeypatch):
+        """Records are only enqueued by the caller; the writer thread does the I/O."""
+        writes = []
+        original = JsonLinesWriter._write
+        monkeypatch.setattr(
+            JsonLinesWriter, "_write",
+            lambda self, batch: (writes.append(threading.current_thread().name), original(self, batch)),
+        )
+        configure_logging(tmp_path / "assistant.jsonl", level="DEBUG")
+        for i in range(50):
+            log_event(get_logger("tests"), logging.INFO, "event", i=i)
+        shutdown_logging()
+
+        assert writes
+        assert set(writes) == {"log-writer"}
+
+    def test_unserializable_fields_use_str(self, tmp_path):
+        """Arbitrary objects are logged via str() instead of failing."""
+        path = tmp_path / "assistant.jsonl"
+        configure_logging(path, level="DEBUG")
+        log_event(get_logger("tests"), logging.INFO, "event", obj=object)
+        shutdown_logging()
+
+        assert read_lines(path)[0]["obj"] == str(object)
+
+    def test_fields_captured_when_logged(self, tmp_path, monkeypatch):
+        """Changing a field after logging does not change what is written."""
+        release = threading.Event()
+        original = JsonLinesWriter._write
+        monkeypatch.setattr(JsonLinesWriter, "_write", lambda self, batch: (release.wait(2), original(self, batch)))
+        path = tmp_path / "assistant.jsonl"
+        configure_logging(path, level="DEBUG")
+        args = {"query": "sony"}
+        log_event(get_logger("tests"), logging.INFO, "tool_call", args=args)
+        get_logger("tests").info("query %s", args)
+        args["query"] = "changed"
+        release.set()
+        shutdown_logging()
+
+        first, second = read_lines(path)
+        assert first["args"] == {"query": "sony"}
+        assert second["event"] == "query {'query': 'sony'}"
+
+    def test_propagation_left_alone(self, tmp_path, caplog, monkeypatch):
+        """Auto-configuration keeps records flowing to the host's root handlers unless told otherwise."""
+        package_logger = logging.getLogger(structured_logging.ROOT_LOGGER_NAME)
+        monkeypatch.setattr(package_logger, "propagate", True)
+        caplog.set_level(logging.INFO, logger=structured_logging.ROOT_LOGGER_NAME)
+        configure_logging(tmp_path / "assistant.jsonl", level="INFO")
+        log_event(get_logger("tests"), logging.INFO, "turn_started")
+        assert package_logger.propagate
+        assert [record.getMessage() for record in caplog.records] == ["turn_started"]
+
+        configure_logging(tmp_path / "assistant.jsonl", level="INFO", propagate=False)
+        log_event(get_logger("tests"), logging.INFO, "hidden")
+        assert not package_logger.propagate
+        assert [record.getMessage() for record in caplog.records] == ["turn_started"]
+
+    def test_ensure_configured_is_idempotent(self, tmp_path, monkeypatch):
+        """ensure_logging_configured only sets logging up once."""
+        monkeypatch.setenv("LOG_FILE", str(tmp_path / "assistant.jsonl"))
+        structured_logging.ensure_logging_configured()
+        writer = structured_logging._writer
+        structured_logging.ensure_logging_configured()
+        assert writer is not None
+        assert structured_logging._writer is writer
+
+
+class TestJsonLinesWriter:
+    """Test cases for batching and rotation in JsonLinesWriter."""
+
+    def test_rotates_by_size(self, tmp_path):
+        """The file is rotated once it would exceed max_bytes."""
+        path = tmp_path / "assistant.jsonl"
+        configure_logging(path, level="INFO", max_bytes=2000, backup_count=2, batch_size=1)
+        logger = get_logger("tests")
+        for i in range(100):
+            log_event(logger, logging.INFO, "event", i=i, padding="x" * 50)
+        shutdown_logging()
+
+        rotated = sorted(p.name for p in tmp_path.iterdir())
+        assert rotated == ["assistant.jsonl", "assistant.jsonl.1", "assistant.jsonl.2"]
+        for name in rotated:
+            assert (tmp_path / name).stat().st_size <= 2000
+        assert read_lines(path)[-1]["i"] == 99
+
+    def test_full_queue_drops_records(self, tmp_path, monkeypatch):
+        """A full queue drops records instead of blocking the caller."""
+        release = threading.Event()
+        original = JsonLinesWriter._write
+        monkeypatch.setattr(
+            JsonLinesWriter, "_write", lambda self, batch: (release.wait(), original(self, batch))
+        )
+        writer = JsonLinesWriter(tmp_path / "assistant.jsonl", queue_size=2)
+        record = logging.LogRecord("tests", logging.INFO, __file__, 1, "event", None, None)
+        for _ in range(10):
+            writer.enqueue(record)
+        release.set()
+        writer.stop()
+        assert 0 < writer.dropped < 10
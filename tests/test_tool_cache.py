@@ -0,0 +1,166 @@
+"""Test cases for the tool result cache."""
+import asyncio
+import time
+
+import pytest
+from langchain_core.tools import StructuredTool
+
+from customer_support_assistant import main, tool_cache
+from customer_support_assistant.fake_llm import FakeChatModel
+from customer_support_assistant.router import Router
+from customer_support_assistant.tool_cache import ToolCache, parse_ttls
+from customer_support_assistant.tools import catalog
+
+
+class Backend:
+    """A tool function counting its calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, order_id: str) -> str:
+        """Look up an order."""
+        self.calls += 1
+        return f"{order_id} call {self.calls}"
+
+
+def wait_for(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return predicate()
+
+
+class TestToolCache:
+    """Test cases for TTLs, eviction, stale-while-revalidate and invalidation."""
+
+    def test_hit_within_ttl(self):
+        """The same call within its TTL is served from the cache."""
+        cache, backend = ToolCache({"order_status_lookup": 60}), Backend()
+        results = [cache.call("order_status_lookup", {"order_id": "ORD1"}, lambda: backend("ORD1")) for _ in range(3)]
+        assert results == ["ORD1 call 1"] * 3
+        assert cache.stats().hits == 2
+
+    def test_per_tool_ttl(self, monkeypatch):
+        """Results expire after their tool's TTL; tools without one are not cached."""
+        now = [1000.0]
+        monkeypatch.setattr(tool_cache.time, "monotonic", lambda: now[0])
+        cache, backend = ToolCache({"order_status_lookup": 30, "knowledge_base_query": 3600}), Backend()
+        cache.call("order_status_lookup", "ORD1", lambda: backend("ORD1"))
+        cache.call("knowledge_base_query", "returns", lambda: "30 days")
+        now[0] += 31
+        assert cache.call("order_status_lookup", "ORD1", lambda: backend("ORD1")) == "ORD1 call 2"
+        assert cache.call("knowledge_base_query", "returns", lambda: "changed") == "30 days"
+        cache.call("other_tool", "x", lambda: backend("x"))
+        assert cache.call("other_tool", "x", lambda: backend("x")) == "x call 4"
+
+    def test_lru_bound(self):
+        """Beyond max_entries the least recently used result is evicted."""
+        cache = ToolCache({"t": 60}, max_entries=2)
+        for key in ("a", "b"):
+            cache.call("t", key, lambda key=key: key)
+        cache.call("t", "a", lambda: "unused")
+        cache.call("t", "c", lambda: "c")
+        assert len(cache) == 2
+        assert cache.call("t", "b", lambda: "recomputed") == "recomputed"
+        assert cache.call("t", "c", lambda: "recomputed") == "c"
+
+    def test_errors_not_cached(self):
+        """A failing call is not cached."""
+        cache = ToolCache({"t": 60})
+
+        def fail():
+            raise RuntimeError("backend down")
+
+        with pytest.raises(RuntimeError):
+            cache.call("t", "a", fail)
+        assert cache.call("t", "a", lambda: "ok") == "ok"
+
+    def test_stale_while_revalidate(self, monkeypatch):
+        """An expired result is served once more while a background call refreshes it."""
+        now = [1000.0]
+        monkeypatch.setattr(tool_cache.time, "monotonic", lambda: now[0])
+        cache, backend = ToolCache({"t": 10}, stale_seconds=60), Backend()
+        cache.call("t", "ORD1", lambda: backend("ORD1"))
+        now[0] += 11
+        assert cache.call("t", "ORD1", lambda: backend("ORD1")) == "ORD1 call 1"
+        assert wait_for(lambda: cache.call("t", "ORD1", lambda: backend("ORD1")) == "ORD1 call 2")
+        assert cache.stats().refreshes == 1
+        cache.close()
+
+    def test_async_stale_while_revalidate(self, monkeypatch):
+        """acall refreshes a stale result in a task."""
+        now = [1000.0]
+        monkeypatch.setattr(tool_cache.time, "monotonic", lambda: now[0])
+        cache, backend = ToolCache({"t": 10}, stale_seconds=60), Backend()
+
+        async def compute():
+            return backend("ORD1")
+
+        async def run():
+            await cache.acall("t", "ORD1", compute)
+            now[0] += 11
+            stale = await cache.acall("t", "ORD1", compute)
+            await asyncio.sleep(0)
+            return stale, await cache.acall("t", "ORD1", compute)
+
+        assert asyncio.run(run()) == ("ORD1 call 1", "ORD1 call 2")
+
+    def test_invalidate(self):
+        """Results can be dropped per call, per tool or all at once."""
+        cache = ToolCache({"a": 60, "b": 60})
+        for tool, key in (("a", "1"), ("a", "2"), ("b", "1")):
+            cache.call(tool, key, lambda: "x")
+        assert cache.invalidate("a", "1") == 1
+        assert cache.invalidate("a") == 1
+        assert cache.invalidate() == 1
+        assert len(cache) == 0
+
+    def test_in_flight_call_not_cached_after_invalidate(self):
+        """A call that started before an invalidation does not repopulate the cache."""
+        cache = ToolCache({"t": 60})
+
+        def compute():
+            cache.invalidate("t")
+            return "old"
+
+        cache.call("t", "a", compute)
+        assert cache.call("t", "a", lambda: "new") == "new"
+
+    def test_catalog_reload_invalidates(self):
+        """Reloading the catalog drops cached product searches in every cache."""
+        cache = ToolCache()
+        cache.call("product_catalog_search", "sony", lambda: "$399.99")
+        cache.call("order_status_lookup", "ORD1", lambda: "shipped")
+        catalog.reload_catalog()
+        assert len(cache) == 1
+
+    def test_parse_ttls(self):
+        """TOOL_CACHE_TTLS pairs are parsed and malformed ones rejected."""
+        assert parse_ttls("order_status_lookup=5, knowledge_base_query=0") == {
+            "order_status_lookup": 5.0,
+            "knowledge_base_query": 0.0,
+        }
+        with pytest.raises(ValueError, match="name=seconds"):
+            parse_ttls("order_status_lookup")
+
+
+class TestAssistantToolCache:
+    """Test cases for the tool cache inside assistant turns."""
+
+    def test_repeated_lookup_hits_cache(self):
+        """The second turn asking for the same order does not call the backend."""
+        backend = Backend()
+        tool = StructuredTool.from_function(backend.__call__, name="order_status_lookup", description="Look up an order")
+        assistant = main.Assistant(
+            llm=FakeChatModel(), tools=[tool], router=Router(rules=[]), tool_cache=ToolCache(), tool_calling="native"
+        )
+        first = assistant.process("Where is my order ORD12345?")
+        second = asyncio.run(assistant.aprocess("Where is my order ORD12345?"))
+        assert first == second == "ORD12345 call 1"
+        assert backend.calls == 1
+
+    def test_disabled_by_default(self, monkeypatch):
+        """Without TOOL_CACHE the assistant has no tool cache."""
+        monkeypatch.delenv("TOOL_CACHE", raising=False)
+        assert main.Assistant(llm=object()).tool_cache is None
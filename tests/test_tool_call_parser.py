@@ -0,0 +1,81 @@
+"""Test cases for the incremental tool-call parser."""
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from customer_support_assistant import main
+from customer_support_assistant.router import Router
+from customer_support_assistant.tool_call_parser import ToolCallParser, parse_tool_calls
+
+CALLS = [{"name": "knowledge_base_query", "args": {"query": "a } tricky \" {string"}}]
+TOOL_CALL = json.dumps({"tool_calls": CALLS}, indent=2)
+
+
+class TestParseToolCalls:
+    """Test cases for parse_tool_calls on complete replies."""
+
+    @pytest.mark.parametrize("reply", [
+        TOOL_CALL,
+        "\n  " + TOOL_CALL,
+        "```json\n" + TOOL_CALL + "\n```",
+        "```\n" + TOOL_CALL + "\n```",
+        "Let me check.\n```json\n" + TOOL_CALL + "\n```",
+        TOOL_CALL + "\nTrailing text is ignored.",
+    ])
+    def test_tool_calls_are_found(self, reply):
+        """Raw, fenced and prefixed tool-call objects are recognized."""
+        assert parse_tool_calls(reply) == CALLS
+
+    @pytest.mark.parametrize("reply", [
+        "Our return policy is 30 days.",
+        "Use {curly} braces in prose freely.",
+        '{"answer": "not a tool call"}',
+        '{"tool_calls": "not a list"}',
+        "```python\nprint('hi')\n```",
+        '{"tool_calls": [',
+    ])
+    def test_answers_are_not_tool_calls(self, reply):
+        """Prose, other JSON and incomplete objects are answers."""
+        assert parse_tool_calls(reply) is None
+
+    def test_chunked_input_matches_whole(self):
+        """Feeding one character at a time gives the same result."""
+        reply = "Sure.\n```json\n" + TOOL_CALL + "\n```"
+        parser = ToolCallParser()
+        results = [parser.feed(char) for char in reply]
+        assert results[-1] == CALLS
+        # Recognized as soon as the closing brace arrives
+        assert results.index(CALLS) == reply.rindex("}")
+        assert parser.done
+
+
+class ChunkedLLM:
+    """LLM stub streaming a tool call, then prose, counting the chunks it sends."""
+
+    def __init__(self):
+        self.chunks_sent = 0
+        self.calls = 0
+
+    def stream(self, messages):
+        self.calls += 1
+        reply = TOOL_CALL + " and then a long ramble" * 20 if self.calls == 1 else "Done."
+        for i in range(0, len(reply), 8):
+            self.chunks_sent += 1
+            yield AIMessageChunk(content=reply[i:i + 8])
+
+
+class TestToolCallDispatch:
+    """Test cases for tool-call handling in the graph."""
+
+    def test_stream_stops_once_tool_calls_are_complete(self, monkeypatch):
+        """The rest of a streamed reply is not read once its tool calls are parsed."""
+        llm = ChunkedLLM()
+        monkeypatch.setattr(main, "assistant", main.Assistant(llm=llm, router=Router([])))
+        assert "".join(main.stream_user_input("Warranty?")) == "Done."
+        assert llm.chunks_sent == -(-len(TOOL_CALL) // 8) + 1
+
+    def test_tool_dispatch_does_not_parse_content(self):
+        """call_tool only uses the tool calls parsed when the LLM replied."""
+        state = {"agent_outcome": [AIMessage(content=TOOL_CALL)]}
+        assert main.Assistant().call_tool(state) == {"intermediate_steps": []}
@@ -0,0 +1,85 @@
+"""Test cases for dispatching the tool calls of one LLM turn."""
+import asyncio
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.tools import Tool
+
+from customer_support_assistant import main
+
+
+def slow_tool(name, delay, result):
+    """Build a tool that sleeps before answering."""
+
+    def run(query: str) -> str:
+        time.sleep(delay)
+        return f"{result}: {query}"
+
+    return Tool(name=name, func=run, description=name)
+
+
+def state_with_calls(*calls):
+    """Graph state whose last LLM message requests ``calls``."""
+    tool_calls = [{"name": name, "args": {"query": query}} for name, query in calls]
+    return {"agent_outcome": [AIMessage(content="", additional_kwargs={"tool_calls": tool_calls})]}
+
+
+class TestParallelToolCalls:
+    """Test cases for call_tool and acall_tool with several calls."""
+
+    def test_all_calls_run_in_order(self):
+        """Every requested tool runs and results keep the request order."""
+        state = state_with_calls(
+            ("knowledge_base_query", "warranty"),
+            ("product_catalog_search", "Sony WH-1000XM5"),
+        )
+        steps = main.Assistant().call_tool(state)["intermediate_steps"]
+        assert len(steps) == 2
+        assert "1-year" in steps[0].content
+        assert steps[1].content == "$399.99"
+
+    def test_sync_calls_overlap(self, monkeypatch):
+        """Sync tools run concurrently on the tool pool."""
+        assistant = main.Assistant(tools=[slow_tool("a", 0.3, "A"), slow_tool("b", 0.3, "B")])
+        start = time.perf_counter()
+        steps = assistant.call_tool(state_with_calls(("b", "1"), ("a", "2"), ("b", "3")))["intermediate_steps"]
+        assert time.perf_counter() - start < 0.8
+        assert [s.content for s in steps] == ["B: 1", "A: 2", "B: 3"]
+
+    def test_async_calls_overlap(self, monkeypatch):
+        """Async dispatch gathers the calls."""
+        assistant = main.Assistant(tools=[slow_tool("a", 0.3, "A"), slow_tool("b", 0.3, "B")])
+        start = time.perf_counter()
+        result = asyncio.run(assistant.acall_tool(state_with_calls(("a", "1"), ("b", "2"))))
+        assert time.perf_counter() - start < 0.55
+        assert [s.content for s in result["intermediate_steps"]] == ["A: 1", "B: 2"]
+
+    def test_timeouts_and_errors(self, monkeypatch):
+        """A slow or failing tool yields an error message, others still answer."""
+
+        def broken(query: str) -> str:
+            raise RuntimeError("backend down")
+
+        assistant = main.Assistant(tools=[
+            slow_tool("slow", 1.0, "late"),
+            slow_tool("fast", 0, "ok"),
+            Tool(name="broken", func=broken, description="broken"),
+        ])
+        monkeypatch.setattr(main, "TOOL_TIMEOUTS", {"slow": 0.1})
+        for result in (
+            assistant.call_tool(state_with_calls(("slow", "x"), ("fast", "y"), ("broken", "z"))),
+            asyncio.run(assistant.acall_tool(state_with_calls(("slow", "x"), ("fast", "y"), ("broken", "z")))),
+        ):
+            contents = [s.content for s in result["intermediate_steps"]]
+            assert contents[0] == "Error calling tool slow: timed out after 0.1 seconds"
+            assert contents[1] == "ok: y"
+            assert contents[2] == "Error calling tool broken: backend down"
+
+    def test_timeouts_run_from_submission(self, monkeypatch):
+        """Timed-out calls share the wait, so a turn waits for the longest timeout, not their sum."""
+        assistant = main.Assistant(tools=[slow_tool("slow", 1.0, "late")])
+        monkeypatch.setattr(main, "TOOL_TIMEOUTS", {"slow": 0.2})
+        start = time.perf_counter()
+        steps = assistant.call_tool(state_with_calls(("slow", "1"), ("slow", "2"), ("slow", "3")))["intermediate_steps"]
+        assert time.perf_counter() - start < 0.45
+        assert all("timed out" in s.content for s in steps)
@@ -0,0 +1,96 @@
+"""Test cases for exact and approximate vector search."""
+import numpy as np
+import pytest
+
+from customer_support_assistant.tools.vector_search import ExactIndex, IVFIndex, build_index, top_k
+from customer_support_assistant.tools.vector_store import HashingEmbedder, VectorStore
+
+
+def random_unit_vectors(n, dim=32, seed=0):
+    """Generate L2-normalized random vectors."""
+    vectors = np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class TestExactIndex:
+    """Test cases for brute-force search."""
+
+    def test_matches_argsort(self):
+        """Batched top-k equals a full sort of the scores."""
+        vectors = random_unit_vectors(500)
+        queries = random_unit_vectors(7, seed=1)
+        scores, ids = ExactIndex(vectors).search(queries, 5)
+        expected = np.argsort(-(queries @ vectors.T), axis=1)[:, :5]
+        assert np.array_equal(ids, expected)
+        assert np.all(np.diff(scores, axis=1) <= 0)
+
+    def test_single_query_and_small_index(self):
+        """A 1-D query works and k is clipped to the index size."""
+        vectors = random_unit_vectors(3)
+        scores, ids = ExactIndex(vectors).search(vectors[1], 10)
+        assert ids.shape == (1, 3)
+        assert ids[0, 0] == 1
+
+    def test_ties_broken_by_id(self):
+        """Equal scores come back in id order."""
+        scores, ids = top_k(np.array([[0.5, 0.9, 0.5, 0.5]]), 3)
+        assert ids.tolist() == [[1, 0, 2]]
+
+    def test_blocked_search(self, monkeypatch):
+        """Searching in blocks gives the same answer as one multiply."""
+        import customer_support_assistant.tools.vector_search as vector_search
+
+        vectors = random_unit_vectors(1000)
+        queries = random_unit_vectors(4, seed=2)
+        expected = ExactIndex(vectors).search(queries, 10)
+        monkeypatch.setattr(vector_search, "_BLOCK_ROWS", 64)
+        scores, ids = ExactIndex(vectors).search(queries, 10)
+        assert np.array_equal(ids, expected[1])
+        assert np.allclose(scores, expected[0])
+
+
+class TestIVFIndex:
+    """Test cases for approximate search."""
+
+    def test_probing_all_lists_is_exact(self):
+        """With every list probed IVF returns the exact neighbours."""
+        vectors = random_unit_vectors(2000)
+        queries = random_unit_vectors(10, seed=3)
+        index = IVFIndex(vectors, n_lists=16)
+        _, exact_ids = ExactIndex(vectors).search(queries, 10)
+        _, ivf_ids = index.search(queries, 10, n_probe=16)
+        assert np.array_equal(np.sort(ivf_ids, axis=1), np.sort(exact_ids, axis=1))
+
+    def test_recall_improves_with_probes(self):
+        """More probes never lower recall."""
+        vectors = random_unit_vectors(3000)
+        queries = vectors[:50] + 0.05 * random_unit_vectors(50, seed=4)
+        _, exact_ids = ExactIndex(vectors).search(queries, 10)
+        index = IVFIndex(vectors, n_lists=32)
+        recalls = []
+        for n_probe in (1, 4, 32):
+            _, ids = index.search(queries, 10, n_probe=n_probe)
+            recalls.append(np.mean([len(set(a) & set(b)) / 10 for a, b in zip(ids, exact_ids)]))
+        assert recalls == sorted(recalls)
+        assert recalls[-1] == 1.0
+        assert recalls[0] > 0.2
+
+    def test_build_index_modes(self):
+        """The factory builds both modes and rejects unknown ones."""
+        vectors = random_unit_vectors(10)
+        assert isinstance(build_index(vectors), ExactIndex)
+        assert isinstance(build_index(vectors, "ivf", n_lists=2), IVFIndex)
+        with pytest.raises(ValueError):
+            build_index(vectors, "hnsw")
+
+
+class TestVectorStoreSearchModes:
+    """VectorStore answers the same way in exact and IVF modes."""
+
+    def test_ivf_store(self, mock_knowledge_base):
+        """A fully probed IVF store agrees with the exact store."""
+        exact = VectorStore(HashingEmbedder(dim=128))
+        ivf = VectorStore(HashingEmbedder(dim=128), search_mode="ivf", n_lists=2, n_probe=2)
+        for store in (exact, ivf):
+            store.sync(mock_knowledge_base)
+        assert ivf.query_batch(["warranty", "return"], k=1) == exact.query_batch(["warranty", "return"], k=1)
@@ -0,0 +1,179 @@
+"""Test cases for the knowledge base vector store."""
+import numpy as np
+import pytest
+
+from customer_support_assistant.tools import knowledge_base
+from customer_support_assistant.tools.vector_store import (
+    HashingEmbedder,
+    VectorStore,
+    chunk_text,
+)
+
+
+class CountingEmbedder(HashingEmbedder):
+    """Hashing embedder that records how many texts it embedded."""
+
+    def __init__(self):
+        super().__init__(dim=256)
+        self.calls = 0
+
+    def embed(self, texts):
+        self.calls += len(texts)
+        return super().embed(texts)
+
+
+@pytest.fixture
+def policy_dir(tmp_path, mock_knowledge_base):
+    """Write one policy document per knowledge base entry."""
+    for name, text in mock_knowledge_base.items():
+        (tmp_path / f"{name}.md").write_text(text)
+    (tmp_path / "shipping.txt").write_text("Free standard shipping on orders over $50")
+    return tmp_path
+
+
+class TestHashingEmbedder:
+    """Test cases for the deterministic embedder."""
+
+    def test_deterministic_and_normalized(self):
+        """Same text, same unit vector."""
+        embedder = HashingEmbedder(dim=128)
+        vectors = embedder.embed(["return policy", "return policy", ""])
+        assert vectors.dtype == np.float32
+        assert np.array_equal(vectors[0], vectors[1])
+        assert np.isclose(np.linalg.norm(vectors[0]), 1.0)
+        assert not vectors[2].any()
+
+
+class TestChunking:
+    """Test cases for document chunking."""
+
+    def test_small_document_is_one_chunk(self):
+        """Short documents stay whole."""
+        assert chunk_text("Para one.\n\nPara two.") == ["Para one.\n\nPara two."]
+
+    def test_long_document_is_split(self):
+        """Chunks never exceed the limit."""
+        text = "\n\n".join(f"Paragraph {i} " + "x" * 40 for i in range(20))
+        chunks = chunk_text(text, max_chars=120)
+        assert len(chunks) > 1
+        assert all(len(c) <= 120 for c in chunks)
+        assert "".join(chunks).replace("\n", "") == text.replace("\n", "")
+
+
+class TestVectorStore:
+    """Test cases for ingestion, retrieval and persistence."""
+
+    def test_query_ranks_relevant_passage_first(self, policy_dir):
+        """The best matching document is returned first."""
+        store = VectorStore(HashingEmbedder(dim=256))
+        store.ingest_directory(policy_dir)
+        results = store.query("what is the warranty?", k=2)
+        assert len(results) == 2
+        assert results[0].doc_id == "warranty.md"
+        assert results[0].score >= results[1].score
+        assert store.query("shipping over $50", k=1)[0].doc_id == "shipping.txt"
+
+    def test_incremental_ingestion(self, policy_dir):
+        """Only new or changed content is embedded again."""
+        embedder = CountingEmbedder()
+        store = VectorStore(embedder)
+        stats = store.ingest_directory(policy_dir)
+        assert (stats.added, stats.embedded_chunks) == (3, 3)
+
+        stats = store.ingest_directory(policy_dir)
+        assert (stats.unchanged, stats.embedded_chunks) == (3, 0)
+
+        (policy_dir / "warranty.md").write_text("2-year standard warranty")
+        (policy_dir / "shipping.txt").unlink()
+        (policy_dir / "copy.md").write_text("30-day return period")
+        stats = store.ingest_directory(policy_dir)
+        assert (stats.added, stats.updated, stats.removed, stats.unchanged) == (1, 1, 1, 1)
+        # The copied document reuses the existing return policy embedding
+        assert stats.embedded_chunks == 1
+        assert embedder.calls == 4
+        assert set(store.documents) == {"return_policy.md", "warranty.md", "copy.md"}
+        assert "2-year" in store.query("warranty", k=1)[0].text
+
+    def test_save_and_load(self, policy_dir, tmp_path):
+        """A persisted index is reloaded without re-embedding."""
+        store = VectorStore(HashingEmbedder(dim=256))
+        store.ingest_directory(policy_dir)
+        store.save(tmp_path / "index")
+
+        embedder = CountingEmbedder()
+        loaded = VectorStore.load(tmp_path / "index", embedder)
+        assert loaded.documents == store.documents
+        assert loaded.ingest_directory(policy_dir).embedded_chunks == 0
+        assert loaded.query("warranty", k=1) == store.query("warranty", k=1)
+
+    def test_load_with_other_embedder_starts_empty(self, policy_dir, tmp_path):
+        """Embeddings from a different embedder are not mixed in."""
+        store = VectorStore(HashingEmbedder(dim=256))
+        store.ingest_directory(policy_dir)
+        store.save(tmp_path / "index")
+        assert len(VectorStore.load(tmp_path / "index", HashingEmbedder(dim=64))) == 0
+
+    def test_load_without_saved_index_starts_empty(self, policy_dir, tmp_path):
+        """An empty or partially written index directory is rebuilt instead of failing."""
+        (tmp_path / "index").mkdir()
+        store = VectorStore.load(tmp_path / "index", HashingEmbedder(dim=256))
+        assert len(store) == 0
+        store.ingest_directory(policy_dir)
+        assert store.query("warranty", k=1)[0].doc_id == "warranty.md"
+
+    def test_knowledge_base_with_empty_index_dir(self, monkeypatch, policy_dir, tmp_path):
+        """KNOWLEDGE_BASE_INDEX pointing at an empty directory is filled on first use."""
+        monkeypatch.setenv("KNOWLEDGE_BASE_DIR", str(policy_dir))
+        monkeypatch.setenv("KNOWLEDGE_BASE_INDEX", str(tmp_path / "index"))
+        (tmp_path / "index").mkdir()
+        knowledge_base.reload_knowledge_base()
+        try:
+            assert "1-year" in knowledge_base.knowledge_base_query("warranty")
+            assert (tmp_path / "index" / "chunks.json").exists()
+        finally:
+            knowledge_base.reload_knowledge_base()
+
+    def test_empty_store(self):
+        """Querying an empty store returns nothing."""
+        assert VectorStore().query("anything") == []
+
+
+class TestKnowledgeBaseQuery:
+    """Test cases for the knowledge base tool over the bundled policy documents."""
+
+    @pytest.fixture(autouse=True)
+    def bundled_policies(self, monkeypatch):
+        for name in ("KNOWLEDGE_BASE_DIR", "KNOWLEDGE_BASE_INDEX", "KNOWLEDGE_BASE_RETRIEVAL", "KNOWLEDGE_BASE_TOP_K"):
+            monkeypatch.delenv(name, raising=False)
+        knowledge_base.reload_knowledge_base()
+        yield
+        knowledge_base.reload_knowledge_base()
+
+    @pytest.mark.parametrize(
+        "query, heading",
+        [
+            ("return", "Return Policy"),
+            ("warranty", "Warranty Policy"),
+            ("guarantee", "Warranty Policy"),
+            ("guaranty", "Warranty Policy"),
+            ("shipping", "Shipping Information"),
+            ("delivery", "Shipping Information"),
+            ("How long does delivery take?", "Shipping Information"),
+            ("payment", "Payment Information"),
+            ("price", "Payment Information"),
+            ("pricing", "Payment Information"),
+        ],
+    )
+    def test_keywords_of_the_original_lookup(self, query, heading):
+        """Every keyword the original lookup answered still finds its policy."""
+        assert knowledge_base.knowledge_base_query(query).startswith(heading)
+
+    def test_unrelated_question(self):
+        """A question no policy covers gets the fallback answer."""
+        assert knowledge_base.knowledge_base_query("weather forecast") == knowledge_base.NO_ANSWER
+
+    def test_expand_query(self):
+        """Synonyms add their policy term once; queries without synonyms are unchanged."""
+        assert knowledge_base.expand_query("Delivery and pricing?") == "Delivery and pricing? shipping payment"
+        assert knowledge_base.expand_query("price of shipping") == "price of shipping payment"
+        assert knowledge_base.expand_query("warranty") == "warranty"